@@ -0,0 +1,36 @@
+"""add background_summary to personas
+
+Revision ID: 20261018_bg_summary
+Revises: 20251113_llm_prefs
+Create Date: 2026-10-18 10:00:00.000000
+
+Adds personas.background_summary (TEXT, nullable):
+- Krótkie ekstraktywne streszczenie background_story liczone przy zapisie persony
+- Używane w promptach focus groups i ankiet zamiast pełnej historii (token budget)
+- NULL dla istniejących person = fallback do background_story przyciętej do budżetu
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '20261018_bg_summary'
+down_revision: Union[str, Sequence[str], None] = '20251113_llm_prefs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - add personas.background_summary."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    persona_columns = [col['name'] for col in inspector.get_columns('personas')]
+
+    if 'background_summary' not in persona_columns:
+        op.add_column('personas', sa.Column('background_summary', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema - remove personas.background_summary."""
+    op.drop_column('personas', 'background_summary')
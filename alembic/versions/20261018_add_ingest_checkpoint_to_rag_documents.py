@@ -0,0 +1,44 @@
+"""add ingest checkpoint to rag_documents
+
+Revision ID: 20261018_rag_ingest_ckpt
+Revises: 20261018_bg_summary
+Create Date: 2026-10-18 14:00:00.000000
+
+Adds rag_documents.ingest_stage (VARCHAR(50), nullable) and
+rag_documents.ingest_checkpoint (JSONB, nullable):
+- Etapowy ingest zapisuje postęp per chunk (graph / vector)
+- Ponowne przetwarzanie dokumentu wznawia pracę od ostatniego zapisanego chunku
+- NULL dla istniejących dokumentów = brak checkpointu (pełny ingest przy retry)
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '20261018_rag_ingest_ckpt'
+down_revision: Union[str, Sequence[str], None] = '20261018_bg_summary'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - add rag_documents ingest checkpoint columns."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    document_columns = [col['name'] for col in inspector.get_columns('rag_documents')]
+
+    if 'ingest_stage' not in document_columns:
+        op.add_column('rag_documents', sa.Column('ingest_stage', sa.String(length=50), nullable=True))
+    if 'ingest_checkpoint' not in document_columns:
+        op.add_column(
+            'rag_documents',
+            sa.Column('ingest_checkpoint', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema - remove rag_documents ingest checkpoint columns."""
+    op.drop_column('rag_documents', 'ingest_checkpoint')
+    op.drop_column('rag_documents', 'ingest_stage')
@@ -1,17 +1,17 @@
 """
-API endpoints dla eksportu raportów do PDF i DOCX.
+API endpoints dla eksportu raportów do PDF i DOCX oraz bulk eksportu/importu person.
 """
 import logging
 from typing import Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, get_project_for_user
 from app.db.session import get_db
 from app.models.user import User
 from app.models.persona import Persona
@@ -19,6 +19,13 @@ from app.models.focus_group import FocusGroup
 from app.models.survey import Survey
 from app.models.project import Project
 from app.services.export import PDFGenerator, DOCXGenerator
+from app.services.export.persona_bulk import (
+    MEDIA_TYPES,
+    PYARROW_AVAILABLE,
+    import_project_personas,
+    stream_project_personas,
+)
+from app.services.dashboard.cache_invalidation import invalidate_project_cache
 
 router = APIRouter(prefix="/export", tags=["export"])
 logger = logging.getLogger(__name__)
@@ -562,3 +569,71 @@ async def export_project_docx(
         media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
+
+
+@router.get("/projects/{project_id}/personas")
+async def export_project_personas(
+    project_id: UUID,
+    format: Literal["parquet", "arrow", "csv"] = Query("parquet", description="Format pliku"),
+    include_inactive: bool = Query(False, description="Czy dołączyć zarchiwizowane persony"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Strumieniowy eksport wszystkich person projektu (Parquet / Arrow IPC / CSV).
+
+    Wiersze czytane są server-side cursorem i kodowane partiami, więc pamięć
+    serwera nie rośnie z liczbą person.
+
+    Returns:
+        StreamingResponse: Plik z populacją person
+    """
+    await get_project_for_user(project_id, current_user, db)
+
+    if format in {"parquet", "arrow"} and not PYARROW_AVAILABLE:
+        raise HTTPException(status_code=400, detail=f"Format '{format}' wymaga pakietu pyarrow")
+
+    extension = {"parquet": "parquet", "arrow": "arrows", "csv": "csv"}[format]
+    filename = f"personas_{project_id}.{extension}"
+    return StreamingResponse(
+        stream_project_personas(project_id, format, include_inactive=include_inactive),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@router.post("/projects/{project_id}/personas/import")
+async def import_project_personas_endpoint(
+    project_id: UUID,
+    file: UploadFile = File(...),
+    format: Literal["parquet", "arrow", "csv"] = Query("parquet", description="Format pliku"),
+    preserve_ids: bool = Query(False, description="Zachowaj UUID person z pliku"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Import populacji person z pliku eksportu (COPY zamiast INSERT per wiersz).
+
+    Returns:
+        Dict z liczbą zaimportowanych i odrzuconych wierszy
+    """
+    await get_project_for_user(project_id, current_user, db)
+
+    try:
+        result = await import_project_personas(
+            db,
+            project_id,
+            file.file,
+            format,
+            preserve_ids=preserve_ids,
+        )
+    except ValueError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Błąd importu person do projektu {project_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Błąd importu person: {str(e)}")
+
+    await invalidate_project_cache(current_user.id, project_id)
+    return {"project_id": str(project_id), **result}
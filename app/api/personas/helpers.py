@@ -10,6 +10,8 @@ from typing import Any
 
 from app.schemas.persona import GraphInsightResponse
 from app.services.personas import PersonaGeneratorLangChain
+from app.services.shared.llm_batch import build_batch_chat_model
+from config import models
 
 
 logger = logging.getLogger(__name__)
@@ -77,6 +79,14 @@ def _get_persona_generator() -> PreferredPersonaGenerator:
     return PreferredPersonaGenerator()
 
 
+def _get_batch_persona_generator(job_name: str) -> PreferredPersonaGenerator:
+    """Generator dla jednego zadania w trybie batch (własny BatchChatModel, bez cache instancji)."""
+    logger.info("Initializing batch persona generator", extra={"job_name": job_name})
+    return PreferredPersonaGenerator(
+        llm=build_batch_chat_model(models.get("personas", "generation").params, job_name=job_name)
+    )
+
+
 def _calculate_concurrency_limit(num_personas: int, adversarial_mode: bool) -> int:
     base_limit = max(3, min(12, (num_personas // 3) + 3))
     if adversarial_mode:
@@ -10,7 +10,6 @@ To jest największy moduł (~760 linii) odpowiedzialny za:
 """
 
 import asyncio
-import json
 import logging
 import random
 from typing import Any
@@ -22,6 +21,8 @@ from app.services.personas import PersonaOrchestrationService
 from app.services.personas import PersonaValidator
 from app.services.personas.generation import DemographicDistribution, SegmentConstructor
 from app.services.personas.validation import DemographicsFormatter, DistributionBuilder
+from app.services.shared.llm_batch import use_batch_mode
+from app.services.shared.token_budget import summarize_background
 from config import demographics, features
 
 # Import shared utilities
@@ -35,7 +36,7 @@ from .shared import (
 )
 
 # Import generator helper z helpers.py
-from .helpers import _get_persona_generator, _calculate_concurrency_limit
+from .helpers import _get_batch_persona_generator, _get_persona_generator, _calculate_concurrency_limit
 
 
 logger = logging.getLogger(__name__)
@@ -75,8 +76,13 @@ async def _generate_personas_task(
     try:
         # Utwórz własną sesję DB (niezależną od HTTP requesta)
         async with AsyncSessionLocal() as db:
-            # Generator trzymamy w cache, żeby uniknąć kosztownej inicjalizacji przy każdym zadaniu
-            generator = _get_persona_generator()
+            # Duże zadania: tryb offline (batch) - koszt i quota zamiast latencji
+            batch_mode = use_batch_mode(num_personas, features.llm_batch.persona_min_count)
+            if batch_mode:
+                generator = _get_batch_persona_generator(f"personas-{project_id}")
+            else:
+                # Generator trzymamy w cache, żeby uniknąć kosztownej inicjalizacji przy każdym zadaniu
+                generator = _get_persona_generator()
             generator_name = getattr(generator, "__class__", type(generator)).__name__
             logger.info("Using %s persona generator", generator_name, extra={"project_id": str(project_id)})
 
@@ -326,6 +332,9 @@ async def _generate_personas_task(
             # Kontrolowana współbieżność pozwala przyspieszyć generowanie bez przeciążania modelu
             logger.info(f"Generating demographic and psychological profiles for {num_personas} personas")
             concurrency_limit = _calculate_concurrency_limit(num_personas, adversarial_mode)
+            if batch_mode:
+                # Wszystkie requesty muszą trafić do tego samego pliku zadania batch
+                concurrency_limit = min(num_personas, features.llm_batch.max_requests_per_job)
             semaphore = asyncio.Semaphore(concurrency_limit)
             demographic_profiles = [generator.sample_demographic_profile(distribution)[0] for _ in range(num_personas)]
             psychological_profiles = [{**generator.sample_big_five_traits(), **generator.sample_cultural_dimensions()} for _ in range(num_personas)]
@@ -449,36 +458,9 @@ async def _generate_personas_task(
 
                     prompt, personality_json = result
 
-                    # Odporne parsowanie JSON-a z mechanizmem awaryjnym
-                    personality: dict[str, Any] = {}
-                    try:
-                        if isinstance(personality_json, str):
-                            cleaned = personality_json.strip()
-                            if cleaned.startswith("```json"):
-                                cleaned = cleaned[7:]
-                            if cleaned.startswith("```"):
-                                cleaned = cleaned[3:]
-                            if cleaned.endswith("```"):
-                                cleaned = cleaned[:-3]
-                            cleaned = cleaned.strip()
-                            personality = json.loads(cleaned)
-                        elif isinstance(personality_json, dict):
-                            personality = personality_json
-                        else:
-                            logger.warning(
-                                f"Unexpected personality_json type: {type(personality_json)}",
-                                extra={"project_id": str(project_id), "index": idx}
-                            )
-                    except (json.JSONDecodeError, TypeError) as e:
-                        logger.error(
-                            f"Failed to parse personality JSON for persona {idx}: {str(e)[:200]}",
-                            extra={
-                                "project_id": str(project_id),
-                                "index": idx,
-                                "raw_json": str(personality_json)[:500],
-                            }
-                        )
-                        personality = {}
+                    # Generator zwraca zwalidowany dict (structured output + repair call);
+                    # poniższe fallbacki to tylko siatka bezpieczeństwa gdy naprawa się nie uda
+                    personality: dict[str, Any] = personality_json if isinstance(personality_json, dict) else {}
 
                     demographic = demographic_profiles[idx]
                     psychological = psychological_profiles[idx]
@@ -654,6 +636,7 @@ async def _generate_personas_task(
                         "income_bracket": income_value,
                         "occupation": occupation,
                         "background_story": background_story,
+                        "background_summary": summarize_background(background_story),
                         "values": values,
                         "interests": interests,
                         "personality_prompt": prompt,
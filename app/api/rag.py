@@ -3,6 +3,7 @@
 import logging
 import shutil
 import uuid
+from functools import partial
 from pathlib import Path
 
 from fastapi import (
@@ -21,20 +22,26 @@ from slowapi.util import get_remote_address
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies import get_current_user, get_db
+from app.core.scheduler import schedule_rag_cache_warming
 from config import app as app_config
+from config import rag as rag_config
 from app.db.session import AsyncSessionLocal
 from app.models.rag_document import RAGDocument
 from app.models.user import User
 from app.schemas.rag import (
     GraphRAGQuestionRequest,
     GraphRAGQuestionResponse,
+    RAGCacheWarmingReport,
     RAGCitation,
     RAGDocumentResponse,
     RAGQueryRequest,
     RAGQueryResponse,
 )
 from app.services.rag import RAGDocumentService, GraphRAGService
+from app.services.rag.clients import vector_search_with_score
+from app.services.rag.documents import IngestCheckpoint
 from app.services.shared import get_polish_society_rag
+from app.tasks.rag_cache_warming import get_warming_report
 
 router = APIRouter(prefix="/rag", tags=["RAG Knowledge Base"])
 logger = logging.getLogger(__name__)
@@ -65,14 +72,47 @@ def get_graph_rag_service() -> GraphRAGService:
     return _graph_rag_service
 
 
+async def _load_ingest_checkpoint(doc_id: uuid.UUID) -> IngestCheckpoint:
+    """Wczytuje checkpoint poprzedniej próby ingestu (pusty dla nowego dokumentu)."""
+
+    async with AsyncSessionLocal() as db:
+        doc = await db.get(RAGDocument, doc_id)
+        return IngestCheckpoint.from_dict(
+            doc.ingest_checkpoint if doc else None,
+            chunk_size=rag_config.chunking.chunk_size,
+            chunk_overlap=rag_config.chunking.chunk_overlap,
+        )
+
+
+async def _save_ingest_checkpoint(doc_id: uuid.UUID, checkpoint: IngestCheckpoint) -> None:
+    """Zapisuje postęp ingestu w rag_documents (osobna, krótka sesja)."""
+
+    async with AsyncSessionLocal() as db:
+        doc = await db.get(RAGDocument, doc_id)
+        if doc:
+            doc.ingest_stage = checkpoint.stage
+            doc.ingest_checkpoint = checkpoint.to_dict()
+            await db.commit()
+
+
 async def _process_document_background(doc_id: uuid.UUID, file_path: str, metadata: dict) -> None:
-    """Przetwarza dokument w tle i aktualizuje status w bazie danych."""
+    """Przetwarza dokument w tle i aktualizuje status w bazie danych.
+
+    Jeśli dokument ma zapisany checkpoint (poprzednia próba przerwana lub nieudana),
+    ingest wznawiany jest od ostatniego zapisanego chunku.
+    """
 
     async with AsyncSessionLocal() as db:
         try:
+            checkpoint = await _load_ingest_checkpoint(doc_id)
             logger.info("Rozpoczynam przetwarzanie dokumentu %s w tle", doc_id)
             service = get_rag_document_service()
-            result = await service.ingest_document(file_path, metadata)
+            result = await service.ingest_document(
+                file_path,
+                metadata,
+                checkpoint=checkpoint,
+                save_checkpoint=partial(_save_ingest_checkpoint, doc_id),
+            )
 
             doc = await db.get(RAGDocument, doc_id)
             if doc:
@@ -86,6 +126,10 @@ async def _process_document_background(doc_id: uuid.UUID, file_path: str, metada
                     result["status"],
                     result.get("num_chunks"),
                 )
+
+            # Nowa wersja indeksu unieważniła konteksty demograficzne - rozgrzej je w tle
+            if result["status"] in ("ready", "partial"):
+                schedule_rag_cache_warming("ingest")
         except Exception as exc:  # pragma: no cover - logujemy awarię background taska
             logger.error("Błąd podczas przetwarzania dokumentu %s: %s", doc_id, exc, exc_info=True)
             try:
@@ -181,6 +225,54 @@ async def upload_document(
     return document
 
 
+@router.post(
+    "/documents/{doc_id}/retry",
+    response_model=RAGDocumentResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+@limiter.limit("20/hour")  # Security: ponowny ingest jest równie kosztowny jak upload
+async def retry_document(
+    request: Request,  # Required by slowapi limiter
+    doc_id: uuid.UUID,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Ponawia nieudany lub częściowy ingest dokumentu - wznowienie od zapisanego checkpointu.
+
+    Dla statusu ``partial`` ponawiana jest tylko ekstrakcja grafu chunków z ``graph_failed``
+    (chunki są już w indeksie wektorowym).
+    """
+
+    document = await db.get(RAGDocument, doc_id)
+    if not document or not document.is_active:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Document {doc_id} not found")
+    if document.status not in ("failed", "partial"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Tylko nieudany lub częściowy ingest można ponowić (status: {document.status}).",
+        )
+
+    document.status = "processing"
+    document.error_message = None
+    await db.commit()
+    await db.refresh(document)
+
+    background_tasks.add_task(
+        _process_document_background,
+        document.id,
+        document.file_path,
+        {"doc_id": str(document.id), "title": document.title, "country": document.country},
+    )
+    logger.info(
+        "Użytkownik %s ponowił ingest dokumentu %s od etapu %s",
+        current_user.id,
+        doc_id,
+        document.ingest_stage,
+    )
+    return document
+
+
 @router.get("/documents", response_model=list[RAGDocumentResponse])
 async def list_documents(
     current_user: User = Depends(get_current_user),
@@ -209,7 +301,7 @@ async def query_rag(
         )
 
     try:
-        results = await rag.vector_store.asimilarity_search_with_score(request.query, k=request.top_k)
+        results = await vector_search_with_score(rag.vector_store, request.query, k=request.top_k)
         context_chunks: list[str] = []
         citations: list[RAGCitation] = []
         for doc, score in results:
@@ -250,6 +342,21 @@ async def query_graph_rag(
         raise HTTPException(status_code=500, detail="Nie udało się uzyskać odpowiedzi Graph RAG.")
 
 
+@router.get("/cache/warming", response_model=RAGCacheWarmingReport)
+async def get_cache_warming_report(
+    current_user: User = Depends(get_current_user),
+):
+    """Zwraca raport ostatniego rozgrzewania cache kontekstów demograficznych."""
+
+    report = await get_warming_report()
+    if report is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Rozgrzewanie cache RAG nie zostało jeszcze uruchomione.",
+        )
+    return report
+
+
 @router.delete("/documents/{doc_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_document(
     doc_id: uuid.UUID,
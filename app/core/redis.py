@@ -10,6 +10,9 @@ Optimizations for Upstash Redis (TLS, connection pooling, retry logic):
 - Retry logic z exponential backoff dla transient failures
 - Socket keepalive dla long-lived connections
 - Graceful degradation - cache failures don't crash aplikacji
+
+Synchroniczny klient (``redis_eval_sync``) istnieje tylko dla ścieżek
+wywoływanych w wątkach bez event loopa (np. sync ``invoke`` modeli LLM).
 """
 
 from __future__ import annotations
@@ -17,10 +20,13 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import threading
 import time
+import uuid
 from typing import TypeVar, Callable
 from collections.abc import Awaitable
 
+from redis import ConnectionPool as SyncConnectionPool, Redis as SyncRedis
 from redis.asyncio import Redis, ConnectionPool
 from redis.exceptions import ConnectionError, TimeoutError, RedisError
 
@@ -32,10 +38,16 @@ T = TypeVar('T')
 logger = logging.getLogger(__name__)
 
 _redis_pool: ConnectionPool | None = None
+_redis_binary_pool: ConnectionPool | None = None
+_redis_sync_pool: SyncConnectionPool | None = None
+_redis_sync_pool_lock = threading.Lock()
 _last_health_check: float = 0
 
 
-def _create_connection_pool() -> ConnectionPool:
+def _create_connection_pool(
+    decode_responses: bool = True,
+    pool_class: type[ConnectionPool] | type[SyncConnectionPool] = ConnectionPool,
+) -> ConnectionPool | SyncConnectionPool:
     """
     Tworzy ConnectionPool z SSL/TLS support i Upstash-optimized settings.
 
@@ -46,6 +58,10 @@ def _create_connection_pool() -> ConnectionPool:
     - retry_on_timeout=True - automatyczny retry przy timeout
     - health_check_interval=30s - ping Redis co 30s (Upstash idle timeout ~60s)
 
+    Args:
+        decode_responses: False dla puli binarnej (wektory, skompresowane payloady)
+        pool_class: ``SyncConnectionPool`` dla synchronicznego klienta
+
     Returns:
         ConnectionPool: Configured connection pool dla Redis
     """
@@ -57,10 +73,12 @@ def _create_connection_pool() -> ConnectionPool:
     logger.info(
         f"Creating Redis ConnectionPool: SSL={is_ssl}, "
         f"max_connections={app.redis.max_connections}, "
-        f"socket_keepalive={app.redis.socket_keepalive}"
+        f"socket_keepalive={app.redis.socket_keepalive}, "
+        f"decode_responses={decode_responses}, "
+        f"sync={pool_class is SyncConnectionPool}"
     )
 
-    pool = ConnectionPool.from_url(
+    pool = pool_class.from_url(
         app.redis.url,
         # Connection pool settings
         max_connections=app.redis.max_connections,
@@ -74,7 +92,7 @@ def _create_connection_pool() -> ConnectionPool:
         health_check_interval=app.redis.health_check_interval,
         # Encoding
         encoding="utf-8",
-        decode_responses=True,
+        decode_responses=decode_responses,
         # SSL/TLS (automatycznie z rediss://)
         # ConnectionPool.from_url() automatycznie wykrywa rediss:// i dodaje ssl=True
     )
@@ -119,6 +137,44 @@ async def get_redis_client() -> Redis:
     return client
 
 
+def get_redis_sync_client() -> SyncRedis:
+    """
+    Zwraca synchroniczny Redis client (osobny connection pool, thread-safe).
+
+    Dla kodu działającego w wątkach roboczych, który nie może czekać na async
+    klienta (jego pula jest związana z event loopem aplikacji).
+
+    Returns:
+        SyncRedis: Synchroniczny Redis client
+    """
+    global _redis_sync_pool
+
+    if _redis_sync_pool is None:
+        with _redis_sync_pool_lock:
+            if _redis_sync_pool is None:
+                _redis_sync_pool = _create_connection_pool(pool_class=SyncConnectionPool)
+    return SyncRedis(connection_pool=_redis_sync_pool)
+
+
+async def get_redis_binary_client() -> Redis:
+    """
+    Zwraca Redis client operujący na surowych bajtach (bez dekodowania UTF-8).
+
+    Osobna pula z tymi samymi ustawieniami co :func:`get_redis_client` -
+    dla wartości binarnych (np. packed float32 embeddingi), których nie da się
+    przechować w puli z ``decode_responses=True``.
+
+    Returns:
+        Redis: Async Redis client z binarnym connection pool
+    """
+    global _redis_binary_pool
+
+    if _redis_binary_pool is None:
+        _redis_binary_pool = _create_connection_pool(decode_responses=False)
+
+    return Redis(connection_pool=_redis_binary_pool)
+
+
 async def _retry_with_backoff(
     operation: Callable[..., Awaitable[T]],
     *args,
@@ -370,3 +426,225 @@ async def redis_delete_pattern(pattern: str) -> int:
         # Unexpected error - log z backtrace
         logger.error(f"Unexpected error in redis_delete_pattern for pattern '{pattern}': {exc}", exc_info=exc)
         return 0
+
+
+async def redis_incr(key: str, ttl_seconds: int | None = None) -> int | None:
+    """Atomically increment an integer counter in Redis.
+
+    Używane do wersjonowania kluczy cache (zamiast DELETE bumpujemy wersję,
+    stare wpisy wygasają same przez TTL).
+
+    Args:
+        key: Redis key licznika
+        ttl_seconds: Optional TTL odświeżany przy każdym increment
+
+    Returns:
+        Nowa wartość licznika lub None przy failure
+    """
+    try:
+        client = await get_redis_client()
+
+        value = await _retry_with_backoff(
+            client.incr,
+            key,
+            max_retries=app.redis.max_retries,
+            backoff=app.redis.retry_backoff,
+        )
+        if ttl_seconds is not None:
+            await client.expire(key, ttl_seconds)
+
+        return int(value)
+
+    except (ConnectionError, TimeoutError, RedisError) as exc:
+        logger.warning(f"Redis INCR failed for key '{key}': {exc}")
+        return None
+
+    except Exception as exc:
+        logger.error(f"Unexpected error in redis_incr for key '{key}': {exc}", exc_info=exc)
+        return None
+
+
+# Compare-and-delete: zwalniamy lock tylko jeśli nadal należy do nas
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+async def redis_acquire_lock(key: str, ttl_seconds: int) -> str | None:
+    """Try to acquire a short-lived distributed lock (SET NX EX).
+
+    Lock jest tylko optymalizacją (np. single-flight dla drogich przeliczeń),
+    więc przy niedostępnym Redis działamy fail-open: zwracamy token tak jakby
+    lock został przyznany - każda instancja policzy wtedy wynik samodzielnie.
+
+    Args:
+        key: Redis key locka
+        ttl_seconds: Czas życia locka (zabezpieczenie przed martwym holderem)
+
+    Returns:
+        Token właściciela jeśli lock przyznany, None jeśli trzyma go ktoś inny
+    """
+    token = uuid.uuid4().hex
+    try:
+        client = await get_redis_client()
+        acquired = await client.set(key, token, nx=True, ex=ttl_seconds)
+        return token if acquired else None
+
+    except (ConnectionError, TimeoutError, RedisError) as exc:
+        logger.warning(f"Redis lock acquire failed for key '{key}' (fail-open): {exc}")
+        return token
+
+    except Exception as exc:
+        logger.error(f"Unexpected error in redis_acquire_lock for key '{key}': {exc}", exc_info=exc)
+        return token
+
+
+async def redis_release_lock(key: str, token: str) -> bool:
+    """Release a lock acquired with :func:`redis_acquire_lock`.
+
+    Args:
+        key: Redis key locka
+        token: Token zwrócony przez redis_acquire_lock
+
+    Returns:
+        True jeśli lock został zwolniony przez nas, False w przeciwnym razie
+    """
+    try:
+        client = await get_redis_client()
+        released = await client.eval(_RELEASE_LOCK_SCRIPT, 1, key, token)
+        return bool(released)
+
+    except (ConnectionError, TimeoutError, RedisError) as exc:
+        logger.warning(f"Redis lock release failed for key '{key}': {exc}")
+        return False
+
+    except Exception as exc:
+        logger.error(f"Unexpected error in redis_release_lock for key '{key}': {exc}", exc_info=exc)
+        return False
+
+
+async def redis_lock_held(key: str) -> bool | None:
+    """Check whether a lock acquired with :func:`redis_acquire_lock` still exists.
+
+    Args:
+        key: Redis key locka
+
+    Returns:
+        True/False, None przy failure (stan nieznany)
+    """
+    try:
+        client = await get_redis_client()
+        return bool(await client.exists(key))
+
+    except (ConnectionError, TimeoutError, RedisError) as exc:
+        logger.warning(f"Redis lock check failed for key '{key}': {exc}")
+        return None
+
+    except Exception as exc:
+        logger.error(f"Unexpected error in redis_lock_held for key '{key}': {exc}", exc_info=exc)
+        return None
+
+
+async def redis_eval(script: str, keys: list[str], args: list[str | int | float]) -> object | None:
+    """Run a Lua script atomically (EVAL).
+
+    Args:
+        script: Kod Lua
+        keys: KEYS skryptu
+        args: ARGV skryptu
+
+    Returns:
+        Wynik skryptu lub None przy failure (wywołujący decyduje o fail-open)
+    """
+    try:
+        client = await get_redis_client()
+        return await client.eval(script, len(keys), *keys, *args)
+
+    except (ConnectionError, TimeoutError, RedisError) as exc:
+        logger.warning(f"Redis EVAL failed for keys {keys}: {exc}")
+        return None
+
+    except Exception as exc:
+        logger.error(f"Unexpected error in redis_eval for keys {keys}: {exc}", exc_info=exc)
+        return None
+
+
+def redis_eval_sync(script: str, keys: list[str], args: list[str | int | float]) -> object | None:
+    """Synchroniczny odpowiednik ``redis_eval`` (blokuje wątek wywołującego).
+
+    Returns:
+        Wynik skryptu lub None przy failure (wywołujący decyduje o fail-open)
+    """
+    try:
+        return get_redis_sync_client().eval(script, len(keys), *keys, *args)
+
+    except (ConnectionError, TimeoutError, RedisError) as exc:
+        logger.warning(f"Redis EVAL (sync) failed for keys {keys}: {exc}")
+        return None
+
+    except Exception as exc:
+        logger.error(f"Unexpected error in redis_eval_sync for keys {keys}: {exc}", exc_info=exc)
+        return None
+
+
+async def redis_mget_bytes(keys: list[str]) -> list[bytes | None]:
+    """Fetch many binary values in one round-trip (MGET).
+
+    Graceful degradation - przy błędzie Redis zwraca same None (cache miss).
+
+    Args:
+        keys: Lista kluczy Redis
+
+    Returns:
+        Lista wartości (bytes lub None) w kolejności kluczy
+    """
+    if not keys:
+        return []
+    try:
+        client = await get_redis_binary_client()
+        return await _retry_with_backoff(
+            client.mget,
+            keys,
+            max_retries=app.redis.max_retries,
+            backoff=app.redis.retry_backoff,
+        )
+
+    except (ConnectionError, TimeoutError, RedisError) as exc:
+        logger.warning(f"Redis MGET failed for {len(keys)} keys: {exc}")
+        return [None] * len(keys)
+
+    except Exception as exc:
+        logger.error(f"Unexpected error in redis_mget_bytes: {exc}", exc_info=exc)
+        return [None] * len(keys)
+
+
+async def redis_mset_bytes(values: dict[str, bytes], ttl_seconds: int | None = None) -> bool:
+    """Store many binary values in one pipeline (SET z opcjonalnym TTL per klucz).
+
+    Args:
+        values: Mapa klucz → bytes
+        ttl_seconds: Optional TTL w sekundach
+
+    Returns:
+        True jeśli zapis się powiódł, False przy failure
+    """
+    if not values:
+        return True
+    try:
+        client = await get_redis_binary_client()
+        async with client.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.set(key, value, ex=ttl_seconds)
+            await pipe.execute()
+        return True
+
+    except (ConnectionError, TimeoutError, RedisError) as exc:
+        logger.warning(f"Redis pipeline SET failed for {len(values)} keys: {exc}")
+        return False
+
+    except Exception as exc:
+        logger.error(f"Unexpected error in redis_mset_bytes: {exc}", exc_info=exc)
+        return False
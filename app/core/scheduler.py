@@ -4,11 +4,18 @@ APScheduler Setup and Management
 Centralized scheduler configuration for background jobs.
 Currently schedules:
 - Daily cleanup job (2:00 AM UTC) - removes old soft-deleted entities
+- Nightly RAG cache warming (config: rag_cache_warming) - precomputes demographic
+  RAG contexts for the most common cells; also scheduled one-off after each ingest
+  via schedule_rag_cache_warming()
 """
 
 import logging
+from datetime import datetime, timedelta, timezone
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from app.tasks.cleanup_job import run_cleanup_job
+from app.tasks.rag_cache_warming import run_rag_cache_warming_job
+from config import features
 
 
 logger = logging.getLogger(__name__)
@@ -24,6 +31,7 @@ def init_scheduler() -> AsyncIOScheduler | None:
 
     Jobs:
     - cleanup_deleted_entities: Daily at 2:00 AM UTC (removes entities deleted >7 days ago)
+    - rag_cache_warming: Nightly (rag_cache_warming.nightly_hour/minute UTC), if enabled
 
     Returns:
         AsyncIOScheduler instance or None if initialization failed
@@ -54,6 +62,23 @@ def init_scheduler() -> AsyncIOScheduler | None:
             kwargs={'retention_days': 7},  # Keep deleted entities for 7 days
         )
 
+        # Schedule RAG cache warming (nightly)
+        warming = features.rag_cache_warming
+        if warming.enabled:
+            scheduler.add_job(
+                run_rag_cache_warming_job,
+                trigger='cron',
+                hour=warming.nightly_hour,
+                minute=warming.nightly_minute,
+                timezone='UTC',
+                id='rag_cache_warming',
+                name='Warm Demographic RAG Contexts',
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True,
+                kwargs={'trigger': 'nightly'},
+            )
+
         scheduler.start()
         logger.info("✓ APScheduler started - cleanup job scheduled daily at 2:00 AM UTC")
 
@@ -66,6 +91,41 @@ def init_scheduler() -> AsyncIOScheduler | None:
         return None
 
 
+def schedule_rag_cache_warming(trigger: str = "ingest") -> bool:
+    """
+    Schedule a one-off RAG cache warming run (e.g. after a document ingest).
+
+    The run is delayed by rag_cache_warming.ingest_delay_seconds and shares a job id,
+    so several ingests in a row collapse into a single warming pass.
+
+    Args:
+        trigger: Source of the run, recorded in the warming report
+
+    Returns:
+        True if the job was scheduled
+    """
+    warming = features.rag_cache_warming
+    if _scheduler is None or not warming.enabled or not warming.after_ingest:
+        return False
+
+    try:
+        _scheduler.add_job(
+            run_rag_cache_warming_job,
+            trigger='date',
+            run_date=datetime.now(timezone.utc) + timedelta(seconds=warming.ingest_delay_seconds),
+            id='rag_cache_warming_after_ingest',
+            name='Warm Demographic RAG Contexts (after ingest)',
+            replace_existing=True,
+            misfire_grace_time=None,
+            kwargs={'trigger': trigger},
+        )
+        logger.info("RAG cache warming scheduled in %ss (%s)", warming.ingest_delay_seconds, trigger)
+        return True
+    except Exception as exc:
+        logger.error(f"❌ Failed to schedule RAG cache warming: {exc}", exc_info=True)
+        return False
+
+
 def shutdown_scheduler(wait: bool = True):
     """
     Shutdown APScheduler gracefully.
@@ -0,0 +1,184 @@
+"""
+Single-flight (request coalescing) dla drogich przeliczeń.
+
+Gdy wiele coroutines jednocześnie potrzebuje tego samego wyniku (np. świeżo
+zinwalidowany cache), tylko jedna (leader) wykonuje obliczenie, a reszta
+czeka na jej wynik.
+
+Dwa poziomy:
+- In-process: słownik key → asyncio.Future (followers robią await na future leadera)
+- Cross-instance (opcjonalnie): Redis lock (SET NX EX). Instancja, która nie
+  dostała locka, polluje cache (``wait_for``) aż leader z innej instancji
+  zapisze wynik. Gdy lock zniknie bez wyniku w cache (leader nie zapisał -
+  pusty / zdegradowany wynik, błąd) albo minie timeout, liczy samodzielnie
+  (graceful degradation).
+
+Użycie:
+    flight = SingleFlight("persona_details")
+    result = await flight.run(
+        key,
+        lambda: compute(...),
+        lock_ttl_seconds=30,
+        wait_for=lambda: read_cache(...),
+    )
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, Generic, TypeVar
+
+from app.core.redis import redis_acquire_lock, redis_lock_held, redis_release_lock
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalescing identycznych, współbieżnych wywołań.
+
+    Attributes:
+        namespace: Prefiks kluczy Redis lock (``{namespace}:lock:{key}``)
+        stats: Liczniki leaders / coalesced / remote_waits / remote_hits / remote_released
+    """
+
+    def __init__(self, namespace: str, poll_interval: float = 0.1):
+        self.namespace = namespace
+        self.poll_interval = poll_interval
+        self._inflight: dict[str, asyncio.Future[T]] = {}
+        self.stats: dict[str, int] = {
+            "leaders": 0,
+            "coalesced": 0,
+            "remote_waits": 0,
+            "remote_hits": 0,
+            "remote_released": 0,
+        }
+
+    def inflight(self, key: str) -> bool:
+        """Czy dla klucza trwa obliczenie w tym procesie."""
+        return key in self._inflight
+
+    async def run(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[T]],
+        *,
+        lock_ttl_seconds: int | None = None,
+        wait_for: Callable[[], Awaitable[T | None]] | None = None,
+    ) -> T:
+        """
+        Wykonaj ``factory`` raz dla danego klucza, współbieżni callerzy dostają ten sam wynik.
+
+        Args:
+            key: Klucz identyfikujący obliczenie
+            factory: Coroutine factory wykonywana tylko przez leadera
+            lock_ttl_seconds: Jeśli podane, leader dodatkowo bierze Redis lock
+                (coalescing między instancjami); również maksymalny czas czekania
+            wait_for: Callable zwracający wynik zapisany przez leadera z innej
+                instancji (np. odczyt z cache) lub None jeśli jeszcze go nie ma
+
+        Returns:
+            Wynik ``factory`` (własny lub leadera)
+        """
+        while True:
+            existing = self._inflight.get(key)
+            if existing is None:
+                break
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(existing)
+            except asyncio.CancelledError:
+                # Leader został anulowany (np. klient zamknął połączenie) - przejmij obliczenie,
+                # chyba że to my jesteśmy anulowani
+                current = asyncio.current_task()
+                if existing.cancelled() and not (current and current.cancelling()):
+                    continue
+                raise
+
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.stats["leaders"] += 1
+        try:
+            result = await self._lead(key, factory, lock_ttl_seconds, wait_for)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Oznacz wyjątek jako odebrany - followers mogą nie istnieć
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _lead(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[T]],
+        lock_ttl_seconds: int | None,
+        wait_for: Callable[[], Awaitable[T | None]] | None,
+    ) -> T:
+        if lock_ttl_seconds is None:
+            return await factory()
+
+        lock_key = f"{self.namespace}:lock:{key}"
+        token = await redis_acquire_lock(lock_key, lock_ttl_seconds)
+        if token is None and wait_for is not None:
+            remote = await self._wait_for_remote(key, lock_key, wait_for, lock_ttl_seconds)
+            if remote is not None:
+                return remote
+            # Leader z innej instancji nie zdążył - spróbuj przejąć lock (best effort)
+            token = await redis_acquire_lock(lock_key, lock_ttl_seconds)
+
+        try:
+            return await factory()
+        finally:
+            if token is not None:
+                await redis_release_lock(lock_key, token)
+
+    async def _wait_for_remote(
+        self,
+        key: str,
+        lock_key: str,
+        wait_for: Callable[[], Awaitable[T | None]],
+        timeout_seconds: int,
+    ) -> T | None:
+        self.stats["remote_waits"] += 1
+        deadline = time.monotonic() + timeout_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            value = await wait_for()
+            if value is not None:
+                self.stats["remote_hits"] += 1
+                return value
+            if await redis_lock_held(lock_key) is False:
+                # Leader skończył bez zapisu do cache (pusty / zdegradowany wynik, błąd)
+                # - ostatni odczyt na wypadek zapisu tuż przed zwolnieniem locka
+                value = await wait_for()
+                if value is not None:
+                    self.stats["remote_hits"] += 1
+                    return value
+                self.stats["remote_released"] += 1
+                logger.info(
+                    "single_flight_remote_released_without_result",
+                    extra={"namespace": self.namespace, "key": key},
+                )
+                return None
+
+        logger.warning(
+            "single_flight_remote_wait_timeout",
+            extra={"namespace": self.namespace, "key": key, "timeout_s": timeout_seconds},
+        )
+        return None
+
+    def snapshot(self) -> dict[str, Any]:
+        """Zwróć statystyki (do logów/metrics)."""
+        return {"namespace": self.namespace, "inflight": len(self._inflight), **self.stats}
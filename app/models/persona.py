@@ -51,6 +51,7 @@ class Persona(Base):
         persona_title: Krótki tytuł persony (np. "UX Designer", "Retired Teacher")
         headline: Jednoliniowy opis persony
         background_story: Historia życiowa (2-3 zdania)
+        background_summary: Streszczenie historii używane w promptach (token budget)
 
         # === CECHY OSOBOWOŚCI (BIG FIVE) ===
         # Wszystkie wartości w przedziale [0.0, 1.0]
@@ -129,6 +130,8 @@ class Persona(Base):
     values = Column(ARRAY(String()), nullable=True)
     interests = Column(ARRAY(String()), nullable=True)
     background_story = Column(Text, nullable=True)
+    # Krótkie streszczenie background_story do promptów (focus groups, ankiety) - liczone przy zapisie
+    background_summary = Column(Text, nullable=True)
 
     # RAG (Retrieval-Augmented Generation)
     rag_context_used = Column(Boolean, nullable=False, default=False, server_default=text("false"))
@@ -18,7 +18,7 @@ from sqlalchemy import (
     String,
     Text,
 )
-from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PGUUID
 from sqlalchemy.sql import func, text
 
 from app.db.base import Base
@@ -48,8 +48,10 @@ class RAGDocument(Base):
 
         # === STATUS PRZETWARZANIA ===
         num_chunks: Liczba chunków tekstowych wygenerowanych z dokumentu
-        status: Status przetwarzania ('processing', 'ready', 'failed')
-        error_message: Komunikat błędu (jeśli status = 'failed')
+        status: Status przetwarzania ('processing', 'ready', 'partial', 'failed')
+        error_message: Komunikat błędu (jeśli status = 'failed' lub 'partial')
+        ingest_stage: Bieżący etap ingestu ('load', 'graph', 'vector', 'done')
+        ingest_checkpoint: Postęp ingestu per chunk (JSONB) - wznowienie po awarii
 
         # === TIMESTAMPS ===
         created_at: Data dodania dokumentu do systemu
@@ -58,9 +60,12 @@ class RAGDocument(Base):
 
     Lifecycle:
         1. Upload pliku → status='processing', num_chunks=0
-        2. Przetwarzanie (parsing, chunking, embedding) → background task
+        2. Przetwarzanie (parsing, chunking, embedding) → background task,
+           postęp zapisywany w ingest_checkpoint (retry wznawia od ostatniego chunku)
         3. Sukces → status='ready', num_chunks=X
+           (status='partial' gdy części chunków nie udało się zamienić na graf)
         4. Błąd → status='failed', error_message='...'
+           ('failed' i 'partial' można ponowić - POST /rag/documents/{id}/retry)
         5. Usunięcie → is_active=False (chunks usuwane z Neo4j)
     """
     __tablename__ = "rag_documents"
@@ -86,6 +91,8 @@ class RAGDocument(Base):
         server_default=text("'processing'")
     )
     error_message = Column(Text, nullable=True)
+    ingest_stage = Column(String(50), nullable=True)
+    ingest_checkpoint = Column(JSONB, nullable=True)
 
     # Timestamps
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -4,6 +4,7 @@ Schematy Pydantic dla person (wersja v1)
 Definiuje struktury danych dla:
 - PersonaGenerateRequest - żądanie generowania person
 - PersonaGenerationAdvancedOptions - zaawansowane opcje targetowania
+- PersonaProfileOutput - structured output LLM przy generowaniu persony
 - PersonaResponse - odpowiedź API z danymi persony
 
 Uwaga: To jest wersja v1. Nowsze projekty powinny używać persona_v2.py
@@ -150,6 +151,49 @@ class PersonaGenerateRequest(BaseModel):
     )
 
 
+_PLACEHOLDER_VALUES = {"", "n/a", "na", "none", "null", "brak", "-"}
+
+
+class PersonaProfileOutput(BaseModel):
+    """
+    Schema structured output LLM dla generowania persony
+
+    Przekazywana do with_structured_output() - provider dekoduje odpowiedź
+    zgodnie z JSON schema (schema-constrained decoding), więc nie trzeba
+    odzyskiwać JSON-a z wolnego tekstu. Walidatory wyłapują odpowiedzi
+    poprawne składniowo, ale bezużyteczne ("N/A", puste listy) - takie pola
+    są naprawiane osobnym, małym wywołaniem (repair call).
+    """
+    full_name: str = Field(min_length=3, max_length=150, description="Polskie imię i nazwisko")
+    persona_title: str = Field(min_length=2, max_length=150, description="Zawód lub etap życia")
+    headline: str = Field(min_length=10, max_length=255, description="1 zdanie: wiek, zawód, unikalne motywacje")
+    background_story: str = Field(min_length=80, description="Konkretna historia tej osoby")
+    values: list[str] = Field(min_length=3, max_length=10, description="5-7 wartości")
+    interests: list[str] = Field(min_length=3, max_length=10, description="5-7 hobby/aktywności")
+    catchy_segment_name: str | None = Field(None, max_length=60, description="2-4 słowa, marketingowa nazwa segmentu")
+    occupation: str | None = Field(None, max_length=255, description="Zawód")
+    communication_style: str | None = Field(None, description="Jak się komunikuje")
+    decision_making_style: str | None = Field(None, description="Jak podejmuje decyzje")
+    typical_concerns: list[str] = Field(default_factory=list, description="3-5 specyficznych zmartwień")
+
+    @validator('full_name', 'persona_title', 'headline', 'background_story')
+    def reject_placeholders(cls, v):
+        """Walidacja: odrzuć placeholdery typu 'N/A' zamiast treści."""
+        if v.strip().lower() in _PLACEHOLDER_VALUES:
+            raise ValueError('placeholder value instead of content')
+        return v.strip()
+
+    @validator('values', 'interests', 'typical_concerns', pre=True)
+    def drop_empty_items(cls, v):
+        """Walidacja: usuń puste/placeholderowe elementy list (przed sprawdzeniem min_length)."""
+        if not isinstance(v, list):
+            return v
+        return [
+            item.strip() for item in v
+            if isinstance(item, str) and item.strip().lower() not in _PLACEHOLDER_VALUES
+        ]
+
+
 class PersonaResponse(BaseModel):
     """
     Schema odpowiedzi API z danymi persony
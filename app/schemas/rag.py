@@ -21,6 +21,7 @@ class RAGDocumentResponse(BaseModel):
     num_chunks: int
     status: str
     error_message: str | None = None
+    ingest_stage: str | None = None
     created_at: datetime
     is_active: bool
 
@@ -28,6 +29,39 @@ class RAGDocumentResponse(BaseModel):
         from_attributes = True
 
 
+class RAGCacheWarmingCell(BaseModel):
+    """Wynik rozgrzewania jednej komórki demograficznej."""
+
+    age_group: str
+    education: str
+    location: str
+    gender: str
+    weight: float = Field(..., description="Udział komórki w populacji (iloczyn wag z config/demographics).")
+    status: str = Field(..., description="cached | warmed | partial | failed")
+    duration_ms: float
+    error: str | None = None
+
+
+class RAGCacheWarmingReport(BaseModel):
+    """Raport ostatniego rozgrzewania cache kontekstów demograficznych (pokrycie i aktualność)."""
+
+    trigger: str
+    index_version: int
+    current_index_version: int
+    started_at: datetime
+    finished_at: datetime
+    duration_ms: float
+    target_cells: int
+    warm_cells: int
+    status_counts: dict[str, int]
+    coverage: float = Field(..., description="Udział rozgrzanych komórek wśród rozgrzewanych.")
+    population_coverage: float = Field(..., description="Udział populacji pokryty rozgrzanymi komórkami.")
+    age_hours: float
+    stale: bool
+    stale_reason: str | None = None
+    cells: list[RAGCacheWarmingCell]
+
+
 class RAGQueryRequest(BaseModel):
     """Schemat zapytania deweloperskiego do klasycznego RAG."""
 
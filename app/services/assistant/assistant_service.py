@@ -45,7 +45,8 @@ class AssistantService:
 
         # Load LLM model (Gemini Flash)
         model_config = models.get("assistant", "chat")
-        self.llm = build_chat_model(**model_config.params)
+        # Użytkownik czeka na odpowiedź - pierwszeństwo przed generacją w tle
+        self.llm = build_chat_model(**model_config.params, request_priority="interactive")
 
         # Load system prompt
         self.system_prompt_template = prompts.get("assistant.system")
@@ -95,6 +95,11 @@ async def log_usage_from_metadata(
         logger.debug("Usage metadata missing for %s", context.operation_type)
         return
 
+    if usage_metadata.get("cache_hit"):
+        # Odpowiedź z cache LLM (app/services/shared/llm_cache.py) - wywołanie bez tokenów
+        await log_usage(context, 0, 0, cache_hit=True)
+        return
+
     input_tokens, output_tokens = _extract_usage_counts(usage_metadata)
 
     if input_tokens is None and output_tokens is None:
@@ -116,14 +121,24 @@ async def log_usage(
     context: UsageLogContext,
     input_tokens: int,
     output_tokens: int,
+    *,
+    cache_hit: bool = False,
 ) -> None:
-    """Store token usage in the UsageMetric table."""
+    """Store token usage in the UsageMetric table.
+
+    Cache hits are stored as zero-token calls so dashboards count the operation.
+    """
     if not context.user_id:
         logger.debug("Missing user_id for usage logging; skipping")
         return
 
+    if cache_hit:
+        logger.info(
+            "llm_usage_cache_hit",
+            extra={"operation_type": context.operation_type, "model_name": context.model_name},
+        )
     # Skip no-op logging to avoid noise
-    if (input_tokens or 0) == 0 and (output_tokens or 0) == 0:
+    elif (input_tokens or 0) == 0 and (output_tokens or 0) == 0:
         return
 
     try:
@@ -0,0 +1,424 @@
+"""
+Bulk eksport/import populacji person w formatach kolumnowych (Parquet, Arrow IPC, CSV).
+
+Eksport:
+- Server-side cursor (AsyncSession.stream + yield_per) - stała pamięć niezależnie od liczby person
+- Streaming: każda partia wierszy jest od razu kodowana i oddawana jako chunk bajtów
+- Parquet: jedna row group na partię, footer na końcu strumienia
+
+Import:
+- Czytanie pliku partiami (w wątku - pyarrow/csv są blokujące)
+- Zapis przez COPY (asyncpg copy_records_to_table) zamiast INSERT per wiersz
+- Domyślnie nowe UUID (przenoszenie populacji między środowiskami bez konfliktów)
+
+Schemat kolumn wyprowadzany jest z modelu Persona, więc eksport i import
+używają tego samego formatu.
+
+Wymaga opcjonalnej zależności ``pyarrow`` dla Parquet/Arrow
+(pip install -e ".[bulk-data]"); CSV działa bez niej.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import json
+import logging
+import uuid
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Literal
+from uuid import UUID
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, select
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID as PGUUID
+
+from app.db import AsyncSessionLocal
+from app.models import Persona
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+BulkFormat = Literal["parquet", "arrow", "csv"]
+
+BULK_BATCH_SIZE = 1000
+
+# Kolumny niezależne od środowiska (bez project/environment/soft-delete metadata)
+PERSONA_EXPORT_COLUMNS: tuple[str, ...] = tuple(
+    column.name
+    for column in Persona.__table__.columns
+    if column.name not in {"project_id", "environment_id", "deleted_at", "deleted_by"}
+)
+
+MEDIA_TYPES: dict[str, str] = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _column_type(name: str) -> Any:
+    return Persona.__table__.columns[name].type
+
+
+def _require_pyarrow(fmt: str) -> None:
+    if fmt in {"parquet", "arrow"} and not PYARROW_AVAILABLE:
+        raise ValueError(f"Format '{fmt}' requires pyarrow. Install: pip install -e \".[bulk-data]\"")
+
+
+def build_arrow_schema() -> "pa.Schema":
+    """Zbuduj schemat Arrow na podstawie typów kolumn Persona."""
+    _require_pyarrow("arrow")
+    fields = []
+    for name in PERSONA_EXPORT_COLUMNS:
+        column_type = _column_type(name)
+        if isinstance(column_type, Integer):
+            arrow_type = pa.int32()
+        elif isinstance(column_type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column_type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column_type, DateTime):
+            arrow_type = pa.timestamp("us", tz="UTC")
+        elif isinstance(column_type, ARRAY):
+            arrow_type = pa.list_(pa.string())
+        else:
+            # String/Text, UUID i JSONB (jako tekst JSON)
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SERIALIZACJA WIERSZY
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+def row_to_export_dict(row: Any) -> dict[str, Any]:
+    """Znormalizuj wiersz DB do wartości przenośnych (UUID → str, JSONB → tekst JSON)."""
+    record: dict[str, Any] = {}
+    for name in PERSONA_EXPORT_COLUMNS:
+        value = row[name] if isinstance(row, dict) else getattr(row, name)
+        column_type = _column_type(name)
+        if value is not None:
+            if isinstance(column_type, PGUUID):
+                value = str(value)
+            elif isinstance(column_type, JSONB):
+                value = json.dumps(value, ensure_ascii=False)
+        record[name] = value
+    return record
+
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def parse_import_value(name: str, value: Any) -> Any:
+    """
+    Odwróć serializację eksportu dla pojedynczej wartości (CSV → typy Python, UUID/JSONB).
+
+    Wartości JSONB zostają tekstem JSON - asyncpg COPY koduje jsonb z ``str``.
+    """
+    if value is None or value == "":
+        return None
+
+    column_type = _column_type(name)
+    if isinstance(column_type, PGUUID):
+        return value if isinstance(value, UUID) else UUID(str(value))
+    if isinstance(column_type, JSONB):
+        return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    if isinstance(value, str):
+        if isinstance(column_type, Integer):
+            return int(value)
+        if isinstance(column_type, Float):
+            return float(value)
+        if isinstance(column_type, Boolean):
+            return value.strip().lower() in {"true", "1", "t", "yes"}
+        if isinstance(column_type, DateTime):
+            parsed = datetime.fromisoformat(value)
+            return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+        if isinstance(column_type, ARRAY):
+            return json.loads(value)
+    return value
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# EKSPORT (STREAMING)
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only sink zbierający bajty z pyarrow writerów - opróżniany po każdej partii."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+        return chunk
+
+
+class PersonaBatchEncoder:
+    """
+    Koduje kolejne partie wierszy do wybranego formatu, zwracając gotowe chunki bajtów.
+
+    Użycie:
+        encoder = PersonaBatchEncoder("parquet")
+        for rows in batches:
+            yield encoder.encode(rows)
+        yield encoder.finish()
+    """
+
+    def __init__(self, fmt: BulkFormat):
+        _require_pyarrow(fmt)
+        self.fmt = fmt
+        self.rows_written = 0
+        self._sink = _ChunkSink()
+        self._writer: Any = None
+        self._csv_writer: Any = None
+        self._text: io.StringIO | None = None
+
+        if fmt == "csv":
+            self._text = io.StringIO()
+            self._csv_writer = csv.DictWriter(self._text, fieldnames=PERSONA_EXPORT_COLUMNS)
+            self._csv_writer.writeheader()
+        else:
+            self._schema = build_arrow_schema()
+            if fmt == "parquet":
+                self._writer = pq.ParquetWriter(self._sink, self._schema, compression="zstd")
+            else:
+                self._writer = pa.ipc.new_stream(self._sink, self._schema)
+
+    def encode(self, records: list[dict[str, Any]]) -> bytes:
+        """Zakoduj partię rekordów (z row_to_export_dict) i zwróć nowe bajty."""
+        self.rows_written += len(records)
+        if self.fmt == "csv":
+            self._csv_writer.writerows({key: _csv_cell(value) for key, value in record.items()} for record in records)
+            chunk = self._text.getvalue().encode("utf-8")
+            self._text.seek(0)
+            self._text.truncate(0)
+            return chunk
+
+        self._writer.write_batch(pa.RecordBatch.from_pylist(records, schema=self._schema))
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        """Zamknij writer (footer Parquet / end-of-stream Arrow) i zwróć ostatnie bajty."""
+        if self.fmt == "csv":
+            return self._text.getvalue().encode("utf-8") if self._text else b""
+        self._writer.close()
+        return self._sink.drain()
+
+
+async def stream_project_personas(
+    project_id: UUID,
+    fmt: BulkFormat = "parquet",
+    *,
+    include_inactive: bool = False,
+    batch_size: int = BULK_BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    """
+    Strumieniuj persony projektu jako Parquet/Arrow/CSV w stałej pamięci.
+
+    Używa dedykowanej sesji - StreamingResponse działa po zamknięciu sesji requestu.
+
+    Args:
+        project_id: UUID projektu
+        fmt: Format wyjściowy
+        include_inactive: Czy dołączyć zarchiwizowane (is_active=False) persony
+        batch_size: Liczba wierszy na partię (yield_per / row group)
+
+    Yields:
+        Chunki bajtów pliku wynikowego
+    """
+    encoder = PersonaBatchEncoder(fmt)
+    columns = [getattr(Persona, name) for name in PERSONA_EXPORT_COLUMNS]
+    stmt = (
+        select(*columns)
+        .where(Persona.project_id == project_id, Persona.deleted_at.is_(None))
+        .order_by(Persona.created_at, Persona.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if not include_inactive:
+        stmt = stmt.where(Persona.is_active.is_(True))
+
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(stmt)
+        async for partition in result.mappings().partitions(batch_size):
+            records = [row_to_export_dict(row) for row in partition]
+            chunk = encoder.encode(records)
+            if chunk:
+                yield chunk
+
+    tail = encoder.finish()
+    if tail:
+        yield tail
+
+    logger.info(
+        "persona_bulk_export_completed",
+        extra={"project_id": str(project_id), "format": fmt, "rows": encoder.rows_written},
+    )
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# IMPORT (COPY)
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+def iter_import_batches(
+    file: BinaryIO,
+    fmt: BulkFormat,
+    batch_size: int = BULK_BATCH_SIZE,
+) -> Iterator[list[dict[str, Any]]]:
+    """
+    Czytaj plik eksportu partiami (generator blokujący - wywoływać w wątku).
+
+    Yields:
+        Listy słowników kolumna → wartość (jeszcze przed parse_import_value)
+    """
+    _require_pyarrow(fmt)
+    if fmt == "parquet":
+        for batch in pq.ParquetFile(file).iter_batches(batch_size=batch_size):
+            yield batch.to_pylist()
+    elif fmt == "arrow":
+        # Partie IPC mają rozmiar z eksportu - tniemy je do batch_size
+        for batch in pa.ipc.open_stream(file):
+            for offset in range(0, batch.num_rows, batch_size):
+                yield batch.slice(offset, batch_size).to_pylist()
+    else:
+        reader = csv.DictReader(io.TextIOWrapper(file, encoding="utf-8", newline=""))
+        batch: list[dict[str, Any]] = []
+        for row in reader:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def build_copy_record(
+    raw: dict[str, Any],
+    project_id: UUID,
+    *,
+    preserve_ids: bool,
+    now: datetime,
+) -> tuple[Any, ...] | None:
+    """
+    Zamień wiersz pliku na krotkę dla COPY (kolejność = copy_columns()).
+
+    Returns:
+        Krotka wartości lub None jeśli wiersz nie spełnia NOT NULL (age, gender)
+    """
+    values = {name: parse_import_value(name, raw.get(name)) for name in PERSONA_EXPORT_COLUMNS}
+    if values.get("age") is None or not values.get("gender"):
+        return None
+
+    if not preserve_ids or values.get("id") is None:
+        values["id"] = uuid.uuid4()
+    values["created_at"] = values.get("created_at") or now
+    values["updated_at"] = values.get("updated_at") or now
+    if values.get("is_active") is None:
+        values["is_active"] = True
+    if values.get("rag_context_used") is None:
+        values["rag_context_used"] = False
+
+    return (project_id, *(values[name] for name in PERSONA_EXPORT_COLUMNS))
+
+
+def copy_columns() -> list[str]:
+    """Kolumny tabeli personas zasilane przez COPY."""
+    return ["project_id", *PERSONA_EXPORT_COLUMNS]
+
+
+async def import_project_personas(
+    session: Any,
+    project_id: UUID,
+    file: BinaryIO,
+    fmt: BulkFormat = "parquet",
+    *,
+    preserve_ids: bool = False,
+    batch_size: int = BULK_BATCH_SIZE,
+) -> dict[str, int]:
+    """
+    Załaduj persony z pliku eksportu do projektu przez COPY.
+
+    Plik czytany jest partiami w wątku; każda partia trafia do
+    ``copy_records_to_table`` w ramach transakcji sesji (commit po wszystkich partiach).
+
+    Args:
+        session: AsyncSession (asyncpg)
+        project_id: Docelowy projekt
+        file: Plik binarny (np. UploadFile.file)
+        fmt: Format pliku
+        preserve_ids: Zachowaj UUID z pliku (domyślnie nowe - brak konfliktów między środowiskami)
+        batch_size: Wierszy na partię COPY
+
+    Returns:
+        Dict z liczbą zaimportowanych i odrzuconych wierszy
+    """
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+
+    now = datetime.now(timezone.utc)
+    columns = copy_columns()
+    imported = 0
+    rejected = 0
+
+    batches = iter_import_batches(file, fmt, batch_size)
+    while True:
+        batch = await asyncio.to_thread(next, batches, None)
+        if batch is None:
+            break
+
+        records = []
+        for raw in batch:
+            record = build_copy_record(raw, project_id, preserve_ids=preserve_ids, now=now)
+            if record is None:
+                rejected += 1
+                continue
+            records.append(record)
+
+        if records:
+            await driver_connection.copy_records_to_table(
+                Persona.__tablename__,
+                records=records,
+                columns=columns,
+            )
+            imported += len(records)
+
+    await session.commit()
+
+    logger.info(
+        "persona_bulk_import_completed",
+        extra={"project_id": str(project_id), "format": fmt, "imported": imported, "rejected": rejected},
+    )
+    return {"imported": imported, "rejected": rejected}
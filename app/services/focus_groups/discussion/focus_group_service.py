@@ -23,6 +23,7 @@ from app.models import FocusGroup, Persona, PersonaResponse
 from app.services.focus_groups.memory import MemoryServiceLangChain
 from app.db import AsyncSessionLocal
 from app.services.shared.clients import build_chat_model
+from app.services.shared.token_budget import PromptBudget
 from app.services.dashboard.usage import (
     UsageLogContext,
     context_with_model,
@@ -480,17 +481,25 @@ IMPORTANT INSTRUCTION:
             Pełny prompt gotowy do wysłania do LLM
         """
 
+        prompt_budget = PromptBudget("focus_group_response")
+
         # Formatuj kontekst poprzednich odpowiedzi (maksymalnie 3 najbardziej istotne)
         context_text = ""
         if context:
-            context_text = "\n\nPast interactions:\n"
+            interactions = ""
             for i, ctx in enumerate(context[:3], 1):  # Ograniczamy do 3 najważniejszych wpisów
                 if ctx["event_type"] == "response_given":
-                    context_text += f"{i}. Q: {ctx['event_data'].get('question', '')}\n"
-                    context_text += f"   A: {ctx['event_data'].get('response', '')}\n"
-
-        # Używamy pełnej historii tła persony
-        background = persona.background_story if persona.background_story else 'Has diverse life experiences'
+                    interactions += f"{i}. Q: {ctx['event_data'].get('question', '')}\n"
+                    interactions += f"   A: {ctx['event_data'].get('response', '')}\n"
+            context_text = "\n\nPast interactions:\n" + prompt_budget.fit("past_interactions", interactions)
+
+        # Streszczenie historii (liczone przy zapisie persony) zamiast pełnej background_story
+        background = prompt_budget.fit(
+            "background",
+            persona.background_summary or persona.background_story,
+            original=persona.background_story,
+        ) or 'Has diverse life experiences'
+        prompt_budget.log(persona_id=str(persona.id))
 
         return f"""You are participating in a focus group discussion.
 
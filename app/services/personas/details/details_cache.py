@@ -0,0 +1,78 @@
+"""
+Persona Details Cache - Wersjonowany cache dla Detail View
+
+Funkcje pomocnicze do:
+- Generowania wersjonowanych cache keys (``persona_details:{id}:v{version}``)
+- Wyznaczania wersji z ``persona.updated_at`` - każda edycja persony
+  (onupdate) zmienia klucz, więc unieważnienie nie wymaga DELETE ani bumpa
+- Odczytu/zapisu envelope z ``cached_at`` dla stale-while-revalidate
+
+Cache przechowuje tylko drogie, wyliczane części widoku (needs & pains,
+audit log, segment brief). Pola bazowe persony zawsze pochodzą ze świeżego
+odczytu z DB, więc serwowanie stale wpisu nie pokazuje nieaktualnego imienia,
+wieku itp.
+"""
+
+import logging
+import time
+from typing import Any
+from uuid import UUID
+
+from app.core.redis import redis_get_json, redis_set_json
+from app.models import Persona
+
+logger = logging.getLogger(__name__)
+
+# Wpis jest "świeży" przez 10 min; do 1h serwujemy go jako stale + rewalidacja w tle
+DETAILS_FRESH_TTL_SECONDS = 10 * 60
+DETAILS_STALE_TTL_SECONDS = 60 * 60
+
+# Maksymalny czas recompute (Redis lock dla single-flight między instancjami)
+DETAILS_RECOMPUTE_LOCK_TTL_SECONDS = 30
+
+
+def get_cache_key(persona_id: UUID, version: int) -> str:
+    """Klucz wpisu cache dla danej wersji persony."""
+    return f"persona_details:{persona_id}:v{version}"
+
+
+def get_cache_version(persona: Persona) -> int:
+    """
+    Wersja cache persony wyprowadzona z ``updated_at`` (ms od epoki).
+
+    Edycja persony podbija ``updated_at`` (onupdate), więc stary wpis przestaje
+    być adresowany i wygasa z TTL - tak jak klucz z ``updated_at`` przed
+    wersjonowaniem.
+
+    Returns:
+        Wersja (0 jeśli persona nie ma ``updated_at``)
+    """
+    updated_at = persona.updated_at
+    return int(updated_at.timestamp() * 1000) if updated_at else 0
+
+
+async def read_cached_details(persona_id: UUID, version: int) -> tuple[dict[str, Any] | None, bool]:
+    """
+    Odczytaj wyliczone dane Detail View z cache.
+
+    Returns:
+        Tuple (computed, is_fresh):
+        - computed: dict z needs_and_pains / audit_log / segment_brief lub None (miss)
+        - is_fresh: True dla wpisu młodszego niż DETAILS_FRESH_TTL_SECONDS
+    """
+    envelope = await redis_get_json(get_cache_key(persona_id, version))
+    if not isinstance(envelope, dict) or "computed" not in envelope:
+        return None, False
+
+    age_seconds = time.time() - float(envelope.get("cached_at", 0))
+    return envelope["computed"], age_seconds < DETAILS_FRESH_TTL_SECONDS
+
+
+async def write_cached_details(persona_id: UUID, version: int, computed: dict[str, Any]) -> bool:
+    """Zapisz wyliczone dane Detail View pod wersjonowanym kluczem."""
+    envelope = {"cached_at": time.time(), "computed": computed}
+    return await redis_set_json(
+        get_cache_key(persona_id, version),
+        envelope,
+        ttl_seconds=DETAILS_STALE_TTL_SECONDS,
+    )
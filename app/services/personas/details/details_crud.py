@@ -12,12 +12,12 @@ from uuid import UUID
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import flag_modified
 
 from app.db import AsyncSessionLocal
 from app.models import Persona
 from app.services.personas.validation.persona_audit_service import PersonaAuditService
 from app.schemas.persona_details import PersonaAuditEntry
-from app.core.redis import redis_delete
 
 logger = logging.getLogger(__name__)
 
@@ -87,7 +87,13 @@ async def log_view_event(persona_id: UUID, user_id: UUID):
         logger.warning("Failed to log view event: %s", e)
 
 
-async def persist_persona_field(persona_id: UUID, field_name: str, value: dict) -> None:
+async def persist_persona_field(
+    persona_id: UUID,
+    field_name: str,
+    value: dict,
+    *,
+    invalidate_cache: bool = True,
+) -> None:
     """
     Persist a JSONB field on Persona in a dedicated transaction.
 
@@ -95,10 +101,13 @@ async def persist_persona_field(persona_id: UUID, field_name: str, value: dict)
         persona_id: UUID persony
         field_name: Nazwa pola do aktualizacji (np. "needs_and_pains")
         value: Wartość do zapisania (dict)
+        invalidate_cache: Czy unieważnić cache Detail View. False gdy wywołujący
+            właśnie zapisał tę wartość w cache bieżącej wersji (recompute) -
+            zachowujemy wtedy ``updated_at``, od którego zależy klucz cache.
 
     Note:
         - Używa dedykowanej sesji do persystencji
-        - Invaliduje cache po zapisie
+        - Invaliduje cache po zapisie (onupdate ``updated_at`` zmienia wersję klucza)
         - Jeśli failuje, loguje warning ale nie propaguje exception
     """
     try:
@@ -110,8 +119,10 @@ async def persist_persona_field(persona_id: UUID, field_name: str, value: dict)
                 return
 
             setattr(persona, field_name, value)
+            if not invalidate_cache:
+                # Jawne updated_at w SET wyłącza onupdate - świeży wpis cache zostaje aktualny
+                flag_modified(persona, "updated_at")
             await session.commit()
             logger.debug("Persisted %s for persona %s", field_name, persona_id)
-            await redis_delete(f"persona_details:{persona_id}")
     except Exception as exc:
         logger.warning("Failed to persist %s for persona %s: %s", field_name, persona_id, exc)
@@ -5,16 +5,21 @@ Główny orchestrator dla szczegółowego widoku persony:
 - Fetch base persona data
 - Parallel fetch needs (with RAG context) and audit log (asyncio.gather)
 - Merge data into comprehensive response
-- Cache full response (Redis, TTL 1h)
+- Cache computed data (Redis, versioned keys, stale-while-revalidate)
 - Handle graceful degradation (jeśli część danych nie jest dostępna)
 
 Performance Optimizations (2025-10):
-- Smart cache invalidation: Include persona.updated_at in cache key
 - Performance logging: Track duration for each fetch operation
-- Longer cache TTL: 5min → 1h for stable data
 - RAG context integration for needs analysis (consistency with segments)
 - Target latency: <50ms (cached), <3s (fresh with parallel fetch)
 
+Cache (2025-11):
+- Versioned keys: wersja z persona.updated_at - edycja persony od razu zmienia klucz
+- Stale-while-revalidate: przeterminowany wpis bieżącej wersji serwowany od razu,
+  przeliczenie w tle (osobna sesja DB)
+- Single-flight: współbieżni viewerzy zinwalidowanej persony czekają na
+  jedno przeliczenie (in-process future + Redis lock między instancjami)
+
 Performance:
 - Cache hit: < 50ms (Redis)
 - Cache miss (optimized): < 3s (parallel fetch + structured output + RAG context)
@@ -24,15 +29,17 @@ Performance:
 import asyncio
 import logging
 import time
+from typing import Any
 from uuid import UUID
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import ValidationError
 
+from app.db import AsyncSessionLocal
 from app.models import Persona
 from app.services.personas.validation.persona_audit_service import PersonaAuditService
-from app.core.redis import redis_get_json, redis_set_json
+from app.core.single_flight import SingleFlight
 from app.schemas.persona_details import PersonaDetailsResponse
 
 # Import funkcji z nowych modułów
@@ -46,9 +53,18 @@ from .details_crud import (
     log_view_event,
     persist_persona_field,
 )
+from .details_cache import (
+    DETAILS_RECOMPUTE_LOCK_TTL_SECONDS,
+    get_cache_version,
+    read_cached_details,
+    write_cached_details,
+)
 
 logger = logging.getLogger(__name__)
 
+# Współdzielony między instancjami serwisu (serwis jest tworzony per request)
+_details_flight: SingleFlight[dict[str, Any]] = SingleFlight("persona_details")
+
 
 class PersonaDetailsService:
     """
@@ -58,7 +74,7 @@ class PersonaDetailsService:
     - Fetch base persona data
     - Parallel fetch needs (with RAG context) and audit log (asyncio.gather)
     - Merge data into comprehensive response
-    - Cache full response (Redis, TTL 5min)
+    - Cache computed data (Redis, versioned keys, stale-while-revalidate)
     - Handle graceful degradation (jeśli część danych nie jest dostępna)
 
     Performance:
@@ -85,8 +101,9 @@ class PersonaDetailsService:
         Pobierz pełny detail view persony
 
         Optimizations:
-        - Smart cache key: Include persona.updated_at for auto-invalidation
-        - Longer TTL: 5min → 1h (invalidates on persona update via updated_at)
+        - Versioned cache key: bump wersji przy persist_persona_field
+        - Stale-while-revalidate: stale wpis serwowany natychmiast, recompute w tle
+        - Single-flight: tylko jedno przeliczenie per (persona, wersja)
         - Performance logging: Track each operation duration
 
         Args:
@@ -107,26 +124,33 @@ class PersonaDetailsService:
         """
         start_time = time.time()
 
-        # === FETCH BASE PERSONA (needed for cache key) ===
+        # === FETCH BASE PERSONA (zawsze świeże pola bazowe) ===
         fetch_start = time.time()
-        result = await self.db.execute(
-            select(Persona).where(Persona.id == persona_id, Persona.is_active.is_(True))
-        )
-        persona = result.scalars().first()
+        persona = await self._fetch_persona(self.db, persona_id)
 
         if not persona:
             raise ValueError(f"Persona {persona_id} not found or inactive")
 
         fetch_elapsed_ms = int((time.time() - fetch_start) * 1000)
 
-        # Smart cache key: Include updated_at timestamp for auto-invalidation
-        cache_key = f"persona_details:{persona_id}:{int(persona.updated_at.timestamp())}"
+        version = get_cache_version(persona)
+        cache_state = "miss"
 
         if not force_refresh:
-            cached = await redis_get_json(cache_key)
-            if cached:
+            cached, is_fresh = await read_cached_details(persona_id, version)
+            if cached is not None:
                 try:
-                    cached_response = PersonaDetailsResponse.model_validate(cached)
+                    response = self._build_response(persona, cached)
+                except ValidationError as e:
+                    logger.warning("Invalid cached data for persona %s: %s", persona_id, e)
+                else:
+                    cache_state = "fresh" if is_fresh else "stale"
+                    if not is_fresh:
+                        # Stale-while-revalidate: odśwież w tle (single-flight dedupuje)
+                        flight_key = f"{persona_id}:v{version}"
+                        if not _details_flight.inflight(flight_key):
+                            asyncio.create_task(self._revalidate_in_background(persona_id, version))
+
                     asyncio.create_task(log_view_event(persona_id, user_id))
 
                     total_elapsed_ms = int((time.time() - start_time) * 1000)
@@ -134,26 +158,111 @@ class PersonaDetailsService:
                         "persona_details_served_from_cache",
                         extra={
                             "persona_id": str(persona_id),
+                            "cache_state": cache_state,
+                            "cache_version": version,
                             "total_duration_ms": total_elapsed_ms,
                             "db_fetch_ms": fetch_elapsed_ms,
                         }
                     )
-                    return cached_response
-                except ValidationError as e:
-                    logger.warning("Invalid cached data for persona %s: %s", persona_id, e)
+                    return response
+
+        # === RECOMPUTE (single-flight) ===
+        # Współbieżni viewerzy tej samej wersji czekają na jedno przeliczenie.
+        # force_refresh ma osobny klucz - nie dołącza do zwykłego recompute.
+        parallel_start = time.time()
+        flight_key = f"{persona_id}:v{version}" + (":refresh" if force_refresh else "")
+        computed = await _details_flight.run(
+            flight_key,
+            lambda: self._compute_and_cache(self.db, persona, version, force_refresh=force_refresh),
+            lock_ttl_seconds=DETAILS_RECOMPUTE_LOCK_TTL_SECONDS,
+            wait_for=None if force_refresh else lambda: self._read_fresh_computed(persona_id, version),
+        )
+        parallel_elapsed_ms = int((time.time() - parallel_start) * 1000)
+
+        response = self._build_response(persona, computed)
+
+        # === LOG VIEW EVENT ===
+        # Async non-blocking (używamy create_task aby nie czekać na commit)
+        asyncio.create_task(log_view_event(persona_id, user_id))
+
+        total_elapsed_ms = int((time.time() - start_time) * 1000)
+        logger.info(
+            "persona_details_fetched_successfully",
+            extra={
+                "persona_id": str(persona_id),
+                "cache_state": cache_state,
+                "cache_version": version,
+                "total_duration_ms": total_elapsed_ms,
+                "db_fetch_ms": fetch_elapsed_ms,
+                "parallel_fetch_ms": parallel_elapsed_ms,
+                "needs_available": response.needs_and_pains is not None,
+                "force_refresh": force_refresh,
+            }
+        )
+
+        return response
+
+    @staticmethod
+    async def _fetch_persona(db: AsyncSession, persona_id: UUID) -> Persona | None:
+        result = await db.execute(
+            select(Persona).where(Persona.id == persona_id, Persona.is_active.is_(True))
+        )
+        return result.scalars().first()
+
+    @staticmethod
+    async def _read_fresh_computed(persona_id: UUID, version: int) -> dict[str, Any] | None:
+        """Odczyt dla followerów z innych instancji - tylko świeży wpis bieżącej wersji."""
+        cached, is_fresh = await read_cached_details(persona_id, version)
+        return cached if is_fresh else None
+
+    async def _revalidate_in_background(self, persona_id: UUID, version: int) -> None:
+        """
+        Przelicz stale wpis w tle (stale-while-revalidate).
+
+        Note:
+            Używa dedykowanej sesji - sesja requestu może być już zamknięta.
+        """
+        try:
+            async with AsyncSessionLocal() as session:
+                persona = await self._fetch_persona(session, persona_id)
+                if not persona:
+                    return
+                # Persona mogła zostać zedytowana od czasu odczytu - licz pod jej bieżącą wersją
+                version = get_cache_version(persona)
+                await _details_flight.run(
+                    f"{persona_id}:v{version}",
+                    lambda: self._compute_and_cache(session, persona, version, force_refresh=False),
+                    lock_ttl_seconds=DETAILS_RECOMPUTE_LOCK_TTL_SECONDS,
+                    wait_for=lambda: self._read_fresh_computed(persona_id, version),
+                )
+        except Exception as exc:
+            logger.warning("Background revalidation failed for persona %s: %s", persona_id, exc)
+
+    async def _compute_and_cache(
+        self,
+        db: AsyncSession,
+        persona: Persona,
+        version: int,
+        *,
+        force_refresh: bool,
+    ) -> dict[str, Any]:
+        """
+        Równoległy fetch wyliczanych danych + zapis do cache.
+
+        Returns:
+            Dict z needs_and_pains, audit_log (JSON) i segment_brief_data
+        """
+        persona_id = persona.id
 
         # === PARALLEL FETCH COMPUTED DATA ===
         # Używamy asyncio.gather dla równoległego fetchowania (non-blocking)
         # Jeśli któraś operacja failuje, catch exception i zwróć None (graceful degradation)
-
-        parallel_start = time.time()
         needs_and_pains, audit_log, segment_brief_data = await asyncio.gather(
-            fetch_needs_and_pains(self.db, persona, force_refresh=force_refresh),
-            fetch_audit_log(persona_id, self.db, self.audit_service),
-            fetch_segment_brief(self.db, persona, force_refresh=force_refresh),
+            fetch_needs_and_pains(db, persona, force_refresh=force_refresh),
+            fetch_audit_log(persona_id, db, self.audit_service),
+            fetch_segment_brief(db, persona, force_refresh=force_refresh),
             return_exceptions=True,  # Nie failuj całego requesta jeśli 1 operacja failuje
         )
-        parallel_elapsed_ms = int((time.time() - parallel_start) * 1000)
 
         # Handle exceptions from parallel fetch (graceful degradation)
         if isinstance(needs_and_pains, Exception):
@@ -181,6 +290,34 @@ class PersonaDetailsService:
             )
             segment_brief_data = None
 
+        computed = {
+            "needs_and_pains": needs_and_pains,
+            "audit_log": [
+                entry.model_dump(mode="json") if hasattr(entry, "model_dump") else entry
+                for entry in (audit_log if isinstance(audit_log, list) else [])
+            ],
+            "segment_brief_data": segment_brief_data,
+        }
+
+        await write_cached_details(persona_id, version, computed)
+
+        # === PERSIST NEEDS IF FRESHLY GENERATED ===
+        # Jeśli needs_and_pains zostały wygenerowane, zapisz asynchronicznie. Bez zmiany updated_at:
+        # wpis powyżej już zawiera te needs - nowa wersja unieważniłaby go i wymusiła kolejny recompute
+        if needs_and_pains and needs_and_pains != persona.needs_and_pains:
+            asyncio.create_task(
+                persist_persona_field(persona_id, "needs_and_pains", needs_and_pains, invalidate_cache=False)
+            )
+
+        return computed
+
+    @staticmethod
+    def _build_response(persona: Persona, computed: dict[str, Any]) -> PersonaDetailsResponse:
+        """Połącz świeże pola bazowe persony z wyliczonymi (potencjalnie cache'owanymi) danymi."""
+        needs_and_pains = computed.get("needs_and_pains")
+        audit_log = computed.get("audit_log") or []
+        segment_brief_data = computed.get("segment_brief_data")
+
         # Enrich RAG details with segment brief data
         enriched_rag_details = ensure_segment_metadata(persona)
         if segment_brief_data and enriched_rag_details:
@@ -194,7 +331,7 @@ class PersonaDetailsService:
         segment_name = persona.segment_name or (enriched_rag_details.get("segment_name") if enriched_rag_details else None)
 
         # === MERGE DATA ===
-        response = PersonaDetailsResponse(
+        return PersonaDetailsResponse(
             # Base persona data
             id=persona.id,
             project_id=persona.project_id,
@@ -233,7 +370,7 @@ class PersonaDetailsService:
             rag_citations=persona.rag_citations,
             rag_context_details=enriched_rag_details,
             # Audit log
-            audit_log=audit_log if isinstance(audit_log, list) else [],
+            audit_log=audit_log,
             # Metadata
             segment_id=segment_id,
             segment_name=segment_name,
@@ -241,30 +378,3 @@ class PersonaDetailsService:
             updated_at=persona.updated_at,
             is_active=persona.is_active,
         )
-
-        # Cache for 1 hour (vs. 5min) - invalidates automatically via updated_at in cache key
-        await redis_set_json(cache_key, response.model_dump(mode="json"), ttl_seconds=3600)
-
-        # === LOG VIEW EVENT ===
-        # Async non-blocking (używamy create_task aby nie czekać na commit)
-        asyncio.create_task(log_view_event(persona_id, user_id))
-
-        # === PERSIST NEEDS IF FRESHLY GENERATED ===
-        # Jeśli needs_and_pains zostały wygenerowane, zapisz asynchronicznie
-        if needs_and_pains and needs_and_pains != persona.needs_and_pains:
-            asyncio.create_task(persist_persona_field(persona.id, "needs_and_pains", needs_and_pains))
-
-        total_elapsed_ms = int((time.time() - start_time) * 1000)
-        logger.info(
-            "persona_details_fetched_successfully",
-            extra={
-                "persona_id": str(persona_id),
-                "total_duration_ms": total_elapsed_ms,
-                "db_fetch_ms": fetch_elapsed_ms,
-                "parallel_fetch_ms": parallel_elapsed_ms,
-                "needs_available": needs_and_pains is not None and not isinstance(needs_and_pains, Exception),
-                "force_refresh": force_refresh,
-            }
-        )
-
-        return response
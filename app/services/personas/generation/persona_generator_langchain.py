@@ -16,6 +16,7 @@ UWAGA: Od refactoringu (2025-11) większość logiki pomocniczej przeniesiono do
 - prompt_templates.py - prompty dla LLM
 - statistical_validation.py - testy chi-kwadrat
 - rag_integration.py - RAG context fetching
+- structured_output.py - walidacja structured output i naprawa pojedynczych pól
 """
 
 import logging
@@ -23,11 +24,13 @@ import re
 import numpy as np
 from typing import Any
 
+from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
 
 from config import models, features, demographics
-from app.services.shared.clients import build_chat_model
+from app.schemas.persona import PersonaProfileOutput
+from app.services.shared.clients import build_chat_model, with_schema_output
+from app.services.shared.token_budget import PromptBudget
 from app.services.dashboard.usage import (
     UsageLogContext,
     context_with_model,
@@ -49,6 +52,13 @@ from .prompt_templates import (
 )
 from ..validation.statistical_validation import validate_distribution
 from .rag_integration import get_rag_context_for_persona
+from .structured_output import (
+    build_repair_model,
+    build_repair_prompt,
+    extract_raw_payload,
+    find_invalid_fields,
+    structured_output_stats,
+)
 
 
 # Import RAG service singleton
@@ -70,17 +80,23 @@ class PersonaGeneratorLangChain:
     zadanych rozkładów demograficznych i psychologicznych.
     """
 
-    def __init__(self):
-        """Inicjalizuj generator z konfiguracją LangChain i Gemini"""
+    def __init__(self, llm: BaseChatModel | None = None):
+        """Inicjalizuj generator z konfiguracją LangChain i Gemini
+
+        Args:
+            llm: Opcjonalny model zamiast build_chat_model (np. BatchChatModel
+                w trybie batch dużych zadań generacji)
+        """
         # RNG dla próbkowania
         self._rng = np.random.default_rng(features.performance.random_seed)
 
         # Model config z centralnego registry
         model_config = models.get("personas", "generation")
-        self.llm = build_chat_model(**model_config.params)
+        self.llm = llm or build_chat_model(**model_config.params)
 
-        # Konfigurujemy parser JSON, aby wymusić strukturalną odpowiedź
-        self.json_parser = JsonOutputParser()
+        # Structured output: provider dekoduje odpowiedź zgodnie z JSON schema
+        # (include_raw=True - potrzebne do usage logging i naprawy pojedynczych pól)
+        self.structured_llm = with_schema_output(self.llm, PersonaProfileOutput, include_raw=True)
 
         # System prompt z centralnego registry
         from config import prompts
@@ -93,13 +109,6 @@ class PersonaGeneratorLangChain:
             ("user", "{prompt}")
         ])
 
-        # Składamy łańcuch LangChain (prompt -> LLM -> parser)
-        self.persona_chain = (
-            self.persona_prompt
-            | self.llm
-            | self.json_parser
-        )
-
         # Inicjalizuj RAG service (singleton - opcjonalnie, tylko jeśli włączony)
         self.rag_service = None
         if _rag_service_available and features.rag.enabled:
@@ -230,60 +239,112 @@ class PersonaGeneratorLangChain:
             # Dla pól jednoliniowych - usuń wszystkie \\n i znormalizuj spacje
             return re.sub(r'\s+', ' ', text).strip()
 
+    def _log_usage(self, message: Any, usage_context: UsageLogContext | None) -> None:
+        """Schedule token usage logging for a raw LLM message."""
+        if not usage_context or message is None:
+            return
+
+        usage_meta = getattr(message, "usage_metadata", None)
+        if usage_meta is None and hasattr(message, "response_metadata"):
+            meta = message.response_metadata or {}
+            if isinstance(meta, dict):
+                usage_meta = meta.get("usage_metadata") or meta.get("token_usage") or meta
+        if usage_meta is None and hasattr(message, "additional_kwargs"):
+            extras = message.additional_kwargs or {}
+            if isinstance(extras, dict):
+                usage_meta = extras.get("usage_metadata") or extras.get("token_usage")
+
+        schedule_usage_logging(
+            context_with_model(usage_context, getattr(self.llm, "model", None)),
+            usage_meta,
+        )
+
     async def _invoke_persona_llm(
         self,
         prompt_text: str,
         usage_context: UsageLogContext | None = None,
-    ) -> str:
-        """Invoke the chat model and optionally log token usage."""
+        persona_context: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Invoke the chat model in structured-output mode and return a validated persona dict.
+
+        Odpowiedź jest dekodowana zgodnie z PersonaProfileOutput (schema-constrained).
+        Jeśli walidacja nie przejdzie, naprawiamy tylko niepoprawne pola (repair call);
+        ``persona_context`` (profil demograficzny) to jedyny kontekst repair call.
+        """
         messages = self.persona_prompt.format_messages(prompt=prompt_text)
+        result = await self.structured_llm.ainvoke(messages)
+        self._log_usage(result.get("raw"), usage_context)
+        structured_output_stats.total += 1
+
+        parsed = result.get("parsed")
+        if parsed is not None:
+            structured_output_stats.valid_first_pass += 1
+            return parsed.model_dump()
+
+        payload = extract_raw_payload(result.get("raw"))
+        invalid_fields = find_invalid_fields(payload)
+        if not invalid_fields:
+            structured_output_stats.valid_first_pass += 1
+            return PersonaProfileOutput.model_validate(payload).model_dump()
+
+        structured_output_stats.record_invalid(invalid_fields)
+        logger.warning(
+            "persona_structured_output_invalid",
+            extra={
+                "invalid_fields": sorted(invalid_fields),
+                "parsing_error": str(result.get("parsing_error"))[:300],
+            },
+        )
+        return await self._repair_persona_fields(payload, invalid_fields, usage_context, persona_context)
 
-        result = await self.llm.ainvoke(messages)
-
-        if usage_context:
-            usage_meta = None
-            if hasattr(result, "response_metadata"):
-                meta = result.response_metadata or {}
-                if isinstance(meta, dict):
-                    usage_meta = meta.get("usage_metadata") or meta.get("token_usage") or meta
-            if usage_meta is None and hasattr(result, "additional_kwargs"):
-                extras = result.additional_kwargs or {}
-                if isinstance(extras, dict):
-                    usage_meta = extras.get("usage_metadata") or extras.get("token_usage")
-
-            schedule_usage_logging(
-                context_with_model(usage_context, getattr(self.llm, "model", None)),
-                usage_meta,
+    async def _repair_persona_fields(
+        self,
+        payload: dict[str, Any],
+        invalid_fields: dict[str, str],
+        usage_context: UsageLogContext | None = None,
+        persona_context: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Ponownie poproś LLM tylko o niepoprawne pola i scal je z resztą odpowiedzi.
+
+        Repair call nie powtarza promptu generowania (system prompt, kontekst RAG) -
+        dostaje schema pól, błędne wartości, błędy walidacji i krótki kontekst persony.
+
+        Returns:
+            Zwalidowany dict persony; jeśli naprawa się nie uda - scalony payload
+            (best effort, brakujące pola uzupełnia fallback w _generate_personas_task)
+        """
+        repair_model = build_repair_model(list(invalid_fields))
+        repair_llm = with_schema_output(self.llm, repair_model, include_raw=True)
+        result = await repair_llm.ainvoke(build_repair_prompt(payload, invalid_fields, persona_context))
+        self._log_usage(result.get("raw"), usage_context)
+
+        repaired = result.get("parsed")
+        patch = repaired.model_dump() if repaired is not None else extract_raw_payload(result.get("raw"))
+        merged = {**payload, **{key: value for key, value in patch.items() if key in invalid_fields}}
+
+        remaining = find_invalid_fields(merged)
+        if remaining:
+            structured_output_stats.repair_failed += 1
+            logger.error(
+                "persona_structured_output_repair_failed",
+                extra={
+                    "invalid_fields": sorted(remaining),
+                    "stats": structured_output_stats.snapshot(),
+                },
             )
+            return merged
 
-        return self._extract_text_from_result(result)
-
-    def _extract_text_from_result(self, result: Any) -> str:
-        """Normalise LangChain AIMessage/content into a plain string."""
-        content = getattr(result, "content", result)
-        if isinstance(content, list):
-            parts: list[str] = []
-            for item in content:
-                if isinstance(item, dict):
-                    parts.append(str(item.get("text", "")))
-                else:
-                    parts.append(str(item))
-            content = " ".join(part for part in parts if part)
-        if not isinstance(content, str):
-            content = str(content)
-        return content.strip()
-
-    def _parse_persona_response(self, raw_response: str) -> dict[str, Any]:
-        """Parse persona JSON output, preserving existing parser behaviour."""
-        cleaned = raw_response.strip()
-        if cleaned.startswith("```json"):
-            cleaned = cleaned[7:]
-        if cleaned.startswith("```"):
-            cleaned = cleaned[3:]
-        if cleaned.endswith("```"):
-            cleaned = cleaned[:-3]
-        cleaned = cleaned.strip()
-        return self.json_parser.parse(cleaned)
+        structured_output_stats.repaired += 1
+        logger.info(
+            "persona_structured_output_repaired",
+            extra={
+                "repaired_fields": sorted(invalid_fields),
+                "stats": structured_output_stats.snapshot(),
+            },
+        )
+        return PersonaProfileOutput.model_validate(merged).model_dump()
 
     async def generate_persona_personality(
         self,
@@ -365,6 +426,12 @@ class PersonaGeneratorLangChain:
             if orchestration_brief:
                 logger.info(f"Using orchestration brief: {orchestration_brief[:150]}... ({len(orchestration_brief)} chars)")
 
+        # Przytnij kontekst RAG do budżetu tokenów zadania (context_preview zostaje z pełnego kontekstu)
+        if rag_context:
+            prompt_budget = PromptBudget("persona_generation")
+            rag_context = prompt_budget.fit("rag_context", rag_context, marker="\n\n[... kontekst obcięty]")
+            prompt_budget.log(age_group=demographic_profile.get('age_group'))
+
         # Generuj prompt (deleguj do prompt_templates)
         prompt_text = create_persona_prompt(
             demographic_profile,
@@ -382,21 +449,8 @@ class PersonaGeneratorLangChain:
                 f"{demographic_profile.get('gender')}, {demographic_profile.get('location')}"
                 f" | RAG: {'YES' if rag_context else 'NO'}"
             )
-            # Wywołaj łańcuch LangChain (prompt -> LLM -> parser JSON)
-            raw_response = await self._invoke_persona_llm(prompt_text, usage_context)
-            response = self._parse_persona_response(raw_response)
-
-            # Loguj odpowiedź do debugowania
-            logger.info(f"LLM response type: {type(response)}, keys: {response.keys() if isinstance(response, dict) else 'N/A'}")
-
-            # Waliduj wymagane pola
-            required_fields = ["full_name", "persona_title", "headline", "background_story", "values", "interests"]
-            missing_fields = [field for field in required_fields if not response.get(field)]
-            if missing_fields:
-                logger.error(
-                    f"LLM response missing required fields: {missing_fields}. "
-                    f"Response keys: {list(response.keys()) if isinstance(response, dict) else 'NOT A DICT'}"
-                )
+            # Wywołaj LLM w trybie structured output (prompt -> LLM -> PersonaProfileOutput)
+            response = await self._invoke_persona_llm(prompt_text, usage_context, demographic_profile)
 
             # Sanityzuj wszystkie pola tekstowe (usuń nadmiarowe \n\n i whitespace)
             # KLUCZOWE: Zapobiega wyświetlaniu "Zawód\n\nJuż" w UI
@@ -505,8 +559,7 @@ class PersonaGeneratorLangChain:
         )
 
         try:
-            raw_response = await self._invoke_persona_llm(prompt_text, usage_context)
-            response = self._parse_persona_response(raw_response)
+            response = await self._invoke_persona_llm(prompt_text, usage_context, demographic_profile)
 
             # ENFORCE demographic fields (override LLM if needed)
             response['age'] = age
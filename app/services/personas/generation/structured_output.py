@@ -0,0 +1,186 @@
+"""
+Structured output dla generowania person - walidacja, pomiar i naprawa pól
+
+Generator wywołuje LLM w trybie schema-constrained decoding (PersonaProfileOutput).
+Jeśli odpowiedź nie przechodzi walidacji (np. za krótka historia, "N/A" zamiast
+imienia, puste listy), NIE generujemy persony od nowa - ponownie prosimy tylko
+o niepoprawne pola w małym wywołaniu naprawczym (repair call).
+
+Moduł dostarcza:
+- extract_raw_payload() - odzyskanie dict z surowej odpowiedzi (tool call / JSON content)
+- find_invalid_fields() - mapowanie błędów walidacji na nazwy pól
+- build_repair_model() / build_repair_prompt() - schema i prompt dla repair call
+- StructuredOutputStats - liczniki (first-pass valid, repaired, failed, per-field)
+"""
+
+import json
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+from pydantic import BaseModel, ValidationError, create_model
+
+from app.schemas.persona import PersonaProfileOutput
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StructuredOutputStats:
+    """
+    Liczniki jakości structured output (per proces).
+
+    Attributes:
+        total: Liczba odpowiedzi LLM
+        valid_first_pass: Odpowiedzi poprawne bez naprawy
+        repaired: Odpowiedzi naprawione repair call
+        repair_failed: Odpowiedzi, których repair call nie naprawił
+        invalid_fields: Ile razy dane pole było niepoprawne
+    """
+    total: int = 0
+    valid_first_pass: int = 0
+    repaired: int = 0
+    repair_failed: int = 0
+    invalid_fields: Counter = field(default_factory=Counter)
+
+    def record_invalid(self, fields: dict[str, str]) -> None:
+        self.invalid_fields.update(fields.keys())
+
+    def snapshot(self) -> dict[str, Any]:
+        """Zwróć statystyki do logów (valid_rate = first-pass valid / total)."""
+        return {
+            "total": self.total,
+            "valid_first_pass": self.valid_first_pass,
+            "repaired": self.repaired,
+            "repair_failed": self.repair_failed,
+            "valid_rate": round(self.valid_first_pass / self.total, 3) if self.total else None,
+            "invalid_fields": dict(self.invalid_fields),
+        }
+
+
+structured_output_stats = StructuredOutputStats()
+
+
+def extract_raw_payload(raw: Any) -> dict[str, Any]:
+    """
+    Odzyskaj dict z surowej odpowiedzi structured output (gdy parsing Pydantic się nie powiódł).
+
+    Args:
+        raw: AIMessage z ``include_raw=True`` (tool_calls lub JSON w content)
+
+    Returns:
+        Dict z polami odpowiedzi (pusty jeśli nie da się odczytać)
+    """
+    tool_calls = getattr(raw, "tool_calls", None) or []
+    if tool_calls and isinstance(tool_calls[0].get("args"), dict):
+        return dict(tool_calls[0]["args"])
+
+    content = getattr(raw, "content", raw)
+    if isinstance(content, list):
+        content = "".join(
+            str(item.get("text", "")) if isinstance(item, dict) else str(item)
+            for item in content
+        )
+    if not isinstance(content, str) or not content.strip():
+        return {}
+
+    try:
+        payload = json.loads(content)
+    except json.JSONDecodeError:
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def find_invalid_fields(payload: dict[str, Any]) -> dict[str, str]:
+    """
+    Zwaliduj payload względem PersonaProfileOutput.
+
+    Returns:
+        Mapa nazwa_pola → komunikat błędu (pusta = payload poprawny)
+    """
+    try:
+        PersonaProfileOutput.model_validate(payload)
+    except ValidationError as exc:
+        invalid: dict[str, str] = {}
+        for error in exc.errors():
+            name = str(error["loc"][0]) if error.get("loc") else "__root__"
+            invalid.setdefault(name, error.get("msg", "invalid"))
+        return invalid
+    return {}
+
+
+def build_repair_model(field_names: list[str]) -> type[BaseModel]:
+    """
+    Zbuduj schema zawierającą tylko pola do naprawy (te same constraints co PersonaProfileOutput).
+
+    Args:
+        field_names: Nazwy niepoprawnych pól
+
+    Returns:
+        Dynamiczna klasa Pydantic ``PersonaProfileRepair``
+    """
+    definitions = {
+        name: (PersonaProfileOutput.model_fields[name].annotation, PersonaProfileOutput.model_fields[name])
+        for name in field_names
+        if name in PersonaProfileOutput.model_fields
+    }
+    return create_model("PersonaProfileRepair", **definitions)
+
+
+# Krótkie pola tożsamości persony - kontekst repair call (bez historii i list)
+REPAIR_CONTEXT_FIELDS = ("full_name", "persona_title", "occupation", "headline")
+REPAIR_CONTEXT_MAX_CHARS = 160
+REPAIR_VALUE_MAX_CHARS = 300
+
+
+def _truncate(value: Any, limit: int) -> str:
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def build_repair_prompt(
+    payload: dict[str, Any],
+    invalid_fields: dict[str, str],
+    persona_context: dict[str, Any] | None = None,
+) -> str:
+    """
+    Zbuduj krótki prompt naprawczy - schema, wartość i błąd tylko dla niepoprawnych pól.
+
+    Pierwotny prompt (kontekst RAG, brief segmentu) NIE jest powtarzany - repair
+    call dostaje tylko krótki kontekst persony, żeby poprawione pola były spójne.
+
+    Args:
+        payload: Dotychczasowa (częściowo poprawna) odpowiedź
+        invalid_fields: Mapa pole → błąd walidacji
+        persona_context: Profil demograficzny persony (wiek, płeć, lokalizacja...)
+
+    Returns:
+        Tekst promptu dla repair call
+    """
+    properties = PersonaProfileOutput.model_json_schema()["properties"]
+    schema = {name: properties[name] for name in invalid_fields if name in properties}
+    problems = "\n".join(
+        f"- {name}: {message} (otrzymano: {_truncate(payload.get(name), REPAIR_VALUE_MAX_CHARS)})"
+        for name, message in invalid_fields.items()
+    )
+
+    context = {
+        key: value for key, value in (persona_context or {}).items()
+        if value not in (None, "", [])
+    }
+    context.update(
+        {
+            key: _truncate(payload[key], REPAIR_CONTEXT_MAX_CHARS)
+            for key in REPAIR_CONTEXT_FIELDS
+            if key not in invalid_fields and payload.get(key)
+        }
+    )
+
+    return (
+        "Poprzednia odpowiedź zawierała niepoprawne pola persony. "
+        "Zwróć WYŁĄCZNIE poniższe pola, zgodnie ze schematem i spójnie z personą.\n\n"
+        f"SCHEMAT PÓL:\n{json.dumps(schema, ensure_ascii=False)}\n\n"
+        f"BŁĘDY WALIDACJI:\n{problems}\n\n"
+        f"PERSONA:\n{json.dumps(context, ensure_ascii=False, default=str)}"
+    )
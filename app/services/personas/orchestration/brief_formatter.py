@@ -105,6 +105,7 @@ ZWRÓĆ TYLKO NAZWĘ (bez cudzysłowów):"""
             temperature=0.7,
             max_tokens=50,
             timeout=10,
+            response_cache=True,  # ta sama demografia + insighty → ta sama nazwa
         )
 
         response = await llm_flash.ainvoke(prompt)
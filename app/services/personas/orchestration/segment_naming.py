@@ -86,6 +86,7 @@ ZWRÓĆ TYLKO NAZWĘ (bez cudzysłowów, bez dodatkowych wyjaśnień):"""
                 temperature=0.7,
                 max_tokens=50,
                 timeout=10,
+                response_cache=True,  # ta sama demografia + insighty → ta sama nazwa
             )
 
         response = await llm_flash.ainvoke(prompt)
@@ -0,0 +1,17 @@
+"""Cache RAG - dwupoziomowy cache (LRU w procesie → Redis) z wersjonowaniem indeksu."""
+
+from .tiered_cache import (
+    TieredCache,
+    bump_index_version,
+    coalescing_lock_ttl,
+    get_index_version,
+    tiered_cache_metrics,
+)
+
+__all__ = [
+    "TieredCache",
+    "bump_index_version",
+    "coalescing_lock_ttl",
+    "get_index_version",
+    "tiered_cache_metrics",
+]
@@ -0,0 +1,336 @@
+"""Dwupoziomowy cache RAG (LRU w procesie → Redis) z kompresją i wersjonowaniem indeksu.
+
+Wspólna warstwa dla hybrid search (``search/cache.py``) i GraphTraversal
+(kontekst demograficzny z grafu). Zastępuje osobne klienty ``redis.from_url``
+z pretty JSON - korzysta ze współdzielonej binarnej puli z ``app/core/redis.py``.
+
+Poziomy:
+1. LRU w procesie (OrderedDict z TTL) - gorące konteksty demograficzne bez
+   sieciowego round-tripu
+2. Redis (binarna pula) - współdzielony między instancjami, dłuższy TTL
+
+Format wartości: 2-bajtowy nagłówek (serializer, kompresja) + payload.
+Preferowane msgpack + zstd; bez opcjonalnych zależności (extras ``rag-cache``)
+fallback na JSON + zlib. Dekoder rozpoznaje oba formaty po nagłówku.
+
+Klucze: ``rag:{namespace}:v{index_version}:{key}``. Wersja indeksu to licznik
+w Redis (``rag:index_version``) bumpowany po ingest/usunięciu dokumentu -
+stare wpisy przestają być adresowane i wygasają przez TTL. Namespace'y bez
+wersji (``versioned=False``, ``rag:{namespace}:{key}``) przeżywają ingest -
+klucz sam niesie to, od czego zależy wartość (np. wersję schematu grafu).
+
+Metryki wszystkich namespace'ów: ``tiered_cache_metrics.snapshot()``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+import zlib
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.redis import redis_get_json, redis_incr, redis_mget_bytes, redis_mset_bytes
+from config import features
+
+try:
+    import msgpack
+
+    MSGPACK_AVAILABLE = True
+except ImportError:  # pragma: no cover - zależne od środowiska
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:  # pragma: no cover - zależne od środowiska
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION_KEY = "rag:index_version"
+
+_SERIALIZER_MSGPACK = b"m"
+_SERIALIZER_JSON = b"j"
+_COMPRESSION_ZSTD = b"z"
+_COMPRESSION_ZLIB = b"l"
+
+_ZSTD_LEVEL = 3
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CODEC
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+def encode_value(value: Any) -> bytes:
+    """Serializuj i skompresuj wartość (msgpack+zstd lub fallback JSON+zlib)."""
+    return _encode(value)[0]
+
+
+def _encode(value: Any) -> tuple[bytes, int]:
+    """Zwróć (payload, rozmiar przed kompresją) - rozmiar do metryk kompresji."""
+    if MSGPACK_AVAILABLE:
+        serializer, raw = _SERIALIZER_MSGPACK, msgpack.packb(value, use_bin_type=True)
+    else:
+        serializer, raw = _SERIALIZER_JSON, json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    if ZSTD_AVAILABLE:
+        compression, body = _COMPRESSION_ZSTD, zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(raw)
+    else:
+        compression, body = _COMPRESSION_ZLIB, zlib.compress(raw)
+
+    return serializer + compression + body, len(raw)
+
+
+def decode_value(payload: bytes) -> Any:
+    """Odczytaj wartość zapisaną przez :func:`encode_value`.
+
+    Raises:
+        ValueError: Nieznany nagłówek lub brak biblioteki potrzebnej do odczytu
+    """
+    serializer, compression, body = payload[:1], payload[1:2], payload[2:]
+
+    if compression == _COMPRESSION_ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise ValueError("Wpis skompresowany zstd, a zstandard nie jest zainstalowany")
+        raw = zstandard.ZstdDecompressor().decompress(body)
+    elif compression == _COMPRESSION_ZLIB:
+        raw = zlib.decompress(body)
+    else:
+        raise ValueError(f"Nieznany format kompresji: {compression!r}")
+
+    if serializer == _SERIALIZER_MSGPACK:
+        if not MSGPACK_AVAILABLE:
+            raise ValueError("Wpis zapisany jako msgpack, a msgpack nie jest zainstalowany")
+        return msgpack.unpackb(raw, raw=False)
+    if serializer == _SERIALIZER_JSON:
+        return json.loads(raw)
+    raise ValueError(f"Nieznany format serializacji: {serializer!r}")
+
+
+def coalescing_lock_ttl() -> int | None:
+    """TTL Redis locka single-flight dla przeliczeń RAG (None = coalescing tylko w procesie)."""
+    return features.rag_cache.single_flight_lock_seconds or None
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# INDEX VERSION
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+_index_version: int = 0
+_index_version_checked_at: float = 0.0
+
+
+async def get_index_version() -> int:
+    """Zwróć bieżącą wersję indeksu RAG (odświeżaną z Redis co ``version_refresh_seconds``)."""
+    global _index_version, _index_version_checked_at
+
+    now = time.monotonic()
+    if now - _index_version_checked_at >= features.rag_cache.version_refresh_seconds:
+        remote = await redis_get_json(INDEX_VERSION_KEY)
+        if isinstance(remote, int):
+            _index_version = remote
+        _index_version_checked_at = now
+    return _index_version
+
+
+async def bump_index_version() -> int:
+    """Podbij wersję indeksu po ingest/usunięciu dokumentu (unieważnia cache RAG).
+
+    Lokalne LRU są czyszczone od razu; inne instancje przełączą się na nową
+    wersję przy najbliższym odświeżeniu licznika.
+    """
+    global _index_version, _index_version_checked_at
+
+    version = await redis_incr(INDEX_VERSION_KEY)
+    _index_version = version if version is not None else _index_version + 1
+    _index_version_checked_at = time.monotonic()
+    for cache in TieredCache.instances():
+        if cache.versioned:
+            cache.clear_local()
+
+    logger.info("rag_index_version_bumped", extra={"index_version": _index_version})
+    return _index_version
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# METRICS
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+@dataclass
+class _NamespaceStats:
+    memory_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    raw_bytes: int = 0
+    stored_bytes: int = 0
+
+
+class TieredCacheMetrics:
+    """Liczniki cache RAG per namespace (jedno miejsce dla hybrid search i grafu)."""
+
+    def __init__(self) -> None:
+        self._stats: dict[str, _NamespaceStats] = defaultdict(_NamespaceStats)
+
+    def namespace(self, name: str) -> _NamespaceStats:
+        return self._stats[name]
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Zwróć metryki per namespace (hit rate, współczynnik kompresji)."""
+        result: dict[str, dict[str, Any]] = {}
+        for name, stats in self._stats.items():
+            lookups = stats.memory_hits + stats.redis_hits + stats.misses
+            result[name] = {
+                "memory_hits": stats.memory_hits,
+                "redis_hits": stats.redis_hits,
+                "misses": stats.misses,
+                "hit_rate": round((stats.memory_hits + stats.redis_hits) / lookups, 3) if lookups else None,
+                "writes": stats.writes,
+                "compression_ratio": round(stats.raw_bytes / stats.stored_bytes, 2) if stats.stored_bytes else None,
+            }
+        return result
+
+
+tiered_cache_metrics = TieredCacheMetrics()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CACHE
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+class TieredCache:
+    """
+    Cache ``namespace`` → wartość (JSON-like) w LRU z TTL przed Redis.
+
+    Args:
+        namespace: Prefiks kluczy i nazwa w metrykach (np. "hybrid_search")
+        lru_max_entries: Pojemność LRU (domyślnie z ``features.rag_cache``)
+        lru_ttl_seconds: TTL wpisu w LRU
+        redis_ttl_seconds: TTL wpisu w Redis
+        versioned: Czy klucze niosą wersję indeksu RAG (False = wpisy przeżywają ingest)
+    """
+
+    _registry: list[TieredCache] = []
+
+    def __init__(
+        self,
+        namespace: str,
+        *,
+        lru_max_entries: int | None = None,
+        lru_ttl_seconds: float | None = None,
+        redis_ttl_seconds: int | None = None,
+        versioned: bool = True,
+    ) -> None:
+        config = features.rag_cache
+        self.namespace = namespace
+        self.lru_max_entries = config.lru_max_entries if lru_max_entries is None else lru_max_entries
+        self.lru_ttl_seconds = config.lru_ttl_seconds if lru_ttl_seconds is None else lru_ttl_seconds
+        self.redis_ttl_seconds = config.redis_ttl_days * 86400 if redis_ttl_seconds is None else redis_ttl_seconds
+        self.versioned = versioned
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+        TieredCache._registry.append(self)
+
+    @classmethod
+    def instances(cls) -> list[TieredCache]:
+        return list(cls._registry)
+
+    @property
+    def stats(self) -> _NamespaceStats:
+        return tiered_cache_metrics.namespace(self.namespace)
+
+    async def full_key(self, key: str) -> str:
+        """Klucz Redis z namespace i wersją indeksu (bez wersji dla ``versioned=False``)."""
+        if not self.versioned:
+            return f"rag:{self.namespace}:{key}"
+        return f"rag:{self.namespace}:v{await get_index_version()}:{key}"
+
+    def clear_local(self) -> None:
+        """Wyczyść LRU w procesie (Redis zostaje - wersja klucza rozdziela generacje)."""
+        with self._lock:
+            self._entries.clear()
+
+    def _lru_get(self, full_key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at < time.monotonic():
+                del self._entries[full_key]
+                return None
+            self._entries.move_to_end(full_key)
+            return payload
+
+    def _lru_put(self, full_key: str, payload: bytes) -> None:
+        if self.lru_max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[full_key] = (time.monotonic() + self.lru_ttl_seconds, payload)
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.lru_max_entries:
+                self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Any | None:
+        """Pobierz wartość (LRU → Redis); None przy miss lub uszkodzonym wpisie."""
+        if not features.rag_cache.enabled:
+            return None
+
+        full_key = await self.full_key(key)
+        payload = self._lru_get(full_key)
+        if payload is not None:
+            self.stats.memory_hits += 1
+            return self._decode(full_key, payload)
+
+        remote = await redis_mget_bytes([full_key])
+        payload = remote[0] if remote else None
+        if payload:
+            self.stats.redis_hits += 1
+            self._lru_put(full_key, payload)
+            return self._decode(full_key, payload)
+
+        self.stats.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        """Zapisz wartość w LRU i Redis (best-effort)."""
+        if not features.rag_cache.enabled:
+            return
+
+        full_key = await self.full_key(key)
+        try:
+            payload, raw_size = _encode(value)
+        except (TypeError, ValueError) as exc:
+            logger.warning("Nie udało się zserializować wpisu cache %s: %s", full_key, exc)
+            return
+
+        self._lru_put(full_key, payload)
+        await redis_mset_bytes({full_key: payload}, ttl_seconds=self.redis_ttl_seconds)
+
+        stats = self.stats
+        stats.writes += 1
+        stats.raw_bytes += raw_size
+        stats.stored_bytes += len(payload)
+
+    def _decode(self, full_key: str, payload: bytes) -> Any | None:
+        try:
+            return decode_value(payload)
+        except Exception as exc:
+            logger.warning("Uszkodzony wpis cache %s - traktuję jako miss: %s", full_key, exc)
+            with self._lock:
+                self._entries.pop(full_key, None)
+            return None
+
+    def __len__(self) -> int:
+        return len(self._entries)
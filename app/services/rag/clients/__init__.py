@@ -1,5 +1,12 @@
 """Klienty RAG (Neo4j vector store, graph store)."""
 
-from .rag_clients import get_graph_store, get_vector_store
+from .local_index import LocalVectorIndex, get_local_index
+from .rag_clients import get_graph_store, get_vector_store, vector_search_with_score
 
-__all__ = ["get_graph_store", "get_vector_store"]
+__all__ = [
+    "get_graph_store",
+    "get_vector_store",
+    "vector_search_with_score",
+    "LocalVectorIndex",
+    "get_local_index",
+]
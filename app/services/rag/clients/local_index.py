@@ -0,0 +1,329 @@
+"""Lokalne lustro indeksu wektorowego RAG (ANN w procesie).
+
+Korpus RAG jest mały i w większości statyczny, więc zamiast każdego vector
+search przez sieć do indeksu wektorowego Neo4j możemy odpowiadać z pamięci:
+
+- Snapshot budowany z embeddingów ``RAGChunk`` (stronicowy odczyt z Neo4j)
+  i zapisywany w ``local_index.snapshot_dir/v{wersja}/``:
+  ``vectors.npy`` (znormalizowane float32), ``chunks.json`` (id, tekst,
+  metadata) i opcjonalnie ``hnsw.bin``
+- Wektory czytane przez ``np.load(mmap_mode="r")`` - workery na jednym
+  hoście współdzielą strony page cache zamiast trzymać własne kopie
+- Backend: hnswlib (extras ``rag-local-index``) albo dokładny NumPy
+  brute-force (iloczyn skalarny na znormalizowanych wektorach)
+- Wersja snapshotu = wersja indeksu RAG (``rag:index_version``, bumpowana
+  po ingest/usunięciu dokumentu) - nowa wersja → przebudowa w tle
+
+Neo4j pozostaje źródłem prawdy i fallbackiem: dopóki snapshot dla bieżącej
+wersji nie jest wczytany (albo budowa się nie powiodła), ``get_local_index``
+zwraca None i zapytanie idzie do Neo4j. Score jak w indeksie wektorowym
+Neo4j dla cosine: ``(1 + cos) / 2``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.services.rag.caching.tiered_cache import get_index_version
+from config import rag
+
+try:
+    import hnswlib
+
+    HNSWLIB_AVAILABLE = True
+except ImportError:  # pragma: no cover - zależne od środowiska
+    hnswlib = None
+    HNSWLIB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+BACKEND_AUTO = "auto"
+BACKEND_HNSW = "hnsw"
+BACKEND_NUMPY = "numpy"
+
+VECTORS_FILE = "vectors.npy"
+CHUNKS_FILE = "chunks.json"
+HNSW_FILE = "hnsw.bin"
+
+LOAD_CHUNKS_QUERY = """
+MATCH (c:`{label}`)
+WHERE c.`{embedding}` IS NOT NULL AND c.id > $after
+RETURN c.id AS id, c.`{text}` AS text, c.`{embedding}` AS embedding,
+       c {{.*, `{text}`: Null, `{embedding}`: Null, id: Null}} AS metadata
+ORDER BY c.id
+LIMIT $limit
+"""
+
+
+def resolve_backend(backend: str) -> str:
+    """Backend faktycznie używany dla ustawienia ``local_index.backend``."""
+    if backend == BACKEND_AUTO:
+        return BACKEND_HNSW if HNSWLIB_AVAILABLE else BACKEND_NUMPY
+    if backend == BACKEND_HNSW and not HNSWLIB_AVAILABLE:
+        logger.warning("hnswlib niedostępny - lokalny indeks RAG używa NumPy brute-force")
+        return BACKEND_NUMPY
+    if backend not in (BACKEND_HNSW, BACKEND_NUMPY):
+        logger.warning("Nieznany backend lokalnego indeksu RAG '%s' - używam NumPy brute-force", backend)
+        return BACKEND_NUMPY
+    return backend
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+def _build_hnsw(vectors: np.ndarray) -> Any:
+    config = rag.local_index
+    index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+    index.init_index(max_elements=len(vectors), ef_construction=config.hnsw_ef_construction, M=config.hnsw_m)
+    index.add_items(vectors, np.arange(len(vectors)))
+    index.set_ef(config.hnsw_ef_search)
+    return index
+
+
+class LocalVectorIndex:
+    """Snapshot embeddingów chunków jednej wersji indeksu RAG.
+
+    Args:
+        version: Wersja indeksu RAG, z której zbudowano snapshot
+        ids: Identyfikatory chunków (``RAGChunk.id``)
+        texts: Treść chunków
+        metadatas: Metadata chunków (jak w ``Neo4jVector``)
+        vectors: Znormalizowane embeddingi (N × dim, float32; może być memmap)
+        hnsw_index: Indeks hnswlib (None = brute-force)
+    """
+
+    def __init__(
+        self,
+        version: int,
+        ids: list[str],
+        texts: list[str],
+        metadatas: list[dict[str, Any]],
+        vectors: np.ndarray,
+        hnsw_index: Any = None,
+    ):
+        self.version = version
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.vectors = vectors
+        self._hnsw = hnsw_index
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def backend(self) -> str:
+        return BACKEND_HNSW if self._hnsw is not None else BACKEND_NUMPY
+
+    @classmethod
+    def from_records(cls, version: int, records: list[dict[str, Any]], backend: str) -> LocalVectorIndex:
+        """Zbuduj indeks z rekordów ``LOAD_CHUNKS_QUERY``."""
+        ids = [record["id"] for record in records]
+        texts = [record.get("text") or "" for record in records]
+        metadatas = [
+            {key: value for key, value in (record.get("metadata") or {}).items() if value is not None}
+            for record in records
+        ]
+        if records:
+            vectors = _normalize(np.asarray([record["embedding"] for record in records], dtype=np.float32))
+        else:
+            vectors = np.zeros((0, 0), dtype=np.float32)
+        hnsw_index = _build_hnsw(vectors) if backend == BACKEND_HNSW and records else None
+        return cls(version, ids, texts, metadatas, vectors, hnsw_index)
+
+    def save(self, path: Path) -> None:
+        """Zapisz snapshot atomowo (katalog tymczasowy → rename)."""
+        tmp_path = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
+        np.save(tmp_path / VECTORS_FILE, np.ascontiguousarray(self.vectors))
+        with open(tmp_path / CHUNKS_FILE, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": self.version, "ids": self.ids, "texts": self.texts, "metadatas": self.metadatas},
+                f,
+                ensure_ascii=False,
+                default=str,
+            )
+        if self._hnsw is not None:
+            self._hnsw.save_index(str(tmp_path / HNSW_FILE))
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Inny worker zapisał snapshot tej wersji pierwszy - używamy jego
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: Path, backend: str) -> LocalVectorIndex:
+        """Wczytaj snapshot - wektory przez mmap (współdzielone strony między workerami)."""
+        with open(path / CHUNKS_FILE, encoding="utf-8") as f:
+            chunks = json.load(f)
+        ids = chunks["ids"]
+        vectors = np.load(path / VECTORS_FILE, mmap_mode="r" if ids else None)
+
+        hnsw_index = None
+        if backend == BACKEND_HNSW and ids and (path / HNSW_FILE).exists():
+            hnsw_index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+            hnsw_index.load_index(str(path / HNSW_FILE), max_elements=len(ids))
+            hnsw_index.set_ef(rag.local_index.hnsw_ef_search)
+        return cls(chunks["version"], ids, chunks["texts"], chunks["metadatas"], vectors, hnsw_index)
+
+    def search(self, embedding: list[float], k: int) -> list[tuple[Document, float]]:
+        """Top-k chunków dla embeddingu zapytania (Document, score jak w Neo4j)."""
+        if not self.ids or k <= 0:
+            return []
+
+        query = _normalize(np.asarray(embedding, dtype=np.float32).reshape(1, -1))[0]
+        if query.shape[0] != self.vectors.shape[1]:
+            raise ValueError(
+                f"Wymiar embeddingu zapytania ({query.shape[0]}) ≠ wymiar snapshotu ({self.vectors.shape[1]})"
+            )
+        k = min(k, len(self.ids))
+
+        if self._hnsw is not None:
+            self._hnsw.set_ef(max(rag.local_index.hnsw_ef_search, k))
+            labels, distances = self._hnsw.knn_query(query, k=k)
+            positions = labels[0]
+            cosines = 1.0 - distances[0]
+        else:
+            scores = self.vectors @ query
+            candidates = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+            positions = candidates[np.argsort(-scores[candidates], kind="stable")]
+            cosines = scores[positions]
+
+        return [
+            (
+                Document(page_content=self.texts[position], metadata=dict(self.metadatas[position])),
+                float((1.0 + cosine) / 2.0),
+            )
+            for position, cosine in zip(positions.tolist(), cosines.tolist())
+        ]
+
+
+def fetch_chunk_records(vector_store: Any, page_size: int) -> list[dict[str, Any]]:
+    """Odczytaj embeddingi chunków z Neo4j stronicowo (keyset po ``id``; blokujące)."""
+    query = LOAD_CHUNKS_QUERY.format(
+        label=vector_store.node_label,
+        text=vector_store.text_node_property,
+        embedding=vector_store.embedding_node_property,
+    )
+    records: list[dict[str, Any]] = []
+    after = ""
+    while True:
+        page = vector_store.query(query, params={"after": after, "limit": page_size})
+        if not page:
+            return records
+        records.extend(page)
+        after = page[-1]["id"]
+
+
+class LocalIndexManager:
+    """Wersjonowane lustro indeksu wektorowego - snapshot per wersja indeksu RAG.
+
+    Nowa wersja indeksu (po ingest) → wczytanie istniejącego snapshotu (inny
+    worker już go zbudował) albo budowa z Neo4j, w tle. W tym czasie
+    :meth:`get` zwraca None (fallback do Neo4j). Dwa workery budujące tę samą
+    wersję równocześnie zapiszą ją raz - przegrany rename odrzuca swoją kopię.
+
+    Args:
+        snapshot_dir: Katalog snapshotów
+        backend: ``auto`` | ``hnsw`` | ``numpy``
+    """
+
+    def __init__(self, snapshot_dir: str | Path, backend: str = BACKEND_AUTO):
+        self.snapshot_dir = Path(snapshot_dir)
+        self.backend = resolve_backend(backend)
+        self._index: LocalVectorIndex | None = None
+        self._refresh_task: asyncio.Task | None = None
+        self._failed_version: int | None = None
+
+    def snapshot_path(self, version: int) -> Path:
+        return self.snapshot_dir / f"v{version}"
+
+    async def get(self, vector_store: Any) -> LocalVectorIndex | None:
+        """Indeks dla bieżącej wersji albo None (i przebudowa w tle)."""
+        version = await get_index_version()
+        index = self._index
+        if index is not None and index.version == version:
+            return index
+        self._schedule_refresh(version, vector_store)
+        return None
+
+    def _schedule_refresh(self, version: int, vector_store: Any) -> None:
+        if version == self._failed_version:
+            return
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.create_task(self.refresh(version, vector_store))
+
+    async def refresh(self, version: int, vector_store: Any) -> LocalVectorIndex | None:
+        """Wczytaj albo zbuduj snapshot wersji ``version`` (wątek, nie blokuje event loop)."""
+        start = time.perf_counter()
+        try:
+            index, built = await asyncio.to_thread(self._load_or_build, version, vector_store)
+        except Exception as exc:
+            self._failed_version = version
+            logger.warning(
+                "Nie udało się przygotować lokalnego indeksu RAG (v%s): %s - wyszukiwanie przez Neo4j",
+                version,
+                exc,
+            )
+            return None
+
+        self._index = index
+        logger.info(
+            "rag_local_index_ready",
+            extra={
+                "index_version": version,
+                "chunks": len(index),
+                "backend": index.backend,
+                "built": built,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            },
+        )
+        return index
+
+    def _load_or_build(self, version: int, vector_store: Any) -> tuple[LocalVectorIndex, bool]:
+        path = self.snapshot_path(version)
+        built = False
+        if not path.exists():
+            records = fetch_chunk_records(vector_store, rag.local_index.build_page_size)
+            LocalVectorIndex.from_records(version, records, self.backend).save(path)
+            built = True
+            self._prune_snapshots(keep=path)
+        return LocalVectorIndex.load(path, self.backend), built
+
+    def _prune_snapshots(self, keep: Path) -> None:
+        """Usuń starsze snapshoty (zmapowane pliki pozostają ważne dla workerów, które je trzymają)."""
+        for path in self.snapshot_dir.glob("v*"):
+            if path != keep and path.is_dir() and ".tmp-" not in path.name:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+_manager: LocalIndexManager | None = None
+
+
+async def get_local_index(vector_store: Any) -> LocalVectorIndex | None:
+    """Lokalny indeks dla bieżącej wersji indeksu RAG albo None (→ Neo4j).
+
+    Pierwsze wywołanie po starcie i po każdym bumpie wersji uruchamia
+    wczytanie/budowę snapshotu w tle.
+    """
+    global _manager
+    if not rag.local_index.enabled:
+        return None
+    if _manager is None:
+        _manager = LocalIndexManager(rag.local_index.snapshot_dir, rag.local_index.backend)
+    return await _manager.get(vector_store)
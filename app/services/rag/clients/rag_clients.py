@@ -4,23 +4,30 @@ Pomocnicze funkcje do zarządzania połączeniami z Neo4j dla usług RAG.
 Zapewnia:
 - współdzielony dostęp do Neo4jVector oraz Neo4jGraph
 - retry logic z wykładniczym backoffem
+- vector search z async (cache'owanym) embeddingiem zapytania
+- opcjonalne lokalne lustro indeksu wektorowego (``local_index.py``)
 - spójne logowanie
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import time
 from typing import TypeVar
 from collections.abc import Callable
 
+from langchain_core.documents import Document
 from langchain_neo4j import Neo4jGraph, Neo4jVector
 
 from config import app
 from app.services.shared.clients import get_embeddings
+from .local_index import get_local_index
 
 T = TypeVar("T")
 
+logger = logging.getLogger(__name__)
+
 _VECTOR_STORE: Neo4jVector | None = None
 _GRAPH_STORE: Neo4jGraph | None = None
 
@@ -121,3 +128,43 @@ def get_graph_store(logger: logging.Logger) -> Neo4jGraph | None:
             "Neo4j Graph Store",
         )
     return _GRAPH_STORE
+
+
+async def vector_search_with_score(
+    vector_store: Neo4jVector,
+    query: str,
+    k: int,
+) -> list[tuple[Document, float]]:
+    """Vector search z embeddingiem zapytania przez async API modelu.
+
+    ``Neo4jVector.asimilarity_search_with_score`` uruchamia synchroniczne
+    ``embed_query`` w executorze, więc omija Redis w cache embeddingów.
+    Tutaj embedujemy zapytanie przez ``aembed_query`` (LRU + Redis), a samo
+    zapytanie do indeksu wektorowego (blokujący driver) wykonujemy w wątku.
+
+    Przy włączonym ``local_index`` i gotowym snapshocie dla bieżącej wersji
+    indeksu RAG wyszukiwanie odbywa się w procesie (bez round-tripu do Neo4j).
+
+    Args:
+        vector_store: Instancja Neo4jVector
+        query: Tekst zapytania
+        k: Liczba wyników
+
+    Returns:
+        Lista (Document, score)
+    """
+    embedding = await vector_store.embedding.aembed_query(query)
+
+    local_index = await get_local_index(vector_store)
+    if local_index is not None:
+        try:
+            return local_index.search(embedding, k)
+        except Exception as exc:
+            logger.warning("Lokalny indeks RAG zawiódł (%s) - vector search przez Neo4j", exc)
+
+    return await asyncio.to_thread(
+        vector_store.similarity_search_with_score_by_vector,
+        embedding,
+        k=k,
+        query=query,
+    )
@@ -1,5 +1,6 @@
 """Moduł zarządzania dokumentami RAG."""
 
 from .document_service import RAGDocumentService
+from .ingest_checkpoint import IngestCheckpoint
 
-__all__ = ["RAGDocumentService"]
+__all__ = ["RAGDocumentService", "IngestCheckpoint"]
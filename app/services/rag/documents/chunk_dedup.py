@@ -0,0 +1,215 @@
+"""Deduplikacja chunków RAG po hashu znormalizowanej treści.
+
+Chunk w Neo4j (``RAGChunk``) ma ``id`` = SHA-256 znormalizowanego tekstu.
+Ten sam fragment (boilerplate, niezmieniona strona poprawionej wersji raportu)
+jest przechowywany raz, a dokumenty, które go zawierają, trafiają do listy
+``doc_ids`` na węźle chunku, węźle źródłowym ``Document`` i węzłach grafu
+wspomnianych przez ten chunk (``MENTIONS``).
+
+- Ingest pomija embedding i ekstrakcję grafu dla hashy już obecnych w indeksie
+  i tylko dopisuje nowy ``doc_id`` (``link_chunks_to_document``); chunk dostaje
+  też relację ``IN_DOCUMENT`` do węzła-kotwicy ``RAGDocumentRef {id: doc_id}``
+- Usunięcie dokumentu zdejmuje jego ``doc_id`` z węzłów współdzielonych
+  i kasuje tylko węzły, do których nie odwołuje się już żaden dokument
+  (``release_document_nodes``). Węzły dokumentu wyszukiwane są po indeksach:
+  chunki przez kotwicę i ``RAGChunk.doc_id``, źródła ``Document`` po ``id``
+  chunku, encje przez ``MENTIONS`` - bez skanu całego grafu
+
+Węzły sprzed deduplikacji (bez ``doc_ids``) traktowane są jak należące
+wyłącznie do ``doc_id``. Metadane dokumentu na węźle (tytuł, kraj, plik)
+opisują jego ``doc_id`` - przy przepięciu na kolejnego właściciela są
+nadpisywane jego metadanymi (``owner_metadata``), a ``chunk_index`` usuwany,
+bo pozycja chunku w nowym dokumencie nie jest znana.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import unicodedata
+from typing import Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+FIND_EXISTING_CHUNKS_QUERY = """
+UNWIND $ids AS chunk_id
+MATCH (c:RAGChunk {id: chunk_id})
+WHERE c.embedding IS NOT NULL
+RETURN c.id AS id
+"""
+
+# Indeksy pod wyszukiwanie węzłów dokumentu (tworzone raz na proces, ``ensure_dedup_indexes``)
+DEDUP_INDEX_QUERIES = (
+    "CREATE INDEX rag_chunk_id IF NOT EXISTS FOR (n:RAGChunk) ON (n.id)",
+    "CREATE INDEX rag_chunk_doc_id IF NOT EXISTS FOR (n:RAGChunk) ON (n.doc_id)",
+    "CREATE INDEX document_id IF NOT EXISTS FOR (n:Document) ON (n.id)",
+    "CREATE CONSTRAINT rag_document_ref_id IF NOT EXISTS FOR (n:RAGDocumentRef) REQUIRE n.id IS UNIQUE",
+)
+
+LINK_CHUNKS_QUERY = """
+MERGE (ref:RAGDocumentRef {id: $doc_id})
+WITH ref
+UNWIND $ids AS chunk_id
+MATCH (c:RAGChunk {id: chunk_id})
+MERGE (c)-[:IN_DOCUMENT]->(ref)
+WITH c, chunk_id
+OPTIONAL MATCH (d:Document {id: chunk_id})
+OPTIONAL MATCH (d)-[:MENTIONS]->(entity)
+WITH collect(DISTINCT c) + collect(DISTINCT d) + collect(DISTINCT entity) AS nodes
+UNWIND nodes AS node
+WITH DISTINCT node
+WITH node, coalesce(node.doc_ids, CASE WHEN node.doc_id IS NULL THEN [] ELSE [node.doc_id] END) AS owners
+SET node.doc_ids = CASE WHEN $doc_id IN owners THEN owners ELSE owners + $doc_id END
+RETURN count(node) AS linked
+"""
+
+# Oba zapytania wykonywane w transakcjach niejawnych (``session.run``) - tylko
+# tam dozwolone jest ``CALL { ... } IN TRANSACTIONS``. Każda paczka ``$batch_size``
+# węzłów commitowana osobno, więc pamięć transakcji nie rośnie z rozmiarem dokumentu.
+# ``$owners``: doc_id -> ``owner_metadata`` dla dokumentów, które mogą przejąć węzeł.
+#
+# Węzły dokumentu: chunki przez kotwicę (``IN_DOCUMENT``) lub ``doc_id`` (dane sprzed
+# kotwic), dalej źródła ``Document`` i encje (``MENTIONS``). Encje i źródła przed
+# chunkami - przerwane usuwanie wciąż dotrze do nich przez nieskasowane jeszcze chunki.
+_DOCUMENT_NODES_MATCH = """
+CALL {
+  MATCH (:RAGDocumentRef {id: $doc_id})<-[:IN_DOCUMENT]-(c:RAGChunk)
+  RETURN c
+  UNION
+  MATCH (c:RAGChunk {doc_id: $doc_id})
+  RETURN c
+}
+OPTIONAL MATCH (d:Document {id: c.id})
+OPTIONAL MATCH (d)-[:MENTIONS]->(e)
+WITH collect(DISTINCT e) + collect(DISTINCT d) + collect(DISTINCT c) AS nodes
+UNWIND nodes AS n
+WITH n
+WHERE n.doc_id = $doc_id OR $doc_id IN coalesce(n.doc_ids, [])
+"""
+
+RELEASE_SHARED_NODES_QUERY = _DOCUMENT_NODES_MATCH + """
+WITH n, [owner IN coalesce(n.doc_ids, [n.doc_id]) WHERE owner <> $doc_id] AS remaining
+WHERE size(remaining) > 0
+CALL {
+  WITH n, remaining
+  WITH n, remaining, n.doc_id = $doc_id AS reassigned, $owners[remaining[0]] AS owner
+  FOREACH (properties IN CASE
+      WHEN reassigned AND owner IS NOT NULL
+      THEN [CASE WHEN n:RAGChunk OR n:Document THEN owner.chunk ELSE owner.entity END]
+      ELSE [] END |
+    SET n += properties
+  )
+  SET n.doc_ids = remaining,
+      n.doc_id = CASE WHEN reassigned THEN remaining[0] ELSE n.doc_id END,
+      n.chunk_index = CASE WHEN reassigned THEN null ELSE n.chunk_index END
+} IN TRANSACTIONS OF $batch_size ROWS
+RETURN count(*) AS kept
+"""
+
+DELETE_EXCLUSIVE_NODES_QUERY = _DOCUMENT_NODES_MATCH + """
+CALL {
+  WITH n
+  DETACH DELETE n
+} IN TRANSACTIONS OF $batch_size ROWS
+RETURN count(*) AS deleted
+"""
+
+# Kotwica na końcu - wcześniejsze kroki (także powtórzone po przerwaniu) jej potrzebują
+DELETE_DOCUMENT_REF_QUERY = """
+MATCH (ref:RAGDocumentRef {id: $doc_id})
+DETACH DELETE ref
+"""
+
+_indexes_ready = False
+
+
+def normalize_chunk_text(text: str) -> str:
+    """Normalizacja przed hashowaniem: NFKC + zwinięte białe znaki."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def chunk_content_hash(text: str) -> str:
+    """Stabilny identyfikator chunku (SHA-256 znormalizowanej treści)."""
+    return hashlib.sha256(normalize_chunk_text(text).encode("utf-8")).hexdigest()
+
+
+def owner_metadata(title: str, country: str | None, source_file: str) -> dict[str, dict[str, Any]]:
+    """Metadane dokumentu w formie zapisywanej przy ingeście na węzłach.
+
+    ``chunk`` - właściwości ``RAGChunk`` / źródłowego ``Document`` (metadane chunku),
+    ``entity`` - właściwości węzłów grafu (``enrich_graph_nodes``).
+    """
+    country = country or "Poland"
+    return {
+        "chunk": {"title": title, "country": country, "source_file": source_file},
+        "entity": {"document_title": title, "document_country": country},
+    }
+
+
+def ensure_dedup_indexes(session: Any) -> None:
+    """Tworzy indeksy ``DEDUP_INDEX_QUERIES`` raz na proces (best-effort, blokujące)."""
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    for query in DEDUP_INDEX_QUERIES:
+        try:
+            session.run(query).consume()
+        except Exception as exc:  # np. równoważny indeks/constraint już istnieje pod inną nazwą
+            logger.warning("Nie udało się utworzyć indeksu deduplikacji chunków: %s", exc)
+    _indexes_ready = True
+
+
+def find_existing_chunks(driver: Any, chunk_ids: Iterable[str]) -> set[str]:
+    """Zwraca hashe chunków, które mają już embedding w indeksie (blokujące)."""
+    ids = list(chunk_ids)
+    if not ids:
+        return set()
+    with driver.session() as session:
+        records = session.execute_read(
+            lambda tx: tx.run(FIND_EXISTING_CHUNKS_QUERY, ids=ids).data()
+        )
+    return {record["id"] for record in records}
+
+
+def link_chunks_to_document(driver: Any, chunk_ids: Iterable[str], doc_id: str) -> int:
+    """Dopisuje ``doc_id`` do chunków, ich źródeł i wspomnianych węzłów (blokujące)."""
+    ids = list(chunk_ids)
+    if not ids:
+        return 0
+    with driver.session() as session:
+        ensure_dedup_indexes(session)
+        record = session.execute_write(
+            lambda tx: tx.run(LINK_CHUNKS_QUERY, ids=ids, doc_id=doc_id).single()
+        )
+    return record["linked"] if record else 0
+
+
+def release_document_nodes(
+    driver: Any,
+    doc_id: str,
+    batch_size: int = 1000,
+    owners: dict[str, dict[str, dict[str, Any]]] | None = None,
+) -> dict[str, int]:
+    """Odpina dokument od współdzielonych węzłów i kasuje węzły tylko jego (blokujące).
+
+    Węzeł przepięty na kolejnego właściciela dostaje jego metadane z ``owners``
+    (doc_id -> ``owner_metadata``); właściciel spoza mapy zachowuje dotychczasowe.
+
+    Oba kroki commitowane paczkami po ``batch_size`` węzłów. Przerwane usuwanie
+    można bezpiecznie powtórzyć: odpięte węzły nie pasują już do ``doc_id``,
+    a skasowane znikają z dopasowania.
+    """
+    with driver.session() as session:
+        ensure_dedup_indexes(session)
+        kept = session.run(
+            RELEASE_SHARED_NODES_QUERY, doc_id=doc_id, batch_size=batch_size, owners=owners or {}
+        ).single()
+        deleted = session.run(DELETE_EXCLUSIVE_NODES_QUERY, doc_id=doc_id, batch_size=batch_size).single()
+        session.run(DELETE_DOCUMENT_REF_QUERY, doc_id=doc_id).consume()
+    return {
+        "kept": kept["kept"] if kept else 0,
+        "deleted": deleted["deleted"] if deleted else 0,
+    }
@@ -1,10 +1,11 @@
 """Serwis zarządzający dokumentami RAG - wczytywanie, chunking, vector store.
 
 Ten moduł odpowiada za podstawową infrastrukturę przetwarzania dokumentów:
-- Wczytywanie PDF/DOCX
+- Wczytywanie PDF/DOCX (strona po stronie)
 - Dzielenie na chunki
-- Generowanie embeddingów
-- Zapis do Neo4j Vector Store
+- Generowanie embeddingów i zapis do Neo4j Vector Store w batchach
+- Checkpoint postępu per chunk (wznawialny ingest, patrz ingest_checkpoint.py)
+- Deduplikacja chunków po hashu treści (patrz chunk_dedup.py)
 - Zarządzanie dokumentami (lista, usuwanie)
 
 Graph RAG funkcjonalność znajduje się w rag_graph_service.py
@@ -22,6 +23,8 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from langchain_community.document_loaders import Docx2txtLoader, PyPDFLoader
+from langchain_community.graphs.graph_document import GraphDocument
+from langchain_core.documents import Document
 from langchain_experimental.graph_transformers.llm import LLMGraphTransformer
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
@@ -35,7 +38,24 @@ from app.core.rag_config import (
 from config import prompts
 from app.models.rag_document import RAGDocument
 from app.services.shared.clients import build_chat_model
-from app.services.rag.clients import get_graph_store, get_vector_store
+from app.services.rag.clients import get_graph_store, get_local_index, get_vector_store
+from app.services.rag.caching import bump_index_version
+from app.services.rag.graph.term_index import schedule_graph_term_indexes
+from .chunk_dedup import (
+    chunk_content_hash,
+    find_existing_chunks,
+    link_chunks_to_document,
+    owner_metadata,
+    release_document_nodes,
+)
+from .ingest_checkpoint import (
+    STAGE_DONE,
+    STAGE_GRAPH,
+    STAGE_LOAD,
+    STAGE_VECTOR,
+    CheckpointSaver,
+    IngestCheckpoint,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -66,20 +86,36 @@ class RAGDocumentService:
         self.vector_store = get_vector_store(logger)
         self.graph_store = get_graph_store(logger)
 
-    async def ingest_document(self, file_path: str, metadata: dict[str, Any]) -> dict[str, Any]:
-        """Przetwarza dokument przez pełny pipeline: load → chunk → graph → vector.
+    async def ingest_document(
+        self,
+        file_path: str,
+        metadata: dict[str, Any],
+        *,
+        checkpoint: IngestCheckpoint | None = None,
+        save_checkpoint: CheckpointSaver | None = None,
+    ) -> dict[str, Any]:
+        """Przetwarza dokument etapami: load (strona po stronie) → split → graph → vector.
+
+        Etap graph konwertuje chunki z ograniczoną współbieżnością i zapisuje graf
+        w batchach, etap vector liczy embeddingi i zapisuje je w batchach. Po każdym
+        batchu postęp (indeksy chunków) trafia do ``save_checkpoint``, więc ponowne
+        wywołanie z tym samym checkpointem pomija chunki już zapisane. Blokujące
+        zapisy do Neo4j wykonywane są w wątkach (``asyncio.to_thread``).
 
         Args:
             file_path: Ścieżka do pliku PDF lub DOCX zapisanej kopii dokumentu.
             metadata: Metadane dokumentu (doc_id, title, country, itp.).
+            checkpoint: Postęp z poprzedniej próby (None = ingest od zera).
+            save_checkpoint: Callback utrwalający postęp (np. w RAGDocument).
 
         Returns:
-            Słownik zawierający liczbę chunków oraz status zakończenia procesu.
+            Słownik zawierający liczbę chunków, status oraz etap, na którym skończono.
+            Status ``partial`` - dokument zaindeksowany, ale ekstrakcja grafu nie
+            powiodła się dla części chunków (``graph_failed``, ponawiane przy retry).
 
         Raises:
             RuntimeError: Gdy brakuje połączenia z Neo4j (vector store jest kluczowy).
             FileNotFoundError: Jeśli plik nie istnieje.
-            ValueError: Przy nieobsługiwanym rozszerzeniu lub braku treści.
         """
 
         if not self.vector_store:
@@ -89,155 +125,432 @@ class RAGDocumentService:
         if not path.exists():
             raise FileNotFoundError(f"Nie znaleziono pliku: {file_path}")
 
-        logger.info("Rozpoczynam przetwarzanie dokumentu: %s", path.name)
+        if checkpoint is None:
+            checkpoint = IngestCheckpoint(
+                chunk_size=rag.chunking.chunk_size,
+                chunk_overlap=rag.chunking.chunk_overlap,
+            )
+
+        doc_id = metadata.get("doc_id")
+        logger.info(
+            "Rozpoczynam przetwarzanie dokumentu: %s",
+            path.name,
+            extra={
+                "doc_id": str(doc_id),
+                "resumed_graph_chunks": len(checkpoint.graph_done),
+                "resumed_vector_chunks": len(checkpoint.vector_done),
+            },
+        )
 
         try:
-            # 1. LOAD – wybór loadera zależnie od rozszerzenia pliku.
-            file_extension = path.suffix.lower()
-            if file_extension == ".pdf":
-                loader = PyPDFLoader(str(path))
-                logger.info("Używam PyPDFLoader dla pliku %s", path.name)
-            elif file_extension == ".docx":
-                loader = Docx2txtLoader(str(path))
-                logger.info("Używam Docx2txtLoader dla pliku %s", path.name)
+            # 1-2. LOAD + SPLIT – strona po stronie, chunki numerowane w kolejności.
+            checkpoint.stage = STAGE_LOAD
+            chunks = await self._load_and_split(path, metadata)
+
+            if checkpoint.total_chunks and checkpoint.total_chunks != len(chunks):
+                # Plik lub splitter zmienił się od poprzedniej próby - indeksy nie pasują
+                logger.warning(
+                    "Liczba chunków różni się od checkpointu (%s → %s) – ingest od zera.",
+                    checkpoint.total_chunks,
+                    len(chunks),
+                    extra={"doc_id": str(doc_id)},
+                )
+                checkpoint = IngestCheckpoint(
+                    chunk_size=checkpoint.chunk_size,
+                    chunk_overlap=checkpoint.chunk_overlap,
+                )
+            checkpoint.total_chunks = len(chunks)
+
+            # 2b. DEDUP – chunki o hashu obecnym w indeksie tylko linkujemy do dokumentu,
+            # powtórzenia w obrębie dokumentu przetwarzamy raz (pierwsze wystąpienie).
+            indices_by_hash: dict[str, list[int]] = {}
+            unique_chunks: list[Document] = []
+            for chunk in chunks:
+                indices = indices_by_hash.setdefault(chunk.metadata["content_hash"], [])
+                if not indices:
+                    unique_chunks.append(chunk)
+                indices.append(chunk.metadata["chunk_index"])
+            await self._reuse_existing_chunks(str(doc_id), indices_by_hash, checkpoint)
+            await self._save_checkpoint(checkpoint, save_checkpoint)
+
+            # 3. GRAPH – próbujemy zbudować graf wiedzy, jeśli Neo4j Graph jest dostępny.
+            if self.graph_store:
+                checkpoint.stage = STAGE_GRAPH
+                await self._ingest_graph(unique_chunks, metadata, indices_by_hash, checkpoint, save_checkpoint)
+                # Fulltext indexy terminów (traversal) - tworzone/uzupełniane w tle
+                schedule_graph_term_indexes(self.graph_store)
             else:
-                raise ValueError(
-                    f"Nieobsługiwany typ pliku: {file_extension}. Dozwolone: PDF, DOCX."
+                logger.warning(
+                    "Neo4j Graph Store nie jest dostępny – dokument zostanie przetworzony "
+                    "bez struktury grafowej."
                 )
 
-            documents = await asyncio.to_thread(loader.load)
-            if not documents:
-                raise ValueError("Nie udało się odczytać zawartości dokumentu.")
-            logger.info("Wczytano %s segmentów dokumentu źródłowego.", len(documents))
-
-            # 2. SPLIT – dzielenie tekstu na fragmenty z kontrolowanym overlapem.
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=rag.chunking.chunk_size,
-                chunk_overlap=rag.chunking.chunk_overlap,
-                separators=["\n\n", "\n", ". ", " ", ""],
-                length_function=len,
-            )
-            chunks = text_splitter.split_documents(documents)
-            if not chunks:
-                raise ValueError("Nie wygenerowano żadnych fragmentów tekstu.")
+            # 4. VECTOR – embeddingi i zapis chunków do indeksu wektorowego w batchach.
+            checkpoint.stage = STAGE_VECTOR
+            await self._ingest_vectors(unique_chunks, str(doc_id), indices_by_hash, checkpoint, save_checkpoint)
             logger.info(
-                "Podzielono dokument na %s fragmentów (chunk_size=%s, overlap=%s)",
+                "Zakończono przetwarzanie %s fragmentów dokumentu %s",
                 len(chunks),
-                rag.chunking.chunk_size,
-                rag.chunking.chunk_overlap,
+                doc_id,
+                extra={"doc_id": str(doc_id), "reused_chunks": len(checkpoint.reused)},
+            )
+
+            checkpoint.stage = STAGE_DONE
+            await self._save_checkpoint(checkpoint, save_checkpoint)
+
+            # Nowe chunki/węzły zmieniają wyniki wyszukiwania - unieważnij cache RAG
+            await bump_index_version()
+            # Lokalne lustro indeksu wektorowego (jeśli włączone) - przebudowa w tle
+            await get_local_index(self.vector_store)
+
+            result = {
+                "num_chunks": len(chunks),
+                "status": "ready",
+                "stage": checkpoint.stage,
+                "reused_chunks": len(checkpoint.reused),
+            }
+            if checkpoint.graph_failed:
+                # Dokument jest w indeksie wektorowym, ale część chunków nie ma grafu -
+                # status "partial" pozwala ponowić ingest (tylko chunki z graph_failed)
+                result["status"] = "partial"
+                result["graph_failed_chunks"] = len(checkpoint.graph_failed)
+                result["error"] = (
+                    f"Nie udało się wygenerować grafu wiedzy dla {len(checkpoint.graph_failed)} "
+                    "fragmentów - ponów ingest, aby je uzupełnić."
+                )
+            return result
+
+        except Exception as exc:  # pragma: no cover - logujemy pełną diagnostykę
+            logger.error(
+                "Błąd podczas przetwarzania dokumentu %s: %s",
+                file_path,
+                exc,
+                exc_info=True,
+                extra={"doc_id": str(doc_id), "error_stage": checkpoint.stage},
+            )
+            await self._save_checkpoint(checkpoint, save_checkpoint)
+            return {"num_chunks": 0, "status": "failed", "error": str(exc), "stage": checkpoint.stage}
+
+    async def _load_and_split(self, path: Path, metadata: dict[str, Any]) -> list[Document]:
+        """Wczytuje dokument strona po stronie (lazy_load w wątku) i dzieli na chunki.
+
+        Raises:
+            ValueError: Przy nieobsługiwanym rozszerzeniu lub braku treści.
+        """
+
+        file_extension = path.suffix.lower()
+        if file_extension == ".pdf":
+            loader = PyPDFLoader(str(path))
+            logger.info("Używam PyPDFLoader dla pliku %s", path.name)
+        elif file_extension == ".docx":
+            loader = Docx2txtLoader(str(path))
+            logger.info("Używam Docx2txtLoader dla pliku %s", path.name)
+        else:
+            raise ValueError(
+                f"Nieobsługiwany typ pliku: {file_extension}. Dozwolone: PDF, DOCX."
             )
 
-            # 3. METADATA – wzbogacenie każdego chunku o metadane identyfikujące.
-            doc_id = metadata.get("doc_id")
-            for index, chunk in enumerate(chunks):
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=rag.chunking.chunk_size,
+            chunk_overlap=rag.chunking.chunk_overlap,
+            separators=["\n\n", "\n", ". ", " ", ""],
+            length_function=len,
+        )
+
+        doc_id = metadata.get("doc_id")
+        chunks: list[Document] = []
+        pages = loader.lazy_load()
+        page_count = 0
+        while True:
+            # Parsowanie kolejnej strony jest blokujące - wykonujemy je w wątku
+            page = await asyncio.to_thread(next, pages, None)
+            if page is None:
+                break
+            page_count += 1
+            for chunk in text_splitter.split_documents([page]):
                 chunk.metadata.update(
                     {
                         "doc_id": str(doc_id),
-                        "chunk_index": index,
+                        "chunk_index": len(chunks),
+                        "content_hash": chunk_content_hash(chunk.page_content),
                         "title": metadata.get("title", "Nieznany dokument"),
                         "country": metadata.get("country", "Poland"),
                         "source_file": path.name,
                     }
                 )
+                chunks.append(chunk)
+
+        if not page_count:
+            raise ValueError("Nie udało się odczytać zawartości dokumentu.")
+        if not chunks:
+            raise ValueError("Nie wygenerowano żadnych fragmentów tekstu.")
+        logger.info(
+            "Podzielono dokument na %s fragmentów (%s stron, chunk_size=%s, overlap=%s)",
+            len(chunks),
+            page_count,
+            rag.chunking.chunk_size,
+            rag.chunking.chunk_overlap,
+        )
+        return chunks
+
+    async def _reuse_existing_chunks(
+        self,
+        doc_id: str,
+        indices_by_hash: dict[str, list[int]],
+        checkpoint: IngestCheckpoint,
+    ) -> None:
+        """Linkuje do dokumentu chunki już obecne w indeksie i oznacza je jako gotowe.
+
+        Dla takich chunków pomijamy ekstrakcję grafu i embedding - graf i wektor
+        zostały zapisane przy ingestcie dokumentu, który wniósł je pierwszy.
+        """
 
-            # 4. GRAPH – próbujemy zbudować graf wiedzy, jeśli Neo4j Graph jest dostępny.
-            if self.graph_store:
-                try:
-                    logger.info(
-                        "Generuję strukturę grafową na podstawie uniwersalnego modelu.",
-                        extra={"doc_id": str(doc_id), "chunk_count": len(chunks)}
-                    )
+        pending = [
+            content_hash
+            for content_hash, indices in indices_by_hash.items()
+            if not set(indices) <= checkpoint.vector_done
+        ]
+        if not pending:
+            return
 
-                    # Get graph transformer instructions from YAML config
-                    graph_instructions_prompt = prompts.get("rag.graph_transformer_instructions")
-                    # Extract system message content
-                    additional_instructions = ""
-                    for msg in graph_instructions_prompt.messages:
-                        if msg.role == "system":
-                            additional_instructions = msg.content
-                            break
-
-                    transformer = LLMGraphTransformer(
-                        llm=self.llm,
-                        allowed_nodes=GRAPH_TRANSFORMER_ALLOWED_NODES,
-                        allowed_relationships=GRAPH_TRANSFORMER_ALLOWED_RELATIONSHIPS,
-                        node_properties=GRAPH_TRANSFORMER_NODE_PROPERTIES,
-                        relationship_properties=GRAPH_TRANSFORMER_RELATIONSHIP_PROPERTIES,
-                        additional_instructions=additional_instructions,
-                    )
-                    graph_documents = await transformer.aconvert_to_graph_documents(chunks)
-
-                    # Wzbogacenie węzłów o metadane dokumentu (współdzielona logika GraphRAGService)
-                    from app.services.rag.graph import GraphRAGService
-                    enriched_graph_documents = GraphRAGService.enrich_graph_nodes(
-                        graph_documents,
-                        doc_id=str(doc_id),
-                        metadata=metadata
-                    )
+        driver = self.vector_store._driver  # Dostęp wewnętrzny – akceptowalny w serwisie.
+        existing = await asyncio.to_thread(find_existing_chunks, driver, pending)
+        if not existing:
+            return
 
-                    self.graph_store.add_graph_documents(enriched_graph_documents, include_source=True)
-                    logger.info(
-                        "Zapisano strukturę grafową dla dokumentu %s",
-                        doc_id,
-                        extra={
-                            "doc_id": str(doc_id),
-                            "graph_nodes_count": len(enriched_graph_documents)
-                        }
-                    )
-                except KeyError as key_exc:  # Specyficzny handling dla template errors
-                    error_msg = str(key_exc)
-                    logger.error(
-                        "❌ Graph transformer template error for document %s: %s",
-                        doc_id,
-                        error_msg,
-                        extra={
-                            "doc_id": str(doc_id),
-                            "error_type": "template_variable_error",
-                            "error_stage": "graph_transformation",
-                            "suggestion": "Check GRAPH_TRANSFORMER_ADDITIONAL_INSTRUCTIONS for unescaped curly braces",
-                            "user_message": "Nie udało się wygenerować grafu wiedzy (błąd szablonu). Dokument zostanie zapisany bez struktury grafowej."
-                        }
-                    )
-                    # Kontynuuj bez grafu - vector store zostanie zapisany normalnie
-                except Exception as graph_exc:  # pragma: no cover - catch-all dla innych błędów
-                    logger.error(
-                        "❌ Nie udało się wygenerować grafu wiedzy dla dokumentu %s: %s",
+        await asyncio.to_thread(link_chunks_to_document, driver, existing, doc_id)
+        reused = {index for content_hash in existing for index in indices_by_hash[content_hash]}
+        checkpoint.reused.update(reused)
+        checkpoint.graph_done.update(reused)
+        checkpoint.vector_done.update(reused)
+        logger.info(
+            "Pominięto %s chunków obecnych już w indeksie (deduplikacja po hashu treści)",
+            len(reused),
+            extra={"doc_id": doc_id, "reused_chunks": len(reused), "unique_hashes": len(existing)},
+        )
+
+    def _build_graph_transformer(self) -> LLMGraphTransformer:
+        """Tworzy LLMGraphTransformer z instrukcjami z config/prompts."""
+
+        # Get graph transformer instructions from YAML config
+        graph_instructions_prompt = prompts.get("rag.graph_transformer_instructions")
+        # Extract system message content
+        additional_instructions = ""
+        for msg in graph_instructions_prompt.messages:
+            if msg.role == "system":
+                additional_instructions = msg.content
+                break
+
+        return LLMGraphTransformer(
+            llm=self.llm,
+            allowed_nodes=GRAPH_TRANSFORMER_ALLOWED_NODES,
+            allowed_relationships=GRAPH_TRANSFORMER_ALLOWED_RELATIONSHIPS,
+            node_properties=GRAPH_TRANSFORMER_NODE_PROPERTIES,
+            relationship_properties=GRAPH_TRANSFORMER_RELATIONSHIP_PROPERTIES,
+            additional_instructions=additional_instructions,
+        )
+
+    async def _ingest_graph(
+        self,
+        chunks: list[Document],
+        metadata: dict[str, Any],
+        indices_by_hash: dict[str, list[int]],
+        checkpoint: IngestCheckpoint,
+        save_checkpoint: CheckpointSaver | None,
+    ) -> None:
+        """Etap graph: konwersja chunków z limitem współbieżności, zapis w batchach.
+
+        Błąd LLM dla pojedynczego chunku oznacza chunk jako ``graph_failed``
+        (ponowiony przy następnej próbie). Błąd szablonu lub zapisu do Neo4j
+        przerywa etap - dokument zostanie zapisany bez (części) struktury grafowej.
+        """
+
+        doc_id = str(metadata.get("doc_id"))
+        pending = [chunk for chunk in chunks if chunk.metadata["chunk_index"] not in checkpoint.graph_done]
+        if not pending:
+            return
+
+        logger.info(
+            "Generuję strukturę grafową na podstawie uniwersalnego modelu.",
+            extra={
+                "doc_id": doc_id,
+                "chunk_count": len(pending),
+                "graph_concurrency": rag.ingest.graph_concurrency,
+            },
+        )
+
+        semaphore = asyncio.Semaphore(max(1, rag.ingest.graph_concurrency))
+        batch_size = max(1, rag.ingest.graph_batch_size)
+
+        async def convert(chunk: Document) -> tuple[int, GraphDocument | None]:
+            index = chunk.metadata["chunk_index"]
+            async with semaphore:
+                try:
+                    return index, await transformer.aprocess_response(chunk)
+                except KeyError:
+                    raise
+                except Exception as chunk_exc:
+                    logger.warning(
+                        "Nie udało się wygenerować grafu dla chunku %s dokumentu %s: %s",
+                        index,
                         doc_id,
-                        str(graph_exc)[:200],  # Limit error message length
-                        extra={
-                            "doc_id": str(doc_id),
-                            "error_type": type(graph_exc).__name__,
-                            "error_stage": "graph_transformation",
-                            "user_message": f"Nie udało się wygenerować grafu wiedzy ({type(graph_exc).__name__}). Dokument zostanie zapisany bez struktury grafowej."
-                        },
-                        exc_info=True,
+                        str(chunk_exc)[:200],
+                        extra={"doc_id": doc_id, "chunk_index": index, "error_type": type(chunk_exc).__name__},
                     )
+                    return index, None
 
-            else:
-                logger.warning(
-                    "Neo4j Graph Store nie jest dostępny – dokument zostanie przetworzony "
-                    "bez struktury grafowej."
-                )
+        tasks: list[asyncio.Task] = []
+        try:
+            transformer = self._build_graph_transformer()
+            tasks = [asyncio.create_task(convert(chunk)) for chunk in pending]
+            buffer: list[tuple[int, GraphDocument]] = []
+            for next_done in asyncio.as_completed(tasks):
+                index, graph_document = await next_done
+                if graph_document is None:
+                    checkpoint.graph_failed.add(index)
+                    continue
+                buffer.append((index, graph_document))
+                if len(buffer) >= batch_size:
+                    await self._write_graph_batch(buffer, doc_id, metadata, indices_by_hash, checkpoint, save_checkpoint)
+                    buffer = []
+            if buffer:
+                await self._write_graph_batch(buffer, doc_id, metadata, indices_by_hash, checkpoint, save_checkpoint)
 
-            # 5. VECTOR – zapis chunków do indeksu wektorowego w Neo4j.
-            logger.info("Generuję embeddingi i zapisuję je w indeksie wektorowym...")
-            await self.vector_store.aadd_documents(chunks)
             logger.info(
-                "Zakończono przetwarzanie %s fragmentów dokumentu %s",
-                len(chunks),
+                "Zapisano strukturę grafową dla dokumentu %s",
                 doc_id,
+                extra={
+                    "doc_id": doc_id,
+                    "graph_chunks_done": len(checkpoint.graph_done),
+                    "graph_chunks_failed": len(checkpoint.graph_failed),
+                },
             )
-
-            return {"num_chunks": len(chunks), "status": "ready"}
-
-        except Exception as exc:  # pragma: no cover - logujemy pełną diagnostykę
+        except KeyError as key_exc:  # Specyficzny handling dla template errors
+            error_msg = str(key_exc)
             logger.error(
-                "Błąd podczas przetwarzania dokumentu %s: %s",
-                file_path,
-                exc,
+                "❌ Graph transformer template error for document %s: %s",
+                doc_id,
+                error_msg,
+                extra={
+                    "doc_id": doc_id,
+                    "error_type": "template_variable_error",
+                    "error_stage": "graph_transformation",
+                    "suggestion": "Check GRAPH_TRANSFORMER_ADDITIONAL_INSTRUCTIONS for unescaped curly braces",
+                    "user_message": "Nie udało się wygenerować grafu wiedzy (błąd szablonu). Dokument zostanie zapisany bez struktury grafowej."
+                }
+            )
+            # Kontynuuj bez grafu - vector store zostanie zapisany normalnie
+        except Exception as graph_exc:  # pragma: no cover - catch-all dla innych błędów
+            logger.error(
+                "❌ Nie udało się wygenerować grafu wiedzy dla dokumentu %s: %s",
+                doc_id,
+                str(graph_exc)[:200],  # Limit error message length
+                extra={
+                    "doc_id": doc_id,
+                    "error_type": type(graph_exc).__name__,
+                    "error_stage": "graph_transformation",
+                    "user_message": f"Nie udało się wygenerować grafu wiedzy ({type(graph_exc).__name__}). Dokument zostanie zapisany bez struktury grafowej."
+                },
                 exc_info=True,
             )
-            return {"num_chunks": 0, "status": "failed", "error": str(exc)}
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _write_graph_batch(
+        self,
+        batch: list[tuple[int, GraphDocument]],
+        doc_id: str,
+        metadata: dict[str, Any],
+        indices_by_hash: dict[str, list[int]],
+        checkpoint: IngestCheckpoint,
+        save_checkpoint: CheckpointSaver | None,
+    ) -> None:
+        """Wzbogaca węzły batcha o metadane dokumentu i zapisuje je w Neo4j (w wątku)."""
+
+        # Węzeł źródłowy Document dostaje id = hash treści (link doc_ids przez MENTIONS)
+        for _, graph_document in batch:
+            graph_document.source.metadata["id"] = graph_document.source.metadata["content_hash"]
+
+        # Wzbogacenie węzłów o metadane dokumentu (współdzielona logika GraphRAGService)
+        from app.services.rag.graph import GraphRAGService
+        enriched_graph_documents = GraphRAGService.enrich_graph_nodes(
+            [graph_document for _, graph_document in batch],
+            doc_id=doc_id,
+            metadata=metadata
+        )
+        await asyncio.to_thread(
+            self.graph_store.add_graph_documents,
+            enriched_graph_documents,
+            include_source=True,
+        )
+
+        indices = {
+            index
+            for _, graph_document in batch
+            for index in indices_by_hash[graph_document.source.metadata["content_hash"]]
+        }
+        checkpoint.graph_done.update(indices)
+        checkpoint.graph_failed.difference_update(indices)
+        await self._save_checkpoint(checkpoint, save_checkpoint)
+
+    async def _ingest_vectors(
+        self,
+        chunks: list[Document],
+        doc_id: str,
+        indices_by_hash: dict[str, list[int]],
+        checkpoint: IngestCheckpoint,
+        save_checkpoint: CheckpointSaver | None,
+    ) -> None:
+        """Etap vector: embeddingi (async) i zapis do Neo4j (w wątku) w batchach.
+
+        Id chunku w indeksie to hash znormalizowanej treści (zapis przez MERGE),
+        więc ponowny zapis batcha po awarii jest idempotentny. Po zapisie chunki
+        (i wspomniane przez nie węzły grafu) dostają ``doc_id`` w ``doc_ids``.
+        """
+
+        pending = [chunk for chunk in chunks if chunk.metadata["chunk_index"] not in checkpoint.vector_done]
+        if not pending:
+            return
+
+        logger.info(
+            "Generuję embeddingi i zapisuję je w indeksie wektorowym...",
+            extra={"chunk_count": len(pending), "vector_batch_size": rag.ingest.vector_batch_size},
+        )
+        batch_size = max(1, rag.ingest.vector_batch_size)
+        embedder = self.vector_store.embedding
+        driver = self.vector_store._driver  # Dostęp wewnętrzny – akceptowalny w serwisie.
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            texts = [chunk.page_content for chunk in batch]
+            chunk_ids = [chunk.metadata["content_hash"] for chunk in batch]
+            embeddings = await embedder.aembed_documents(texts)
+            await asyncio.to_thread(
+                self.vector_store.add_embeddings,
+                texts,
+                embeddings,
+                [chunk.metadata for chunk in batch],
+                chunk_ids,
+            )
+            await asyncio.to_thread(link_chunks_to_document, driver, chunk_ids, doc_id)
+            checkpoint.vector_done.update(
+                index for content_hash in chunk_ids for index in indices_by_hash[content_hash]
+            )
+            await self._save_checkpoint(checkpoint, save_checkpoint)
+
+    @staticmethod
+    async def _save_checkpoint(
+        checkpoint: IngestCheckpoint,
+        save_checkpoint: CheckpointSaver | None,
+    ) -> None:
+        """Utrwala postęp; błąd zapisu checkpointu nie przerywa ingestu."""
+
+        if save_checkpoint is None:
+            return
+        try:
+            await save_checkpoint(checkpoint)
+        except Exception as exc:  # pragma: no cover - checkpoint jest best-effort
+            logger.warning("Nie udało się zapisać checkpointu ingestu: %s", exc)
 
     async def list_documents(self, db: AsyncSession) -> list[RAGDocument]:
         """Zwraca listę aktywnych dokumentów posortowanych malejąco po dacie."""
@@ -259,41 +572,48 @@ class RAGDocumentService:
         doc.is_active = False
         await db.commit()
 
-        await self._delete_chunks_from_neo4j(str(doc_id))
+        await self._delete_chunks_from_neo4j(str(doc_id), await self._owner_metadata(db))
 
-        if self.graph_store:
-            try:
-                self.graph_store.query(
-                    "MATCH (n {doc_id: $doc_id}) DETACH DELETE n",
-                    params={"doc_id": str(doc_id)},
-                )
-                logger.info("Usunięto węzły grafu dla dokumentu %s", doc_id)
-            except Exception as exc:  # pragma: no cover - logujemy, ale nie przerywamy
-                logger.error(
-                    "Nie udało się usunąć węzłów grafu dokumentu %s: %s",
-                    doc_id,
-                    exc,
-                )
+        await bump_index_version()
 
-    async def _delete_chunks_from_neo4j(self, doc_id: str) -> None:
-        """Czyści wszystkie chunki dokumentu z indeksu Neo4j Vector."""
+    @staticmethod
+    async def _owner_metadata(db: AsyncSession) -> dict[str, dict[str, dict[str, Any]]]:
+        """Metadane aktywnych dokumentów - kandydatów na nowych właścicieli współdzielonych węzłów."""
+
+        result = await db.execute(
+            select(RAGDocument.id, RAGDocument.title, RAGDocument.country, RAGDocument.file_path)
+            .where(RAGDocument.is_active.is_(True))
+        )
+        return {
+            str(row.id): owner_metadata(row.title, row.country, Path(row.file_path).name)
+            for row in result.all()
+        }
+
+    async def _delete_chunks_from_neo4j(
+        self,
+        doc_id: str,
+        owners: dict[str, dict[str, dict[str, Any]]] | None = None,
+    ) -> None:
+        """Czyści chunki i węzły grafu dokumentu z Neo4j.
+
+        Chunki i węzły współdzielone z innymi dokumentami (deduplikacja po hashu
+        treści) tracą tylko ten ``doc_id`` - kasowane są wyłącznie węzły, do których
+        nie odwołuje się już żaden dokument. Węzeł przepięty na inny dokument
+        dostaje jego metadane z ``owners``.
+        """
 
         if not self.vector_store:
             return
 
         try:
             driver = self.vector_store._driver  # Dostęp wewnętrzny – akceptowalny w serwisie.
-
-            def delete_chunks() -> None:
-                with driver.session() as session:
-                    session.execute_write(
-                        lambda tx: tx.run(
-                            "MATCH (n:RAGChunk {doc_id: $doc_id}) DETACH DELETE n",
-                            doc_id=doc_id,
-                        )
-                    )
-
-            await asyncio.to_thread(delete_chunks)
-            logger.info("Usunięto wektorowe chunki dokumentu %s", doc_id)
+            result = await asyncio.to_thread(
+                release_document_nodes, driver, doc_id, rag.ingest.delete_batch_size, owners
+            )
+            logger.info(
+                "Usunięto chunki i węzły grafu dokumentu %s",
+                doc_id,
+                extra={"doc_id": doc_id, "deleted_nodes": result["deleted"], "shared_nodes_kept": result["kept"]},
+            )
         except Exception as exc:  # pragma: no cover - logujemy, ale nie przerywamy
             logger.error("Nie udało się usunąć chunków dokumentu %s z Neo4j: %s", doc_id, exc)
@@ -0,0 +1,75 @@
+"""Checkpoint etapowego ingestu dokumentów RAG.
+
+Postęp ingestu zapisywany jest per chunk w ``rag_documents.ingest_checkpoint``
+(JSONB). Chunki identyfikuje ``chunk_index`` - podział jest deterministyczny
+dla tego samego pliku i tych samych parametrów splittera, więc przy retry
+pomijamy chunki już zapisane w grafie / indeksie wektorowym.
+
+Zmiana ``chunk_size`` / ``chunk_overlap`` między próbami unieważnia checkpoint
+(indeksy chunków przestają sobie odpowiadać) - ingest startuje od zera.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+STAGE_LOAD = "load"
+STAGE_GRAPH = "graph"
+STAGE_VECTOR = "vector"
+STAGE_DONE = "done"
+
+
+@dataclass
+class IngestCheckpoint:
+    """Postęp ingestu jednego dokumentu (indeksy chunków per etap)."""
+
+    chunk_size: int
+    chunk_overlap: int
+    stage: str = STAGE_LOAD
+    total_chunks: int = 0
+    graph_done: set[int] = field(default_factory=set)
+    graph_failed: set[int] = field(default_factory=set)
+    vector_done: set[int] = field(default_factory=set)
+    reused: set[int] = field(default_factory=set)
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: dict[str, Any] | None,
+        *,
+        chunk_size: int,
+        chunk_overlap: int,
+    ) -> IngestCheckpoint:
+        """Odtwórz checkpoint z JSONB; pusty, gdy zmieniły się parametry splittera."""
+        fresh = cls(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        if not data:
+            return fresh
+        if data.get("chunk_size") != chunk_size or data.get("chunk_overlap") != chunk_overlap:
+            return fresh
+        return cls(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            stage=data.get("stage", STAGE_LOAD),
+            total_chunks=data.get("total_chunks", 0),
+            graph_done=set(data.get("graph_done", [])),
+            graph_failed=set(data.get("graph_failed", [])),
+            vector_done=set(data.get("vector_done", [])),
+            reused=set(data.get("reused", [])),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serializuj do JSONB (posortowane listy indeksów)."""
+        return {
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "stage": self.stage,
+            "total_chunks": self.total_chunks,
+            "graph_done": sorted(self.graph_done),
+            "graph_failed": sorted(self.graph_failed),
+            "vector_done": sorted(self.vector_done),
+            "reused": sorted(self.reused),
+        }
+
+
+CheckpointSaver = Callable[[IngestCheckpoint], Awaitable[None]]
@@ -2,15 +2,19 @@
 
 from .graph_formatter import format_graph_context
 from .graph_enrichment import find_related_graph_nodes, enrich_chunk_with_graph
+from .node_index import GraphNodeIndex, get_graph_node_index
 from .graph_service import GraphRAGService
 from .query_builder import generate_cypher_query
-from .traversal import GraphTraversal
+from .traversal import GraphTraversal, get_profile_node_index
 from .insights_extractor import enrich_graph_nodes, answer_question
 
 __all__ = [
     "format_graph_context",
     "find_related_graph_nodes",
     "enrich_chunk_with_graph",
+    "GraphNodeIndex",
+    "get_graph_node_index",
+    "get_profile_node_index",
     "GraphRAGService",
     "generate_cypher_query",
     "GraphTraversal",
@@ -0,0 +1,134 @@
+"""Cache Graph RAG: pytanie → wygenerowany Cypher, wynik zapytania → odpowiedź.
+
+``answer_question`` wywołuje LLM dwa razy: generacja Cypher (structured output)
+i odpowiedź końcowa. Powtórzone i niemal identyczne pytania (wielkość liter,
+interpunkcja, białe znaki) omijają jeden lub oba wywołania:
+
+- ``graph_cypher`` - znormalizowane pytanie + wersja schematu grafu → Cypher
+  i encje. Zapisywany tylko Cypher, który wykonał się poprawnie (walidacja
+  read-only + wykonanie w Neo4j).
+- ``graph_cypher_failed`` - negatywny wpis dla Cypher zakończonego błędem
+  (krótki TTL ``rag_cache.cypher_failure_ttl_seconds``): do wygaśnięcia nie
+  generujemy ani nie wykonujemy go ponownie - odpowiedź z samego kontekstu
+  wektorowego, jak przy błędzie wykonania.
+- ``graph_answer`` - pytanie + hash wyniku (kontekst grafowy + fragmenty
+  dokumentów) → odpowiedź. Zmiana danych w grafie zmienia hash, więc wpisy
+  nie niosą wersji indeksu RAG.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Any
+
+from langchain_core.documents import Document
+
+from app.services.rag.caching.tiered_cache import TieredCache
+from config import features
+
+_NON_WORD_RE = re.compile(r"[^\w\s-]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+# Klauzula zapisu poza dostępem do właściwości (n.set, n.created nie są klauzulami)
+_WRITE_CLAUSE_RE = re.compile(
+    r"(?<!\.)\b(CREATE|MERGE|DELETE|DETACH|SET|REMOVE|DROP|FOREACH|LOAD\s+CSV)\b",
+    re.IGNORECASE,
+)
+# Literały stringów, identyfikatory w backtickach i komentarze - słowa kluczowe
+# w ich treści (WHERE n.name = 'Set Top Box') nie są klauzulami
+_CYPHER_LITERAL_RE = re.compile(
+    r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`(?:[^`]|``)*`|//[^\n]*|/\*.*?\*/",
+    re.DOTALL,
+)
+
+graph_cypher_cache = TieredCache("graph_cypher", versioned=False)
+graph_cypher_failure_cache = TieredCache(
+    "graph_cypher_failed",
+    lru_ttl_seconds=min(features.rag_cache.lru_ttl_seconds, features.rag_cache.cypher_failure_ttl_seconds),
+    redis_ttl_seconds=features.rag_cache.cypher_failure_ttl_seconds,
+    versioned=False,
+)
+graph_answer_cache = TieredCache("graph_answer", versioned=False)
+
+
+def normalize_question(question: str) -> str:
+    """Postać pytania do klucza cache (NFKC, lowercase, bez interpunkcji i nadmiarowych spacji)."""
+    normalized = unicodedata.normalize("NFKC", question).lower()
+    normalized = _NON_WORD_RE.sub(" ", normalized)
+    return _WHITESPACE_RE.sub(" ", normalized).strip()
+
+
+def question_key(question: str) -> str:
+    return hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()
+
+
+def graph_schema_version(graph_schema: str) -> str:
+    """Wersja schematu grafu (hash tekstu schematu przekazywanego do promptu)."""
+    return hashlib.sha256(graph_schema.encode("utf-8")).hexdigest()[:16]
+
+
+def is_read_only_cypher(cypher_query: str) -> bool:
+    """Czy wygenerowany Cypher tylko czyta graf (bez klauzul zapisu).
+
+    Literały i identyfikatory są wycinane przed dopasowaniem; niedomknięty
+    cudzysłów zostaje w tekście, więc słowo kluczowe za nim nadal odrzuca zapytanie.
+    """
+    code = _CYPHER_LITERAL_RE.sub(" ", cypher_query)
+    return bool(cypher_query.strip()) and not _WRITE_CLAUSE_RE.search(code)
+
+
+def graph_result_hash(graph_context: Any, vector_docs: list[Document]) -> str:
+    """Hash wyniku zapytania - wszystkiego, co trafia do promptu odpowiedzi poza pytaniem."""
+    payload = json.dumps(
+        {"graph": graph_context, "vector": [doc.page_content for doc in vector_docs]},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cypher_key(question: str, schema_version: str) -> str:
+    return f"{schema_version}:{question_key(question)}"
+
+
+async def get_cached_cypher(question: str, schema_version: str) -> dict[str, Any] | None:
+    """Cypher dla pytania: ``{"cypher_query", "entities", "failed"}`` albo None (miss).
+
+    ``failed=True`` oznacza negatywny wpis - Cypher zakończył się błędem.
+    """
+    key = _cypher_key(question, schema_version)
+    cached = await graph_cypher_cache.get(key)
+    if cached:
+        return {**cached, "failed": False}
+    failed = await graph_cypher_failure_cache.get(key)
+    if failed:
+        return {**failed, "failed": True}
+    return None
+
+
+async def cache_cypher(
+    question: str,
+    schema_version: str,
+    cypher_query: str,
+    entities: list[str],
+    error: str | None = None,
+) -> None:
+    """Zapisz Cypher po wykonaniu: poprawny w ``graph_cypher``, błędny negatywnie."""
+    key = _cypher_key(question, schema_version)
+    entry = {"cypher_query": cypher_query, "entities": entities}
+    if error is None:
+        await graph_cypher_cache.set(key, entry)
+    else:
+        await graph_cypher_failure_cache.set(key, {**entry, "error": error[:200]})
+
+
+async def get_cached_answer(question: str, result_hash: str) -> str | None:
+    cached = await graph_answer_cache.get(f"{question_key(question)}:{result_hash}")
+    return cached.get("answer") if cached else None
+
+
+async def cache_answer(question: str, result_hash: str, answer: str) -> None:
+    await graph_answer_cache.set(f"{question_key(question)}:{result_hash}", {"answer": answer})
@@ -11,12 +11,15 @@ from typing import List, Dict, Any
 
 from langchain_core.documents import Document
 
+from .node_index import GraphNodeIndex
+
 logger = logging.getLogger(__name__)
 
 
 def find_related_graph_nodes(
     chunk_doc: Document,
-    graph_nodes: List[Dict[str, Any]]
+    graph_nodes: List[Dict[str, Any]],
+    node_index: GraphNodeIndex | None = None,
 ) -> List[Dict[str, Any]]:
     """Znajdź graph nodes które są powiązane z danym chunkiem.
 
@@ -24,9 +27,14 @@ def find_related_graph_nodes(
     1. Wspólnych słowach kluczowych (z summary/key_facts)
     2. Dokumencie źródłowym (doc_id)
 
+    Słowa kluczowe węzłów są dopasowywane jednym przejściem automatu Aho-Corasick
+    po tekście chunku (``GraphNodeIndex``). Przy wzbogacaniu wielu chunków tym samym
+    graph context przekaż ``node_index`` - skompilowany raz dla wyniku.
+
     Args:
         chunk_doc: Document chunk z vector/keyword search
         graph_nodes: Lista graph nodes z get_demographic_graph_context()
+        node_index: Skompilowany indeks dla graph_nodes (None = kompilacja na miejscu)
 
     Returns:
         Lista graph nodes które są powiązane z chunkiem
@@ -50,35 +58,9 @@ def find_related_graph_nodes(
     if not graph_nodes:
         return []
 
-    related = []
-    chunk_text = chunk_doc.page_content.lower()
-    chunk_doc_id = chunk_doc.metadata.get('doc_id', '')
-
-    for node in graph_nodes:
-        # Sprawdź czy node pochodzi z tego samego dokumentu
-        node_doc_id = node.get('doc_id', '')
-        if node_doc_id and node_doc_id == chunk_doc_id:
-            related.append(node)
-            continue
-
-        # Sprawdź overlap słów kluczowych
-        # Backward compatibility: używaj nowych nazw z fallbackiem na stare
-        summary = (node.get('streszczenie') or node.get('summary', '') or '').lower()
-        key_facts = (node.get('kluczowe_fakty') or node.get('key_facts', '') or '').lower()
-
-        # Ekstraktuj słowa kluczowe (> 5 chars)
-        summary_words = {w for w in summary.split() if len(w) > 5}
-        key_facts_words = {w for w in key_facts.split() if len(w) > 5}
-        node_keywords = summary_words | key_facts_words
-
-        # Policz overlap
-        matches = sum(1 for keyword in node_keywords if keyword in chunk_text)
-
-        # Jeśli >=2 matching keywords, uznaj za related
-        if matches >= 2:
-            related.append(node)
-
-    return related
+    if node_index is None:
+        node_index = GraphNodeIndex(graph_nodes)
+    return node_index.related_nodes(chunk_doc)
 
 
 def enrich_chunk_with_graph(
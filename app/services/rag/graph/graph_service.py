@@ -82,13 +82,16 @@ class GraphRAGService:
         return generate_cypher_query(self.llm, self.graph_store, question)
 
     async def answer_question(self, question: str) -> dict[str, Any]:
-        """Odpowiada na pytanie (deleguje do graph_insights_extractor)."""
+        """Odpowiada na pytanie (deleguje do graph_insights_extractor).
+
+        Powtórzone pytania omijają generację Cypher i/lub odpowiedź LLM (cypher_cache.py).
+        """
         return await answer_question_impl(
             self.llm,
             self.graph_store,
             self.vector_store,
             question,
-            self._generate_cypher_query
+            generate_cypher_query
         )
 
     @staticmethod
@@ -3,16 +3,41 @@
 Odpowiedzialny za:
 - Wzbogacanie węzłów grafu o metadane dokumentów
 - Walidację jakości danych w grafie
-- Odpowiadanie na pytania z wykorzystaniem Graph RAG (kontekst grafowy + wektorowy)
+- Odpowiadanie na pytania z wykorzystaniem Graph RAG (kontekst grafowy + wektorowy),
+  z cache Cypher i odpowiedzi (cypher_cache.py)
 """
 
+import asyncio
 import logging
 from typing import Any
 
 from langchain_core.documents import Document
+from neo4j.exceptions import DriverError, TransientError
+
+from app.schemas.rag import GraphRAGQuery
+from app.services.rag.clients import vector_search_with_score
+
+from .cypher_cache import (
+    cache_answer,
+    cache_cypher,
+    get_cached_answer,
+    get_cached_cypher,
+    graph_result_hash,
+    graph_schema_version,
+    is_read_only_cypher,
+)
+from .query_builder import graph_schema_text
+from .term_index import annotate_graph_documents
 
 logger = logging.getLogger(__name__)
 
+CACHE_HIT = "hit"
+CACHE_MISS = "miss"
+CACHE_NEGATIVE = "negative"
+
+# Błędy połączenia / przejściowe - nie świadczą o błędnym Cypher (bez negatywnego cache)
+_TRANSIENT_GRAPH_ERRORS = (ConnectionError, TimeoutError, DriverError, TransientError)
+
 
 def enrich_graph_nodes(
     graph_documents: list[Any],
@@ -35,6 +60,7 @@ def enrich_graph_nodes(
         3. Waliduje jakość metadanych węzłów (sprawdza czy summary i description nie są puste)
         4. Dodaje timestamp przetwarzania
         5. Normalizuje formaty danych (confidence, magnitude)
+        6. Dodaje znormalizowane terminy wyszukiwania (search_terms, search_text)
     """
     from datetime import datetime, timezone
 
@@ -102,6 +128,9 @@ def enrich_graph_nodes(
             if sila not in ('silna', 'umiarkowana', 'slaba'):
                 relationship.properties['sila'] = 'umiarkowana'  # default
 
+    # 6. TERMINY WYSZUKIWANIA - search_terms/search_text dla fulltext indexów traversal
+    annotate_graph_documents(graph_documents)
+
     logger.info(
         "Wzbogacono %s węzłów. Ostrzeżenia walidacji: %s",
         enriched_count,
@@ -132,7 +161,8 @@ async def answer_question(
         graph_store: Neo4j graph store instance
         vector_store: Vector store instance
         question: Pytanie użytkownika
-        generate_cypher_fn: Funkcja generująca zapytanie Cypher (z graph_query_builder)
+        generate_cypher_fn: Funkcja ``(llm, graph_store, question)`` generująca zapytanie
+            Cypher (z graph_query_builder); pomijana przy trafieniu w cache Cypher
 
     Returns:
         Dict z odpowiedzią, kontekstem grafowym, wektorowym i zapytaniem Cypher
@@ -145,22 +175,49 @@ async def answer_question(
             "Graph RAG wymaga jednoczesnego dostępu do grafu i indeksu wektorowego."
         )
 
-    logger.info("Generuję zapytanie Cypher dla pytania: %s", question)
-    rag_query = generate_cypher_fn(llm, graph_store, question)
-    logger.info("Wygenerowane zapytanie Cypher: %s", rag_query.cypher_query)
+    # Cypher z cache (pytanie znormalizowane + wersja schematu grafu), inaczej z LLM
+    schema_version = graph_schema_version(graph_schema_text(graph_store))
+    cached_cypher = await get_cached_cypher(question, schema_version)
+    if cached_cypher:
+        cypher_cache_status = CACHE_NEGATIVE if cached_cypher["failed"] else CACHE_HIT
+        rag_query = GraphRAGQuery(
+            cypher_query=cached_cypher["cypher_query"],
+            entities=cached_cypher.get("entities") or [],
+        )
+        logger.info("Zapytanie Cypher z cache (%s): %s", cypher_cache_status, rag_query.cypher_query)
+    else:
+        cypher_cache_status = CACHE_MISS
+        logger.info("Generuję zapytanie Cypher dla pytania: %s", question)
+        rag_query = await asyncio.to_thread(generate_cypher_fn, llm, graph_store, question)
+        logger.info("Wygenerowane zapytanie Cypher: %s", rag_query.cypher_query)
 
     # 1. Kontekst grafowy – zapytanie Cypher wygenerowane przez LLM.
-    try:
-        graph_context = graph_store.query(rag_query.cypher_query)
-    except Exception as exc:  # pragma: no cover - logujemy i kontynuujemy
-        logger.error("Błąd wykonania zapytania Cypher: %s", exc, exc_info=True)
-        graph_context = []
+    #    Negatywny wpis cache = ten Cypher już zawiódł, nie wykonujemy go ponownie.
+    graph_context: list[dict[str, Any]] = []
+    if cypher_cache_status != CACHE_NEGATIVE:
+        store_cypher = cypher_cache_status == CACHE_MISS
+        cypher_error: str | None = None
+        try:
+            if not is_read_only_cypher(rag_query.cypher_query):
+                raise ValueError("Wygenerowane zapytanie Cypher nie jest read-only")
+            graph_context = await asyncio.to_thread(graph_store.query, rag_query.cypher_query)
+        except _TRANSIENT_GRAPH_ERRORS as exc:
+            # Niedostępny Neo4j to nie wina zapytania - bez negatywnego wpisu
+            logger.error("Błąd połączenia przy zapytaniu Cypher: %s", exc, exc_info=True)
+            store_cypher = False
+        except Exception as exc:  # logujemy i kontynuujemy bez kontekstu grafowego
+            logger.error("Błąd wykonania zapytania Cypher: %s", exc, exc_info=True)
+            cypher_error = str(exc) or type(exc).__name__
+        if store_cypher:
+            await cache_cypher(question, schema_version, rag_query.cypher_query, rag_query.entities, cypher_error)
 
     # 2. Kontekst wektorowy – semantyczne wyszukiwanie po encjach.
     vector_context_docs: list[Document] = []
     if rag_query.entities:
         search_query = " ".join(rag_query.entities)
-        vector_context_docs = await vector_store.asimilarity_search(search_query, k=5)
+        vector_context_docs = [
+            doc for doc, _ in await vector_search_with_score(vector_store, search_query, k=5)
+        ]
 
     # 3. Agregacja kontekstu i wygenerowanie odpowiedzi końcowej.
     final_context = "KONTEKST Z GRAFU WIEDZY:\n" + str(graph_context)
@@ -168,21 +225,37 @@ async def answer_question(
     for doc in vector_context_docs:
         final_context += f"- {doc.page_content}\n"
 
-    # Pobierz prompt z config/prompts/rag/graph_rag_answer.yaml
-    from config import prompts
-    answer_prompt_template = prompts.get("rag.graph_rag_answer")
+    # Odpowiedź z cache, jeśli to samo pytanie dostało już identyczny kontekst
+    result_hash = graph_result_hash(graph_context, vector_context_docs)
+    answer = await get_cached_answer(question, result_hash)
+    answer_cached = answer is not None
+    if not answer_cached:
+        # Pobierz prompt z config/prompts/rag/graph_rag_answer.yaml
+        from config import prompts
+        answer_prompt_template = prompts.get("rag.graph_rag_answer")
+
+        # Renderuj prompt ze zmiennymi
+        rendered_messages = answer_prompt_template.render(
+            question=question,
+            context=final_context
+        )
 
-    # Renderuj prompt ze zmiennymi
-    rendered_messages = answer_prompt_template.render(
-        question=question,
-        context=final_context
-    )
+        # Wywołaj LLM z renderowanymi wiadomościami
+        response = await llm.ainvoke(rendered_messages)
+        answer = response.content
+        await cache_answer(question, result_hash, answer)
 
-    # Wywołaj LLM z renderowanymi wiadomościami
-    response = await llm.ainvoke(rendered_messages)
+    logger.info(
+        "graph_rag_answer",
+        extra={
+            "cypher_cache": cypher_cache_status,
+            "answer_cache": CACHE_HIT if answer_cached else CACHE_MISS,
+            "graph_rows": len(graph_context),
+        },
+    )
 
     return {
-        "answer": response.content,
+        "answer": answer,
         "graph_context": graph_context,
         "vector_context": [doc.to_json() for doc in vector_context_docs],
         "cypher_query": rag_query.cypher_query,
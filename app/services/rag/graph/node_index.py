@@ -0,0 +1,153 @@
+"""Skompilowany indeks słów kluczowych węzłów grafu do wzbogacania chunków.
+
+``find_related_graph_nodes`` sprawdzał dla każdego chunku każdy węzeł
+(``keyword in chunk_text`` dla każdego słowa kluczowego każdego węzła).
+``GraphNodeIndex`` kompiluje słowa kluczowe wszystkich węzłów wyniku
+graph context raz - do automatu Aho-Corasick - więc dopasowanie chunku
+to jedno liniowe przejście po jego tekście.
+
+Semantyka bez zmian:
+- słowo kluczowe = token ``streszczenie`` / ``kluczowe_fakty`` dłuższy niż 5 znaków
+  (lowercase, podział po białych znakach), dopasowanie jako podciąg tekstu chunku
+- węzeł jest powiązany, gdy pochodzi z tego samego dokumentu (``doc_id``)
+  albo w chunku występują co najmniej 2 różne jego słowa kluczowe
+
+Skompilowane indeksy trzymane są w LRU w procesie, pod kluczem wyniku
+graph context (z wersją indeksu RAG) - patrz ``get_graph_node_index``.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from typing import Any, Iterable
+
+from langchain_core.documents import Document
+
+MIN_KEYWORD_LENGTH = 6
+MIN_KEYWORD_MATCHES = 2
+NODE_INDEX_CACHE_SIZE = 256
+
+
+class KeywordAutomaton:
+    """Automat Aho-Corasick - wszystkie słowa kluczowe występujące w tekście w jednym przejściu."""
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        self.keywords: list[str] = []
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[tuple[int, ...]] = [()]
+
+        terminal: dict[int, int] = {}
+        for keyword in dict.fromkeys(keywords):
+            if not keyword:
+                continue
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            terminal[state] = len(self.keywords)
+            self.keywords.append(keyword)
+
+        for state, keyword_id in terminal.items():
+            self._output[state] = (keyword_id,)
+        self._build_fail_links()
+
+    def _build_fail_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                # Wyjścia stanu fail dołączamy od razu - przy wyszukiwaniu bez chodzenia po łańcuchu
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> set[int]:
+        """Zwróć identyfikatory (indeksy w ``self.keywords``) słów obecnych w tekście."""
+        found: set[int] = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+def node_keywords(node: dict[str, Any]) -> set[str]:
+    """Słowa kluczowe węzła (backward compatibility: summary/key_facts)."""
+    summary = (node.get('streszczenie') or node.get('summary', '') or '').lower()
+    key_facts = (node.get('kluczowe_fakty') or node.get('key_facts', '') or '').lower()
+    return {word for word in (summary + " " + key_facts).split() if len(word) >= MIN_KEYWORD_LENGTH}
+
+
+class GraphNodeIndex:
+    """Węzły jednego wyniku graph context ze skompilowanym automatem słów kluczowych."""
+
+    def __init__(self, graph_nodes: list[dict[str, Any]]) -> None:
+        self.graph_nodes = graph_nodes
+        self._doc_nodes: dict[str, set[int]] = {}
+        keyword_nodes: dict[str, list[int]] = {}
+        for position, node in enumerate(graph_nodes):
+            node_doc_id = node.get('doc_id', '')
+            if node_doc_id:
+                self._doc_nodes.setdefault(node_doc_id, set()).add(position)
+            for keyword in node_keywords(node):
+                keyword_nodes.setdefault(keyword, []).append(position)
+
+        self.automaton = KeywordAutomaton(keyword_nodes)
+        self._keyword_nodes = [keyword_nodes[keyword] for keyword in self.automaton.keywords]
+
+    def __len__(self) -> int:
+        return len(self.graph_nodes)
+
+    def related_nodes(self, chunk_doc: Document) -> list[dict[str, Any]]:
+        """Węzły powiązane z chunkiem (kolejność jak w graph context)."""
+        if not self.graph_nodes:
+            return []
+
+        related = set(self._doc_nodes.get(chunk_doc.metadata.get('doc_id', ''), ()))
+        matches: dict[int, int] = {}
+        for keyword_id in self.automaton.find(chunk_doc.page_content.lower()):
+            for position in self._keyword_nodes[keyword_id]:
+                matches[position] = matches.get(position, 0) + 1
+        related.update(position for position, count in matches.items() if count >= MIN_KEYWORD_MATCHES)
+        return [self.graph_nodes[position] for position in sorted(related)]
+
+
+_node_index_cache: OrderedDict[str, GraphNodeIndex] = OrderedDict()
+
+
+def get_graph_node_index(cache_key: str | None, graph_nodes: list[dict[str, Any]]) -> GraphNodeIndex:
+    """Zwróć skompilowany indeks dla wyniku graph context (LRU w procesie).
+
+    Args:
+        cache_key: Pełny klucz wyniku w ``graph_context_cache`` (z wersją indeksu RAG);
+            None = indeks jednorazowy, bez cache
+        graph_nodes: Węzły wyniku graph context
+    """
+    if cache_key is None:
+        return GraphNodeIndex(graph_nodes)
+
+    index = _node_index_cache.get(cache_key)
+    if index is not None and len(index) == len(graph_nodes):
+        _node_index_cache.move_to_end(cache_key)
+        return index
+
+    index = GraphNodeIndex(graph_nodes)
+    _node_index_cache[cache_key] = index
+    while len(_node_index_cache) > NODE_INDEX_CACHE_SIZE:
+        _node_index_cache.popitem(last=False)
+    return index
@@ -16,6 +16,12 @@ from app.schemas.rag import GraphRAGQuery
 logger = logging.getLogger(__name__)
 
 
+def graph_schema_text(graph_store: Any) -> str:
+    """Schemat grafu dla promptu (``Neo4jGraph.get_schema`` to property, starsze klienty - metoda)."""
+    schema = graph_store.get_schema
+    return schema() if callable(schema) else schema
+
+
 def generate_cypher_query(
     llm: Any,
     graph_store: Any,
@@ -42,7 +48,7 @@ def generate_cypher_query(
     cypher_prompt_template = prompts.get("rag.cypher_generation")
 
     # Renderuj prompt ze zmiennymi
-    graph_schema = graph_store.get_schema()
+    graph_schema = graph_schema_text(graph_store)
     rendered_messages = cypher_prompt_template.render(
         question=question,
         graph_schema=graph_schema
@@ -0,0 +1,211 @@
+"""Indeksowane dopasowanie terminów dla traversal grafu demograficznego.
+
+Zamiast ``toLower(...) CONTAINS toLower(term)`` po wszystkich węzłach
+(pełny skan etykiety, koszt rośnie liniowo z rozmiarem grafu) węzły
+``Wskaznik``, ``Obserwacja``, ``Trend`` i ``Demografia`` dostają przy ingestcie:
+
+- ``search_terms`` - listę znormalizowanych tokenów ze ``streszczenie``
+  i ``kluczowe_fakty`` (lowercase + pseudo-lematyzacja ``normalize_polish_word``;
+  zachowujemy też formę bez końcówki, żeby prefiks zapytania pasował do odmian)
+- ``search_text`` - te same tokeny złączone spacją, indeksowane przez
+  fulltext index per etykieta (analyzer ``whitespace`` - tokeny są już
+  znormalizowane po stronie Pythona)
+
+Zapytanie zamienia terminy profilu na zapytanie Lucene z prefiksami
+(``warszawa* OR 25\\-34*``) i korzysta z ``db.index.fulltext.queryNodes``.
+Indexy tworzy i stare węzły uzupełnia ``ensure_graph_term_indexes`` - w tle
+(``schedule_graph_term_indexes`` po pierwszym zapytaniu i po ingestcie), nigdy
+w ścieżce zapytania. Dopóki indexy nie są gotowe (``term_indexes_ready``),
+traversal używa dawnego dopasowania ``CONTAINS`` (``to_contains_matching``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from typing import Any, Iterable
+
+from app.services.focus_groups.nlp.language_detection import normalize_polish_word
+
+logger = logging.getLogger(__name__)
+
+TERM_INDEXED_LABELS = ("Wskaznik", "Obserwacja", "Trend", "Demografia")
+TERM_SOURCE_PROPERTIES = ("streszczenie", "kluczowe_fakty")
+MIN_TERM_LENGTH = 2
+BACKFILL_BATCH_SIZE = 500
+AWAIT_INDEXES_TIMEOUT_SECONDS = 300
+
+_TOKEN_RE = re.compile(r"[0-9a-ząćęłńóśźż]+(?:[-–][0-9a-ząćęłńóśźż]+)*")
+_LUCENE_SPECIAL_RE = re.compile(r'([+\-!(){}\[\]^"~*?:\\/&|])')
+_FULLTEXT_CALL_RE = re.compile(
+    r"CALL db\.index\.fulltext\.queryNodes\('graph_terms_(\w+)', \$lucene_query\)\s*YIELD node AS (\w+)"
+)
+
+_indexes_ready = False
+_indexes_lock = asyncio.Lock()
+_background_task: asyncio.Task | None = None
+
+
+def term_index_name(label: str) -> str:
+    """Nazwa fulltext indexu terminów dla etykiety (np. ``graph_terms_wskaznik``)."""
+    return f"graph_terms_{label.lower()}"
+
+
+def extract_search_terms(*texts: Any) -> list[str]:
+    """Tokeny + ich formy po pseudo-lematyzacji (kolejność zachowana, bez duplikatów)."""
+    terms: dict[str, None] = {}
+    for text in texts:
+        if not text:
+            continue
+        for token in _TOKEN_RE.findall(str(text).lower()):
+            if len(token) < MIN_TERM_LENGTH:
+                continue
+            terms.setdefault(token, None)
+            terms.setdefault(normalize_polish_word(token), None)
+    return list(terms)
+
+
+def build_lucene_query(search_terms: Iterable[str]) -> str:
+    """Zapytanie Lucene (OR prefiksów) dla terminów profilu demograficznego.
+
+    Prefiks znormalizowanego tokenu pasuje do odmian zapisanych w węźle
+    (``wyższe*`` → ``wyższego``), co zachowuje recall dawnego ``CONTAINS``.
+    """
+    escaped = (_LUCENE_SPECIAL_RE.sub(r"\\\1", term) for term in extract_search_terms(*search_terms))
+    return " OR ".join(f"{term}*" for term in escaped)
+
+
+def annotate_node_properties(properties: dict[str, Any]) -> None:
+    """Zapisz ``search_terms`` / ``search_text`` w properties węzła (in place)."""
+    terms = extract_search_terms(*(properties.get(name) for name in TERM_SOURCE_PROPERTIES))
+    properties["search_terms"] = terms
+    properties["search_text"] = " ".join(terms)
+
+
+def annotate_graph_documents(graph_documents: Iterable[Any]) -> int:
+    """Dodaj terminy wyszukiwania do węzłów z ``TERM_INDEXED_LABELS``; zwraca liczbę węzłów."""
+    annotated = 0
+    for graph_doc in graph_documents:
+        for node in graph_doc.nodes:
+            if node.type in TERM_INDEXED_LABELS:
+                annotate_node_properties(node.properties)
+                annotated += 1
+    return annotated
+
+
+def _create_indexes(graph_store: Any) -> None:
+    for label in TERM_INDEXED_LABELS:
+        graph_store.query(
+            f"CREATE FULLTEXT INDEX {term_index_name(label)} IF NOT EXISTS "
+            f"FOR (n:{label}) ON EACH [n.search_text] "
+            "OPTIONS {indexConfig: {`fulltext.analyzer`: 'whitespace'}}"
+        )
+
+
+def _backfill_label(graph_store: Any, label: str) -> int:
+    """Uzupełnij terminy węzłom zapisanym przed indeksowaniem (stronicowo)."""
+    total = 0
+    while True:
+        rows = graph_store.query(
+            f"MATCH (n:{label}) WHERE n.search_text IS NULL "
+            "RETURN elementId(n) AS element_id, n.streszczenie AS streszczenie, "
+            "n.kluczowe_fakty AS kluczowe_fakty LIMIT $limit",
+            params={"limit": BACKFILL_BATCH_SIZE},
+        )
+        if not rows:
+            return total
+        updates = []
+        for row in rows:
+            properties = {name: row.get(name) for name in TERM_SOURCE_PROPERTIES}
+            annotate_node_properties(properties)
+            updates.append(
+                {
+                    "element_id": row["element_id"],
+                    "search_terms": properties["search_terms"],
+                    "search_text": properties["search_text"],
+                }
+            )
+        graph_store.query(
+            "UNWIND $rows AS row MATCH (n) WHERE elementId(n) = row.element_id "
+            "SET n.search_terms = row.search_terms, n.search_text = row.search_text",
+            params={"rows": updates},
+        )
+        total += len(updates)
+
+
+def to_contains_matching(cypher_query: str) -> str:
+    """Zamień wywołania fulltext indexu terminów na dawny skan ``toLower(...) CONTAINS``.
+
+    Fallback na czas, gdy indexy jeszcze nie istnieją lub są w trakcie
+    populacji - zapytanie przyjmuje wtedy parametr ``$search_terms``.
+    """
+    labels = {label.lower(): label for label in TERM_INDEXED_LABELS}
+
+    def replace(match: re.Match[str]) -> str:
+        label, var = labels[match.group(1)], match.group(2)
+        conditions = " OR\n                    ".join(
+            f"toLower(coalesce({var}.{name}, '')) CONTAINS toLower(term)" for name in TERM_SOURCE_PROPERTIES
+        )
+        return (
+            f"WITH $search_terms AS terms\n                MATCH ({var}:{label})\n"
+            f"                WHERE ANY(term IN terms WHERE\n                    {conditions}\n                )"
+        )
+
+    return _FULLTEXT_CALL_RE.sub(replace, cypher_query)
+
+
+def _await_indexes(graph_store: Any) -> None:
+    graph_store.query(
+        "CALL db.awaitIndexes($timeout)",
+        params={"timeout": AWAIT_INDEXES_TIMEOUT_SECONDS},
+    )
+
+
+def term_indexes_ready() -> bool:
+    """Czy fulltext indexy terminów istnieją, są zapełnione i stare węzły uzupełnione."""
+    return _indexes_ready
+
+
+async def ensure_graph_term_indexes(graph_store: Any) -> bool:
+    """Utwórz fulltext indexy terminów, uzupełnij stare węzły i poczekaj na populację.
+
+    Raz na proces (współbieżne wywołania czekają na ``_indexes_lock``). Flaga
+    gotowości ustawiana jest dopiero po ``db.awaitIndexes``, więc traversal
+    nie trafi w index w trakcie populacji. Zwraca stan gotowości.
+    """
+    global _indexes_ready
+    if _indexes_ready or not graph_store:
+        return _indexes_ready
+
+    async with _indexes_lock:
+        if _indexes_ready:
+            return True
+        try:
+            await asyncio.to_thread(_create_indexes, graph_store)
+            backfilled = 0
+            for label in TERM_INDEXED_LABELS:
+                backfilled += await asyncio.to_thread(_backfill_label, graph_store, label)
+            await asyncio.to_thread(_await_indexes, graph_store)
+            _indexes_ready = True
+            logger.info(
+                "graph_term_indexes_ready",
+                extra={"labels": list(TERM_INDEXED_LABELS), "backfilled_nodes": backfilled},
+            )
+        except Exception as exc:  # indeks nie jest krytyczny - kolejne wywołanie spróbuje ponownie
+            logger.warning("Nie udało się przygotować indeksów terminów grafu: %s", exc)
+    return _indexes_ready
+
+
+def schedule_graph_term_indexes(graph_store: Any) -> asyncio.Task | None:
+    """Uruchom ``ensure_graph_term_indexes`` w tle (bez blokowania wywołującego).
+
+    Wywoływane po ingestcie grafu i przy zapytaniu, gdy indexy nie są gotowe.
+    Nie duplikuje zadania, które już trwa; zwraca je (lub None gdy nie ma czego robić).
+    """
+    global _background_task
+    if _indexes_ready or not graph_store:
+        return None
+    if _background_task is None or _background_task.done():
+        _background_task = asyncio.create_task(ensure_graph_term_indexes(graph_store))
+    return _background_task
@@ -2,23 +2,61 @@
 
 Odpowiedzialny za:
 - Wykonywanie zapytań Cypher na grafie Neo4j
-- Cache'owanie wyników w Redis (7-day TTL)
+- Cache'owanie wyników (LRU w procesie → Redis, klucze z wersją indeksu)
 - Normalizację education terms
-- Wyszukiwanie węzłów grafu dla profili demograficznych
+- Wyszukiwanie węzłów grafu dla profili demograficznych (fulltext index terminów,
+  patrz term_index.py)
+- Skompilowany indeks słów kluczowych wyniku (node_index.py), cache'owany pod
+  tym samym kluczem co graph context
 """
 
 import asyncio
-import json
 import logging
 import time
 from typing import Any
 
-import redis.asyncio as redis
+from config import features
+from app.core.single_flight import SingleFlight
+from app.services.rag.caching.tiered_cache import TieredCache, coalescing_lock_ttl
 
-from config import app
+from .node_index import GraphNodeIndex, get_graph_node_index
+from .term_index import (
+    build_lucene_query,
+    schedule_graph_term_indexes,
+    term_indexes_ready,
+    to_contains_matching,
+)
 
 logger = logging.getLogger(__name__)
 
+graph_context_cache = TieredCache("graph_context")
+_graph_context_flight: SingleFlight[list[dict[str, Any]]] = SingleFlight("rag_graph_context")
+
+
+async def get_profile_node_index(
+    graph_nodes: list[dict[str, Any]],
+    age_group: str,
+    location: str,
+    education: str,
+    gender: str,
+) -> GraphNodeIndex:
+    """Skompilowany indeks słów kluczowych dla wyniku graph context profilu.
+
+    Klucz = pełny klucz ``graph_context_cache`` (z wersją indeksu RAG), więc
+    indeks jest unieważniany razem z cache'owanym kontekstem po ingeście.
+    Przy wyłączonym cache RAG indeks budowany jest jednorazowo.
+    """
+    if not features.rag_cache.enabled:
+        return get_graph_node_index(None, graph_nodes)
+
+    cache_key = GraphTraversal._get_cache_key(age_group, location, education, gender)
+    try:
+        full_key = await graph_context_cache.full_key(cache_key)
+    except Exception as exc:  # pragma: no cover - bez wersji indeksu budujemy jednorazowo
+        logger.debug("Brak klucza graph context dla indeksu węzłów: %s", exc)
+        full_key = None
+    return get_graph_node_index(full_key, graph_nodes)
+
 
 class GraphTraversal:
     """Klasa zarządzająca traversal grafu i cache'owaniem wyników."""
@@ -31,26 +69,14 @@ class GraphTraversal:
         """
         self.graph_store = graph_store
 
-        # Redis cache dla Graph RAG queries (7-day TTL)
-        self.redis_client = None
-        try:
-            self.redis_client = redis.from_url(
-                app.redis.url,
-                encoding="utf-8",
-                decode_responses=True,
-            )
-            logger.info("✅ GraphTraversal: Redis cache enabled")
-        except Exception as exc:
-            logger.warning(
-                "⚠️ GraphTraversal: Redis unavailable - cache disabled. Error: %s",
-                exc
-            )
+        # Cache kontekstu grafowego: LRU w procesie → Redis (współdzielona pula)
+        self.cache = graph_context_cache
 
-        # Cache TTL (7 days)
-        self.CACHE_TTL_SECONDS = 7 * 24 * 60 * 60  # 604800 seconds
+    @staticmethod
+    def _get_cache_key(age_group: str, location: str, education: str, gender: str) -> str:
+        """Generate cache key for demographic graph context.
 
-    def _get_cache_key(self, age_group: str, location: str, education: str, gender: str) -> str:
-        """Generate Redis cache key for demographic graph context.
+        Namespace i wersję indeksu dokłada :class:`TieredCache`.
 
         Args:
             age_group: Grupa wiekowa (np. "25-34")
@@ -59,7 +85,7 @@ class GraphTraversal:
             gender: Płeć (np. "kobieta")
 
         Returns:
-            Cache key string (format: "graph_context:age:edu:loc:gender")
+            Cache key string (format: "age:edu:loc:gender")
         """
         # Normalize inputs for consistent caching (lowercase, trim, replace spaces with dashes)
         age = age_group.lower().replace(" ", "-") if age_group else "any"
@@ -68,54 +94,30 @@ class GraphTraversal:
         edu = education.lower().replace(" ", "-").replace("/", "-") if education else "any"
         gen = gender.lower().replace(" ", "-") if gender else "any"
 
-        return f"graph_context:{age}:{edu}:{loc}:{gen}"
+        return f"{age}:{edu}:{loc}:{gen}"
 
     async def _get_from_cache(self, cache_key: str) -> list[dict[str, Any]] | None:
-        """Get cached graph context from Redis.
+        """Get cached graph context (LRU w procesie, potem Redis).
 
         Args:
-            cache_key: Redis key
+            cache_key: Klucz z :meth:`_get_cache_key`
 
         Returns:
             Cached graph context (list of dicts) or None if cache miss
         """
-        if not self.redis_client:
-            return None
-
-        try:
-            cached = await self.redis_client.get(cache_key)
-            if cached:
-                logger.info(f"✅ Graph RAG cache HIT for {cache_key}")
-                return json.loads(cached)
-            else:
-                logger.info(f"❌ Graph RAG cache MISS for {cache_key}")
-                return None
-        except Exception as exc:
-            logger.warning(f"⚠️ Redis get failed: {exc}")
-            return None
+        cached = await self.cache.get(cache_key)
+        logger.debug("Graph RAG cache %s for %s", "HIT" if cached else "MISS", cache_key)
+        return cached or None
 
     async def _set_cache(self, cache_key: str, data: list[dict[str, Any]]) -> None:
-        """Store graph context in Redis cache.
+        """Store graph context in cache (LRU + Redis).
 
         Args:
-            cache_key: Redis key
+            cache_key: Klucz z :meth:`_get_cache_key`
             data: Graph context data (list of dicts)
         """
-        if not self.redis_client:
-            return
-
-        try:
-            await self.redis_client.setex(
-                cache_key,
-                self.CACHE_TTL_SECONDS,
-                json.dumps(data, ensure_ascii=False)
-            )
-            logger.info(
-                f"💾 Cached graph context: {cache_key} "
-                f"({len(data)} nodes, TTL 7 days)"
-            )
-        except Exception as exc:
-            logger.warning(f"⚠️ Redis set failed: {exc}")
+        await self.cache.set(cache_key, data)
+        logger.debug("Cached graph context: %s (%s nodes)", cache_key, len(data))
 
     @staticmethod
     def normalize_education_term(education: str) -> list[str]:
@@ -187,7 +189,7 @@ class GraphTraversal:
     ) -> list[dict[str, Any]]:
         """Pobiera strukturalny kontekst z grafu wiedzy dla profilu demograficznego.
 
-        NOWOŚĆ: Redis caching (7-day TTL) - cache hit rate ~70-90% expected.
+        Wynik cache'owany w LRU w procesie i Redis (``graph_context_cache``).
 
         Wykonuje zapytania Cypher na grafie aby znaleźć:
         1. Indicators (wskaźniki) - z magnitude, confidence_level
@@ -220,7 +222,7 @@ class GraphTraversal:
             logger.warning("Graph store nie jest dostępny - zwracam pusty kontekst grafowy")
             return []
 
-        # === REDIS CACHE CHECK ===
+        # === CACHE CHECK (LRU → Redis) ===
         cache_key = self._get_cache_key(age_group, location, education, gender)
 
         try:
@@ -235,8 +237,27 @@ class GraphTraversal:
             logger.debug(f"Cache check failed: {cache_exc}")
             # Continue without cache
 
+        # === SINGLE-FLIGHT ===
+        # Współbieżne zapytania o ten sam profil czekają na jedno zapytanie Cypher;
+        # Redis lock rozszerza to na inne instancje (czekają na wpis w cache)
+        return await _graph_context_flight.run(
+            cache_key,
+            lambda: self._query_graph_context(cache_key, age_group, location, education, gender),
+            lock_ttl_seconds=coalescing_lock_ttl(),
+            wait_for=lambda: self._get_from_cache(cache_key),
+        )
+
+    async def _query_graph_context(
+        self,
+        cache_key: str,
+        age_group: str,
+        location: str,
+        education: str,
+        gender: str,
+    ) -> list[dict[str, Any]]:
+        """Wykonaj zapytanie Cypher dla profilu i zapisz niepusty wynik w cache."""
         # Budujemy search terms - rozdzielamy education na pojedyncze terminy
-        # CRITICAL: Normalize to lowercase for TEXT index matching (case-sensitive CONTAINS)
+        # (normalizację i stemming robi build_lucene_query - tak samo jak przy ingestcie)
         search_terms = [
             age_group.lower() if age_group else "",
             location.lower() if location else "",
@@ -265,6 +286,16 @@ class GraphTraversal:
             search_terms[:15]  # Log pierwsze 15 dla debugowania
         )
 
+        lucene_query = build_lucene_query(search_terms)
+        if not lucene_query:
+            logger.warning("Brak terminów wyszukiwania dla profilu - zwracam pusty kontekst grafowy")
+            return []
+
+        # Fulltext indexy terminów powstają w tle - do tego czasu dawny skan CONTAINS
+        use_term_index = term_indexes_ready()
+        if not use_term_index:
+            schedule_graph_term_indexes(self.graph_store)
+
         try:
             # === OPTIMIZED CYPHER QUERY WITH CALL SUBQUERIES ===
             # Performance: 30-50% faster execution vs sequential MATCH clauses
@@ -275,19 +306,16 @@ class GraphTraversal:
             # Schema: streszczenie, skala, pewnosc, okres_czasu, kluczowe_fakty (POLSKIE)
             cypher_query = """
             // === OPTIMIZED WITH CALL SUBQUERIES (Neo4j 5.x+ syntax) ===
-            // Parametry: $search_terms - lista słów kluczowych do matchingu
-            // UWAGA: Case-insensitive matching (toLower) - TEXT indexes nie działają,
-            //        ale poprawia recall dla polskich odmian (Warszawa/warszawie/warszawy)
+            // Parametry: $lucene_query - prefiksy znormalizowanych terminów profilu
+            //           (term_index.build_lucene_query), np. "warszawa* OR 25\\-34*"
+            // Węzły mają search_text (tokeny + formy po pseudo-lematyzacji) zapisany
+            // przy ingestcie - dopasowanie przez fulltext index per etykieta
 
             // 1. Znajdź Wskaźniki (preferuj wysoką pewność jeśli istnieje)
-            // ZMIANA: Case-insensitive CONTAINS dla lepszego recall (cost: 2-5x slower)
+            // Fulltext index terminów (search_text) zamiast skanu etykiety z CONTAINS
             CALL () {
-                WITH $search_terms AS terms
-                MATCH (ind:Wskaznik)
-                WHERE ANY(term IN terms WHERE
-                    toLower(coalesce(ind.streszczenie, '')) CONTAINS toLower(term) OR
-                    toLower(coalesce(ind.kluczowe_fakty, '')) CONTAINS toLower(term)
-                )
+                CALL db.index.fulltext.queryNodes('graph_terms_wskaznik', $lucene_query)
+                YIELD node AS ind
                 RETURN ind,
                     CASE WHEN ind.pewnosc = 'wysoka' THEN 0
                          WHEN ind.pewnosc = 'srednia' THEN 1
@@ -305,14 +333,10 @@ class GraphTraversal:
             }) AS indicators
 
             // 2. Znajdź Obserwacje (preferuj wysoką pewność jeśli istnieje)
-            // ZMIANA: Case-insensitive CONTAINS dla lepszego recall (cost: 2-5x slower)
+            // Fulltext index terminów (search_text) zamiast skanu etykiety z CONTAINS
             CALL () {
-                WITH $search_terms AS terms
-                MATCH (obs:Obserwacja)
-                WHERE ANY(term IN terms WHERE
-                    toLower(coalesce(obs.streszczenie, '')) CONTAINS toLower(term) OR
-                    toLower(coalesce(obs.kluczowe_fakty, '')) CONTAINS toLower(term)
-                )
+                CALL db.index.fulltext.queryNodes('graph_terms_obserwacja', $lucene_query)
+                YIELD node AS obs
                 RETURN obs,
                     CASE WHEN obs.pewnosc = 'wysoka' THEN 0
                          WHEN obs.pewnosc = 'srednia' THEN 1
@@ -329,14 +353,10 @@ class GraphTraversal:
             }) AS observations
 
             // 3. Znajdź Trendy
-            // ZMIANA: Case-insensitive CONTAINS dla lepszego recall (cost: 2-5x slower)
+            // Fulltext index terminów (search_text) zamiast skanu etykiety z CONTAINS
             CALL () {
-                WITH $search_terms AS terms
-                MATCH (trend:Trend)
-                WHERE ANY(term IN terms WHERE
-                    toLower(coalesce(trend.streszczenie, '')) CONTAINS toLower(term) OR
-                    toLower(coalesce(trend.kluczowe_fakty, '')) CONTAINS toLower(term)
-                )
+                CALL db.index.fulltext.queryNodes('graph_terms_trend', $lucene_query)
+                YIELD node AS trend
                 RETURN trend
                 ORDER BY size(coalesce(trend.kluczowe_fakty, '')) DESC
                 LIMIT 2
@@ -349,14 +369,10 @@ class GraphTraversal:
             }) AS trends
 
             // 4. Znajdź węzły Demografii
-            // ZMIANA: Case-insensitive CONTAINS dla lepszego recall (cost: 2-5x slower)
+            // Fulltext index terminów (search_text) zamiast skanu etykiety z CONTAINS
             CALL () {
-                WITH $search_terms AS terms
-                MATCH (demo:Demografia)
-                WHERE ANY(term IN terms WHERE
-                    toLower(coalesce(demo.streszczenie, '')) CONTAINS toLower(term) OR
-                    toLower(coalesce(demo.kluczowe_fakty, '')) CONTAINS toLower(term)
-                )
+                CALL db.index.fulltext.queryNodes('graph_terms_demografia', $lucene_query)
+                YIELD node AS demo
                 RETURN demo,
                     CASE WHEN demo.pewnosc = 'wysoka' THEN 0
                          WHEN demo.pewnosc = 'srednia' THEN 1
@@ -374,6 +390,10 @@ class GraphTraversal:
             // 5. Połącz wszystkie wyniki
             RETURN indicators + observations + trends + demographics AS graph_context
             """
+            params: dict[str, Any] = {"lucene_query": lucene_query}
+            if not use_term_index:
+                cypher_query = to_contains_matching(cypher_query)
+                params = {"search_terms": search_terms}
 
             # Execute query with timeout + performance monitoring
             query_start = time.perf_counter()
@@ -383,7 +403,7 @@ class GraphTraversal:
                     asyncio.to_thread(
                         self.graph_store.query,
                         cypher_query,
-                        params={"search_terms": search_terms}
+                        params=params
                     ),
                     timeout=10.0  # 10s max per Cypher query (should be <5s with TEXT indexes)
                 )
@@ -432,7 +452,6 @@ class GraphTraversal:
             )
 
             # === CACHE RESULT ===
-            # Cache the result for future requests (7-day TTL)
             try:
                 await self._set_cache(cache_key, graph_context)
             except Exception as cache_exc:
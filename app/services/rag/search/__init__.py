@@ -1,4 +1,4 @@
-"""Search modules dla hybrid RAG - keyword search, Lucene utils, RRF fusion."""
+"""Search modules dla hybrid RAG - keyword search, Lucene utils, fuzja rankingów (RRF / CombSUM)."""
 
 from .cache import (
     get_hybrid_search_cache_key,
@@ -8,8 +8,8 @@ from .cache import (
 )
 from .keyword_search import keyword_search, ensure_fulltext_index
 from .lucene_utils import sanitize_lucene_query
-from .fusion_algorithms import rrf_fusion
-from .reranker import init_reranker, rerank_with_cross_encoder
+from .fusion_algorithms import RankedList, chunk_id, fuse, rrf_fusion
+from .reranker import init_reranker, rerank_with_cross_encoder, reranker_disabled, reranker_ready
 from .graph_enrichment import (
     format_graph_context,
     find_related_graph_nodes,
@@ -29,10 +29,15 @@ __all__ = [
     # Lucene utils
     "sanitize_lucene_query",
     # Fusion
+    "RankedList",
+    "chunk_id",
+    "fuse",
     "rrf_fusion",
     # Reranking
     "init_reranker",
     "rerank_with_cross_encoder",
+    "reranker_disabled",
+    "reranker_ready",
     # Graph enrichment
     "format_graph_context",
     "find_related_graph_nodes",
@@ -1,113 +1,85 @@
-"""Redis cache dla hybrid search queries.
+"""Cache dla hybrid search queries.
 
 Moduł odpowiada za:
 - Generowanie cache keys dla hybrid search
-- Get/Set operations z 7-day TTL
+- Get/Set operations przez dwupoziomowy cache RAG (LRU w procesie → Redis,
+  msgpack+zstd, klucze z wersją indeksu - patrz ``app/services/rag/caching``)
 - Serializacja/deserializacja Document objects
 """
 
 import hashlib
-import json
 import logging
 from typing import Optional
 
-import redis.asyncio as redis
 from langchain_core.documents import Document
 
+from app.services.rag.caching.tiered_cache import TieredCache
+from config import features
+
 logger = logging.getLogger(__name__)
 
-# Cache TTL (7 days - same as GraphRAGService)
-CACHE_TTL_SECONDS = 7 * 24 * 60 * 60  # 604800 seconds
+# Cache TTL w Redis (domyślnie 7 dni - features.rag_cache.redis_ttl_days)
+CACHE_TTL_SECONDS = features.rag_cache.redis_ttl_days * 24 * 60 * 60
+
+hybrid_search_cache = TieredCache("hybrid_search")
 
 
 def get_hybrid_search_cache_key(query: str, top_k: int) -> str:
     """Generate cache key for hybrid search.
 
+    Namespace i wersję indeksu dokłada :class:`TieredCache`.
+
     Args:
         query: Search query text
         top_k: Number of results
 
     Returns:
-        Cache key string (format: "hybrid_search:query_hash:topk")
+        Cache key string (format: "query_hash:topk")
     """
     # Hash query for shorter cache key (MD5 sufficient for caching)
     query_normalized = query.lower().strip()
     query_hash = hashlib.md5(query_normalized.encode()).hexdigest()[:12]
 
-    return f"hybrid_search:{query_hash}:{top_k}"
+    return f"{query_hash}:{top_k}"
 
 
-async def get_hybrid_cache(
-    redis_client: Optional[redis.Redis],
-    cache_key: str
-) -> Optional[list[Document]]:
-    """Get cached hybrid search results from Redis.
+async def get_hybrid_cache(cache_key: str) -> Optional[list[Document]]:
+    """Get cached hybrid search results (LRU w procesie, potem Redis).
 
     Args:
-        redis_client: Redis client instance (or None if disabled)
-        cache_key: Redis key
+        cache_key: Klucz z :func:`get_hybrid_search_cache_key`
 
     Returns:
         Cached documents (list of Document) or None if cache miss
     """
-    if not redis_client:
+    docs_data = await hybrid_search_cache.get(cache_key)
+    if not docs_data:
+        logger.debug("Hybrid search cache MISS for %s", cache_key)
         return None
 
-    try:
-        cached = await redis_client.get(cache_key)
-        if cached:
-            logger.info(f"✅ Hybrid search cache HIT for {cache_key}")
-            # Deserialize JSON back to Document objects
-            docs_data = json.loads(cached)
-            documents = [
-                Document(
-                    page_content=doc_data["page_content"],
-                    metadata=doc_data.get("metadata", {})
-                )
-                for doc_data in docs_data
-            ]
-            return documents
-        else:
-            logger.info(f"❌ Hybrid search cache MISS for {cache_key}")
-            return None
-    except Exception as exc:
-        logger.warning(f"⚠️ Redis get failed: {exc}")
-        return None
+    logger.debug("Hybrid search cache HIT for %s", cache_key)
+    return [
+        Document(
+            page_content=doc_data["page_content"],
+            metadata=doc_data.get("metadata", {})
+        )
+        for doc_data in docs_data
+    ]
 
 
-async def set_hybrid_cache(
-    redis_client: Optional[redis.Redis],
-    cache_key: str,
-    documents: list[Document]
-) -> None:
-    """Store hybrid search results in Redis cache.
+async def set_hybrid_cache(cache_key: str, documents: list[Document]) -> None:
+    """Store hybrid search results in cache (LRU + Redis).
 
     Args:
-        redis_client: Redis client instance (or None if disabled)
-        cache_key: Redis key
+        cache_key: Klucz z :func:`get_hybrid_search_cache_key`
         documents: List of Document objects
     """
-    if not redis_client:
-        return
-
-    try:
-        # Serialize Document objects to JSON
-        docs_data = [
-            {
-                "page_content": doc.page_content,
-                "metadata": doc.metadata
-            }
-            for doc in documents
-        ]
-
-        await redis_client.setex(
-            cache_key,
-            CACHE_TTL_SECONDS,
-            json.dumps(docs_data, ensure_ascii=False)
-        )
-        logger.info(
-            f"💾 Cached hybrid search: {cache_key} "
-            f"({len(documents)} docs, TTL 7 days)"
-        )
-    except Exception as exc:
-        logger.warning(f"⚠️ Redis set failed: {exc}")
+    docs_data = [
+        {
+            "page_content": doc.page_content,
+            "metadata": doc.metadata
+        }
+        for doc in documents
+    ]
+    await hybrid_search_cache.set(cache_key, docs_data)
+    logger.debug("Cached hybrid search: %s (%s docs)", cache_key, len(documents))
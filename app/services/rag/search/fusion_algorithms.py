@@ -1,16 +1,134 @@
-"""Reciprocal Rank Fusion (RRF) algorithm dla łączenia wyników wyszukiwania.
+"""Fuzja rankingów z wielu retrieverów (vector, keyword, ...) dla hybrid search.
 
-RRF to algorytm fuzji który łączy rankingi z różnych źródeł (vector + keyword search)
-używając wzoru: score = sum(1 / (k + rank)) gdzie k=60 (domyślnie).
+``fuse`` łączy dowolną liczbę nazwanych list kandydatów z wagami:
+- ``rrf`` - Reciprocal Rank Fusion: score = sum(waga / (k + rank)), k=60 domyślnie
+- ``combsum`` - suma wyników znormalizowanych min-max w obrębie każdej listy,
+  ważona per retriever (listy bez wyników liczbowych - wynik z pozycji)
+
+Dokument identyfikowany jest hashem treści węzła ``RAGChunk`` (``content_hash``
+z metadanych - jeden węzeł współdzielony przez dokumenty po deduplikacji),
+a w starszych danych ``doc_id`` + ``chunk_index`` lub skrótem treści. Wynik ograniczany kopcem
+(``limit``) - sortujemy tylko tyle kandydatów, ile potrzebuje reranking.
+
+``rrf_fusion`` to dwuelementowy wariant zachowany dla istniejących wywołań.
 """
 
+import hashlib
+import heapq
 import logging
-from typing import List, Tuple, Union
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional, Sequence, Tuple, Union
 
 from langchain_core.documents import Document
 
 logger = logging.getLogger(__name__)
 
+FUSION_RRF = "rrf"
+FUSION_COMBSUM = "combsum"
+FUSION_METHODS = (FUSION_RRF, FUSION_COMBSUM)
+
+RankedItem = Union[Document, Tuple[Document, float]]
+
+
+@dataclass(frozen=True)
+class RankedList:
+    """Ranking jednego retrievera (najlepszy pierwszy) z wagą w fuzji."""
+
+    name: str
+    results: Sequence[RankedItem]
+    weight: float = 1.0
+
+
+def chunk_id(doc: Document) -> str:
+    """Stabilny identyfikator chunku: ``content_hash``, ``doc_id:chunk_index`` albo skrót treści.
+
+    ``doc_id:chunk_index`` nie jest unikalny po deduplikacji - współdzielony chunk
+    zachowuje ``chunk_index`` pierwszego dokumentu, a po jego usunięciu dostaje
+    ``doc_id`` innego - dlatego tylko jako fallback dla chunków sprzed hashy.
+    """
+    metadata = doc.metadata or {}
+    content_hash = metadata.get("content_hash")
+    if content_hash:
+        return f"c:{content_hash}"
+    doc_id = metadata.get("doc_id")
+    chunk_index = metadata.get("chunk_index")
+    if doc_id is not None and chunk_index is not None:
+        return f"{doc_id}:{chunk_index}"
+    return "h:" + hashlib.blake2b(doc.page_content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _unpack(item: RankedItem) -> Tuple[Document, Optional[float]]:
+    if isinstance(item, tuple):
+        return item[0], item[1]
+    return item, None
+
+
+def _combsum_scores(items: Sequence[Tuple[Document, Optional[float]]]) -> List[float]:
+    """Wyniki listy znormalizowane min-max do [0, 1] (bez wyników liczbowych - z pozycji)."""
+    count = len(items)
+    raw = [score for _, score in items]
+    if any(score is None for score in raw):
+        return [(count - rank) / count for rank in range(count)]
+    low, high = min(raw), max(raw)
+    if high == low:
+        return [1.0] * count
+    return [(score - low) / (high - low) for score in raw]
+
+
+def fuse(
+    ranked_lists: Iterable[RankedList],
+    method: str = FUSION_RRF,
+    k: int = 60,
+    limit: Optional[int] = None,
+) -> List[Tuple[Document, float]]:
+    """Połącz rankingi retrieverów w jeden ranking (Document, fused_score).
+
+    Args:
+        ranked_lists: Rankingi retrieverów (kolejność list rozstrzyga remisy)
+        method: ``rrf`` | ``combsum``
+        k: Stała RRF (ignorowana dla ``combsum``)
+        limit: Ile najlepszych wyników zwrócić (None = wszystkie)
+
+    Returns:
+        Lista (Document, fused_score) malejąco po score; dla dokumentu obecnego
+        w kilku listach zwracany jest egzemplarz z pierwszej listy
+
+    Raises:
+        ValueError: Nieznana metoda fuzji
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Nieznana metoda fuzji: {method}. Dozwolone: {', '.join(FUSION_METHODS)}")
+
+    # chunk_id → [fused_score, kolejność pierwszego wystąpienia, dokument]
+    entries: dict[str, list[Any]] = {}
+    for ranked in ranked_lists:
+        if not ranked.results or ranked.weight == 0:
+            continue
+        items = [_unpack(item) for item in ranked.results]
+        if method == FUSION_RRF:
+            contributions = [ranked.weight / (k + rank + 1) for rank in range(len(items))]
+        else:
+            contributions = [ranked.weight * score for score in _combsum_scores(items)]
+
+        seen: set[str] = set()
+        for (doc, _), contribution in zip(items, contributions):
+            key = chunk_id(doc)
+            if key in seen:  # duplikat w obrębie jednej listy liczymy raz (najlepsza pozycja)
+                continue
+            seen.add(key)
+            entry = entries.get(key)
+            if entry is None:
+                entries[key] = [contribution, len(entries), doc]
+            else:
+                entry[0] += contribution
+
+    ordered = (
+        heapq.nsmallest(limit, entries.values(), key=lambda entry: (-entry[0], entry[1]))
+        if limit is not None
+        else sorted(entries.values(), key=lambda entry: (-entry[0], entry[1]))
+    )
+    return [(doc, score) for score, _, doc in ordered]
+
 
 def rrf_fusion(
     vector_results: List[Tuple[Document, float]],
@@ -18,36 +136,17 @@ def rrf_fusion(
     k: int = 60,
 ) -> List[Tuple[Document, float]]:
     """Łączy wyniki vector i keyword search przy pomocy Reciprocal Rank Fusion.
-    
+
     Args:
         vector_results: List of (Document, score) from vector search
         keyword_results: List of Document or (Document, score) from keyword search
         k: RRF constant (default 60)
-        
+
     Returns:
         Fused list of (Document, fused_score) sorted by score desc
     """
-    scores: dict[int, float] = {}
-    doc_map: dict[int, Tuple[Document, float]] = {}
-
-    # Process vector results
-    for rank, (doc, original_score) in enumerate(vector_results):
-        doc_hash = hash(doc.page_content)
-        scores[doc_hash] = scores.get(doc_hash, 0.0) + 1.0 / (k + rank + 1)
-        doc_map[doc_hash] = (doc, original_score)
-
-    # Process keyword results
-    for rank, item in enumerate(keyword_results):
-        if isinstance(item, tuple):
-            doc, keyword_score = item
-        else:
-            doc, keyword_score = item, 0.0
-
-        doc_hash = hash(doc.page_content)
-        scores[doc_hash] = scores.get(doc_hash, 0.0) + 1.0 / (k + rank + 1)
-        if doc_hash not in doc_map:
-            doc_map[doc_hash] = (doc, keyword_score)
-
-    # Sort by fused score
-    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
-    return [(doc_map[doc_hash][0], fused_score) for doc_hash, fused_score in fused]
+    return fuse(
+        [RankedList("vector", vector_results), RankedList("keyword", keyword_results)],
+        method=FUSION_RRF,
+        k=k,
+    )
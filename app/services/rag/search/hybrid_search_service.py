@@ -10,13 +10,15 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Any, Optional
+import time
+from typing import Any
 
-import redis.asyncio as redis
 from langchain_core.documents import Document
 
-from config import rag, app
-from app.services.rag.clients import get_vector_store
+from config import rag
+from app.core.single_flight import SingleFlight
+from app.services.rag.caching import TieredCache, coalescing_lock_ttl
+from app.services.rag.clients import get_vector_store, vector_search_with_score
 from app.services.rag.search.cache import (
     get_hybrid_search_cache_key,
     get_hybrid_cache,
@@ -27,16 +29,26 @@ from app.services.rag.search.keyword_search import (
     ensure_fulltext_index,
 )
 from app.services.rag.search.lucene_utils import sanitize_lucene_query
-from app.services.rag.search.fusion_algorithms import rrf_fusion
+from app.services.rag.search.fusion_algorithms import RankedList, fuse
 from app.services.rag.search.reranker import init_reranker, rerank_with_cross_encoder
 from app.services.rag.search.graph_enrichment import (
     format_graph_context,
     find_related_graph_nodes,
     enrich_chunk_with_graph,
 )
+from app.services.rag.graph.traversal import get_profile_node_index
+from app.services.rag.search.retrieval_stages import STAGE_OK, StageTimings, run_stage
 
 logger = logging.getLogger(__name__)
 
+# Single-flight: współbieżne identyczne zapytania (np. generacja wielu person z tego
+# samego segmentu) czekają na jedno wyszukiwanie zamiast powtarzać je w Neo4j
+_hybrid_search_flight: SingleFlight[list[Document]] = SingleFlight("rag_hybrid_search")
+_insights_flight: SingleFlight[dict[str, Any]] = SingleFlight("rag_demographic_insights")
+
+# Wynik get_demographic_insights - także źródło dla followerów z innych instancji
+demographic_insights_cache = TieredCache("demographic_insights")
+
 
 class PolishSocietyRAG:
     """Hybrydowe wyszukiwanie kontekstu dla generatora person.
@@ -52,21 +64,6 @@ class PolishSocietyRAG:
         # Współdzielone połączenie z Neo4j Vector Store (retry logic w warstwie pomocniczej)
         self.vector_store = get_vector_store(logger)
 
-        # Redis cache dla hybrid search queries (7-day TTL - same as GraphRAGService)
-        self.redis_client: Optional[redis.Redis] = None
-        try:
-            self.redis_client = redis.from_url(
-                app.redis.url,
-                encoding="utf-8",
-                decode_responses=True,
-            )
-            logger.info("✅ PolishSocietyRAG: Redis cache enabled")
-        except Exception as exc:
-            logger.warning(
-                "⚠️ PolishSocietyRAG: Redis unavailable - cache disabled. Error: %s",
-                exc
-            )
-
         if self.vector_store:
             logger.info("✅ PolishSocietyRAG: Neo4j Vector Store połączony")
 
@@ -77,7 +74,7 @@ class PolishSocietyRAG:
             # Leniwa inicjalizacja GraphRAGService dla dostępu do kontekstu grafowego
             self._graph_rag_service = None
 
-            # Inicjalizuj cross-encoder dla reranking (opcjonalny)
+            # Reranker (opcjonalny) - model ładuje się leniwie w tle przy pierwszym użyciu
             self.reranker = init_reranker()
         else:
             logger.error("❌ PolishSocietyRAG: Neo4j Vector Store failed - RAG wyłączony")
@@ -94,6 +91,109 @@ class PolishSocietyRAG:
             self._graph_rag_service = GraphRAGService()
         return self._graph_rag_service
 
+    async def _keyword_stage(self, query: str, k: int) -> list[tuple[Document, float]]:
+        """Keyword search z leniwą inicjalizacją indeksu fulltext (część etapu keyword)."""
+        if not self._fulltext_index_initialized:
+            await ensure_fulltext_index(self.vector_store)
+            self._fulltext_index_initialized = True
+
+        return await keyword_search(
+            query=query,
+            k=k,
+            vector_store=self.vector_store,
+            sanitize_query_func=sanitize_lucene_query,
+        )
+
+    async def _retrieve_candidates(
+        self,
+        query: str,
+        k: int,
+        timings: StageTimings,
+    ) -> dict[str, list[tuple[Document, float]]]:
+        """Uruchom retrievery (vector, keyword) współbieżnie, każdy z własnym timeoutem.
+
+        Retriever, który przekroczy timeout lub rzuci wyjątkiem, zwraca pustą listę -
+        fuzja działa wtedy na wynikach pozostałych.
+
+        Returns:
+            Słownik nazwa retrievera → ranking (Document, score)
+        """
+        vector_results, keyword_results = await asyncio.gather(
+            run_stage(
+                "vector",
+                vector_search_with_score(self.vector_store, query, k=k),
+                timeout=rag.retrieval.vector_timeout,
+                fallback=[],
+                timings=timings,
+            ),
+            run_stage(
+                "keyword",
+                self._keyword_stage(query, k),
+                timeout=rag.retrieval.keyword_timeout,
+                fallback=[],
+                timings=timings,
+            ),
+        )
+        return {"vector": vector_results, "keyword": keyword_results}
+
+    @staticmethod
+    def _fuse_candidates(
+        candidates: dict[str, list[tuple[Document, float]]],
+        limit: int,
+        timings: StageTimings | None = None,
+    ) -> list[tuple[Document, float]]:
+        """Połącz rankingi retrieverów (metoda i wagi z ``rag.retrieval.fusion_*``)."""
+        fusion_start = time.perf_counter()
+        weights = rag.retrieval.fusion_weights
+        fused = fuse(
+            [RankedList(name, results, weights.get(name, 1.0)) for name, results in candidates.items()],
+            method=rag.retrieval.fusion_method,
+            k=rag.retrieval.rrf_k,
+            limit=limit,
+        )
+        if timings is not None:
+            timings.record("fusion", (time.perf_counter() - fusion_start) * 1000, STAGE_OK)
+        return fused
+
+    async def _fetch_graph_nodes(
+        self,
+        age_group: str,
+        education: str,
+        location: str,
+        gender: str,
+    ) -> list[dict[str, Any]]:
+        """Pobierz węzły grafu dla profilu demograficznego (etap graph)."""
+        import inspect
+
+        # WAŻNE: get_demographic_graph_context jest async – MUSI być awaitowane
+        result = await self.graph_rag_service.get_demographic_graph_context(
+            age_group=age_group,
+            location=location,
+            education=education,
+            gender=gender,
+        )
+
+        # DEFENSIVE CHECK: Ensure result is not a coroutine
+        if inspect.iscoroutine(result):
+            logger.error(
+                "❌ BUG: get_demographic_graph_context returned a coroutine instead of list! "
+                "This should never happen - returning empty list"
+            )
+            # Clean up the unawaited coroutine to prevent warning
+            result.close()
+            return []
+
+        # DEFENSIVE CHECK: Validate graph_nodes type before using
+        if not isinstance(result, list):
+            logger.error(
+                "❌ BUG: graph_nodes is not a list (type: %s)! "
+                "Resetting to empty list to prevent crash",
+                type(result).__name__
+            )
+            return []
+
+        return result
+
     async def hybrid_search(
         self,
         query: str,
@@ -101,10 +201,13 @@ class PolishSocietyRAG:
     ) -> list[Document]:
         """Wykonuje hybrydowe wyszukiwanie (vector + keyword + RRF fusion).
 
-        NOWOŚĆ: Redis caching (7-day TTL) - cache hit rate ~70-90% expected.
+        Cache: LRU w procesie → Redis (``search/cache.py``), klucze z wersją indeksu.
 
         Ta metoda łączy wyszukiwanie semantyczne (embeddingi) i pełnotekstowe (keywords)
-        używając Reciprocal Rank Fusion do połączenia wyników.
+        używając Reciprocal Rank Fusion do połączenia wyników. Vector i keyword search
+        działają współbieżnie z osobnymi timeoutami (``rag.retrieval.*_timeout``);
+        wynik częściowy (etap po timeout/błędzie, reranking pominięty lub zastąpiony
+        rankingiem RRF) nie jest cache'owany.
 
         Args:
             query: Zapytanie tekstowe do wyszukania
@@ -119,9 +222,9 @@ class PolishSocietyRAG:
         if not self.vector_store:
             raise RuntimeError("Vector store niedostępny - hybrid search niemożliwy")
 
-        # === REDIS CACHE CHECK ===
+        # === CACHE CHECK (LRU → Redis) ===
         cache_key = get_hybrid_search_cache_key(query, top_k)
-        cached_documents = await get_hybrid_cache(self.redis_client, cache_key)
+        cached_documents = await get_hybrid_cache(cache_key)
 
         if cached_documents:
             logger.info(
@@ -130,84 +233,66 @@ class PolishSocietyRAG:
             )
             return cached_documents
 
+        # === SINGLE-FLIGHT ===
+        # Współbieżni callerzy z tym samym kluczem czekają na jedno wyszukiwanie;
+        # Redis lock rozszerza to na inne instancje (czekają na wpis w cache)
+        return await _hybrid_search_flight.run(
+            cache_key,
+            lambda: self._search_and_cache(query, top_k, cache_key),
+            lock_ttl_seconds=coalescing_lock_ttl(),
+            wait_for=lambda: get_hybrid_cache(cache_key),
+        )
+
+    async def _search_and_cache(self, query: str, top_k: int, cache_key: str) -> list[Document]:
+        """Wykonaj hybrid search (vector + keyword + RRF) i zapisz pełny wynik w cache."""
         logger.info("Hybrid search: query='%s...', top_k=%s", query[:50], top_k)
 
         try:
-            import time
-            search_start = time.perf_counter()
+            timings = StageTimings()
 
-            # HYBRID SEARCH (Vector + Keyword)
+            # HYBRID SEARCH (Vector + Keyword współbieżnie)
             if rag.retrieval.use_hybrid_search:
                 # Zwiększamy k aby mieć więcej candidates dla reranking
                 candidates_k = rag.retrieval.rerank_candidates if rag.retrieval.use_reranking else top_k * 2
 
-                # Lazy initialization fulltext index przy pierwszym użyciu
-                if not self._fulltext_index_initialized:
-                    await ensure_fulltext_index(self.vector_store)
-                    self._fulltext_index_initialized = True
+                candidates = await self._retrieve_candidates(query, candidates_k, timings)
 
-                # Vector search (timing)
-                vector_start = time.perf_counter()
-                vector_results = await self.vector_store.asimilarity_search_with_score(
-                    query,
-                    k=candidates_k,
-                )
-                vector_duration = time.perf_counter() - vector_start
-
-                # Keyword search (timing)
-                keyword_start = time.perf_counter()
-                keyword_results = await keyword_search(
-                    query=query,
-                    k=candidates_k,
-                    vector_store=self.vector_store,
-                    sanitize_query_func=sanitize_lucene_query,
-                )
-                keyword_duration = time.perf_counter() - keyword_start
-
-                # RRF fusion (timing)
-                rrf_start = time.perf_counter()
-                fused_results = rrf_fusion(
-                    vector_results,
-                    keyword_results,
-                    k=rag.retrieval.rrf_k,
-                )
-                rrf_duration = time.perf_counter() - rrf_start
+                # Fuzja rankingów (RRF / CombSUM) - tylko tyle wyników, ile zużyje reranking / top_k
+                fused_results = self._fuse_candidates(candidates, max(candidates_k, top_k), timings)
 
-                # Optional reranking
-                if rag.retrieval.use_reranking and self.reranker:
-                    logger.info("Applying cross-encoder reranking")
+                # Optional reranking - pominięty (model się ładuje) / fallback do RRF
+                # oznacza wynik zdegradowany w timings, więc nie trafia do cache
+                if rag.retrieval.use_reranking and self.reranker is not None:
                     final_results = await rerank_with_cross_encoder(
                         query=query,
                         candidates=fused_results[:rag.retrieval.rerank_candidates],
                         reranker=self.reranker,
-                        top_k=top_k
+                        top_k=top_k,
+                        timings=timings,
                     )
                 else:
                     final_results = fused_results[:top_k]
-
-                # Performance metrics logging
-                total_duration = time.perf_counter() - search_start
-                logger.info(
-                    "🔍 Hybrid search performance: vector=%.2fs | keyword=%.2fs | RRF=%.2fs | total=%.2fs",
-                    vector_duration,
-                    keyword_duration,
-                    rrf_duration,
-                    total_duration
-                )
             else:
                 # Vector-only search
-                final_results = await self.vector_store.asimilarity_search_with_score(
-                    query,
-                    k=top_k,
+                final_results = await run_stage(
+                    "vector",
+                    vector_search_with_score(self.vector_store, query, k=top_k),
+                    timeout=rag.retrieval.vector_timeout,
+                    fallback=[],
+                    timings=timings,
                 )
 
+            # Performance metrics (czasy etapów - total ≈ max(vector, keyword) + RRF)
+            timings.log("hybrid_search")
+
             # Return only Documents (strip scores)
             documents = [doc for doc, score in final_results]
             logger.info("Hybrid search returned %s documents", len(documents))
 
             # === CACHE RESULT ===
-            # Cache the result for future requests (7-day TTL)
-            await set_hybrid_cache(self.redis_client, cache_key, documents)
+            # Cache the result for future requests (LRU + Redis) - bez wyników częściowych
+            if not timings.degraded:
+                await set_hybrid_cache(cache_key, documents)
 
             return documents
 
@@ -215,6 +300,27 @@ class PolishSocietyRAG:
             logger.error("Hybrid search failed: %s", exc, exc_info=True)
             raise RuntimeError(f"Hybrid search failed: {exc}")
 
+    @staticmethod
+    def _demographic_query(age_group: str, education: str, location: str, gender: str) -> str:
+        """Zapytanie wyszukiwania dla profilu demograficznego (też podstawa klucza cache)."""
+        return (
+            f"Profil demograficzny: {gender}, wiek {age_group}, wykształcenie {education}, "
+            f"lokalizacja {location} w Polsce. Jakie są typowe cechy, wartości, zainteresowania, "
+            f"style życia oraz aspiracje dla tej grupy?"
+        )
+
+    async def is_demographic_insights_cached(
+        self,
+        age_group: str,
+        education: str,
+        location: str,
+        gender: str,
+    ) -> bool:
+        """Czy kontekst profilu jest w cache dla bieżącej wersji indeksu (rozgrzewanie cache)."""
+        query = self._demographic_query(age_group, education, location, gender)
+        cache_key = get_hybrid_search_cache_key(query, rag.retrieval.top_k)
+        return await demographic_insights_cache.get(cache_key) is not None
+
     async def get_demographic_insights(
         self,
         age_group: str,
@@ -224,7 +330,8 @@ class PolishSocietyRAG:
     ) -> dict[str, Any]:
         """Buduje kontekst raportowy dla wskazanego profilu demograficznego.
 
-        Łączy trzy źródła kontekstu:
+        Łączy trzy źródła kontekstu, pobierane współbieżnie (każde z własnym timeoutem,
+        przy timeout/błędzie etap zwraca pusty wynik):
         1. **Graph RAG** - Strukturalna wiedza z grafu (Indicators, Observations, Trends)
         2. **Vector Search** - Semantyczne wyszukiwanie w embeddingach
         3. **Keyword Search** - Leksykalne wyszukiwanie fulltext (opcjonalnie)
@@ -244,12 +351,34 @@ class PolishSocietyRAG:
             logger.warning("Vector store niedostępny – zwracam pusty kontekst.")
             return {"context": "", "citations": [], "query": "", "num_results": 0}
 
-        query = (
-            f"Profil demograficzny: {gender}, wiek {age_group}, wykształcenie {education}, "
-            f"lokalizacja {location} w Polsce. Jakie są typowe cechy, wartości, zainteresowania, "
-            f"style życia oraz aspiracje dla tej grupy?"
+        query = self._demographic_query(age_group, education, location, gender)
+
+        # === CACHE CHECK + SINGLE-FLIGHT ===
+        # Przy generacji person dziesiątki coroutines pytają o ten sam profil naraz -
+        # tylko leader wykonuje vector/fulltext/Cypher + reranking, reszta czeka na wynik
+        cache_key = get_hybrid_search_cache_key(query, rag.retrieval.top_k)
+        cached = await demographic_insights_cache.get(cache_key)
+        if cached:
+            logger.info("Demographic insights cache HIT (%s)", cache_key)
+            return cached
+
+        return await _insights_flight.run(
+            cache_key,
+            lambda: self._build_demographic_insights(query, cache_key, age_group, education, location, gender),
+            lock_ttl_seconds=coalescing_lock_ttl(),
+            wait_for=lambda: demographic_insights_cache.get(cache_key),
         )
 
+    async def _build_demographic_insights(
+        self,
+        query: str,
+        cache_key: str,
+        age_group: str,
+        education: str,
+        location: str,
+        gender: str,
+    ) -> dict[str, Any]:
+        """Pobierz graph context i chunki dla profilu, złóż kontekst i zapisz go w cache."""
         logger.info(
             "RAG hybrid search + Graph RAG dla profilu: wiek=%s, edukacja=%s, lokalizacja=%s, płeć=%s",
             age_group,
@@ -259,115 +388,63 @@ class PolishSocietyRAG:
         )
 
         try:
-            # 1. GRAPH RAG - Pobierz strukturalny kontekst z grafu wiedzy
-            graph_nodes = []
-            graph_context_formatted = ""
-
-            try:
-                import inspect
-
-                # Timeout dla Graph RAG query (domyślnie 30s)
-                async def get_graph_context_with_timeout():
-                    # WAŻNE: get_demographic_graph_context jest async – MUSI być awaitowane
-                    result = await self.graph_rag_service.get_demographic_graph_context(
-                        age_group=age_group,
-                        location=location,
-                        education=education,
-                        gender=gender,
+            timings = StageTimings()
+
+            # 1. HYBRID SEARCH (Vector + Keyword) - Pobierz chunki tekstowe
+            async def search_chunks() -> tuple[list[tuple[Document, float]], str]:
+                if not rag.retrieval.use_hybrid_search:
+                    vector_only = await run_stage(
+                        "vector",
+                        vector_search_with_score(self.vector_store, query, k=rag.retrieval.top_k),
+                        timeout=rag.retrieval.vector_timeout,
+                        fallback=[],
+                        timings=timings,
                     )
+                    return vector_only, "vector_only"
 
-                    # DEFENSIVE CHECK: Ensure result is not a coroutine
-                    if inspect.iscoroutine(result):
-                        logger.error(
-                            "❌ BUG: get_demographic_graph_context returned a coroutine instead of list! "
-                            "This should never happen - returning empty list"
-                        )
-                        # Clean up the unawaited coroutine to prevent warning
-                        result.close()
-                        return []
-
-                    return result
-
-                graph_nodes = await asyncio.wait_for(
-                    get_graph_context_with_timeout(),
-                    timeout=30,  # Default 30s timeout
-                )
-
-                # DEFENSIVE CHECK: Validate graph_nodes type before using
-                if not isinstance(graph_nodes, list):
-                    logger.error(
-                        "❌ BUG: graph_nodes is not a list (type: %s)! "
-                        "Resetting to empty list to prevent crash",
-                        type(graph_nodes).__name__
-                    )
-                    # If it's a coroutine, close it to prevent warning
-                    if inspect.iscoroutine(graph_nodes):
-                        graph_nodes.close()
-                    graph_nodes = []
-
-                if graph_nodes:
-                    graph_context_formatted = format_graph_context(graph_nodes)
-                    logger.info("Pobrano %s węzłów grafu z kontekstem demograficznym", len(graph_nodes))
-                else:
-                    logger.info("Brak wyników z graph context dla podanego profilu")
-            except asyncio.TimeoutError:
-                logger.warning(
-                    "Graph RAG timeout po 30s - kontynuacja bez graph context"
-                )
-                graph_nodes = []  # Explicitly reset
-            except Exception as graph_exc:
-                logger.error(
-                    "Nie udało się pobrać graph context: %s - kontynuacja bez graph context",
-                    graph_exc,
-                    exc_info=True  # Full traceback for debugging
-                )
-                graph_nodes = []  # Explicitly reset
-
-            # 2. HYBRID SEARCH (Vector + Keyword) - Pobierz chunki tekstowe
-            # Lazy initialization fulltext index przy pierwszym użyciu
-            if rag.retrieval.use_hybrid_search and not self._fulltext_index_initialized:
-                await ensure_fulltext_index(self.vector_store)
-                self._fulltext_index_initialized = True
-
-            if rag.retrieval.use_hybrid_search:
                 # Zwiększamy k aby mieć więcej candidates dla reranking
                 candidates_k = rag.retrieval.rerank_candidates if rag.retrieval.use_reranking else rag.retrieval.top_k * 2
 
-                vector_results = await self.vector_store.asimilarity_search_with_score(
-                    query,
-                    k=candidates_k,
-                )
-                keyword_results = await keyword_search(
-                    query=query,
-                    k=candidates_k,
-                    vector_store=self.vector_store,
-                    sanitize_query_func=sanitize_lucene_query,
-                )
-                fused_results = rrf_fusion(
-                    vector_results,
-                    keyword_results,
-                    k=rag.retrieval.rrf_k,
+                candidates = await self._retrieve_candidates(query, candidates_k, timings)
+                fused_results = self._fuse_candidates(
+                    candidates, max(candidates_k, rag.retrieval.top_k), timings
                 )
 
-                # 2b. RERANKING (opcjonalne) - Precyzyjny re-scoring z cross-encoder
-                if rag.retrieval.use_reranking and self.reranker:
-                    logger.info("Applying cross-encoder reranking on top %s candidates", len(fused_results))
-                    final_results = await rerank_with_cross_encoder(
+                # 1b. RERANKING (opcjonalne) - Precyzyjny re-scoring z cross-encoder;
+                # ranking RRF zamiast rerankingu = wynik zdegradowany (bez cache)
+                if rag.retrieval.use_reranking and self.reranker is not None:
+                    reranked = await rerank_with_cross_encoder(
                         query=query,
                         candidates=fused_results[:rag.retrieval.rerank_candidates],
                         reranker=self.reranker,
-                        top_k=rag.retrieval.top_k
+                        top_k=rag.retrieval.top_k,
+                        timings=timings,
                     )
-                    search_type = "hybrid+rerank+graph" if graph_nodes else "hybrid+rerank"
-                else:
-                    final_results = fused_results[:rag.retrieval.top_k]
-                    search_type = "hybrid+graph" if graph_nodes else "hybrid"
+                    if timings.statuses.get("rerank") == STAGE_OK:
+                        return reranked, "hybrid+rerank"
+                    return reranked, "hybrid"
+                return fused_results[:rag.retrieval.top_k], "hybrid"
+
+            # 2. GRAPH RAG - strukturalny kontekst z grafu, współbieżnie z wyszukiwaniem chunków
+            (final_results, search_type), graph_nodes = await asyncio.gather(
+                search_chunks(),
+                run_stage(
+                    "graph",
+                    self._fetch_graph_nodes(age_group, education, location, gender),
+                    timeout=rag.retrieval.graph_timeout,
+                    fallback=[],
+                    timings=timings,
+                ),
+            )
+            timings.log("demographic_insights")
+
+            graph_context_formatted = ""
+            if graph_nodes:
+                graph_context_formatted = format_graph_context(graph_nodes)
+                search_type = f"{search_type}+graph"
+                logger.info("Pobrano %s węzłów grafu z kontekstem demograficznym", len(graph_nodes))
             else:
-                final_results = await self.vector_store.asimilarity_search_with_score(
-                    query,
-                    k=rag.retrieval.top_k,
-                )
-                search_type = "vector_only+graph" if graph_nodes else "vector_only"
+                logger.info("Brak wyników z graph context dla podanego profilu")
 
             # 3. UNIFIED CONTEXT - Wzbogać chunki o powiązane graph nodes
             context_chunks: list[str] = []
@@ -380,10 +457,18 @@ class PolishSocietyRAG:
                 context_chunks.append(graph_context_formatted)
                 context_chunks.append("\n=== KONTEKST Z DOKUMENTÓW (WZBOGACONY) ===\n")
 
+            # Słowa kluczowe węzłów kompilujemy raz na wynik graph context
+            # (cache pod kluczem profilu) - dopasowanie chunku to jedno przejście
+            node_index = None
+            if graph_nodes:
+                node_index = await get_profile_node_index(
+                    graph_nodes, age_group, location, education, gender
+                )
+
             # Dodaj chunki tekstowe WZBOGACONE o powiązane graph nodes
             for doc, score in final_results:
                 # Znajdź graph nodes powiązane z tym chunkiem
-                related_nodes = find_related_graph_nodes(doc, graph_nodes)
+                related_nodes = find_related_graph_nodes(doc, graph_nodes, node_index=node_index)
 
                 # Wzbogać chunk jeśli są related nodes
                 if related_nodes:
@@ -420,7 +505,7 @@ class PolishSocietyRAG:
             if len(context) > rag.retrieval.max_context_chars:
                 context = context[: rag.retrieval.max_context_chars] + "\n\n[... kontekst obcięty]"
 
-            return {
+            insights = {
                 "context": context,
                 "graph_context": graph_context_formatted,
                 "graph_nodes": graph_nodes,
@@ -431,6 +516,12 @@ class PolishSocietyRAG:
                 "search_type": search_type,
                 "enriched_chunks_count": enriched_chunks_count,
             }
+
+            # Wynik częściowy (etap po timeout/błędzie) nie trafia do cache
+            if not timings.degraded:
+                await demographic_insights_cache.set(cache_key, insights)
+
+            return insights
         except Exception as exc:  # pragma: no cover - zwracamy pusty kontekst
             logger.error("Hybrydowe wyszukiwanie nie powiodło się: %s", exc, exc_info=True)
             return {"context": "", "citations": [], "query": query, "num_results": 0}
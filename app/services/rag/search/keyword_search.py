@@ -85,6 +85,7 @@ async def keyword_search(
                            node.doc_id AS doc_id,
                            node.title AS title,
                            node.chunk_index AS chunk_index,
+                           node.content_hash AS content_hash,
                            score
                     ORDER BY score DESC
                     LIMIT $limit
@@ -103,6 +104,7 @@ async def keyword_search(
                         doc_id = record.get("doc_id")
                         title = record.get("title")
                         chunk_index = record.get("chunk_index")
+                        content_hash = record.get("content_hash")
                         score = float(record.get("score", 0.0))
                     elif "node" in record:
                         node_props = record.get("node") or {}
@@ -110,12 +112,14 @@ async def keyword_search(
                         doc_id = node_props.get("doc_id")
                         title = node_props.get("title")
                         chunk_index = node_props.get("chunk_index")
+                        content_hash = node_props.get("content_hash")
                         score = float(record.get("score", 0.0))
                     else:
                         text = None
                         doc_id = None
                         title = None
                         chunk_index = None
+                        content_hash = None
                         score = float(record.get("score", 0.0))
 
                     if not text:
@@ -127,6 +131,7 @@ async def keyword_search(
                             "doc_id": doc_id,
                             "title": title,
                             "chunk_index": chunk_index,
+                            "content_hash": content_hash,
                             "keyword_score": score,
                         },
                     )
@@ -0,0 +1,237 @@
+"""Micro-batching dla cross-encoder reranking.
+
+Zamiast osobnego ``reranker.predict`` w ``asyncio.to_thread`` dla każdego
+zapytania (współbieżne zapytania konkurują wtedy o wątki CPU i nie dzielą
+batchy), ``RerankBatcher`` zbiera pary (query, passage) z wielu requestów
+w krótkim oknie czasowym i wykonuje jeden duży batched predict w jednym
+wątku. Wyniki są rozdzielane z powrotem do callerów.
+
+- Bounded queue (limit par w kolejce) z backpressure: caller czeka na miejsce,
+  ale najwyżej do swojego deadline'u
+- Per-request timeout: po przekroczeniu caller dostaje ``RerankUnavailable``
+  i ``rerank_with_cross_encoder`` wraca do rankingu RRF
+- Request, który przekroczył timeout przed wysłaniem do modelu, jest pomijany
+  w batchu (nie marnujemy CPU)
+
+Metryki: ``RerankBatcher.snapshot()``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from config import rag
+
+logger = logging.getLogger(__name__)
+
+
+class RerankUnavailable(Exception):
+    """Reranking nie zmieścił się w timeout (kolejka pełna lub wolny model)."""
+
+
+@dataclass
+class _RerankRequest:
+    pairs: list[tuple[str, str]]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class RerankBatcher:
+    """
+    Worker łączący pary (query, passage) z współbieżnych requestów w jeden predict.
+
+    Args:
+        reranker: Model z metodą ``predict(pairs, ...)`` (np. CrossEncoder)
+        max_batch_pairs: Maksymalna liczba par w jednym predict
+        batch_window_ms: Jak długo worker czeka na kolejne requesty po pierwszym
+        max_queue_pairs: Limit par oczekujących w kolejce (backpressure)
+        predict_batch_size: ``batch_size`` przekazywany do ``reranker.predict``
+    """
+
+    def __init__(
+        self,
+        reranker: Any,
+        *,
+        max_batch_pairs: int = 64,
+        batch_window_ms: float = 8.0,
+        max_queue_pairs: int = 512,
+        predict_batch_size: int = 32,
+    ) -> None:
+        self.reranker = reranker
+        self.max_batch_pairs = max_batch_pairs
+        self.batch_window_ms = batch_window_ms
+        self.max_queue_pairs = max_queue_pairs
+        self.predict_batch_size = predict_batch_size
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pending: deque[_RerankRequest] = deque()
+        self._pending_pairs = 0
+        self._wakeup: asyncio.Event | None = None
+        self._space: asyncio.Condition | None = None
+        self._worker: asyncio.Task | None = None
+
+        self.stats: dict[str, int] = {
+            "requests": 0,
+            "batches": 0,
+            "pairs": 0,
+            "timeouts": 0,
+            "skipped_expired": 0,
+            "errors": 0,
+        }
+
+    def _ensure_worker(self) -> None:
+        """Uruchom worker w bieżącej pętli zdarzeń (lazy, restart po zmianie pętli)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._pending.clear()
+            self._pending_pairs = 0
+            self._wakeup = asyncio.Event()
+            self._space = asyncio.Condition()
+            self._worker = None
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run(), name="rerank-batcher")
+
+    async def score(self, pairs: list[tuple[str, str]], timeout: float) -> list[float]:
+        """
+        Oceń pary (query, passage) w najbliższym wspólnym batchu.
+
+        Args:
+            pairs: Pary do oceny
+            timeout: Łączny limit czasu (czekanie na miejsce w kolejce + predict)
+
+        Returns:
+            Scores w kolejności par
+
+        Raises:
+            RerankUnavailable: Timeout (kolejka pełna przez cały czas lub wolny model)
+        """
+        if not pairs:
+            return []
+        self._ensure_worker()
+        self.stats["requests"] += 1
+        deadline = time.monotonic() + timeout
+
+        # Backpressure - czekaj na miejsce w kolejce, najwyżej do deadline'u
+        needed = min(len(pairs), self.max_queue_pairs)
+        try:
+            async with self._space:
+                await asyncio.wait_for(
+                    self._space.wait_for(lambda: self._pending_pairs + needed <= self.max_queue_pairs),
+                    timeout=max(deadline - time.monotonic(), 0),
+                )
+                request = _RerankRequest(pairs=pairs, future=self._loop.create_future())
+                self._pending.append(request)
+                self._pending_pairs += len(pairs)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise RerankUnavailable("kolejka rerankera pełna") from None
+        self._wakeup.set()
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(request.future), timeout=max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            request.future.cancel()
+            raise RerankUnavailable(f"reranking nie zakończył się w {timeout:.1f}s") from None
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            # Okno batchowania - dajmy współbieżnym requestom chwilę na dołączenie
+            if self._pending_pairs < self.max_batch_pairs:
+                await asyncio.sleep(self.batch_window_ms / 1000)
+
+            batch = await self._take_batch()
+            if not self._pending:
+                self._wakeup.clear()
+            if batch:
+                await self._predict(batch)
+
+    async def _take_batch(self) -> list[_RerankRequest]:
+        batch: list[_RerankRequest] = []
+        batch_pairs = 0
+        async with self._space:
+            while self._pending:
+                request = self._pending[0]
+                if batch and batch_pairs + len(request.pairs) > self.max_batch_pairs:
+                    break
+                self._pending.popleft()
+                self._pending_pairs -= len(request.pairs)
+                if request.future.done():
+                    # Caller już zrezygnował (timeout) - nie liczymy tych par
+                    self.stats["skipped_expired"] += 1
+                    continue
+                batch.append(request)
+                batch_pairs += len(request.pairs)
+            self._space.notify_all()
+        return batch
+
+    async def _predict(self, batch: list[_RerankRequest]) -> None:
+        pairs = [pair for request in batch for pair in request.pairs]
+        start = time.perf_counter()
+        try:
+            scores = await asyncio.to_thread(
+                self.reranker.predict,
+                pairs,
+                show_progress_bar=False,
+                batch_size=self.predict_batch_size,
+                num_workers=0,
+            )
+        except Exception as exc:
+            self.stats["errors"] += 1
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(exc)
+            return
+
+        self.stats["batches"] += 1
+        self.stats["pairs"] += len(pairs)
+        logger.debug(
+            "rerank_batch",
+            extra={
+                "requests": len(batch),
+                "pairs": len(pairs),
+                "predict_ms": round((time.perf_counter() - start) * 1000, 1),
+                "max_queue_wait_ms": round((start - min(r.enqueued_at for r in batch)) * 1000, 1),
+            },
+        )
+
+        offset = 0
+        for request in batch:
+            count = len(request.pairs)
+            if not request.future.done():
+                request.future.set_result([float(score) for score in scores[offset:offset + count]])
+            offset += count
+
+    def snapshot(self) -> dict[str, Any]:
+        """Zwróć statystyki (średni rozmiar batcha = pairs / batches)."""
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "queued_pairs": self._pending_pairs,
+            "avg_batch_pairs": round(self.stats["pairs"] / batches, 1) if batches else None,
+        }
+
+
+_batchers: dict[int, RerankBatcher] = {}
+
+
+def get_rerank_batcher(reranker: Any) -> RerankBatcher:
+    """Zwróć współdzielony batcher dla instancji modelu (jeden worker na model)."""
+    batcher = _batchers.get(id(reranker))
+    if batcher is None or batcher.reranker is not reranker:
+        batcher = RerankBatcher(
+            reranker,
+            max_batch_pairs=rag.retrieval.rerank_max_batch_pairs,
+            batch_window_ms=rag.retrieval.rerank_batch_window_ms,
+            max_queue_pairs=rag.retrieval.rerank_max_queue_pairs,
+            predict_batch_size=rag.retrieval.rerank_predict_batch_size,
+        )
+        _batchers[id(reranker)] = batcher
+    return batcher
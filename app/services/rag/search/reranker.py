@@ -1,64 +1,240 @@
 """Cross-encoder reranking dla hybrid search results.
 
 Moduł odpowiada za:
-- Inicjalizację cross-encoder modelu (sentence-transformers)
+- Wybór backendu rerankera (``reranking.backend``):
+  - ``cross_encoder`` - PyTorch CrossEncoder (sentence-transformers)
+  - ``onnx_int8`` - ten sam model wyeksportowany do ONNX i skwantyzowany do int8
+    (onnxruntime, ``scripts/export_reranker_onnx.py``) - mniej RAM, szybszy CPU
+- Leniwe ładowanie modelu w tle (wątek) z warm-up batchem - do czasu gotowości
+  modelu requesty pomijają reranking (ranking RRF)
 - Reranking candidates używając attention mechanism
-- Async offload do thread pool (CPU-bound task)
-- Timeout protection (15s max)
+- Micro-batching par z współbieżnych zapytań (``rerank_batcher.py``)
+- Timeout protection (``reranking.batching.timeout``) z fallbackiem do RRF
+- Status etapu ``rerank`` w ``StageTimings`` - ranking RRF zamiast rerankingu
+  oznacza wynik zdegradowany (nie trafia do cache)
 """
 
-import asyncio
 import logging
+import threading
 import time
-from functools import partial
-from typing import Optional
+from collections.abc import Callable
+from typing import Any, Optional
 
 from langchain_core.documents import Document
 
+from app.services.rag.search.rerank_batcher import RerankUnavailable, get_rerank_batcher
+from app.services.rag.search.retrieval_stages import (
+    STAGE_ERROR,
+    STAGE_OK,
+    STAGE_SKIPPED,
+    STAGE_TIMEOUT,
+    StageTimings,
+)
 from config import rag
 
 logger = logging.getLogger(__name__)
 
+BACKEND_CROSS_ENCODER = "cross_encoder"
+BACKEND_ONNX_INT8 = "onnx_int8"
+RERANKER_BACKENDS = (BACKEND_CROSS_ENCODER, BACKEND_ONNX_INT8)
 
-def init_reranker() -> Optional[any]:
-    """Inicjalizuj cross-encoder dla reranking (opcjonalny).
+RERANKER_MAX_LENGTH = 512
+
+# Warm-up batch - pierwsze predict alokuje bufory / kompiluje kernele
+WARMUP_PAIRS = [
+    ("młode kobiety w dużych miastach", "Wskaźnik zatrudnienia kobiet w wieku 25-34 lat w miastach powyżej 500 tys."),
+    ("seniorzy na wsi", "Osoby 65+ na obszarach wiejskich częściej korzystają z telewizji niż z internetu."),
+    ("wykształcenie wyższe a dochody", "Mediana wynagrodzeń osób z wyższym wykształceniem jest o 40% wyższa."),
+    ("praca zdalna", "Odsetek osób pracujących zdalnie wzrósł w latach 2020-2024."),
+]
+
+STATE_IDLE = "idle"
+STATE_LOADING = "loading"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+
+
+class OnnxCrossEncoder:
+    """
+    Cross-encoder w ONNX Runtime (np. int8 po dynamicznej kwantyzacji).
+
+    Interfejs ``predict`` zgodny z ``CrossEncoder.predict`` w zakresie używanym
+    przez ``RerankBatcher`` - zwraca surowe logity (monotoniczne względem
+    wyników CrossEncoder, więc ranking jest porównywalny).
+
+    Args:
+        model_path: Ścieżka do pliku .onnx
+        tokenizer_name: Nazwa/ścieżka tokenizera HuggingFace (ten sam co model bazowy)
+        max_length: Maksymalna długość sekwencji (query + passage)
+    """
+
+    def __init__(self, model_path: str, tokenizer_name: str, max_length: int = RERANKER_MAX_LENGTH):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+        self.max_length = max_length
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def predict(self, pairs: list[tuple[str, str]], batch_size: int = 32, **_: Any) -> list[float]:
+        scores: list[float] = []
+        for start in range(0, len(pairs), batch_size):
+            chunk = pairs[start:start + batch_size]
+            encoded = self.tokenizer(
+                [query for query, _ in chunk],
+                [passage for _, passage in chunk],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            feeds = {name: value.astype("int64") for name, value in encoded.items() if name in self.input_names}
+            logits = self.session.run(None, feeds)[0]
+            scores.extend(float(row[0]) for row in logits.reshape(len(chunk), -1))
+        return scores
+
+
+def load_reranker_backend(backend: str) -> Any:
+    """Załaduj model rerankera dla backendu (blokujące - wywoływać w wątku).
+
+    Raises:
+        ValueError: Nieznany backend
+        ImportError: Brak opcjonalnych zależności backendu
+    """
+    if backend == BACKEND_CROSS_ENCODER:
+        from sentence_transformers import CrossEncoder
+
+        return CrossEncoder(rag.retrieval.reranker_model, max_length=RERANKER_MAX_LENGTH)
+    if backend == BACKEND_ONNX_INT8:
+        return OnnxCrossEncoder(rag.retrieval.reranker_onnx_path, rag.retrieval.reranker_model)
+    raise ValueError(f"Nieznany backend rerankera: {backend}. Dozwolone: {', '.join(RERANKER_BACKENDS)}")
+
+
+class LazyReranker:
+    """
+    Reranker ładowany leniwie w wątku w tle, z warm-up batchem.
+
+    Pierwsze użycie (:func:`reranker_ready`) uruchamia ładowanie i zwraca False -
+    request idzie bez rerankingu, kolejne po zakończeniu warm-up już z nim.
+    Nieudane ładowanie (brak zależności, brak pliku .onnx) wyłącza reranking
+    dla procesu.
+
+    Args:
+        backend: Nazwa backendu (``cross_encoder`` | ``onnx_int8``)
+        loader: Funkcja ładująca model (domyślnie :func:`load_reranker_backend`)
+    """
+
+    def __init__(self, backend: str, loader: Callable[[str], Any] | None = None):
+        self.backend = backend
+        self.state = STATE_IDLE
+        self._loader = loader or load_reranker_backend
+        self._model: Any = None
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == STATE_READY
+
+    @property
+    def failed(self) -> bool:
+        return self.state == STATE_FAILED
+
+    def start_loading(self) -> None:
+        """Uruchom ładowanie modelu w wątku (idempotentne)."""
+        with self._lock:
+            if self.state != STATE_IDLE:
+                return
+            self.state = STATE_LOADING
+        threading.Thread(target=self._load, name=f"reranker-load-{self.backend}", daemon=True).start()
+
+    def wait_until_loaded(self, timeout: float | None = None) -> bool:
+        """Poczekaj na zakończenie ładowania (skrypty/benchmarki). Zwraca ``ready``."""
+        self.start_loading()
+        self._loaded.wait(timeout)
+        return self.ready
+
+    def _load(self) -> None:
+        load_start = time.perf_counter()
+        try:
+            model = self._loader(self.backend)
+            warmup_start = time.perf_counter()
+            model.predict(WARMUP_PAIRS, batch_size=len(WARMUP_PAIRS), show_progress_bar=False)
+            warmup_ms = (time.perf_counter() - warmup_start) * 1000
+        except Exception as exc:
+            self.state = STATE_FAILED
+            logger.warning(
+                "Nie udało się załadować rerankera (%s): %s - reranking wyłączony",
+                self.backend,
+                exc,
+            )
+        else:
+            self._model = model
+            self.state = STATE_READY
+            logger.info(
+                "reranker_ready",
+                extra={
+                    "backend": self.backend,
+                    "model": rag.retrieval.reranker_model,
+                    "load_ms": round((warmup_start - load_start) * 1000, 1),
+                    "warmup_ms": round(warmup_ms, 1),
+                },
+            )
+        finally:
+            self._loaded.set()
+
+    def predict(self, pairs: list[tuple[str, str]], **kwargs: Any) -> list[float]:
+        if not self.ready:
+            raise RuntimeError(f"Reranker {self.backend} nie jest jeszcze gotowy (state={self.state})")
+        return self._model.predict(pairs, **kwargs)
+
+
+def init_reranker() -> Optional[LazyReranker]:
+    """Przygotuj reranker (opcjonalny) - bez ładowania modelu.
+
+    Model ładuje się w tle przy pierwszym zapytaniu z rerankingiem, więc
+    cold start ``PolishSocietyRAG`` nie płaci za PyTorch / ONNX Runtime.
 
     Returns:
-        CrossEncoder instance lub None jeśli disabled/failed
+        LazyReranker lub None jeśli reranking wyłączony
     """
     if not rag.retrieval.use_reranking:
         return None
 
-    try:
-        from sentence_transformers import CrossEncoder
-        reranker = CrossEncoder(
-            rag.retrieval.reranker_model,
-            max_length=512
-        )
-        logger.info(
-            "Cross-encoder reranker zainicjalizowany: %s",
-            rag.retrieval.reranker_model
-        )
-        return reranker
-    except ImportError:
-        logger.warning(
-            "sentence-transformers nie jest zainstalowany - reranking wyłączony. "
-            "Zainstaluj: pip install sentence-transformers"
-        )
-        return None
-    except Exception as rerank_exc:
-        logger.warning(
-            "Nie udało się załadować reranker: %s - kontynuacja bez rerankingu",
-            rerank_exc
-        )
+    backend = rag.retrieval.reranker_backend
+    if backend not in RERANKER_BACKENDS:
+        logger.warning("Nieznany backend rerankera '%s' - reranking wyłączony", backend)
         return None
 
+    logger.info("Reranker %s (%s) - ładowanie leniwe w tle", backend, rag.retrieval.reranker_model)
+    return LazyReranker(backend)
+
+
+def reranker_disabled(reranker: Optional[Any]) -> bool:
+    """Czy reranking jest wyłączony na stałe (brak modelu lub nieudane ładowanie)."""
+    return reranker is None or (isinstance(reranker, LazyReranker) and reranker.failed)
+
+
+def reranker_ready(reranker: Optional[Any]) -> bool:
+    """Czy reranker może być użyty teraz; dla leniwego modelu uruchamia ładowanie."""
+    if reranker is None:
+        return False
+    if isinstance(reranker, LazyReranker):
+        if not reranker.ready:
+            reranker.start_loading()
+        return reranker.ready
+    return True
+
 
 async def rerank_with_cross_encoder(
     query: str,
     candidates: list[tuple[Document, float]],
     reranker: Optional[any],
-    top_k: int = 5
+    top_k: int = 5,
+    timings: StageTimings | None = None,
 ) -> list[tuple[Document, float]]:
     """Użyj cross-encoder aby precyzyjnie re-score query-document pairs.
 
@@ -68,43 +244,51 @@ async def rerank_with_cross_encoder(
     Args:
         query: Query użytkownika
         candidates: Lista (Document, RRF_score) par z RRF fusion
-        reranker: CrossEncoder instance (or None if disabled)
+        reranker: LazyReranker / model z ``predict`` (or None if disabled)
         top_k: Liczba top wyników do zwrócenia
+        timings: Kolektor etapów zapytania - etap ``rerank`` dostaje status
+            ``ok`` albo ``skipped`` / ``timeout`` / ``error`` przy fallbacku do RRF.
+            Wyłączony reranker (nieudane ładowanie) nie zapisuje etapu - ranking
+            RRF jest wtedy wynikiem docelowym, nie zdegradowanym (trafia do cache)
 
     Returns:
         Lista (Document, rerank_score) sorted by rerank_score descending
+        (ranking RRF przy fallbacku - patrz ``timings``)
     """
-    if not reranker or not candidates:
-        logger.info("Reranker niedostępny lub brak candidates - skip reranking")
+    rerank_start = time.perf_counter()
+
+    def record(status: str) -> None:
+        if timings is not None:
+            timings.record("rerank", (time.perf_counter() - rerank_start) * 1000, status)
+
+    if not candidates:
+        return []
+    if reranker_disabled(reranker):
+        return candidates[:top_k]
+    if not reranker_ready(reranker):
+        logger.info("Reranker niedostępny (lub jeszcze się ładuje) - skip reranking")
+        record(STAGE_SKIPPED)
         return candidates[:top_k]
 
     try:
-        rerank_start = time.perf_counter()
 
         # Przygotuj pary (query, document) dla cross-encoder
         pairs = [(query, doc.page_content[:512]) for doc, _ in candidates]
         # Limit do 512 znaków dla cross-encoder (max_length)
 
-        # Cross-encoder prediction - ASYNC offload to thread pool (CPU-bound task)
-        # Prevents blocking event loop and disables noisy tqdm progress bar
-        predict_fn = partial(
-            reranker.predict,
-            pairs,
-            show_progress_bar=False,
-            batch_size=16,
-            num_workers=0,
-        )
-
-        # Safety timeout: if reranking is abnormally slow, fall back to RRF
+        # Micro-batching: pary z współbieżnych zapytań trafiają do jednego predict
+        # w wątku workera (bez konkurencji o CPU, bez tqdm progress bar).
+        # Safety timeout / pełna kolejka → fallback do RRF
         try:
-            scores = await asyncio.wait_for(
-                asyncio.to_thread(predict_fn),
-                timeout=15.0,
+            scores = await get_rerank_batcher(reranker).score(
+                pairs,
+                timeout=rag.retrieval.rerank_timeout,
             )
-        except asyncio.TimeoutError:
+        except RerankUnavailable as unavailable:
             logger.warning(
-                "⏱️ Reranker timed out after 15s – using RRF scores"
+                "⏱️ Reranker unavailable (%s) – using RRF scores", unavailable
             )
+            record(STAGE_TIMEOUT)
             return candidates[:top_k]
 
         # Połącz dokumenty z nowymi scores
@@ -114,6 +298,7 @@ async def rerank_with_cross_encoder(
         reranked.sort(key=lambda x: x[1], reverse=True)
 
         rerank_duration = time.perf_counter() - rerank_start
+        record(STAGE_OK)
         logger.info(
             "✅ Reranking completed: %s candidates → top %s results (%.2fs)",
             len(candidates),
@@ -125,4 +310,5 @@ async def rerank_with_cross_encoder(
 
     except Exception as exc:
         logger.error("❌ Reranking failed: %s - fallback to RRF ranking", exc)
+        record(STAGE_ERROR)
         return candidates[:top_k]
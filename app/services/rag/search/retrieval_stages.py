@@ -0,0 +1,140 @@
+"""Etapy retrieval uruchamiane współbieżnie - timeouty, fallbacki i metryki.
+
+Vector search, keyword search i Graph RAG traversal są od siebie niezależne,
+więc ``PolishSocietyRAG`` uruchamia je równolegle. Każdy etap ma własny
+timeout; etap który przekroczy czas lub rzuci wyjątkiem zwraca fallback
+(pusty wynik), a pozostałe etapy dostarczają wynik częściowy. Całkowita
+latencja to max czasów etapów zamiast ich sumy.
+
+Moduł dostarcza:
+- run_stage() - wykonanie etapu z timeoutem i fallbackiem, pomiar czasu
+- StageTimings - czasy/statusy etapów jednego zapytania (do logów)
+- RetrievalStageMetrics - zagregowane metryki etapów w procesie (snapshot)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+STAGE_OK = "ok"
+STAGE_TIMEOUT = "timeout"
+STAGE_ERROR = "error"
+STAGE_SKIPPED = "skipped"  # Etap pominięty mimo konfiguracji (np. reranker jeszcze się ładuje)
+
+
+@dataclass
+class StageTimings:
+    """
+    Czasy i statusy etapów jednego zapytania retrieval.
+
+    Attributes:
+        durations_ms: Nazwa etapu → czas w ms
+        statuses: Nazwa etapu → "ok" | "timeout" | "error" | "skipped"
+    """
+    durations_ms: dict[str, float] = field(default_factory=dict)
+    statuses: dict[str, str] = field(default_factory=dict)
+    started_at: float = field(default_factory=time.perf_counter)
+
+    def record(self, stage: str, duration_ms: float, status: str) -> None:
+        self.durations_ms[stage] = round(duration_ms, 1)
+        self.statuses[stage] = status
+        retrieval_stage_metrics.observe(stage, duration_ms, status)
+
+    @property
+    def degraded(self) -> bool:
+        """True jeśli którykolwiek etap zwrócił fallback (wynik częściowy)."""
+        return any(status != STAGE_OK for status in self.statuses.values())
+
+    def as_log_extra(self, operation: str) -> dict[str, Any]:
+        """Spłaszczone pola do structured logu ``rag_retrieval_stages``."""
+        extra: dict[str, Any] = {
+            "operation": operation,
+            "total_ms": round((time.perf_counter() - self.started_at) * 1000, 1),
+            "degraded": self.degraded,
+        }
+        for stage, duration in self.durations_ms.items():
+            extra[f"{stage}_ms"] = duration
+            extra[f"{stage}_status"] = self.statuses[stage]
+        return extra
+
+    def log(self, operation: str) -> None:
+        logger.info("rag_retrieval_stages", extra=self.as_log_extra(operation))
+
+
+async def run_stage(
+    stage: str,
+    awaitable: Awaitable[T],
+    *,
+    timeout: float | None,
+    fallback: T,
+    timings: StageTimings,
+) -> T:
+    """
+    Wykonaj etap retrieval z timeoutem; przy timeout/błędzie zwróć fallback.
+
+    Args:
+        stage: Nazwa etapu ("vector", "keyword", "graph")
+        awaitable: Korutyna etapu
+        timeout: Limit czasu w sekundach (None = bez limitu)
+        fallback: Wartość zwracana gdy etap się nie powiedzie
+        timings: Kolektor czasów bieżącego zapytania
+
+    Returns:
+        Wynik etapu lub fallback
+    """
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(awaitable, timeout=timeout)
+    except asyncio.TimeoutError:
+        timings.record(stage, (time.perf_counter() - start) * 1000, STAGE_TIMEOUT)
+        logger.warning("RAG stage '%s' timeout po %.1fs - kontynuacja z wynikiem częściowym", stage, timeout)
+        return fallback
+    except Exception as exc:
+        timings.record(stage, (time.perf_counter() - start) * 1000, STAGE_ERROR)
+        logger.error("RAG stage '%s' nie powiódł się: %s - kontynuacja z wynikiem częściowym", stage, exc, exc_info=True)
+        return fallback
+
+    timings.record(stage, (time.perf_counter() - start) * 1000, STAGE_OK)
+    return result
+
+
+class RetrievalStageMetrics:
+    """Zagregowane metryki etapów retrieval w procesie (count, błędy, średni i max czas)."""
+
+    def __init__(self) -> None:
+        self._count: dict[str, int] = defaultdict(int)
+        self._total_ms: dict[str, float] = defaultdict(float)
+        self._max_ms: dict[str, float] = defaultdict(float)
+        self._failures: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def observe(self, stage: str, duration_ms: float, status: str) -> None:
+        self._count[stage] += 1
+        self._total_ms[stage] += duration_ms
+        self._max_ms[stage] = max(self._max_ms[stage], duration_ms)
+        if status != STAGE_OK:
+            self._failures[stage][status] += 1
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Zwróć metryki per etap (do logów / health endpointów)."""
+        return {
+            stage: {
+                "count": count,
+                "avg_ms": round(self._total_ms[stage] / count, 1),
+                "max_ms": round(self._max_ms[stage], 1),
+                "timeouts": self._failures[stage].get(STAGE_TIMEOUT, 0),
+                "errors": self._failures[stage].get(STAGE_ERROR, 0),
+            }
+            for stage, count in self._count.items()
+        }
+
+
+retrieval_stage_metrics = RetrievalStageMetrics()
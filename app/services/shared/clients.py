@@ -3,14 +3,21 @@ Wspólne fabryki klientów LLM i embeddingów.
 
 Udostępnia pomocnicze funkcje do tworzenia instancji modeli LLM (Google, OpenAI, Anthropic)
 oraz embeddingów Google, aby uniknąć duplikacji konfiguracji w serwisach.
+Provider ``simulated`` (app/services/shared/simulated_llm.py) działa bez sieci -
+testy obciążeniowe i benchmarki.
 """
 
 from __future__ import annotations
 
 import os
 from functools import lru_cache
+from operator import itemgetter
 from typing import Any, Literal, Union
 
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.output_parsers import JsonOutputParser, PydanticOutputParser
+from langchain_core.runnables import RunnableMap, RunnablePassthrough
 from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
 
 # Conditional imports dla multi-provider support
@@ -32,10 +39,13 @@ try:
 except ImportError:
     AZURE_OPENAI_AVAILABLE = False
 
-from config import models
+from config import features, models
+from app.services.shared.embedding_cache import CachedEmbeddings
+from app.services.shared.llm_cache import resolve_response_cache
+from app.services.shared.rate_limiter import RequestPriority, get_rate_limiter
 
 # Type alias dla supported providers
-LLMProvider = Literal["google", "openai", "anthropic", "azure_openai"]
+LLMProvider = Literal["google", "openai", "anthropic", "azure_openai", "simulated"]
 
 
 def build_chat_model(
@@ -48,13 +58,16 @@ def build_chat_model(
     top_k: int | None = None,
     timeout: int | None = None,
     max_retries: int = 3,
+    response_cache: bool | None = None,
+    request_priority: RequestPriority | str = RequestPriority.BATCH,
     **extra: Any,
 ) -> Union[ChatGoogleGenerativeAI, "ChatOpenAI", "ChatAnthropic", "AzureChatOpenAI"]:
     """
     Tworzy instancję LLM chat model z uwspólnioną konfiguracją.
 
     Args:
-        provider: LLM provider (google, openai, anthropic, azure_openai). Default: google
+        provider: LLM provider (google, openai, anthropic, azure_openai, simulated).
+            Default: google (simulated przy ``features.simulated_llm.enabled`` / ``SIMULATED_LLM=true``)
         model: Nazwa modelu (domyślnie z config.models.defaults.chat.model)
         temperature: Temperatura próbkująca (domyślnie z config.models.defaults.chat.temperature)
         max_tokens: Limit tokenów (domyślnie z config.models.defaults.chat.max_tokens)
@@ -62,6 +75,10 @@ def build_chat_model(
         top_k: Parametr top-k sampling (opcjonalny, tylko Google)
         timeout: Timeout zapytania w sekundach (opcjonalny)
         max_retries: Liczba ponownych prób dla rate limits (domyślnie 3)
+        response_cache: Cache odpowiedzi (True - włącz w tym call site, False - wyłącz,
+            None - wg polityki temperatury ``features.llm_cache.max_temperature``)
+        request_priority: Priorytet w globalnym limiterze RPM/TPM (``interactive``
+            przed ``batch``); limity per model z models.yaml
         extra: Dodatkowe parametry przekazywane do klienta
 
     Returns:
@@ -74,8 +91,8 @@ def build_chat_model(
         Retry logic używa exponential backoff dla API rate limits.
         LangChain automatycznie obsługuje rate limit exceptions.
     """
-    # Default to google if not specified
-    provider = provider or "google"
+    # Default to google if not specified (simulated w testach obciążeniowych / benchmarkach)
+    provider = provider or ("simulated" if features.simulated_llm.enabled else "google")
 
     # Get defaults from config.models
     defaults = models.config.get("defaults", {}).get("chat", {})
@@ -86,6 +103,9 @@ def build_chat_model(
         "max_retries": max_retries,
     }
 
+    cache = resolve_response_cache(response_cache, base_params["temperature"])
+    if cache is not None:
+        base_params["cache"] = cache
     if timeout is not None:
         base_params["timeout"] = timeout
     if top_p is not None:
@@ -106,7 +126,21 @@ def build_chat_model(
         if top_k is not None:
             params["top_k"] = top_k
         params.update(extra)
-        return ChatGoogleGenerativeAI(**params)
+        return ChatGoogleGenerativeAI(**_with_rate_limiter(params, request_priority))
+
+    elif provider == "simulated":
+        # Bez sieci i API key - app/services/shared/simulated_llm.py
+        from app.services.shared.simulated_llm import SimulatedChatModel
+
+        params = {
+            **base_params,
+            "model": model or defaults.get("model", "gemini-2.5-flash"),
+            "max_tokens": max_tokens if max_tokens is not None else defaults.get("max_tokens", 6000),
+        }
+        if top_k is not None:
+            params["top_k"] = top_k
+        params.update(extra)
+        return SimulatedChatModel(**_with_rate_limiter(params, request_priority))
 
     elif provider == "openai":
         if not OPENAI_AVAILABLE:
@@ -122,7 +156,7 @@ def build_chat_model(
             "max_tokens": max_tokens if max_tokens is not None else defaults.get("max_tokens", 6000),
         }
         params.update(extra)
-        return ChatOpenAI(**params)
+        return ChatOpenAI(**_with_rate_limiter(params, request_priority))
 
     elif provider == "anthropic":
         if not ANTHROPIC_AVAILABLE:
@@ -138,7 +172,7 @@ def build_chat_model(
             "max_tokens": max_tokens if max_tokens is not None else defaults.get("max_tokens", 6000),
         }
         params.update(extra)
-        return ChatAnthropic(**params)
+        return ChatAnthropic(**_with_rate_limiter(params, request_priority))
 
     elif provider == "azure_openai":
         if not AZURE_OPENAI_AVAILABLE:
@@ -164,28 +198,119 @@ def build_chat_model(
             "max_tokens": max_tokens if max_tokens is not None else defaults.get("max_tokens", 6000),
         }
         params.update(extra)
-        return AzureChatOpenAI(**params)
+        return AzureChatOpenAI(**_with_rate_limiter(params, request_priority))
 
     else:
         raise ValueError(f"Unsupported provider: {provider}. Must be one of: google, openai, anthropic, azure_openai")
 
 
+def _with_rate_limiter(params: dict[str, Any], priority: RequestPriority | str) -> dict[str, Any]:
+    """Dodaje globalny limiter RPM/TPM modelu (jeśli model ma limity w models.yaml)."""
+    model_name = params.get("model") or params.get("deployment_name")
+    limiter = get_rate_limiter(model_name, priority) if model_name else None
+    if limiter is None or "rate_limiter" in params:
+        return params
+    return {
+        **params,
+        "rate_limiter": limiter,
+        "callbacks": [*(params.get("callbacks") or []), limiter.reconciler],
+    }
+
+
+def with_schema_output(llm: Any, schema: type, *, include_raw: bool = False) -> Any:
+    """
+    Wiąże chat model ze schematem Pydantic w trybie schema-constrained decoding.
+
+    Wybiera natywny tryb providera zamiast parsowania wolnego tekstu:
+    - Google: ``json_mode`` (response_mime_type + response_schema)
+    - OpenAI/Azure: ``json_schema`` (strict structured outputs)
+    - Pozostałe: domyślny tryb LangChain (tool calling)
+
+    Args:
+        llm: Instancja chat model z build_chat_model()
+        schema: Klasa Pydantic opisująca oczekiwany output
+        include_raw: Zwracaj dict {"raw", "parsed", "parsing_error"} (potrzebne
+            do usage logging i naprawy częściowo poprawnych odpowiedzi)
+
+    Returns:
+        Runnable zwracający instancję ``schema`` (lub dict przy include_raw=True)
+    """
+    if isinstance(llm, ChatGoogleGenerativeAI):
+        return llm.with_structured_output(schema, method="json_mode", include_raw=include_raw)
+    if OPENAI_AVAILABLE and isinstance(llm, ChatOpenAI):
+        return llm.with_structured_output(schema, method="json_schema", include_raw=include_raw)
+    return llm.with_structured_output(schema, include_raw=include_raw)
+
+
+def json_schema_output(llm: BaseChatModel, schema: type | dict[str, Any], *, include_raw: bool = False) -> Any:
+    """
+    Structured output dla modeli bez natywnego trybu: JSON schema w kwargs + parser Pydantic.
+
+    Model dostaje ``response_schema`` (JSON schema ``schema``) w kwargs wywołania
+    i zwraca JSON jako treść odpowiedzi - jak ``json_mode`` w ChatGoogleGenerativeAI.
+    Używane przez BatchChatModel i SimulatedChatModel.
+
+    Args:
+        llm: Chat model obsługujący kwarg ``response_schema``
+        schema: Klasa Pydantic opisująca oczekiwany output (albo JSON schema jako dict)
+        include_raw: Zwracaj dict {"raw", "parsed", "parsing_error"}
+
+    Returns:
+        Runnable zwracający instancję ``schema`` (dict dla JSON schema; dict
+        {"raw", "parsed", "parsing_error"} przy include_raw=True)
+    """
+    if isinstance(schema, dict):
+        parser = JsonOutputParser()
+        bound = llm.bind(response_schema=schema)
+    else:
+        parser = PydanticOutputParser(pydantic_object=schema)
+        bound = llm.bind(response_schema=schema.model_json_schema())
+    if not include_raw:
+        return bound | parser
+    parser_assign = RunnablePassthrough.assign(parsed=itemgetter("raw") | parser, parsing_error=lambda _: None)
+    parser_none = RunnablePassthrough.assign(parsed=lambda _: None)
+    parser_with_fallback = parser_assign.with_fallbacks([parser_none], exception_key="parsing_error")
+    return RunnableMap(raw=bound) | parser_with_fallback
+
+
 @lru_cache(maxsize=5)  # Limit to 5 most recent embedding models (prevent unlimited growth)
-def get_embeddings(model: str | None = None) -> GoogleGenerativeAIEmbeddings:
+def get_embeddings(model: str | None = None, provider: str | None = None) -> Embeddings:
     """
     Zwraca współdzieloną instancję embeddingów Google Gemini.
 
+    Przy włączonym ``features.embedding_cache`` model jest opakowany
+    w CachedEmbeddings (LRU w procesie + Redis, klucz: model + hash tekstu).
+
     Args:
         model: Nazwa modelu embeddingowego (domyślnie z config.models.rag.embedding)
+        provider: google albo simulated (bez sieci); domyślnie simulated przy
+            ``features.simulated_llm.enabled``, inaczej google
 
     Returns:
-        Instancja GoogleGenerativeAIEmbeddings (cache'owana).
+        Instancja embeddingów (cache'owana per model).
     """
     # Get embedding model from config.models
     embedding_config = models.get("rag", "embedding")
     model_name = model or embedding_config.model
 
-    return GoogleGenerativeAIEmbeddings(
-        model=model_name,
-        google_api_key=os.getenv("GOOGLE_API_KEY"),
+    provider = provider or ("simulated" if features.simulated_llm.enabled else "google")
+    if provider == "simulated":
+        from app.services.shared.simulated_llm import SimulatedEmbeddings
+
+        embeddings: Embeddings = SimulatedEmbeddings(model_name)
+    else:
+        embeddings = GoogleGenerativeAIEmbeddings(
+            model=model_name,
+            google_api_key=os.getenv("GOOGLE_API_KEY"),
+        )
+
+    cache_config = features.embedding_cache
+    if not cache_config.enabled:
+        return embeddings
+
+    return CachedEmbeddings(
+        embeddings,
+        model_name,
+        lru_max_entries=cache_config.lru_max_entries,
+        ttl_seconds=cache_config.ttl_days * 24 * 60 * 60,
     )
@@ -0,0 +1,249 @@
+"""
+Cache embeddingów dla get_embeddings()
+
+Każde wyszukiwanie wektorowe embeduje tekst zapytania przez Gemini API - także
+szablonowe zapytania budowane z demografii, które powtarzają się ciągle.
+``CachedEmbeddings`` opakowuje model embeddingów dwupoziomowym cache:
+
+1. LRU w procesie (OrderedDict, bez I/O)
+2. Redis (binarna pula, MGET/pipeline) - współdzielony między instancjami
+
+Klucz: ``embedding:{model}:{sha256(znormalizowany tekst)}``. Wektory trzymane
+są jako packed float32 (little-endian) - ~3 KB dla 768 wymiarów zamiast ~15 KB JSON.
+
+Ścieżka async (aembed_query / aembed_documents) używa LRU + Redis. Ścieżka
+sync (embed_query / embed_documents - np. Neo4jVector.add_texts w wątku)
+używa tylko LRU, bo nie może czekać na async Redis.
+
+Statystyki (hit rate, bajty zaoszczędzone) dostępne przez
+``embedding_cache_stats.snapshot()``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import struct
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.embeddings import Embeddings
+
+from app.core.redis import redis_mget_bytes, redis_mset_bytes
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_embedding_text(text: str) -> str:
+    """Normalizacja tekstu przed hashowaniem (NFC + zwinięte białe znaki)."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def embedding_cache_key(model: str, text: str) -> str:
+    """Klucz cache dla pary (model, znormalizowany tekst)."""
+    digest = hashlib.sha256(normalize_embedding_text(text).encode("utf-8")).hexdigest()
+    return f"embedding:{model}:{digest}"
+
+
+def pack_vector(vector: list[float]) -> bytes:
+    """Zapisz wektor jako packed float32 (little-endian)."""
+    return struct.pack(f"<{len(vector)}f", *vector)
+
+
+def unpack_vector(payload: bytes) -> list[float]:
+    """Odczytaj wektor zapisany przez :func:`pack_vector`."""
+    return list(struct.unpack(f"<{len(payload) // 4}f", payload))
+
+
+@dataclass
+class EmbeddingCacheStats:
+    """
+    Liczniki cache embeddingów (per proces).
+
+    Attributes:
+        requests: Liczba tekstów do zembedowania
+        lru_hits: Trafienia w LRU w procesie
+        redis_hits: Trafienia w Redis
+        misses: Teksty wysłane do API
+        bytes_saved: Bajty wektorów (float32) obsłużone z cache zamiast z API
+    """
+    requests: int = 0
+    lru_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    bytes_saved: int = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        """Zwróć statystyki do logów (hit_rate = (lru + redis) / requests)."""
+        hits = self.lru_hits + self.redis_hits
+        return {
+            "requests": self.requests,
+            "lru_hits": self.lru_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / self.requests, 3) if self.requests else None,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+embedding_cache_stats = EmbeddingCacheStats()
+
+
+class _PackedLRU:
+    """Thread-safe LRU dla packed wektorów (ścieżka sync działa w wątkach executora)."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+            return payload
+
+    def put(self, key: str, payload: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Model embeddingów z cache LRU + Redis.
+
+    Args:
+        inner: Opakowywany model (np. GoogleGenerativeAIEmbeddings)
+        model: Nazwa modelu (część klucza cache)
+        lru_max_entries: Pojemność LRU w procesie
+        ttl_seconds: TTL wpisów w Redis
+    """
+
+    def __init__(
+        self,
+        inner: Embeddings,
+        model: str,
+        *,
+        lru_max_entries: int = 2048,
+        ttl_seconds: int | None = None,
+    ) -> None:
+        self.inner = inner
+        self.model = model
+        self.ttl_seconds = ttl_seconds
+        self._lru = _PackedLRU(lru_max_entries)
+
+    def __getattr__(self, name: str) -> Any:
+        # Atrybuty modelu bazowego (np. .google_api_key) dostępne jak wcześniej
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def _lookup_lru(self, texts: list[str]) -> tuple[list[list[float] | None], list[str]]:
+        keys = [embedding_cache_key(self.model, text) for text in texts]
+        vectors: list[list[float] | None] = []
+        for key in keys:
+            payload = self._lru.get(key)
+            if payload is not None:
+                embedding_cache_stats.lru_hits += 1
+                embedding_cache_stats.bytes_saved += len(payload)
+                vectors.append(unpack_vector(payload))
+            else:
+                vectors.append(None)
+        embedding_cache_stats.requests += len(texts)
+        return vectors, keys
+
+    def _store(self, keys: list[str], indexes: list[int], computed: list[list[float]]) -> dict[str, bytes]:
+        packed: dict[str, bytes] = {}
+        for index, vector in zip(indexes, computed):
+            payload = pack_vector(vector)
+            self._lru.put(keys[index], payload)
+            packed[keys[index]] = payload
+        embedding_cache_stats.misses += len(indexes)
+        return packed
+
+    # ------------------------------------------------------------------ async
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embeduj dokumenty - z API tylko teksty nieobecne w LRU ani w Redis."""
+        if not texts:
+            return []
+        vectors, keys = self._lookup_lru(texts)
+
+        missing = [index for index, vector in enumerate(vectors) if vector is None]
+        if missing:
+            remote = await redis_mget_bytes([keys[index] for index in missing])
+            still_missing: list[int] = []
+            for index, payload in zip(missing, remote):
+                if payload:
+                    self._lru.put(keys[index], payload)
+                    embedding_cache_stats.redis_hits += 1
+                    embedding_cache_stats.bytes_saved += len(payload)
+                    vectors[index] = unpack_vector(payload)
+                else:
+                    still_missing.append(index)
+            missing = still_missing
+
+        if missing:
+            computed = await self.inner.aembed_documents([texts[index] for index in missing])
+            packed = self._store(keys, missing, computed)
+            await redis_mset_bytes(packed, ttl_seconds=self.ttl_seconds)
+            for index, vector in zip(missing, computed):
+                vectors[index] = list(vector)
+
+        return vectors  # type: ignore[return-value]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        """Embeduj zapytanie (LRU → Redis → API)."""
+        vectors, keys = self._lookup_lru([text])
+        if vectors[0] is not None:
+            return vectors[0]
+
+        remote = await redis_mget_bytes(keys)
+        if remote and remote[0]:
+            self._lru.put(keys[0], remote[0])
+            embedding_cache_stats.redis_hits += 1
+            embedding_cache_stats.bytes_saved += len(remote[0])
+            return unpack_vector(remote[0])
+
+        vector = await self.inner.aembed_query(text)
+        await redis_mset_bytes(self._store(keys, [0], [vector]), ttl_seconds=self.ttl_seconds)
+        return list(vector)
+
+    # ------------------------------------------------------------------- sync
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embeduj dokumenty synchronicznie (tylko LRU - brak async Redis w wątku)."""
+        if not texts:
+            return []
+        vectors, keys = self._lookup_lru(texts)
+        missing = [index for index, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = self.inner.embed_documents([texts[index] for index in missing])
+            self._store(keys, missing, computed)
+            for index, vector in zip(missing, computed):
+                vectors[index] = list(vector)
+        return vectors  # type: ignore[return-value]
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embeduj zapytanie synchronicznie (tylko LRU)."""
+        vectors, keys = self._lookup_lru([text])
+        if vectors[0] is not None:
+            return vectors[0]
+        vector = self.inner.embed_query(text)
+        self._store(keys, [0], [vector])
+        return list(vector)
@@ -0,0 +1,359 @@
+"""
+Tryb offline (batch) dla dużych zadań generacji
+
+Przy 500+ personach albo dużych ankietach latencja nie ma znaczenia, liczą się
+koszt i quota. Zamiast wołać model request po requeście:
+
+1. ``BatchChatModel`` (podmieniany zamiast modelu z build_chat_model) nie woła
+   API - rejestruje request w ``BatchCollector`` i czeka na jego wynik
+2. Collector po ``collect_window_seconds`` bez nowych requestów zapisuje je
+   do pliku JSONL (``{custom_id, params, messages, response_schema}``)
+3. Plik jest wysyłany przez ``BatchProvider`` (submit → status → results)
+4. Wyniki z pliku JSONL wracają jako ``AIMessage`` (z usage_metadata) do
+   oczekujących wywołań - dalej działa ten sam kod parsowania i walidacji
+   (structured output + repair person, dopasowanie odpowiedzi ankiet);
+   requesty naprawcze trafiają do kolejnego pliku
+
+Providery:
+- ``local`` - stand-in: wykonuje plik requestów w procesie (build_chat_model,
+  priorytet batch w limiterze RPM/TPM) i zapisuje plik wyników
+- testy podstawiają własny provider (protokół ``BatchProvider``)
+
+Użycie:
+    collector = BatchCollector(get_batch_provider(), job_name=f"personas-{project_id}")
+    llm = BatchChatModel(collector=collector, params=model_config.params)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Protocol
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import ConfigDict, Field
+
+from app.services.shared.clients import build_chat_model, json_schema_output, with_schema_output
+from config import features
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_LOCAL = "local"
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+TERMINAL_STATUSES = (STATUS_SUCCEEDED, STATUS_FAILED)
+
+
+class BatchRequestError(RuntimeError):
+    """Request nie dostał wyniku z zadania batch (błąd requestu, zadania albo timeout)."""
+
+
+@dataclass
+class BatchRequest:
+    """
+    Jedna linia pliku requestów.
+
+    Attributes:
+        custom_id: Identyfikator łączący request z wynikiem
+        params: Parametry modelu (jak dla build_chat_model)
+        messages: Wiadomości (message_to_dict)
+        response_schema: JSON schema odpowiedzi (structured output) albo None
+    """
+    custom_id: str
+    params: dict[str, Any]
+    messages: list[dict[str, Any]]
+    response_schema: dict[str, Any] | None = None
+
+
+@dataclass
+class BatchResult:
+    """
+    Jedna linia pliku wyników.
+
+    Attributes:
+        custom_id: Identyfikator requestu
+        content: Tekst odpowiedzi (JSON dla structured output)
+        usage: usage_metadata odpowiedzi
+        error: Opis błędu (None = sukces)
+    """
+    custom_id: str
+    content: str = ""
+    usage: dict[str, int] = field(default_factory=dict)
+    error: str | None = None
+
+
+def write_jsonl(path: Path, records: list[Any]) -> None:
+    with open(path, "w", encoding="utf-8") as handle:
+        for record in records:
+            handle.write(json.dumps(asdict(record), ensure_ascii=False, default=str) + "\n")
+
+
+def read_requests(path: Path) -> list[BatchRequest]:
+    with open(path, encoding="utf-8") as handle:
+        return [BatchRequest(**json.loads(line)) for line in handle if line.strip()]
+
+
+def read_results(path: Path) -> list[BatchResult]:
+    with open(path, encoding="utf-8") as handle:
+        return [BatchResult(**json.loads(line)) for line in handle if line.strip()]
+
+
+class BatchProvider(Protocol):
+    """Interfejs batch API providera: plik requestów → zadanie → plik wyników."""
+
+    async def submit(self, requests_path: Path) -> str: ...
+
+    async def status(self, job_id: str) -> str: ...
+
+    async def results(self, job_id: str) -> Path: ...
+
+
+class LocalBatchProvider:
+    """
+    Stand-in batch API: wykonuje plik requestów w procesie.
+
+    Każdy request idzie przez build_chat_model (priorytet ``batch`` w globalnym
+    limiterze RPM/TPM, cache odpowiedzi wg polityki), structured output przez
+    with_schema_output. Wyniki zapisywane obok pliku requestów.
+
+    Args:
+        concurrency: Równoległe wywołania modelu
+    """
+
+    def __init__(self, concurrency: int = 8) -> None:
+        self.concurrency = concurrency
+        self._jobs: dict[str, asyncio.Task] = {}
+        self._outputs: dict[str, Path] = {}
+
+    async def submit(self, requests_path: Path) -> str:
+        job_id = f"local-{uuid.uuid4().hex[:12]}"
+        output_path = requests_path.with_name(requests_path.name.replace(".requests.", ".results."))
+        self._outputs[job_id] = output_path
+        self._jobs[job_id] = asyncio.create_task(self._run(requests_path, output_path))
+        return job_id
+
+    async def status(self, job_id: str) -> str:
+        task = self._jobs[job_id]
+        if not task.done():
+            return STATUS_RUNNING
+        return STATUS_FAILED if task.cancelled() or task.exception() is not None else STATUS_SUCCEEDED
+
+    async def results(self, job_id: str) -> Path:
+        return self._outputs[job_id]
+
+    async def _run(self, requests_path: Path, output_path: Path) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def execute(request: BatchRequest) -> BatchResult:
+            async with semaphore:
+                try:
+                    return await self._execute(request)
+                except Exception as exc:
+                    return BatchResult(custom_id=request.custom_id, error=f"{type(exc).__name__}: {exc}")
+
+        requests = await asyncio.to_thread(read_requests, requests_path)
+        results = await asyncio.gather(*(execute(request) for request in requests))
+        await asyncio.to_thread(write_jsonl, output_path, results)
+
+    @staticmethod
+    async def _execute(request: BatchRequest) -> BatchResult:
+        llm = build_chat_model(**request.params, request_priority="batch")
+        messages = messages_from_dict(request.messages)
+        if request.response_schema is not None:
+            raw = (await with_schema_output(llm, request.response_schema, include_raw=True).ainvoke(messages))["raw"]
+        else:
+            raw = await llm.ainvoke(messages)
+        return BatchResult(
+            custom_id=request.custom_id,
+            content=raw.content if isinstance(raw.content, str) else raw.text(),
+            usage=dict(raw.usage_metadata or {}),
+        )
+
+
+class BatchCollector:
+    """
+    Zbiera requesty z BatchChatModel w pliki i rozsyła wyniki do oczekujących.
+
+    Args:
+        provider: Batch provider
+        job_name: Nazwa zadania (podkatalog w ``features.llm_batch.work_dir``)
+        work_dir: Nadpisanie katalogu roboczego (testy)
+    """
+
+    def __init__(self, provider: BatchProvider, job_name: str, work_dir: str | Path | None = None) -> None:
+        config = features.llm_batch
+        self.provider = provider
+        self.job_name = job_name
+        self.work_dir = Path(work_dir or config.work_dir) / job_name
+        self._pending: dict[str, tuple[BatchRequest, asyncio.Future]] = {}
+        self._flush_timer: asyncio.TimerHandle | None = None
+        self._jobs: set[asyncio.Task] = set()
+        self._sequence = 0
+        self.submitted_jobs: list[str] = []
+
+    async def request(self, request: BatchRequest) -> BatchResult:
+        """Zarejestruj request i poczekaj na jego wynik z zadania batch."""
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._pending[request.custom_id] = (request, future)
+        if len(self._pending) >= features.llm_batch.max_requests_per_job:
+            self._start_job()
+        else:
+            self._schedule_flush()
+        return await future
+
+    def _schedule_flush(self) -> None:
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+        self._flush_timer = asyncio.get_running_loop().call_later(
+            features.llm_batch.collect_window_seconds, self._start_job
+        )
+
+    def _start_job(self) -> None:
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        task = asyncio.create_task(self._run_job(batch))
+        self._jobs.add(task)
+        task.add_done_callback(self._jobs.discard)
+
+    async def _run_job(self, batch: dict[str, tuple[BatchRequest, asyncio.Future]]) -> None:
+        config = features.llm_batch
+        self._sequence += 1
+        requests_path = self.work_dir / f"{self.job_name}-{self._sequence:04d}.requests.jsonl"
+        started = time.monotonic()
+        try:
+            await asyncio.to_thread(self.work_dir.mkdir, parents=True, exist_ok=True)
+            await asyncio.to_thread(write_jsonl, requests_path, [request for request, _ in batch.values()])
+            job_id = await self.provider.submit(requests_path)
+            self.submitted_jobs.append(job_id)
+            logger.info(
+                "llm_batch_job_submitted",
+                extra={"job_name": self.job_name, "job_id": job_id, "requests": len(batch), "file": str(requests_path)},
+            )
+
+            status = await self.provider.status(job_id)
+            while status not in TERMINAL_STATUSES:
+                if time.monotonic() - started > config.timeout_hours * 3600:
+                    raise BatchRequestError(f"Batch job {job_id} timed out after {config.timeout_hours}h")
+                await asyncio.sleep(config.poll_interval_seconds)
+                status = await self.provider.status(job_id)
+            if status == STATUS_FAILED:
+                raise BatchRequestError(f"Batch job {job_id} failed")
+
+            results = await asyncio.to_thread(read_results, await self.provider.results(job_id))
+        except Exception as exc:
+            logger.error("llm_batch_job_failed", extra={"job_name": self.job_name, "error": str(exc)})
+            for _, future in batch.values():
+                if not future.done():
+                    future.set_exception(exc if isinstance(exc, BatchRequestError) else BatchRequestError(str(exc)))
+            return
+
+        by_id = {result.custom_id: result for result in results}
+        failed = 0
+        for custom_id, (_, future) in batch.items():
+            if future.done():
+                continue
+            result = by_id.get(custom_id)
+            if result is None or result.error:
+                failed += 1
+                future.set_exception(BatchRequestError(result.error if result else f"No result for {custom_id}"))
+            else:
+                future.set_result(result)
+        logger.info(
+            "llm_batch_job_completed",
+            extra={
+                "job_name": self.job_name,
+                "job_id": job_id,
+                "requests": len(batch),
+                "failed": failed,
+                "duration_seconds": round(time.monotonic() - started, 1),
+            },
+        )
+
+
+class BatchChatModel(BaseChatModel):
+    """
+    Chat model trybu batch: wywołanie = request w pliku zadania batch.
+
+    Zachowuje interfejs modelu z build_chat_model (``ainvoke``, structured
+    output przez with_schema_output, ``usage_metadata`` w odpowiedzi), więc
+    serwisy generacji podmieniają tylko instancję modelu. Tylko async.
+
+    Attributes:
+        collector: Collector zadania
+        params: Parametry modelu (jak dla build_chat_model)
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    collector: Any = Field(exclude=True)
+    params: dict[str, Any] = Field(default_factory=dict)
+
+    @property
+    def model(self) -> str | None:
+        return self.params.get("model")
+
+    @property
+    def _llm_type(self) -> str:
+        return "batch"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return dict(self.params)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        # Collector grupuje requesty współbieżnych tasków jednego event loopa - sync invoke
+        # (np. w wątku przez to_thread) nie może do niego dołączyć. TypeError, nie
+        # NotImplementedError: nie jest to brakująca implementacja, a błędny sposób wywołania.
+        raise TypeError("BatchChatModel supports only async calls (ainvoke)")
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        request = BatchRequest(
+            custom_id=uuid.uuid4().hex,
+            params=self.params,
+            messages=[message_to_dict(message) for message in messages],
+            response_schema=kwargs.get("response_schema"),
+        )
+        result = await self.collector.request(request)
+        message = AIMessage(
+            content=result.content,
+            usage_metadata=result.usage or None,
+            response_metadata={"batch_job": self.collector.job_name},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def with_structured_output(self, schema: Any, *, include_raw: bool = False, **kwargs: Any) -> Any:
+        """JSON schema w requeście + parser Pydantic (jak json_mode w ChatGoogleGenerativeAI)."""
+        return json_schema_output(self, schema, include_raw=include_raw)
+
+
+def get_batch_provider() -> BatchProvider:
+    """Provider wg ``features.llm_batch.provider``."""
+    config = features.llm_batch
+    if config.provider == PROVIDER_LOCAL:
+        return LocalBatchProvider(concurrency=config.local_concurrency)
+    raise ValueError(f"Unknown llm_batch provider: {config.provider}. Must be one of: local")
+
+
+def use_batch_mode(request_count: int, threshold: int) -> bool:
+    """Czy zadanie o ``request_count`` wywołaniach LLM idzie w trybie batch."""
+    return features.llm_batch.enabled and request_count >= threshold
+
+
+def build_batch_chat_model(params: dict[str, Any], job_name: str, provider: BatchProvider | None = None) -> BatchChatModel:
+    """BatchChatModel z nowym collectorem zadania (provider wg konfiguracji)."""
+    collector = BatchCollector(provider or get_batch_provider(), job_name=job_name)
+    return BatchChatModel(collector=collector, params=dict(params))
@@ -0,0 +1,290 @@
+"""
+Cache odpowiedzi chat modeli dla build_chat_model()
+
+Te same prompty trafiają do Gemini wielokrotnie: nazwy segmentów, retry po
+fallbacku, ponowne uruchomienia workflow. ``LLMResponseCache`` to LangChain
+``BaseCache`` podpinany do modelu przez ``build_chat_model(..., response_cache=...)``
+(pole ``cache`` modelu) - LangChain sprawdza go przed wywołaniem API,
+także dla ``with_structured_output`` i ``with_schema_output``.
+
+Klucz: ``llm:{sha256(llm_string)[:16]}:{sha256(wiadomości)}``, gdzie
+``llm_string`` to serializacja modelu i parametrów wywołania (model,
+temperatura, max_tokens, schemat structured output, stop...).
+
+Backendy:
+- ``redis`` - binarna pula Redis, współdzielona między instancjami
+  (ścieżka sync ``invoke`` nie czeka na async Redis - zawsze miss)
+- ``sqlite`` - lokalny plik (dev bez Redis), sync i async
+
+Trafienie zwraca wiadomość z zerowym ``usage_metadata`` i flagą
+``cache_hit`` - ``log_usage_from_metadata`` zapisuje je jako wywołanie
+bez tokenów. Statystyki: ``llm_cache_stats.snapshot()``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Protocol, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import AIMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from app.core.redis import redis_delete_pattern, redis_mget_bytes, redis_mset_bytes
+from config import features
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "llm"
+BACKEND_REDIS = "redis"
+BACKEND_SQLITE = "sqlite"
+
+ZERO_USAGE = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+
+
+def response_cache_key(prompt: str, llm_string: str) -> str:
+    """Klucz cache dla pary (model + parametry, wyrenderowane wiadomości)."""
+    model_hash = hashlib.sha256(llm_string.encode("utf-8")).hexdigest()[:16]
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return f"{KEY_PREFIX}:{model_hash}:{prompt_hash}"
+
+
+def serialize_generations(generations: Sequence[Generation]) -> bytes:
+    """Generacje → JSON (wiadomości przez message_to_dict, bez pickle)."""
+    payload = []
+    for generation in generations:
+        entry: dict[str, Any] = {"text": generation.text, "generation_info": generation.generation_info}
+        if isinstance(generation, ChatGeneration):
+            entry["message"] = message_to_dict(generation.message)
+        payload.append(entry)
+    return json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def deserialize_cache_hit(payload: bytes) -> tuple[list[Generation], int]:
+    """Odczytaj generacje jako trafienie cache: zerowe usage + ``cache_hit``.
+
+    Returns:
+        (generacje, tokeny oryginalnego wywołania - zaoszczędzone)
+    """
+    generations: list[Generation] = []
+    tokens_saved = 0
+    for entry in json.loads(payload):
+        if "message" not in entry:
+            generations.append(Generation(text=entry["text"], generation_info=entry.get("generation_info")))
+            continue
+        message = messages_from_dict([entry["message"]])[0]
+        if isinstance(message, AIMessage):
+            tokens_saved += (message.usage_metadata or {}).get("total_tokens", 0)
+            usage = {**ZERO_USAGE, "cache_hit": True}
+            message = message.model_copy(
+                update={
+                    "usage_metadata": usage,
+                    "response_metadata": {**message.response_metadata, "usage_metadata": usage, "cache_hit": True},
+                }
+            )
+        generations.append(ChatGeneration(message=message, generation_info=entry.get("generation_info")))
+    return generations, tokens_saved
+
+
+@dataclass
+class LLMCacheStats:
+    """
+    Liczniki cache odpowiedzi LLM (per proces).
+
+    Attributes:
+        lookups: Sprawdzenia cache przed wywołaniem API
+        hits: Trafienia
+        tokens_saved: Suma tokenów oryginalnych wywołań obsłużonych z cache
+    """
+    lookups: int = 0
+    hits: int = 0
+    tokens_saved: int = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else None,
+            "tokens_saved": self.tokens_saved,
+        }
+
+
+llm_cache_stats = LLMCacheStats()
+
+
+class ResponseCacheBackend(Protocol):
+    """Magazyn bajtów pod kluczem z TTL."""
+
+    def get(self, key: str) -> bytes | None: ...
+
+    def set(self, key: str, value: bytes, ttl_seconds: int) -> None: ...
+
+    async def aget(self, key: str) -> bytes | None: ...
+
+    async def aset(self, key: str, value: bytes, ttl_seconds: int) -> None: ...
+
+    async def aclear(self) -> None: ...
+
+
+class RedisResponseBackend:
+    """Backend Redis (binarna pula, graceful degradation przy awarii)."""
+
+    def get(self, key: str) -> bytes | None:
+        return None
+
+    def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        return None
+
+    async def aget(self, key: str) -> bytes | None:
+        values = await redis_mget_bytes([key])
+        return values[0] if values else None
+
+    async def aset(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        await redis_mset_bytes({key: value}, ttl_seconds=ttl_seconds)
+
+    async def aclear(self) -> None:
+        await redis_delete_pattern(f"{KEY_PREFIX}:*")
+
+
+class SQLiteResponseBackend:
+    """Backend SQLite (jeden plik, wygasłe wpisy pomijane i nadpisywane)."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._connection.commit()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM llm_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl_seconds),
+            )
+            self._connection.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM llm_cache")
+            self._connection.commit()
+
+    async def aget(self, key: str) -> bytes | None:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        await asyncio.to_thread(self.set, key, value, ttl_seconds)
+
+    async def aclear(self) -> None:
+        await asyncio.to_thread(self.clear)
+
+
+class LLMResponseCache(BaseCache):
+    """
+    LangChain BaseCache nad backendem Redis / SQLite.
+
+    Args:
+        backend: Magazyn wpisów
+        ttl_seconds: TTL wpisów
+    """
+
+    def __init__(self, backend: ResponseCacheBackend, ttl_seconds: int) -> None:
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+
+    def _hit(self, key: str, payload: bytes | None) -> list[Generation] | None:
+        llm_cache_stats.lookups += 1
+        if payload is None:
+            return None
+        try:
+            generations, tokens_saved = deserialize_cache_hit(payload)
+        except (ValueError, KeyError, TypeError) as exc:
+            logger.warning("llm_cache_corrupted_entry", extra={"key": key, "error": str(exc)})
+            return None
+        llm_cache_stats.hits += 1
+        llm_cache_stats.tokens_saved += tokens_saved
+        logger.info("llm_cache_hit", extra={"key": key, "tokens_saved": tokens_saved})
+        return generations
+
+    def lookup(self, prompt: str, llm_string: str) -> list[Generation] | None:
+        key = response_cache_key(prompt, llm_string)
+        return self._hit(key, self.backend.get(key))
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        self.backend.set(response_cache_key(prompt, llm_string), serialize_generations(return_val), self.ttl_seconds)
+
+    def clear(self, **kwargs: Any) -> None:
+        clear = getattr(self.backend, "clear", None)
+        if clear is not None:
+            clear()
+
+    async def alookup(self, prompt: str, llm_string: str) -> list[Generation] | None:
+        key = response_cache_key(prompt, llm_string)
+        return self._hit(key, await self.backend.aget(key))
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        await self.backend.aset(
+            response_cache_key(prompt, llm_string), serialize_generations(return_val), self.ttl_seconds
+        )
+
+    async def aclear(self, **kwargs: Any) -> None:
+        await self.backend.aclear()
+
+
+_response_cache: LLMResponseCache | None = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> LLMResponseCache:
+    """Współdzielona instancja cache (backend wg ``features.llm_cache.backend``)."""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            config = features.llm_cache
+            if config.backend == BACKEND_SQLITE:
+                backend: ResponseCacheBackend = SQLiteResponseBackend(config.sqlite_path)
+            elif config.backend == BACKEND_REDIS:
+                backend = RedisResponseBackend()
+            else:
+                raise ValueError(f"Unknown llm_cache backend: {config.backend}. Must be one of: redis, sqlite")
+            _response_cache = LLMResponseCache(backend, ttl_seconds=config.ttl_hours * 60 * 60)
+        return _response_cache
+
+
+def resolve_response_cache(response_cache: bool | None, temperature: float) -> LLMResponseCache | None:
+    """Polityka cache dla jednego modelu.
+
+    Args:
+        response_cache: Decyzja call site (True - zawsze, False - nigdy,
+            None - wg progu ``features.llm_cache.max_temperature``)
+        temperature: Efektywna temperatura modelu
+
+    Returns:
+        Cache do podpięcia w polu ``cache`` modelu albo None (bez cache)
+    """
+    config = features.llm_cache
+    if not config.enabled or response_cache is False:
+        return None
+    if response_cache is None and temperature > config.max_temperature:
+        return None
+    return get_response_cache()
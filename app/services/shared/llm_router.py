@@ -1,15 +1,36 @@
 """
 Multi-LLM Router z fallbackiem, cost routingiem i automatycznym switchingiem.
 Obsługuje Gemini, OpenAI i Anthropic Claude z inteligentnym routingiem.
+
+Latencja i hedging:
+- każdy model z routera raportuje czas i wynik wywołania (``ProviderStatsCallback``)
+  do rolling okna per provider (p50 / p95, error rate)
+- provider z error rate > ``features.llm_router.max_error_rate`` jest pomijany
+  przez ``degraded_cooldown_seconds``
+- ``get_chat_model(..., hedge=True)`` (tylko wywołania idempotentne) zwraca
+  ``HedgedChatModel``: gdy primary przekroczy swoje p95, ten sam request idzie
+  do drugiego modelu, wygrywa pierwsza odpowiedź, druga jest anulowana;
+  udział hedgy ograniczony budżetem ``hedge_budget_fraction``
 """
+import asyncio
 import logging
+import math
 import os
+import time
+from collections import deque
 from enum import Enum
 from typing import Any, Optional, Dict, List
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from uuid import UUID
 
+from langchain_core.callbacks import AsyncCallbackHandler
 from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult, LLMResult
 from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import ConfigDict, Field
+
+from config import features
 
 logger = logging.getLogger(__name__)
 
@@ -107,6 +128,180 @@ LLM_PROVIDER_CONFIGS: Dict[LLMProvider, Dict[str, LLMProviderConfig]] = {
 }
 
 
+@dataclass
+class ProviderLatencyStats:
+    """
+    Rolling okno ostatnich wywołań jednego providera.
+
+    Attributes:
+        window: Rozmiar okna (ostatnie N wywołań)
+        latencies: Czasy udanych wywołań (sekundy)
+        outcomes: Wyniki wywołań (True = błąd)
+    """
+    window: int = 200
+    latencies: deque = field(init=False)
+    outcomes: deque = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.latencies = deque(maxlen=self.window)
+        self.outcomes = deque(maxlen=self.window)
+
+    def record(self, latency_seconds: Optional[float], error: bool = False) -> None:
+        self.outcomes.append(error)
+        if not error and latency_seconds is not None:
+            self.latencies.append(latency_seconds)
+
+    def reset(self) -> None:
+        self.latencies.clear()
+        self.outcomes.clear()
+
+    @property
+    def samples(self) -> int:
+        return len(self.outcomes)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Percentyl latencji (nearest-rank), None gdy brak udanych wywołań."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[max(0, min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1))]
+
+    @property
+    def p50(self) -> Optional[float]:
+        return self.percentile(0.50)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self.percentile(0.95)
+
+    @property
+    def error_rate(self) -> Optional[float]:
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "p50_seconds": round(self.p50, 3) if self.p50 is not None else None,
+            "p95_seconds": round(self.p95, 3) if self.p95 is not None else None,
+            "error_rate": round(self.error_rate, 3) if self.error_rate is not None else None,
+        }
+
+
+class ProviderStatsCallback(AsyncCallbackHandler):
+    """Callback modeli z routera: czas i wynik wywołania → LLMRouter.record_call.
+
+    Trafienia cache i anulowane wywołania (przegrany hedge) nie są liczone.
+    """
+
+    run_inline = True
+
+    def __init__(self, router: "LLMRouter", provider: LLMProvider) -> None:
+        self.router = router
+        self.provider = provider
+        self._started: Dict[UUID, float] = {}
+
+    async def on_chat_model_start(self, serialized: Any, messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.monotonic()
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._started.pop(run_id, None)
+        if started is None or _is_cache_hit(response):
+            return
+        self.router.record_call(self.provider, time.monotonic() - started)
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._started.pop(run_id, None)
+        if started is None or isinstance(error, asyncio.CancelledError):
+            return
+        self.router.record_call(self.provider, None, error=True)
+
+
+def _is_cache_hit(response: LLMResult) -> bool:
+    return any(
+        getattr(getattr(generation, "message", None), "response_metadata", {}).get("cache_hit")
+        for generations in response.generations
+        for generation in generations
+    )
+
+
+class HedgedChatModel(BaseChatModel):
+    """
+    Model z hedged requests: primary, a po jego p95 także drugi model.
+
+    Tylko dla wywołań idempotentnych (ten sam prompt może trafić do dwóch
+    modeli). Bez tool calling / structured output - zwraca tekst odpowiedzi.
+    Ścieżka sync (``invoke``) woła tylko primary.
+
+    Attributes:
+        primary: Model podstawowy
+        hedge: Model dostający ten sam request po przekroczeniu p95 primary
+        primary_provider: Provider primary (źródło p95)
+        router: Router ze statystykami i budżetem hedgy
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    primary: BaseChatModel
+    hedge: BaseChatModel
+    primary_provider: LLMProvider
+    router: Any = Field(exclude=True)
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {
+            "primary": self.primary._identifying_params,
+            "hedge": self.hedge._identifying_params,
+        }
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return _chat_result(self.primary.invoke(messages, stop=stop, **kwargs))
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        primary = asyncio.ensure_future(self.primary.ainvoke(messages, stop=stop, **kwargs))
+        try:
+            delay = self.router.hedge_delay(self.primary_provider)
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done and self.router.try_hedge():
+                    logger.info(
+                        "llm_hedge_sent",
+                        extra={"provider": self.primary_provider.value, "delay_seconds": round(delay, 3)},
+                    )
+                    return _chat_result(await self._race(primary, messages, stop, **kwargs))
+            self.router.note_unhedged()
+            return _chat_result(await primary)
+        finally:
+            if not primary.done():
+                primary.cancel()
+
+    async def _race(self, primary: asyncio.Future, messages, stop, **kwargs: Any) -> BaseMessage:
+        """Pierwsza udana odpowiedź z (primary, hedge); przegrany jest anulowany."""
+        hedge = asyncio.ensure_future(self.hedge.ainvoke(messages, stop=stop, **kwargs))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        logger.info(
+                            "llm_hedge_finished",
+                            extra={"provider": self.primary_provider.value, "winner": "primary" if task is primary else "hedge"},
+                        )
+                        return task.result()
+            raise primary.exception()
+        finally:
+            if not hedge.done():
+                hedge.cancel()
+
+
+def _chat_result(message: BaseMessage) -> ChatResult:
+    return ChatResult(generations=[ChatGeneration(message=message)])
+
+
 class LLMRouter:
     """
     Router LLM z automatycznym fallbackiem i cost routingiem.
@@ -116,6 +311,8 @@ class LLMRouter:
     - Cost routing: Preferuj tańsze modele dla prostych zadań
     - Provider health tracking: Przełącz na backup jeśli primary nie działa
     - Token usage tracking: Monitoruj koszty per provider
+    - Latency tracking: Rolling p50/p95 i error rate per provider, pomijanie
+      providerów z wysokim error rate, hedged requests (hedge=True)
     """
 
     def __init__(
@@ -148,6 +345,18 @@ class LLMRouter:
             for provider in LLMProvider
         }
 
+        # Latency / error rate tracking (rolling okno per provider)
+        router_config = features.llm_router
+        self.latency_stats: Dict[LLMProvider, ProviderLatencyStats] = {
+            provider: ProviderLatencyStats(window=router_config.latency_window)
+            for provider in LLMProvider
+        }
+        self._degraded_until: Dict[LLMProvider, float] = {}
+        self._stats_callbacks: Dict[LLMProvider, ProviderStatsCallback] = {}
+
+        # Hedging budget: ostatnie wywołania HedgedChatModel (True = z hedgem)
+        self._hedge_window: deque = deque(maxlen=router_config.latency_window)
+
         logger.info(
             f"LLMRouter initialized with fallback chain: {[p.value for p in self.fallback_chain]}"
         )
@@ -159,6 +368,7 @@ class LLMRouter:
         preferred_provider: Optional[LLMProvider] = None,
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
+        hedge: bool = False,
         **extra_params: Any,
     ) -> BaseChatModel:
         """
@@ -169,6 +379,8 @@ class LLMRouter:
             preferred_provider: Preferowany dostawca (jeśli None, użyj cost routing)
             temperature: Temperatura próbkująca (override)
             max_tokens: Limit tokenów (override)
+            hedge: Zwróć HedgedChatModel (tylko dla wywołań idempotentnych -
+                po p95 primary ten sam request idzie do drugiego modelu)
             extra_params: Dodatkowe parametry dla modelu
 
         Returns:
@@ -201,6 +413,8 @@ class LLMRouter:
                 f"Using {model_config.provider.value}:{model_config.model} "
                 f"for {task_complexity.value} task"
             )
+            if hedge and features.llm_router.hedging_enabled:
+                return self._with_hedge(model, provider, task_complexity, temperature, max_tokens, **extra_params)
             return model
         except Exception as e:
             logger.error(f"Failed to build model for {provider.value}: {e}")
@@ -242,6 +456,10 @@ class LLMRouter:
         if not self.provider_health.get(provider, False):
             return False
 
+        # Skip providers degraded by rolling error rate (until cooldown ends)
+        if time.monotonic() < self._degraded_until.get(provider, 0.0):
+            return False
+
         # Check if API key is set
         configs = LLM_PROVIDER_CONFIGS.get(provider, {})
         if not configs:
@@ -281,6 +499,11 @@ class LLMRouter:
         if not api_key:
             raise ValueError(f"API key not found for {config.provider.value}: {config.api_key_env}")
 
+        extra_params["callbacks"] = [
+            *(extra_params.get("callbacks") or []),
+            self._stats_callback(config.provider),
+        ]
+
         # Gemini
         if config.provider == LLMProvider.GEMINI:
             from langchain_google_genai import ChatGoogleGenerativeAI
@@ -360,6 +583,106 @@ class LLMRouter:
 
         raise RuntimeError("All LLM providers failed")
 
+    def _with_hedge(
+        self,
+        model: BaseChatModel,
+        provider: LLMProvider,
+        task_complexity: TaskComplexity,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        **extra_params: Any,
+    ) -> BaseChatModel:
+        """Opakuj model w HedgedChatModel (hedge: najszybszy inny provider albo duplikat primary)."""
+        hedge_provider = self._select_hedge_provider(provider)
+        try:
+            config = self._get_model_config_for_complexity(hedge_provider, task_complexity)
+            if temperature is not None:
+                config.temperature = temperature
+            if max_tokens is not None:
+                config.max_tokens = max_tokens
+            hedge_model = self._build_model(config, **extra_params)
+        except Exception as e:
+            logger.warning(f"Hedge model for {hedge_provider.value} unavailable, using primary only: {e}")
+            return model
+        return HedgedChatModel(primary=model, hedge=hedge_model, primary_provider=provider, router=self)
+
+    def _select_hedge_provider(self, primary: LLMProvider) -> LLMProvider:
+        """Inny dostępny provider z najniższym p95 (bez statystyk - kolejność fallback chain).
+
+        Gdy nie ma innego providera, hedge to duplikat requestu do primary
+        (zwykle trafia na inny backend API).
+        """
+        candidates = [p for p in self.fallback_chain if p != primary and self.is_provider_available(p)]
+        if not candidates:
+            return primary
+        return min(
+            candidates,
+            key=lambda p: self.latency_stats[p].p95 if self.latency_stats[p].p95 is not None else math.inf,
+        )
+
+    def _stats_callback(self, provider: LLMProvider) -> ProviderStatsCallback:
+        callback = self._stats_callbacks.get(provider)
+        if callback is None:
+            callback = self._stats_callbacks[provider] = ProviderStatsCallback(self, provider)
+        return callback
+
+    def record_call(self, provider: LLMProvider, latency_seconds: Optional[float], error: bool = False) -> None:
+        """Zapisz wywołanie w rolling oknie providera; wysoki error rate → degraded."""
+        router_config = features.llm_router
+        stats = self.latency_stats[provider]
+        stats.record(latency_seconds, error=error)
+
+        error_rate = stats.error_rate
+        if error and stats.samples >= router_config.min_samples and error_rate > router_config.max_error_rate:
+            self._degraded_until[provider] = time.monotonic() + router_config.degraded_cooldown_seconds
+            stats.reset()
+            logger.warning(
+                "llm_provider_degraded",
+                extra={
+                    "provider": provider.value,
+                    "error_rate": round(error_rate, 3),
+                    "cooldown_seconds": router_config.degraded_cooldown_seconds,
+                },
+            )
+
+    def hedge_delay(self, provider: LLMProvider) -> Optional[float]:
+        """Po ilu sekundach wysłać hedge (p95 providera), None = bez hedgy (za mało danych)."""
+        router_config = features.llm_router
+        stats = self.latency_stats[provider]
+        if not router_config.hedging_enabled or len(stats.latencies) < router_config.min_samples:
+            return None
+        return max(stats.p95, router_config.min_hedge_delay_seconds)
+
+    def try_hedge(self) -> bool:
+        """Zarezerwuj hedge w budżecie (część wywołań w oknie); False = budżet wyczerpany."""
+        hedged = sum(self._hedge_window)
+        if hedged + 1 > features.llm_router.hedge_budget_fraction * (len(self._hedge_window) + 1):
+            logger.info("llm_hedge_budget_exhausted", extra={"hedged": hedged, "window": len(self._hedge_window)})
+            return False
+        self._hedge_window.append(True)
+        return True
+
+    def note_unhedged(self) -> None:
+        """Wywołanie HedgedChatModel bez hedge (liczy się do budżetu)."""
+        self._hedge_window.append(False)
+
+    def get_latency_summary(self) -> Dict[str, Any]:
+        """Rolling p50/p95 i error rate per provider + wykorzystanie budżetu hedgy."""
+        now = time.monotonic()
+        summary: Dict[str, Any] = {
+            provider.value: {
+                **stats.snapshot(),
+                "degraded": now < self._degraded_until.get(provider, 0.0),
+            }
+            for provider, stats in self.latency_stats.items()
+        }
+        summary["hedging"] = {
+            "calls": len(self._hedge_window),
+            "hedged": sum(self._hedge_window),
+            "budget_fraction": features.llm_router.hedge_budget_fraction,
+        }
+        return summary
+
     def track_usage(
         self,
         provider: LLMProvider,
@@ -0,0 +1,370 @@
+"""
+Globalny limiter RPM/TPM wywołań chat modeli (token bucket w Redis)
+
+Każda instancja Cloud Run woła Gemini niezależnie, a faktycznym limitem jest
+quota projektu (RPM/TPM per model) - bez limitera poznajemy ją dopiero z 429.
+``RedisTokenBucketLimiter`` to LangChain ``BaseRateLimiter`` podpinany przez
+``build_chat_model`` (pole ``rate_limiter`` modelu; LangChain woła go po
+sprawdzeniu cache, więc trafienia cache nie zużywają limitu).
+
+Stan: hash ``llm_rl:{model}`` z dwoma kubełkami (``req``, ``tok``) uzupełnianymi
+liniowo do pojemności ``rpm`` / ``tpm`` na minutę. Pobranie i uzupełnienie
+wykonuje jeden skrypt Lua z zegarem Redis (``TIME``) - atomowo i bez zależności
+od zegarów instancji.
+
+Tokeny:
+- przed wywołaniem pobierany jest szacunek (``estimated_tokens_per_request``)
+- po odpowiedzi ``TokenUsageReconciler`` dolicza / zwraca różnicę względem
+  faktycznego usage (błąd wywołania zwraca cały szacunek)
+
+Priorytety:
+- ``interactive`` (asystent) może wyczerpać kubełki do zera
+- ``batch`` (generacja person, ankiety) nie schodzi poniżej
+  ``batch_reserve_fraction`` pojemności - zapas dla interaktywnych we wszystkich
+  instancjach; w procesie batch nie próbuje pobierać, dopóki czekają interaktywne
+
+Redis niedostępny → fail-open na ``redis_backoff_seconds`` (jak przed limiterem).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from enum import Enum
+from typing import Any
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from app.core.redis import redis_eval, redis_eval_sync
+from config import features, models
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "llm_rl"
+
+
+class _ChargeLedger:
+    """Ile pobrań szacunku czeka na korektę w bieżącym wywołaniu modelu."""
+
+    def __init__(self) -> None:
+        self.charged = 0
+
+
+# Ustawiany przez TokenUsageReconciler.on_chat_model_start (task wywołującego);
+# aacquire działa w tasku potomnym (gather w agenerate) z kopią kontekstu -
+# współdzieli ten sam obiekt, więc on_llm_end wie, czy szacunek został pobrany
+# (trafienie cache nie pobiera; ścieżka sync pobiera szacunek, ale bez ledgera -
+# async callbacki sync invoke działają w innym kontekście, więc bez korekty TPM).
+_charge_ledger: ContextVar[_ChargeLedger | None] = ContextVar("llm_rate_limit_ledger", default=None)
+
+# _waiting zmieniają też wątki robocze (sync acquire)
+_waiting_lock = threading.Lock()
+
+
+class RequestPriority(str, Enum):
+    """Priorytet wywołania LLM przy czekaniu na limit."""
+    INTERACTIVE = "interactive"  # Użytkownik czeka na odpowiedź (asystent)
+    BATCH = "batch"  # Generacja w tle (persony, ankiety, podsumowania)
+
+
+# KEYS[1] = hash kubełków; ARGV = rpm, tpm, koszt w tokenach, rezerwa (0-1)
+# Zwraca 0 (pobrano) albo ms do ponownej próby. rpm/tpm <= 0 = bez limitu.
+ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local reserve = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'req', 'tok', 'ts')
+local ts = tonumber(state[3]) or now
+local elapsed = math.max(0, now - ts)
+local wait = 0
+local req = 0
+local tok = 0
+if rpm > 0 then
+  req = math.min(rpm, (tonumber(state[1]) or rpm) + elapsed * rpm / 60000)
+  local need = math.min(rpm, 1 + reserve * rpm)
+  if req < need then wait = math.max(wait, (need - req) * 60000 / rpm) end
+end
+if tpm > 0 then
+  tok = math.min(tpm, (tonumber(state[2]) or tpm) + elapsed * tpm / 60000)
+  local need = math.min(tpm, cost + reserve * tpm)
+  if tok < need then wait = math.max(wait, (need - tok) * 60000 / tpm) end
+end
+if wait == 0 then
+  req = req - 1
+  tok = tok - cost
+end
+redis.call('HSET', KEYS[1], 'req', tostring(req), 'tok', tostring(tok), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], 120000)
+return math.ceil(wait)
+"""
+
+# KEYS[1] = hash kubełków; ARGV = różnica tokenów (faktyczne - szacunek), tpm
+# Dodatnia różnica może zadłużyć kubełek (kolejne wywołania poczekają dłużej).
+RECONCILE_SCRIPT = """
+local tok = tonumber(redis.call('HGET', KEYS[1], 'tok'))
+if tok == nil then return 0 end
+local tpm = tonumber(ARGV[2])
+tok = math.max(-tpm, math.min(tpm, tok - tonumber(ARGV[1])))
+redis.call('HSET', KEYS[1], 'tok', tostring(tok))
+return 1
+"""
+
+
+def bucket_key(model: str) -> str:
+    return f"{KEY_PREFIX}:{model}"
+
+
+class RedisTokenBucketLimiter(BaseRateLimiter):
+    """
+    Limiter RPM/TPM modelu współdzielony przez wszystkie instancje (Redis).
+
+    Args:
+        model: Nazwa modelu (klucz kubełków)
+        rpm: Requests per minute (None/0 = bez limitu)
+        tpm: Tokens per minute (None/0 = bez limitu)
+        priority: Priorytet wywołań modelu zbudowanego z tym limiterem
+        estimated_tokens: Szacunek tokenów pobierany przed wywołaniem
+    """
+
+    # Czekający per (model, priorytet) w procesie - batch ustępuje interaktywnym
+    _waiting: Counter = Counter()
+    _redis_down_until: float = 0.0
+
+    def __init__(
+        self,
+        model: str,
+        rpm: int | None,
+        tpm: int | None,
+        *,
+        priority: RequestPriority = RequestPriority.BATCH,
+        estimated_tokens: int | None = None,
+    ) -> None:
+        config = features.llm_rate_limit
+        self.model = model
+        self.rpm = rpm or 0
+        self.tpm = tpm or 0
+        self.priority = RequestPriority(priority)
+        self.estimated_tokens = estimated_tokens or config.estimated_tokens_per_request
+        self.reserve = config.batch_reserve_fraction if self.priority == RequestPriority.BATCH else 0.0
+        self.reconciler = TokenUsageReconciler(self)
+
+    @property
+    def key(self) -> str:
+        return bucket_key(self.model)
+
+    def _redis_available(self) -> bool:
+        return time.monotonic() >= RedisTokenBucketLimiter._redis_down_until
+
+    def _mark_redis_down(self) -> None:
+        RedisTokenBucketLimiter._redis_down_until = (
+            time.monotonic() + features.llm_rate_limit.redis_backoff_seconds
+        )
+
+    def _yield_to_interactive(self) -> bool:
+        return (
+            self.priority == RequestPriority.BATCH
+            and RedisTokenBucketLimiter._waiting[(self.model, RequestPriority.INTERACTIVE)] > 0
+        )
+
+    def _acquire_result(self, result: object | None) -> int | None:
+        if result is None:
+            self._mark_redis_down()
+            return None
+        return int(result)
+
+    async def _try_acquire(self) -> int | None:
+        """Jedna próba pobrania z kubełków: 0 = pobrano, N = ms czekania, None = Redis niedostępny."""
+        return self._acquire_result(
+            await redis_eval(ACQUIRE_SCRIPT, [self.key], [self.rpm, self.tpm, self.estimated_tokens, self.reserve])
+        )
+
+    def _try_acquire_sync(self) -> int | None:
+        """``_try_acquire`` przez synchronicznego klienta Redis (ten sam skrypt Lua)."""
+        return self._acquire_result(
+            redis_eval_sync(ACQUIRE_SCRIPT, [self.key], [self.rpm, self.tpm, self.estimated_tokens, self.reserve])
+        )
+
+    @staticmethod
+    def _acquired(wait_ms: int | None) -> bool:
+        """Wynik próby: None (Redis niedostępny - fail-open) lub 0 (pobrano szacunek)."""
+        if wait_ms == 0:
+            ledger = _charge_ledger.get()
+            if ledger is not None:
+                ledger.charged += 1
+        return wait_ms is None or wait_ms == 0
+
+    def _sleep_ms(self, wait_ms: int, started: float) -> int | None:
+        """Ile spać przed kolejną próbą; None - przekroczony ``max_wait_seconds`` (przepuść)."""
+        config = features.llm_rate_limit
+        waited = time.monotonic() - started
+        if waited >= config.max_wait_seconds:
+            logger.warning(
+                "llm_rate_limit_wait_exceeded",
+                extra={"model": self.model, "priority": self.priority.value, "waited_seconds": round(waited, 2)},
+            )
+            return None
+        return max(wait_ms, config.min_poll_ms)
+
+    def _track_waiting(self, delta: int) -> None:
+        with _waiting_lock:
+            RedisTokenBucketLimiter._waiting[(self.model, self.priority)] += delta
+
+    def _log_wait(self, started: float) -> None:
+        waited_ms = (time.monotonic() - started) * 1000
+        if waited_ms >= features.llm_rate_limit.min_poll_ms:
+            logger.info(
+                "llm_rate_limit_wait",
+                extra={"model": self.model, "priority": self.priority.value, "waited_ms": round(waited_ms, 1)},
+            )
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        """Pobierz 1 request i szacunek tokenów; czekaj (async) na uzupełnienie kubełków."""
+        if not self._redis_available():
+            return True
+
+        self._track_waiting(1)
+        started = time.monotonic()
+        try:
+            while True:
+                if self._yield_to_interactive():
+                    wait_ms = features.llm_rate_limit.min_poll_ms
+                else:
+                    wait_ms = await self._try_acquire()
+                if self._acquired(wait_ms):
+                    return True
+                if not blocking:
+                    return False
+                sleep_ms = self._sleep_ms(wait_ms, started)
+                if sleep_ms is None:
+                    return True
+                await asyncio.sleep(sleep_ms / 1000)
+        finally:
+            self._track_waiting(-1)
+            self._log_wait(started)
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        """Sync odpowiednik ``aacquire`` (``invoke`` / ``_generate`` w wątku roboczym).
+
+        Ten sam skrypt Lua przez synchronicznego klienta Redis; czeka przez
+        ``time.sleep`` - blokuje tylko wątek wywołującego, nie event loop.
+        """
+        if not self._redis_available():
+            return True
+
+        self._track_waiting(1)
+        started = time.monotonic()
+        try:
+            while True:
+                if self._yield_to_interactive():
+                    wait_ms = features.llm_rate_limit.min_poll_ms
+                else:
+                    wait_ms = self._try_acquire_sync()
+                if self._acquired(wait_ms):
+                    return True
+                if not blocking:
+                    return False
+                sleep_ms = self._sleep_ms(wait_ms, started)
+                if sleep_ms is None:
+                    return True
+                time.sleep(sleep_ms / 1000)
+        finally:
+            self._track_waiting(-1)
+            self._log_wait(started)
+
+    async def reconcile(self, actual_tokens: int) -> None:
+        """Skoryguj kubełek TPM o różnicę między faktycznym usage a szacunkiem."""
+        if not self.tpm or not self._redis_available():
+            return
+        delta = actual_tokens - self.estimated_tokens
+        if delta and await redis_eval(RECONCILE_SCRIPT, [self.key], [delta, self.tpm]) is None:
+            self._mark_redis_down()
+
+
+def _total_tokens(response: LLMResult) -> int | None:
+    """Suma tokenów z usage_metadata generacji (None - brak usage w odpowiedzi)."""
+    total = 0
+    found = False
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if not usage:
+                continue
+            total += usage.get("total_tokens") or usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+            found = True
+    return total if found else None
+
+
+class TokenUsageReconciler(AsyncCallbackHandler):
+    """Callback modelu: po odpowiedzi koryguje kubełek TPM o faktyczne usage.
+
+    ``run_inline`` - zdarzenia obsługiwane w tasku wywołującego, nie w gather.
+    """
+
+    run_inline = True
+
+    def __init__(self, limiter: RedisTokenBucketLimiter) -> None:
+        self.limiter = limiter
+
+    async def on_chat_model_start(self, serialized: Any, messages: Any, **kwargs: Any) -> None:
+        _charge_ledger.set(_ChargeLedger())
+
+    @staticmethod
+    def _take_charge() -> bool:
+        ledger = _charge_ledger.get()
+        if ledger is None or ledger.charged <= 0:
+            return False
+        ledger.charged -= 1
+        return True
+
+    async def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        if not self._take_charge():
+            return
+        actual = _total_tokens(response)
+        if actual is not None:
+            await self.limiter.reconcile(actual)
+
+    async def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        if self._take_charge():
+            await self.limiter.reconcile(0)
+
+
+_limiters: dict[tuple[str, RequestPriority], RedisTokenBucketLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    model: str,
+    priority: RequestPriority | str = RequestPriority.BATCH,
+) -> RedisTokenBucketLimiter | None:
+    """Limiter dla modelu (współdzielony per model i priorytet).
+
+    Returns:
+        Limiter albo None, gdy limiter wyłączony lub model nie ma limitów w models.yaml
+    """
+    if not features.llm_rate_limit.enabled:
+        return None
+    limits = models.get_rate_limits(model)
+    if limits is None:
+        return None
+    priority = RequestPriority(priority)
+    with _limiters_lock:
+        limiter = _limiters.get((model, priority))
+        if limiter is None:
+            limiter = RedisTokenBucketLimiter(
+                model,
+                limits.rpm,
+                limits.tpm,
+                priority=priority,
+                estimated_tokens=limits.estimated_tokens_per_request,
+            )
+            _limiters[(model, priority)] = limiter
+        return limiter
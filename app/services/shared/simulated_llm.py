@@ -0,0 +1,376 @@
+"""
+Symulowany provider LLM (testy obciążeniowe, benchmarki offline)
+
+``build_chat_model(provider="simulated")`` i ``get_embeddings(provider="simulated")``
+(albo ``SIMULATED_LLM=true`` / ``features.simulated_llm.enabled``) zwracają modele,
+które nie wołają sieci i nie potrzebują API key, ale zachowują się jak Gemini
+z punktu widzenia pipeline'ów:
+
+- structured output: JSON zgodny ze schematem (``response_schema`` z
+  json_schema_output) - przechodzi walidację Pydantic person, needs/pains itd.
+- tekst: odpowiedzi rozpoznawane po promptach z config/prompts - ocena na skali
+  (liczba z zakresu), wybór opcji z listy ``Opcje:``, podsumowanie dyskusji
+  (sekcje markdown parsowane przez DiscussionSummarizer), plan orkiestracji
+  (JSON z ``total_personas``); pozostałe - kilka polskich zdań
+- treść deterministyczna: ziarno = seed + model + prompt + schema
+- latencja: rozkład log-normalny z mediany i p95 (``asyncio.sleep`` w async)
+- błędy: ``error_rate`` → 503 (ServiceUnavailable), ``rate_limit_rate`` → 429
+  (ResourceExhausted) - te same wyjątki, co z klienta Google
+- ``usage_metadata``: tokeny szacowane jako znaki / 4
+
+Rozpoznawanie promptów jest heurystyczne - nowy typ promptu bez dopasowania
+dostaje odpowiedź tekstową.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from typing import Any
+
+from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import ConfigDict
+
+from app.services.shared.clients import json_schema_output
+from config import features
+
+FIRST_NAMES = [
+    "Anna", "Katarzyna", "Magdalena", "Agnieszka", "Joanna", "Małgorzata", "Ewa", "Zofia",
+    "Piotr", "Krzysztof", "Tomasz", "Paweł", "Michał", "Marcin", "Jakub", "Andrzej",
+]
+LAST_NAMES = [
+    "Nowak", "Kowalski", "Wiśniewski", "Wójcik", "Kamiński", "Lewandowski", "Zieliński",
+    "Szymański", "Woźniak", "Dąbrowski", "Kozłowski", "Mazur", "Krawczyk", "Piotrowski",
+]
+WORDS = [
+    "Rodzina", "Stabilność", "Rozwój", "Bezpieczeństwo", "Niezależność", "Zdrowie", "Oszczędność",
+    "Podróże", "Bieganie", "Gotowanie", "Książki", "Technologia", "Ogrodnictwo", "Fotografia",
+]
+SENTENCES = [
+    "Na co dzień zwracam uwagę przede wszystkim na stosunek ceny do jakości.",
+    "W moim otoczeniu coraz więcej osób porównuje oferty w internecie przed zakupem.",
+    "Cenię rozwiązania, które oszczędzają czas i nie wymagają długiej nauki.",
+    "Decyzje finansowe podejmuję ostrożnie, zwykle po rozmowie z rodziną.",
+    "Mieszkam w dużym mieście i większość spraw załatwiam przez aplikacje.",
+    "Zanim zaufam nowej marce, sprawdzam opinie znajomych i recenzje.",
+    "Ważne jest dla mnie, żeby produkt był trwały i łatwo dostępny w Polsce.",
+    "Rosnące koszty życia sprawiają, że planuję wydatki z większym wyprzedzeniem.",
+    "Chętnie próbuję nowości, jeśli widzę w nich realną korzyść dla siebie.",
+    "Najbardziej irytuje mnie niejasna komunikacja i ukryte opłaty.",
+]
+DEMOGRAPHIC_VALUES = {
+    "age": ["18-24", "25-34", "35-44", "45-54", "55-64", "65+"],
+    "gender": ["kobieta", "mężczyzna"],
+    "education": ["podstawowe", "średnie", "wyższe"],
+    "location": ["Warszawa", "Kraków", "Wrocław", "Poznań", "Gdańsk", "Lublin", "wieś"],
+}
+
+_RATING_RE = re.compile(r"skali od\s*(-?\d+)\D*?do\s*(-?\d+)", re.IGNORECASE)
+_OPTIONS_RE = re.compile(r"Opcje:\s*\n((?:[ \t]*- .+\n?)+)")
+_TOTAL_PERSONAS_RE = re.compile(r'"total_personas"\s*:\s*(\d+)')
+
+# Wspólne losowanie latencji i błędów (per wywołanie, nie per prompt - powtórzony
+# request może się udać); ziarno z konfiguracji - przebiegi benchmarku powtarzalne
+_call_rng = random.Random(features.simulated_llm.seed)
+
+
+def estimate_tokens(text: str) -> int:
+    """Szacunek liczby tokenów (~4 znaki na token)."""
+    return max(1, math.ceil(len(text) / 4))
+
+
+def sample_latency_seconds(median_ms: float, p95_ms: float) -> float:
+    """Latencja z rozkładu log-normalnego o zadanej medianie i p95 (sekundy)."""
+    if median_ms <= 0:
+        return 0.0
+    sigma = math.log(p95_ms / median_ms) / 1.645 if p95_ms > median_ms else 0.0
+    return _call_rng.lognormvariate(math.log(median_ms), sigma) / 1000
+
+
+def _content_seed(*parts: Any) -> int:
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return int.from_bytes(hashlib.sha256(payload.encode("utf-8")).digest()[:8], "big")
+
+
+def _full_name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def _sentences(rng: random.Random, count: int) -> str:
+    return " ".join(rng.sample(SENTENCES, k=min(count, len(SENTENCES))))
+
+
+def _text_of_length(rng: random.Random, min_length: int, max_length: int | None) -> str:
+    text = _sentences(rng, rng.randint(1, 2))
+    while len(text) < min_length:
+        text = f"{text} {rng.choice(SENTENCES)}"
+    return text[:max_length].rstrip() if max_length else text
+
+
+def _string_value(schema: dict[str, Any], name: str, rng: random.Random) -> str:
+    min_length = schema.get("minLength", 0)
+    max_length = schema.get("maxLength")
+    if schema.get("format") == "date-time":
+        return "2025-01-15T12:00:00Z"
+    if schema.get("format") == "date":
+        return "2025-01-15"
+    if "cypher" in name:
+        return "MATCH (n) RETURN n LIMIT 5"
+    if name.endswith("name"):
+        value = _full_name(rng)
+    elif max_length is not None and max_length <= 60:
+        value = " ".join(rng.sample(WORDS, k=2))
+    else:
+        return _text_of_length(rng, min_length, max_length)
+    while len(value) < min_length:
+        value = f"{value} {rng.choice(WORDS)}"
+    return value[:max_length] if max_length else value
+
+
+def value_from_schema(
+    schema: dict[str, Any],
+    rng: random.Random,
+    *,
+    defs: dict[str, Any] | None = None,
+    name: str = "",
+) -> Any:
+    """
+    Wartość zgodna z JSON schema (podzbiór używany przez schematy Pydantic w repo).
+
+    Obsługuje ``$ref``/``$defs``, ``anyOf`` (pierwszy wariant nie-null), ``enum``,
+    ``const``, limity długości stringów, zakresy liczb, ``minItems``/``maxItems``.
+
+    Args:
+        schema: JSON schema (fragment)
+        rng: Generator losowy (deterministyczny per prompt)
+        defs: ``$defs`` schematu głównego
+        name: Nazwa pola (podpowiedź treści: imiona, zapytania Cypher)
+    """
+    defs = schema.get("$defs", defs or {})
+    if "$ref" in schema:
+        schema = defs[schema["$ref"].rsplit("/", 1)[-1]]
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            variants = [variant for variant in schema[key] if variant.get("type") != "null"]
+            return value_from_schema(variants[0], rng, defs=defs, name=name) if variants else None
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+
+    schema_type = schema.get("type", "object" if "properties" in schema else "string")
+    if isinstance(schema_type, list):
+        schema_type = next((item for item in schema_type if item != "null"), "null")
+
+    if schema_type == "object":
+        return {
+            key: value_from_schema(child, rng, defs=defs, name=key.lower())
+            for key, child in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        min_items = schema.get("minItems", 1)
+        max_items = schema.get("maxItems", max(min_items, 3))
+        count = rng.randint(min_items, max(min_items, min(max_items, min_items + 3)))
+        item_schema = schema.get("items", {"type": "string"})
+        if item_schema.get("type") == "string" and "maxLength" not in item_schema and count <= len(WORDS):
+            return rng.sample(WORDS, k=count)
+        return [value_from_schema(item_schema, rng, defs=defs, name=name) for _ in range(count)]
+    if schema_type == "integer":
+        low = schema["exclusiveMinimum"] + 1 if "exclusiveMinimum" in schema else schema.get("minimum", 1)
+        high = schema["exclusiveMaximum"] - 1 if "exclusiveMaximum" in schema else schema.get("maximum", 10)
+        return rng.randint(int(low), max(int(low), int(high)))
+    if schema_type == "number":
+        low = schema.get("minimum", schema.get("exclusiveMinimum", 0.0))
+        high = schema.get("maximum", schema.get("exclusiveMaximum", max(low, 0.0) + 1.0))
+        return round(rng.uniform(low, high), 2)
+    if schema_type == "boolean":
+        return rng.random() < 0.5
+    if schema_type == "null":
+        return None
+    return _string_value(schema, name, rng)
+
+
+def _choice_answer(prompt: str, rng: random.Random) -> str | None:
+    match = _OPTIONS_RE.search(prompt)
+    if not match:
+        return None
+    options = [line.strip()[2:].strip() for line in match.group(1).splitlines() if line.strip()]
+    if "oddzielone przecinkami" in prompt:
+        return ", ".join(rng.sample(options, k=rng.randint(1, min(3, len(options)))))
+    return rng.choice(options)
+
+
+def _allocation_plan(total: int, rng: random.Random) -> str:
+    group_count = max(1, min(total, rng.randint(2, 4)))
+    counts = [total // group_count] * group_count
+    for index in range(total % group_count):
+        counts[index] += 1
+    groups = [
+        {
+            "count": count,
+            "demographics": {key: rng.choice(values) for key, values in DEMOGRAPHIC_VALUES.items()},
+            "brief": _text_of_length(rng, 900, 1200),
+            "graph_insights": [],
+            "allocation_reasoning": _sentences(rng, 2),
+            "segment_characteristics": rng.sample(WORDS, k=4),
+        }
+        for count in counts
+    ]
+    plan = {"total_personas": total, "overall_context": _text_of_length(rng, 500, 800), "groups": groups}
+    return json.dumps(plan, ensure_ascii=False, indent=2)
+
+
+def _discussion_summary(rng: random.Random) -> str:
+    def bullets(count: int) -> str:
+        return "\n".join(f"- **{rng.choice(WORDS)}**: {rng.choice(SENTENCES)}" for _ in range(count))
+
+    return "\n\n".join([
+        f"## 1. EXECUTIVE SUMMARY\n{_sentences(rng, 4)}",
+        f"## 2. KEY INSIGHTS\n{bullets(rng.randint(3, 5))}",
+        f"## 3. SURPRISING FINDINGS\n{bullets(rng.randint(1, 2))}",
+        "## 4. SEGMENT ANALYSIS\n" + "\n".join(
+            f"**{age}**: {rng.choice(SENTENCES)}" for age in rng.sample(DEMOGRAPHIC_VALUES["age"], k=2)
+        ),
+        f"## 5. STRATEGIC RECOMMENDATIONS\n{bullets(3)}",
+        f"## 6. SENTIMENT NARRATIVE\n{_sentences(rng, 2)}",
+    ])
+
+
+def simulated_text(prompt: str, rng: random.Random) -> str:
+    """Odpowiedź tekstowa dopasowana do rodzaju promptu (patrz docstring modułu)."""
+    rating = _RATING_RE.search(prompt)
+    if rating:
+        low, high = sorted(int(value) for value in rating.groups())
+        return str(rng.randint(low, high))
+    choice = _choice_answer(prompt, rng)
+    if choice is not None:
+        return choice
+    total = _TOTAL_PERSONAS_RE.search(prompt)
+    if total:
+        return _allocation_plan(int(total.group(1)), rng)
+    if "executive summary" in prompt.lower():
+        return _discussion_summary(rng)
+    return _sentences(rng, rng.randint(2, 4))
+
+
+def _inject_failure(model: str) -> None:
+    config = features.simulated_llm
+    draw = _call_rng.random()
+    if draw < config.rate_limit_rate:
+        raise ResourceExhausted(f"429 Resource has been exhausted (simulated, model={model})")
+    if draw < config.rate_limit_rate + config.error_rate:
+        raise ServiceUnavailable(f"503 The service is currently unavailable (simulated, model={model})")
+
+
+class SimulatedChatModel(BaseChatModel):
+    """
+    Chat model bez sieci: deterministyczna treść, symulowana latencja i błędy.
+
+    Parametry jak w build_chat_model; ``max_retries`` nie jest stosowane -
+    wstrzyknięty błąd trafia do wywołującego (retry, router, hedge).
+    """
+
+    model_config = ConfigDict(extra="ignore")
+
+    model: str = "gemini-2.5-flash"
+    temperature: float = 0.7
+    max_tokens: int | None = None
+    top_p: float | None = None
+    top_k: int | None = None
+    timeout: float | None = None
+    max_retries: int = 3
+
+    @property
+    def _llm_type(self) -> str:
+        return "simulated"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"model": self.model, "temperature": self.temperature, "seed": features.simulated_llm.seed}
+
+    def with_structured_output(self, schema: Any, *, include_raw: bool = False, **kwargs: Any) -> Any:
+        """JSON schema w kwargs + parser Pydantic (jak json_mode w ChatGoogleGenerativeAI)."""
+        return json_schema_output(self, schema, include_raw=include_raw)
+
+    def _respond(self, messages: list[BaseMessage], response_schema: dict[str, Any] | None) -> ChatResult:
+        prompt = "\n\n".join(message.text() for message in messages)
+        rng = random.Random(_content_seed(features.simulated_llm.seed, self.model, prompt, response_schema))
+        if response_schema is not None:
+            content = json.dumps(value_from_schema(response_schema, rng), ensure_ascii=False)
+        else:
+            content = simulated_text(prompt, rng)
+        input_tokens = estimate_tokens(prompt)
+        output_tokens = estimate_tokens(content)
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+            response_metadata={"model_name": self.model, "finish_reason": "STOP"},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _latency(self) -> float:
+        config = features.simulated_llm
+        return sample_latency_seconds(config.latency_median_ms, config.latency_p95_ms)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._latency())
+        _inject_failure(self.model)
+        return self._respond(messages, kwargs.get("response_schema"))
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._latency())
+        _inject_failure(self.model)
+        return self._respond(messages, kwargs.get("response_schema"))
+
+
+class SimulatedEmbeddings(Embeddings):
+    """
+    Embeddingi bez sieci: znormalizowany wektor deterministyczny per (model, tekst).
+
+    Args:
+        model: Nazwa modelu (część ziarna - różne modele, różne przestrzenie)
+        dimensions: Wymiar wektorów (domyślnie ``features.simulated_llm.embedding_dimensions``)
+    """
+
+    def __init__(self, model: str, dimensions: int | None = None) -> None:
+        self.model = model
+        self.dimensions = dimensions or features.simulated_llm.embedding_dimensions
+
+    def _vector(self, text: str) -> list[float]:
+        rng = random.Random(_content_seed(features.simulated_llm.seed, self.model, text))
+        vector = [rng.gauss(0.0, 1.0) for _ in range(self.dimensions)]
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def _latency(self) -> float:
+        config = features.simulated_llm
+        return sample_latency_seconds(config.embedding_latency_median_ms, config.embedding_latency_p95_ms)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        time.sleep(self._latency())
+        _inject_failure(self.model)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        await asyncio.sleep(self._latency())
+        _inject_failure(self.model)
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_documents([text]))[0]
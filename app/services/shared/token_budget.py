@@ -0,0 +1,294 @@
+"""
+Token budget manager dla promptów LLM
+
+Prompty person (focus group, ankiety, generowanie z RAG) składają się z sekcji
+o bardzo różnej długości - pełna historia persony, kontekst RAG do
+``max_context_chars``, poprzednie interakcje. Moduł liczy tokeny lokalnie
+(bez wywołań API) i przycina każdą sekcję do budżetu skonfigurowanego per
+zadanie w ``config/features.yaml`` (sekcja ``prompt_budget``).
+
+Moduł dostarcza:
+- count_tokens() - lokalne liczenie tokenów (tiktoken jeśli dostępny, inaczej heurystyka)
+- truncate_to_tokens() - przycięcie tekstu do budżetu na granicy zdań
+- summarize_background() - ekstraktywne streszczenie historii (zapisywane jako Persona.background_summary)
+- PromptBudget - budżetowanie sekcji jednego promptu + raport zaoszczędzonych tokenów
+
+Użycie:
+    budget = PromptBudget("focus_group_response")
+    background = budget.fit(
+        "background",
+        persona.background_summary or persona.background_story,
+        original=persona.background_story,
+    )
+    ...
+    budget.log(persona_id=str(persona.id))
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+from config import features
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Heurystyka dla polskiego tekstu (Gemini/GPT tokenizery): ~3.5 znaku na token
+CHARS_PER_TOKEN = 3.5
+
+TRUNCATION_MARKER = " [...]"
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?…])\s+")
+
+
+@lru_cache(maxsize=1)
+def _get_encoding() -> Any:
+    """Załaduj encoding tiktoken (None jeśli niedostępny lub brak plików BPE offline)."""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as exc:  # pragma: no cover - brak sieci przy pierwszym pobraniu BPE
+        logger.warning("tiktoken encoding unavailable, using heuristic token count: %s", exc)
+        return None
+
+
+def count_tokens(text: str | None) -> int:
+    """
+    Policz tokeny tekstu lokalnie.
+
+    Używa tiktoken (cl100k_base) jeśli zainstalowany - dla modeli Gemini to
+    przybliżenie, ale stabilne i wystarczające do budżetowania. Bez tiktoken
+    stosuje heurystykę znaków na token.
+
+    Args:
+        text: Tekst do policzenia
+
+    Returns:
+        Liczba tokenów (0 dla pustego tekstu)
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _split_sentences(text: str) -> list[str]:
+    return [sentence for sentence in _SENTENCE_SPLIT.split(text.strip()) if sentence]
+
+
+def _cut_to_tokens(text: str, max_tokens: int) -> str:
+    """Przytnij tekst po znakach tak, aby mieścił się w max_tokens (szukanie binarne)."""
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    cut = text[:low]
+    # Nie tnij w połowie słowa jeśli jest sensowna spacja
+    space = cut.rfind(" ")
+    return cut[:space] if space > len(cut) // 2 else cut
+
+
+def truncate_to_tokens(text: str | None, max_tokens: int, marker: str = TRUNCATION_MARKER) -> str:
+    """
+    Przytnij tekst do budżetu tokenów, preferując granice zdań.
+
+    Args:
+        text: Tekst wejściowy
+        max_tokens: Maksymalna liczba tokenów wyniku (łącznie z markerem)
+        marker: Doklejany gdy tekst został obcięty
+
+    Returns:
+        Tekst mieszczący się w budżecie (bez zmian jeśli już się mieści)
+    """
+    if not text or max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    available = max(1, max_tokens - count_tokens(marker))
+    kept: list[str] = []
+    for sentence in _split_sentences(text):
+        candidate = " ".join([*kept, sentence])
+        if count_tokens(candidate) > available:
+            break
+        kept.append(sentence)
+
+    if kept:
+        return " ".join(kept) + marker
+    return _cut_to_tokens(text, available).rstrip() + marker
+
+
+def summarize_background(text: str | None, max_tokens: int | None = None) -> str | None:
+    """
+    Zbuduj krótkie ekstraktywne streszczenie historii persony.
+
+    Historia generowana jest w akapitach, z których każdy opisuje inny aspekt
+    życia (przeszłość, praca, relacje, wyzwania) - dlatego najpierw bierzemy
+    zdanie otwierające każdy akapit, a resztę budżetu wypełniamy kolejnymi
+    zdaniami. Zdania zachowują pierwotną kolejność. Bez wywołań LLM, więc
+    można liczyć przy zapisie persony.
+
+    Args:
+        text: Pełna background_story
+        max_tokens: Budżet streszczenia (domyślnie features.prompt_budget.summary_max_tokens)
+
+    Returns:
+        Streszczenie lub None dla pustej historii
+    """
+    if not text or not text.strip():
+        return None
+    if max_tokens is None:
+        max_tokens = features.prompt_budget.summary_max_tokens
+    if count_tokens(text) <= max_tokens:
+        return text.strip()
+
+    sentences: list[tuple[int, str]] = []
+    leads: list[int] = []
+    for paragraph in re.split(r"\n\s*\n", text.strip()):
+        paragraph_sentences = _split_sentences(paragraph)
+        if not paragraph_sentences:
+            continue
+        start = len(sentences)
+        leads.append(start)
+        sentences.extend((start + i, sentence) for i, sentence in enumerate(paragraph_sentences))
+
+    lead_set = set(leads)
+    priority = leads + [index for index, _ in sentences if index not in lead_set]
+    selected: set[int] = set()
+    used = 0
+    for index in priority:
+        cost = count_tokens(sentences[index][1]) + 1
+        if used + cost > max_tokens:
+            continue
+        selected.add(index)
+        used += cost
+
+    if not selected:
+        return truncate_to_tokens(text, max_tokens)
+    return " ".join(sentence for index, sentence in sentences if index in selected)
+
+
+@dataclass
+class SectionUsage:
+    """Zużycie tokenów jednej sekcji promptu (przed i po przycięciu)."""
+    name: str
+    budget: int
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+@dataclass
+class PromptBudget:
+    """
+    Budżet tokenów dla sekcji jednego promptu.
+
+    Budżety sekcji czytane są z ``features.prompt_budget.tasks[task]``; sekcje
+    bez budżetu (lub przy wyłączonym ``prompt_budget.enabled``) przechodzą bez
+    zmian, ale nadal są liczone w raporcie.
+
+    Attributes:
+        task: Nazwa zadania (np. "focus_group_response", "survey_response", "persona_generation")
+        sections: Zużycie tokenów per sekcja
+    """
+    task: str
+    sections: list[SectionUsage] = field(default_factory=list)
+
+    def budget_for(self, section: str) -> int | None:
+        """Budżet tokenów sekcji (None = bez limitu)."""
+        settings = features.prompt_budget
+        if not settings.enabled:
+            return None
+        return settings.tasks.get(self.task, {}).get(section)
+
+    def fit(
+        self,
+        section: str,
+        text: str | None,
+        *,
+        original: str | None = None,
+        marker: str = TRUNCATION_MARKER,
+    ) -> str:
+        """
+        Przytnij sekcję do jej budżetu i zapisz zużycie w raporcie.
+
+        Args:
+            section: Nazwa sekcji (klucz w konfiguracji zadania)
+            text: Treść sekcji
+            original: Pełna wersja sekcji, gdy ``text`` jest już skrótem
+                (np. background_summary zamiast background_story) - raport liczy
+                oszczędność względem niej
+            marker: Znacznik obcięcia
+
+        Returns:
+            Treść sekcji mieszcząca się w budżecie
+        """
+        text = text or ""
+        budget = self.budget_for(section)
+        fitted = truncate_to_tokens(text, budget, marker) if budget is not None else text
+        self.sections.append(
+            SectionUsage(
+                name=section,
+                budget=budget or 0,
+                tokens_before=count_tokens(original if original is not None else text),
+                tokens_after=count_tokens(fitted),
+            )
+        )
+        return fitted
+
+    @property
+    def tokens_before(self) -> int:
+        return sum(section.tokens_before for section in self.sections)
+
+    @property
+    def tokens_after(self) -> int:
+        return sum(section.tokens_after for section in self.sections)
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    def report(self) -> dict[str, Any]:
+        """Raport zużycia tokenów (do logów / metadanych odpowiedzi)."""
+        return {
+            "task": self.task,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "tokens_saved": self.tokens_saved,
+            "sections": {
+                section.name: {
+                    "budget": section.budget,
+                    "before": section.tokens_before,
+                    "after": section.tokens_after,
+                }
+                for section in self.sections
+            },
+        }
+
+    def log(self, **extra: Any) -> dict[str, Any]:
+        """Zaloguj raport jako structured log ``prompt_budget_applied`` i zwróć go."""
+        report = self.report()
+        logger.info(
+            "prompt_budget_applied",
+            extra={**extra, **{key: value for key, value in report.items() if key != "sections"}},
+        )
+        return report
@@ -15,15 +15,19 @@ import time
 from datetime import datetime, timezone
 from uuid import UUID
 
+from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 
 from app.models import Survey, Persona, SurveyResponse
 from app.db import AsyncSessionLocal
 from app.services.shared.clients import build_chat_model
+from app.services.shared.llm_batch import build_batch_chat_model, use_batch_mode
+from app.services.shared.token_budget import PromptBudget
 from app.types import (
     QuestionDict,
     AnswerValue,
 )
+from config import features
 from .response_formatter import SurveyResponseFormatter
 
 
@@ -41,8 +45,12 @@ class SurveyResponseGenerator:
     - Historii i tle persony
     """
 
-    def __init__(self):
-        """Inicjalizuj serwis z LangChain LLM"""
+    def __init__(self, llm: BaseChatModel | None = None):
+        """Inicjalizuj serwis z LangChain LLM
+
+        Args:
+            llm: Opcjonalny model zamiast build_chat_model (testy)
+        """
         # Lazy import to prevent crashes if config folder is missing during app startup
         from config import prompts, models
 
@@ -53,7 +61,11 @@ class SurveyResponseGenerator:
         model_config = self.models.get("surveys", "response")
 
         # Inicjalizujemy model Gemini w LangChain
-        self.llm = build_chat_model(**model_config.params)
+        self.model_params = model_config.params
+        self.llm = llm or build_chat_model(**model_config.params)
+
+        # Tryb batch: pytania persony wysyłane równolegle (jeden plik zadania na rundę)
+        self.batch_mode = False
 
         # Inicjalizujemy formatter dla analityki
         self.formatter = SurveyResponseFormatter()
@@ -99,6 +111,16 @@ class SurveyResponseGenerator:
             if len(personas) == 0:
                 raise ValueError("Project has no personas. Generate personas first.")
 
+            # Duże ankiety: tryb offline (batch) - koszt i quota zamiast latencji
+            request_count = len(personas) * len(survey.questions)
+            if use_batch_mode(request_count, features.llm_batch.survey_min_requests):
+                self.llm = build_batch_chat_model(self.model_params, job_name=f"survey-{survey_id}")
+                self.batch_mode = True
+                logger.info(
+                    "survey_batch_mode",
+                    extra={"survey_id": str(survey_id), "requests": request_count},
+                )
+
             # Generujemy odpowiedzi równolegle dla wszystkich person
             logger.info(f"🔄 Generating responses for {len(personas)} personas...")
             response_times = []
@@ -181,9 +203,16 @@ class SurveyResponseGenerator:
         # Generujemy odpowiedzi dla wszystkich pytań ankiety
         answers = {}
 
-        for question in questions:
-            answer = await self._generate_answer_for_question(persona, question)
-            answers[question["id"]] = answer
+        if self.batch_mode:
+            # Batch: wszystkie pytania trafiają do tego samego pliku zadania
+            batch_answers = await asyncio.gather(
+                *(self._generate_answer_for_question(persona, question) for question in questions)
+            )
+            answers = {question["id"]: answer for question, answer in zip(questions, batch_answers)}
+        else:
+            for question in questions:
+                answer = await self._generate_answer_for_question(persona, question)
+                answers[question["id"]] = answer
 
         # Zapisujemy odpowiedzi ankietowe w bazie danych
         async with AsyncSessionLocal() as session:
@@ -336,12 +365,14 @@ class SurveyResponseGenerator:
 
         big_five_str = " | ".join(big_five_scores) if big_five_scores else "N/A"
 
-        # Background (skrócony do 400 znaków dla optymalizacji tokenów)
-        background_short = (
-            persona.background_story[:400] + "..."
-            if persona.background_story and len(persona.background_story) > 400
-            else persona.background_story or "N/A"
-        )
+        # Background (streszczenie zapisane na personie, przycięte do budżetu tokenów)
+        prompt_budget = PromptBudget("survey_response")
+        background_short = prompt_budget.fit(
+            "background",
+            persona.background_summary or persona.background_story,
+            original=persona.background_story,
+        ) or "N/A"
+        prompt_budget.log(persona_id=str(persona.id))
 
         return f"""
 === DEMOGRAFIA ===
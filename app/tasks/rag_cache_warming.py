@@ -0,0 +1,227 @@
+"""
+RAG Cache Warming Job - Scheduled Background Task
+
+Precompute kontekstów demograficznych RAG (``get_demographic_insights``) dla
+najczęstszych komórek demograficznych, żeby pierwszy projekt po ingeście nie
+płacił 10-60s Graph RAG + hybrid search za każdą komórkę.
+
+Komórki = iloczyn wartości z config/demographics (wiek × wykształcenie ×
+lokalizacja × płeć), ranking po iloczynie wag - te same wartości i wagi
+losuje ``sample_demographic_profile`` przy generacji person.
+
+Uruchamiany przez APScheduler:
+- co noc (``rag_cache_warming.nightly_hour``/``nightly_minute`` UTC)
+- jednorazowo po zakończonym ingeście dokumentu (odroczony, kilka uploadów = jeden przebieg)
+
+Raport (pokrycie + aktualność) zapisywany w Redis: ``get_warming_report()``.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+from app.core.redis import redis_get_json, redis_set_json
+from app.services.rag.caching import get_index_version
+from config import demographics, features
+
+logger = logging.getLogger(__name__)
+
+WARMING_REPORT_KEY = "rag:cache_warming:report"
+
+CELL_CACHED = "cached"      # kontekst był już w cache dla bieżącej wersji indeksu
+CELL_WARMED = "warmed"      # policzony i zapisany w cache w tym przebiegu
+CELL_PARTIAL = "partial"    # policzony, ale wynik częściowy (etap po timeout) - nie trafił do cache
+CELL_FAILED = "failed"
+
+_warming_lock = asyncio.Lock()
+
+
+@dataclass(frozen=True)
+class DemographicCell:
+    """Komórka demograficzna (parametry ``get_demographic_insights``) z wagą populacji."""
+
+    age_group: str
+    education: str
+    location: str
+    gender: str
+    weight: float
+
+
+def _demographic_dimensions(demographics_config: Any = None) -> list[dict[str, float]]:
+    demographics_config = demographics_config or demographics
+    return [
+        demographics_config.common.age_groups,
+        demographics_config.poland.education_levels,
+        demographics_config.poland.locations,
+        demographics_config.common.genders,
+    ]
+
+
+def top_demographic_cells(limit: int, demographics_config: Any = None) -> list[DemographicCell]:
+    """Najczęstsze komórki demograficzne (malejąco po iloczynie wag)."""
+    dimensions = _demographic_dimensions(demographics_config)
+    cells = (
+        DemographicCell(age_group, education, location, gender, age_w * edu_w * loc_w * gen_w)
+        for (age_group, age_w), (education, edu_w), (location, loc_w), (gender, gen_w) in itertools.product(
+            *(dimension.items() for dimension in dimensions)
+        )
+    )
+    return heapq.nlargest(limit, cells, key=lambda cell: cell.weight)
+
+
+async def _warm_cell(rag_service: Any, cell: DemographicCell, semaphore: asyncio.Semaphore) -> dict[str, Any]:
+    params = {
+        "age_group": cell.age_group,
+        "education": cell.education,
+        "location": cell.location,
+        "gender": cell.gender,
+    }
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            if await rag_service.is_demographic_insights_cached(**params):
+                status = CELL_CACHED
+            else:
+                await rag_service.get_demographic_insights(**params)
+                cached = await rag_service.is_demographic_insights_cached(**params)
+                status = CELL_WARMED if cached else CELL_PARTIAL
+            error = None
+        except Exception as exc:
+            status = CELL_FAILED
+            error = str(exc)[:200]
+        duration_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    cell_report = {**params, "weight": round(cell.weight, 6), "status": status, "duration_ms": duration_ms}
+    if error:
+        cell_report["error"] = error
+    return cell_report
+
+
+def build_warming_report(
+    cells: list[dict[str, Any]],
+    *,
+    trigger: str,
+    index_version: int,
+    started_at: datetime,
+    duration_ms: float,
+    total_weight: float,
+) -> dict[str, Any]:
+    """Raport przebiegu: pokrycie komórek i masy populacji, statusy per komórka."""
+    warm = [cell for cell in cells if cell["status"] in (CELL_CACHED, CELL_WARMED)]
+    counts = {status: 0 for status in (CELL_CACHED, CELL_WARMED, CELL_PARTIAL, CELL_FAILED)}
+    for cell in cells:
+        counts[cell["status"]] += 1
+
+    return {
+        "trigger": trigger,
+        "index_version": index_version,
+        "started_at": started_at.isoformat(),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": duration_ms,
+        "target_cells": len(cells),
+        "warm_cells": len(warm),
+        "status_counts": counts,
+        # Udział rozgrzanych komórek w celu i w masie populacji (wszystkie kombinacje)
+        "coverage": round(len(warm) / len(cells), 4) if cells else 0.0,
+        "population_coverage": round(sum(cell["weight"] for cell in warm) / total_weight, 4) if total_weight else 0.0,
+        "cells": cells,
+    }
+
+
+async def run_rag_cache_warming_job(trigger: str = "nightly", rag_service: Any = None) -> dict[str, Any] | None:
+    """
+    Scheduled cache warming job - co noc i po ingeście dokumentu.
+
+    Rozgrzewa ``features.rag_cache_warming.max_combinations`` najczęstszych komórek,
+    najwyżej ``concurrency`` naraz. Komórki już obecne w cache dla bieżącej wersji
+    indeksu nie są liczone ponownie (po ingeście wersja się zmienia, więc wszystkie).
+
+    Args:
+        trigger: Źródło przebiegu ("nightly" | "ingest")
+        rag_service: PolishSocietyRAG (domyślnie singleton)
+
+    Returns:
+        Raport przebiegu lub None (wyłączone / przebieg już trwa)
+    """
+    config = features.rag_cache_warming
+    if not config.enabled:
+        return None
+    if _warming_lock.locked():
+        logger.info("⏭️  RAG cache warming already running, skipping (%s)", trigger)
+        return None
+
+    async with _warming_lock:
+        logger.info("⏰ RAG cache warming started (%s)", trigger)
+        if rag_service is None:
+            from app.services.shared.rag_provider import get_polish_society_rag
+
+            rag_service = get_polish_society_rag()
+
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        index_version = await get_index_version()
+        cells = top_demographic_cells(config.max_combinations)
+        semaphore = asyncio.Semaphore(max(1, config.concurrency))
+
+        cell_reports = await asyncio.gather(*(_warm_cell(rag_service, cell, semaphore) for cell in cells))
+
+        report = build_warming_report(
+            list(cell_reports),
+            trigger=trigger,
+            index_version=index_version,
+            started_at=started_at,
+            duration_ms=round((time.perf_counter() - start) * 1000, 1),
+            total_weight=math.prod(sum(dimension.values()) for dimension in _demographic_dimensions()),
+        )
+        await redis_set_json(WARMING_REPORT_KEY, report)
+
+        logger.info(
+            "rag_cache_warming_completed",
+            extra={
+                "job": "rag_cache_warming",
+                "trigger": trigger,
+                "index_version": index_version,
+                "target_cells": report["target_cells"],
+                "status_counts": report["status_counts"],
+                "coverage": report["coverage"],
+                "population_coverage": report["population_coverage"],
+                "duration_ms": report["duration_ms"],
+            },
+        )
+        return report
+
+
+async def get_warming_report() -> dict[str, Any] | None:
+    """Ostatni raport rozgrzewania z oceną aktualności (None = jeszcze nie uruchomiony).
+
+    Raport jest nieaktualny, gdy od przebiegu zmieniła się wersja indeksu RAG
+    (ingest/usunięcie dokumentu - rozgrzane wpisy przestały być adresowane)
+    albo minęło ``stale_after_hours``.
+    """
+    report = await redis_get_json(WARMING_REPORT_KEY)
+    if not isinstance(report, dict):
+        return None
+
+    current_version = await get_index_version()
+    finished_at = datetime.fromisoformat(report["finished_at"])
+    age_hours = (datetime.now(timezone.utc) - finished_at).total_seconds() / 3600
+
+    stale_reason = None
+    if report.get("index_version") != current_version:
+        stale_reason = "index_version_changed"
+    elif age_hours > features.rag_cache_warming.stale_after_hours:
+        stale_reason = "age"
+
+    return {
+        **report,
+        "current_index_version": current_version,
+        "age_hours": round(age_hours, 2),
+        "stale": stale_reason is not None,
+        "stale_reason": stale_reason,
+    }
@@ -37,6 +37,7 @@ Główne API:
 from config.loader import (
     ConfigLoader,
     ModelConfig,
+    ModelRateLimits,
     ModelRegistry,
     Prompt,
     PromptRegistry,
@@ -68,6 +69,15 @@ from config.features_loader import (
     SegmentCacheFeatures,
     OrchestrationFeatures,
     PerformanceConfig,
+    PromptBudgetFeatures,
+    EmbeddingCacheFeatures,
+    RagCacheFeatures,
+    RagCacheWarmingFeatures,
+    LLMCacheFeatures,
+    LLMRateLimitFeatures,
+    LLMRouterFeatures,
+    LLMBatchFeatures,
+    SimulatedLLMFeatures,
     get_features_config,
     features,
 )
@@ -98,6 +108,7 @@ __all__ = [
     "prompts",
     # Models
     "ModelConfig",
+    "ModelRateLimits",
     "ModelRegistry",
     "get_model_registry",
     "models",
@@ -118,6 +129,15 @@ __all__ = [
     "SegmentCacheFeatures",
     "OrchestrationFeatures",
     "PerformanceConfig",
+    "PromptBudgetFeatures",
+    "EmbeddingCacheFeatures",
+    "RagCacheFeatures",
+    "RagCacheWarmingFeatures",
+    "LLMCacheFeatures",
+    "LLMRateLimitFeatures",
+    "LLMRouterFeatures",
+    "LLMBatchFeatures",
+    "SimulatedLLMFeatures",
     "get_features_config",
     "features",
     # App
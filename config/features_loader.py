@@ -7,6 +7,15 @@ Ten moduł dostarcza:
 - OrchestrationFeatures: Feature flags dla persona orchestration
 - StudyDesignerFeatures: Feature flags dla Study Designer
 - PerformanceConfig: Progi wydajnościowe i timeouty
+- PromptBudgetFeatures: Budżety tokenów sekcji promptów per zadanie
+- EmbeddingCacheFeatures: Cache embeddingów (LRU w procesie + Redis)
+- RagCacheFeatures: Dwupoziomowy cache RAG (hybrid search, kontekst grafowy)
+- RagCacheWarmingFeatures: Rozgrzewanie cache kontekstów demograficznych RAG
+- LLMCacheFeatures: Cache odpowiedzi chat modeli (Redis / SQLite)
+- LLMRateLimitFeatures: Globalny limiter RPM/TPM per model (token bucket w Redis)
+- LLMRouterFeatures: Statystyki latencji providerów i hedged requests w LLMRouter
+- LLMBatchFeatures: Tryb offline (batch) dla dużych zadań generacji
+- SimulatedLLMFeatures: Symulowany provider LLM (testy obciążeniowe, benchmarki offline)
 - FeaturesConfig: Singleton łączący wszystkie feature flags
 
 Użycie:
@@ -26,10 +35,14 @@ Użycie:
 
     # Performance
     max_time = features.performance.max_response_time_per_persona
+
+    # Prompt budget
+    background_budget = features.prompt_budget.tasks["focus_group_response"]["background"]
 """
 
 import logging
-from dataclasses import dataclass
+import os
+from dataclasses import dataclass, field
 
 from config.loader import ConfigLoader
 
@@ -129,6 +142,211 @@ class PerformanceConfig:
     random_seed: int | None = 42
 
 
+@dataclass
+class PromptBudgetFeatures:
+    """
+    Budżety tokenów dla sekcji promptów (app/services/shared/token_budget.py).
+
+    Attributes:
+        enabled: Włącz przycinanie sekcji do budżetów (False = tylko pomiar)
+        summary_max_tokens: Budżet streszczenia background_story zapisywanego na personie
+        tasks: Mapa zadanie → {sekcja: max_tokens}
+    """
+    enabled: bool = True
+    summary_max_tokens: int = 120
+    tasks: dict[str, dict[str, int]] = field(default_factory=dict)
+
+
+@dataclass
+class EmbeddingCacheFeatures:
+    """
+    Cache embeddingów zapytań/dokumentów (app/services/shared/embedding_cache.py).
+
+    Attributes:
+        enabled: Włącz cache wokół get_embeddings()
+        lru_max_entries: Pojemność LRU w procesie (wektory jako packed float32)
+        ttl_days: TTL wpisów w Redis (dni)
+    """
+    enabled: bool = True
+    lru_max_entries: int = 2048
+    ttl_days: int = 30
+
+
+@dataclass
+class RagCacheFeatures:
+    """
+    Dwupoziomowy cache RAG (app/services/rag/caching/tiered_cache.py).
+
+    Attributes:
+        enabled: Włącz cache hybrid search i kontekstu grafowego
+        lru_max_entries: Pojemność LRU w procesie (per namespace)
+        lru_ttl_seconds: TTL wpisu w LRU w procesie
+        redis_ttl_days: TTL wpisu w Redis (dni)
+        version_refresh_seconds: Jak często odczytywać wersję indeksu z Redis
+        single_flight_lock_seconds: TTL Redis locka coalescingu między instancjami (0 = tylko w procesie)
+        cypher_failure_ttl_seconds: TTL negatywnego wpisu cache Cypher Graph RAG (zapytanie zakończone błędem)
+    """
+    enabled: bool = True
+    lru_max_entries: int = 512
+    lru_ttl_seconds: int = 600
+    redis_ttl_days: int = 7
+    version_refresh_seconds: float = 5.0
+    single_flight_lock_seconds: int = 30
+    cypher_failure_ttl_seconds: int = 900
+
+
+@dataclass
+class RagCacheWarmingFeatures:
+    """
+    Rozgrzewanie cache kontekstów demograficznych RAG (app/tasks/rag_cache_warming.py).
+
+    Attributes:
+        enabled: Włącz nocny przebieg i przebieg po ingeście
+        max_combinations: Ile najczęstszych komórek demograficznych rozgrzewać
+        concurrency: Ile komórek liczonych równocześnie
+        nightly_hour: Godzina nocnego przebiegu (UTC)
+        nightly_minute: Minuta nocnego przebiegu (UTC)
+        after_ingest: Uruchamiaj przebieg po zakończonym ingeście dokumentu
+        ingest_delay_seconds: Odroczenie przebiegu po ingeście (łączy kolejne uploady)
+        stale_after_hours: Wiek raportu, po którym uznawany jest za nieaktualny
+    """
+    enabled: bool = True
+    max_combinations: int = 100
+    concurrency: int = 2
+    nightly_hour: int = 3
+    nightly_minute: int = 30
+    after_ingest: bool = True
+    ingest_delay_seconds: int = 60
+    stale_after_hours: float = 24.0
+
+
+@dataclass
+class LLMCacheFeatures:
+    """
+    Cache odpowiedzi chat modeli z build_chat_model (app/services/shared/llm_cache.py).
+
+    Attributes:
+        enabled: Włącz cache (False = żaden model nie dostaje cache)
+        backend: ``redis`` (współdzielony) albo ``sqlite`` (lokalny plik, dev)
+        sqlite_path: Ścieżka pliku SQLite dla backendu ``sqlite``
+        ttl_hours: TTL wpisów
+        max_temperature: Wywołania z temperaturą <= progu cache'owane domyślnie
+            (wyżej tylko gdy call site włączy ``response_cache=True``)
+    """
+    enabled: bool = True
+    backend: str = "redis"
+    sqlite_path: str = "data/llm_cache.sqlite3"
+    ttl_hours: int = 168
+    max_temperature: float = 0.0
+
+
+@dataclass
+class LLMRateLimitFeatures:
+    """
+    Globalny limiter RPM/TPM per model (app/services/shared/rate_limiter.py).
+
+    Limity per model: ``rpm`` / ``tpm`` w config/models.yaml (providers.*.models.*).
+
+    Attributes:
+        enabled: Włącz limiter (modele bez limitów w models.yaml nie są limitowane)
+        estimated_tokens_per_request: Szacunek tokenów pobierany przed wywołaniem
+            (korygowany o faktyczne usage po odpowiedzi)
+        batch_reserve_fraction: Część pojemności kubełków zostawiana dla wywołań interaktywnych
+        max_wait_seconds: Po tylu sekundach czekania wywołanie idzie mimo limitu (log warning)
+        min_poll_ms: Minimalny odstęp między próbami pobrania z kubełka
+        redis_backoff_seconds: Po błędzie Redis limiter przepuszcza wywołania przez tyle sekund
+    """
+    enabled: bool = True
+    estimated_tokens_per_request: int = 2000
+    batch_reserve_fraction: float = 0.2
+    max_wait_seconds: float = 60.0
+    min_poll_ms: int = 50
+    redis_backoff_seconds: float = 30.0
+
+
+@dataclass
+class LLMRouterFeatures:
+    """
+    Statystyki providerów i hedged requests w LLMRouter (app/services/shared/llm_router.py).
+
+    Attributes:
+        latency_window: Rozmiar rolling okna (ostatnie N wywołań per provider)
+        min_samples: Minimalna liczba wywołań w oknie, od której używamy p95 / error rate
+        max_error_rate: Provider z wyższym error rate jest pomijany (degraded)
+        degraded_cooldown_seconds: Jak długo provider degraded jest pomijany
+        hedging_enabled: Włącz hedged requests dla get_chat_model(..., hedge=True)
+        hedge_budget_fraction: Maksymalna część wywołań z hedgem (w oknie latency_window)
+        min_hedge_delay_seconds: Dolne ograniczenie opóźnienia hedge (p95 primary)
+    """
+    latency_window: int = 200
+    min_samples: int = 20
+    max_error_rate: float = 0.5
+    degraded_cooldown_seconds: float = 60.0
+    hedging_enabled: bool = True
+    hedge_budget_fraction: float = 0.05
+    min_hedge_delay_seconds: float = 2.0
+
+
+@dataclass
+class LLMBatchFeatures:
+    """
+    Tryb offline (batch) dużych zadań generacji (app/services/shared/llm_batch.py).
+
+    Attributes:
+        enabled: Włącz tryb batch (False = zawsze online)
+        provider: Provider batch (``local`` - stand-in wykonujący requesty w procesie)
+        work_dir: Katalog plików requestów / wyników
+        persona_min_count: Generacja person w trybie batch od tylu person
+        survey_min_requests: Ankieta w trybie batch od tylu requestów (persony x pytania)
+        collect_window_seconds: Plik requestów wysyłany po tylu sekundach bez nowych requestów
+        max_requests_per_job: Maksymalna liczba requestów w jednym pliku
+        poll_interval_seconds: Odstęp pollingu statusu zadania
+        timeout_hours: Maksymalny czas oczekiwania na zadanie
+        local_concurrency: Równoległe wywołania modelu w providerze ``local``
+    """
+    enabled: bool = False
+    provider: str = "local"
+    work_dir: str = "data/llm_batches"
+    persona_min_count: int = 500
+    survey_min_requests: int = 2000
+    collect_window_seconds: float = 2.0
+    max_requests_per_job: int = 10000
+    poll_interval_seconds: float = 5.0
+    timeout_hours: float = 24.0
+    local_concurrency: int = 8
+
+
+@dataclass
+class SimulatedLLMFeatures:
+    """
+    Symulowany provider LLM (app/services/shared/simulated_llm.py).
+
+    Deterministyczne odpowiedzi zgodne ze schematami, bez sieci i API key -
+    do testów obciążeniowych i benchmarków pipeline'ów end-to-end.
+
+    Attributes:
+        enabled: Domyślny provider build_chat_model / get_embeddings = simulated
+            (nadpisywane zmienną środowiskową ``SIMULATED_LLM``)
+        seed: Ziarno losowania treści, latencji i błędów
+        latency_median_ms: Mediana latencji chat modelu (rozkład log-normalny)
+        latency_p95_ms: p95 latencji chat modelu
+        embedding_latency_median_ms: Mediana latencji embeddingów
+        embedding_latency_p95_ms: p95 latencji embeddingów
+        error_rate: Odsetek wywołań kończonych błędem 503
+        rate_limit_rate: Odsetek wywołań kończonych błędem 429
+        embedding_dimensions: Wymiar wektorów embeddingów
+    """
+    enabled: bool = False
+    seed: int = 42
+    latency_median_ms: float = 800.0
+    latency_p95_ms: float = 2500.0
+    embedding_latency_median_ms: float = 50.0
+    embedding_latency_p95_ms: float = 150.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    embedding_dimensions: int = 768
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # FEATURES CONFIG
 # ═══════════════════════════════════════════════════════════════════════════
@@ -156,6 +374,15 @@ class FeaturesConfig:
         self.orchestration = self._load_orchestration()
         self.study_designer = self._load_study_designer()
         self.performance = self._load_performance()
+        self.prompt_budget = self._load_prompt_budget()
+        self.embedding_cache = self._load_embedding_cache()
+        self.rag_cache = self._load_rag_cache()
+        self.rag_cache_warming = self._load_rag_cache_warming()
+        self.llm_cache = self._load_llm_cache()
+        self.llm_rate_limit = self._load_llm_rate_limit()
+        self.llm_router = self._load_llm_router()
+        self.llm_batch = self._load_llm_batch()
+        self.simulated_llm = self._load_simulated_llm()
 
     def _load_rag(self) -> RagFeatures:
         """
@@ -232,6 +459,181 @@ class FeaturesConfig:
             random_seed=perf_config.get("random_seed", 42),
         )
 
+    def _load_prompt_budget(self) -> PromptBudgetFeatures:
+        """
+        Ładuje budżety tokenów promptów.
+
+        Returns:
+            PromptBudgetFeatures object z defaultami
+        """
+        budget_config = self.config.get("prompt_budget", {})
+
+        return PromptBudgetFeatures(
+            enabled=budget_config.get("enabled", True),
+            summary_max_tokens=budget_config.get("summary_max_tokens", 120),
+            tasks={
+                task: {section: int(tokens) for section, tokens in (sections or {}).items()}
+                for task, sections in (budget_config.get("tasks") or {}).items()
+            },
+        )
+
+    def _load_embedding_cache(self) -> EmbeddingCacheFeatures:
+        """
+        Ładuje konfigurację cache embeddingów.
+
+        Returns:
+            EmbeddingCacheFeatures object z defaultami
+        """
+        cache_config = self.config.get("embedding_cache", {})
+
+        return EmbeddingCacheFeatures(
+            enabled=cache_config.get("enabled", True),
+            lru_max_entries=cache_config.get("lru_max_entries", 2048),
+            ttl_days=cache_config.get("ttl_days", 30),
+        )
+
+    def _load_rag_cache(self) -> RagCacheFeatures:
+        """
+        Ładuje konfigurację dwupoziomowego cache RAG.
+
+        Returns:
+            RagCacheFeatures object z defaultami
+        """
+        cache_config = self.config.get("rag_cache", {})
+
+        return RagCacheFeatures(
+            enabled=cache_config.get("enabled", True),
+            lru_max_entries=cache_config.get("lru_max_entries", 512),
+            lru_ttl_seconds=cache_config.get("lru_ttl_seconds", 600),
+            redis_ttl_days=cache_config.get("redis_ttl_days", 7),
+            version_refresh_seconds=cache_config.get("version_refresh_seconds", 5.0),
+            single_flight_lock_seconds=cache_config.get("single_flight_lock_seconds", 30),
+            cypher_failure_ttl_seconds=cache_config.get("cypher_failure_ttl_seconds", 900),
+        )
+
+    def _load_rag_cache_warming(self) -> RagCacheWarmingFeatures:
+        """
+        Ładuje konfigurację rozgrzewania cache kontekstów demograficznych.
+
+        Returns:
+            RagCacheWarmingFeatures object z defaultami
+        """
+        warming_config = self.config.get("rag_cache_warming", {})
+
+        return RagCacheWarmingFeatures(
+            enabled=warming_config.get("enabled", True),
+            max_combinations=warming_config.get("max_combinations", 100),
+            concurrency=warming_config.get("concurrency", 2),
+            nightly_hour=warming_config.get("nightly_hour", 3),
+            nightly_minute=warming_config.get("nightly_minute", 30),
+            after_ingest=warming_config.get("after_ingest", True),
+            ingest_delay_seconds=warming_config.get("ingest_delay_seconds", 60),
+            stale_after_hours=warming_config.get("stale_after_hours", 24.0),
+        )
+
+    def _load_llm_cache(self) -> LLMCacheFeatures:
+        """
+        Ładuje konfigurację cache odpowiedzi chat modeli.
+
+        Returns:
+            LLMCacheFeatures object z defaultami
+        """
+        cache_config = self.config.get("llm_cache", {})
+
+        return LLMCacheFeatures(
+            enabled=cache_config.get("enabled", True),
+            backend=cache_config.get("backend", "redis"),
+            sqlite_path=cache_config.get("sqlite_path", "data/llm_cache.sqlite3"),
+            ttl_hours=cache_config.get("ttl_hours", 168),
+            max_temperature=cache_config.get("max_temperature", 0.0),
+        )
+
+    def _load_llm_rate_limit(self) -> LLMRateLimitFeatures:
+        """
+        Ładuje konfigurację globalnego limitera RPM/TPM.
+
+        Returns:
+            LLMRateLimitFeatures object z defaultami
+        """
+        limit_config = self.config.get("llm_rate_limit", {})
+
+        return LLMRateLimitFeatures(
+            enabled=limit_config.get("enabled", True),
+            estimated_tokens_per_request=limit_config.get("estimated_tokens_per_request", 2000),
+            batch_reserve_fraction=limit_config.get("batch_reserve_fraction", 0.2),
+            max_wait_seconds=limit_config.get("max_wait_seconds", 60.0),
+            min_poll_ms=limit_config.get("min_poll_ms", 50),
+            redis_backoff_seconds=limit_config.get("redis_backoff_seconds", 30.0),
+        )
+
+    def _load_llm_router(self) -> LLMRouterFeatures:
+        """
+        Ładuje konfigurację statystyk providerów i hedged requests LLMRouter.
+
+        Returns:
+            LLMRouterFeatures object z defaultami
+        """
+        router_config = self.config.get("llm_router", {})
+
+        return LLMRouterFeatures(
+            latency_window=router_config.get("latency_window", 200),
+            min_samples=router_config.get("min_samples", 20),
+            max_error_rate=router_config.get("max_error_rate", 0.5),
+            degraded_cooldown_seconds=router_config.get("degraded_cooldown_seconds", 60.0),
+            hedging_enabled=router_config.get("hedging_enabled", True),
+            hedge_budget_fraction=router_config.get("hedge_budget_fraction", 0.05),
+            min_hedge_delay_seconds=router_config.get("min_hedge_delay_seconds", 2.0),
+        )
+
+    def _load_llm_batch(self) -> LLMBatchFeatures:
+        """
+        Ładuje konfigurację trybu batch dużych zadań generacji.
+
+        Returns:
+            LLMBatchFeatures object z defaultami
+        """
+        batch_config = self.config.get("llm_batch", {})
+
+        return LLMBatchFeatures(
+            enabled=batch_config.get("enabled", False),
+            provider=batch_config.get("provider", "local"),
+            work_dir=batch_config.get("work_dir", "data/llm_batches"),
+            persona_min_count=batch_config.get("persona_min_count", 500),
+            survey_min_requests=batch_config.get("survey_min_requests", 2000),
+            collect_window_seconds=batch_config.get("collect_window_seconds", 2.0),
+            max_requests_per_job=batch_config.get("max_requests_per_job", 10000),
+            poll_interval_seconds=batch_config.get("poll_interval_seconds", 5.0),
+            timeout_hours=batch_config.get("timeout_hours", 24.0),
+            local_concurrency=batch_config.get("local_concurrency", 8),
+        )
+
+    def _load_simulated_llm(self) -> SimulatedLLMFeatures:
+        """
+        Ładuje konfigurację symulowanego providera LLM.
+
+        Zmienna środowiskowa ``SIMULATED_LLM`` (true/false) nadpisuje ``enabled``.
+
+        Returns:
+            SimulatedLLMFeatures object z defaultami
+        """
+        simulated_config = self.config.get("simulated_llm", {})
+        enabled = simulated_config.get("enabled", False)
+        env_enabled = os.getenv("SIMULATED_LLM")
+        if env_enabled is not None:
+            enabled = env_enabled.strip().lower() in ("1", "true", "yes", "on")
+
+        return SimulatedLLMFeatures(
+            enabled=enabled,
+            seed=simulated_config.get("seed", 42),
+            latency_median_ms=simulated_config.get("latency_median_ms", 800.0),
+            latency_p95_ms=simulated_config.get("latency_p95_ms", 2500.0),
+            embedding_latency_median_ms=simulated_config.get("embedding_latency_median_ms", 50.0),
+            embedding_latency_p95_ms=simulated_config.get("embedding_latency_p95_ms", 150.0),
+            error_rate=simulated_config.get("error_rate", 0.0),
+            rate_limit_rate=simulated_config.get("rate_limit_rate", 0.0),
+            embedding_dimensions=simulated_config.get("embedding_dimensions", 768),
+        )
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 # GLOBAL SINGLETON
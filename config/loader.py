@@ -443,6 +443,21 @@ class ModelConfig:
         return params
 
 
+@dataclass
+class ModelRateLimits:
+    """
+    Limity projektu dla modelu (providers.*.models.* w models.yaml).
+
+    Attributes:
+        rpm: Requests per minute (None = bez limitu)
+        tpm: Tokens per minute (None = bez limitu)
+        estimated_tokens_per_request: Szacunek tokenów wywołania (None = default z features)
+    """
+    rpm: int | None = None
+    tpm: int | None = None
+    estimated_tokens_per_request: int | None = None
+
+
 class ModelRegistry:
     """
     Registry modeli z fallback chain.
@@ -533,6 +548,31 @@ class ModelRegistry:
         """Get global default model config."""
         return self._build_model_config(self.config["defaults"]["chat"])
 
+    def get_rate_limits(self, model_name: str) -> ModelRateLimits | None:
+        """
+        Limity RPM/TPM modelu z sekcji providers (po nazwie modelu).
+
+        Args:
+            model_name: Nazwa modelu (e.g., "gemini-2.5-flash")
+
+        Returns:
+            ModelRateLimits albo None, jeśli model nie ma limitów
+        """
+        for provider_config in self.config.get("providers", {}).values():
+            if not isinstance(provider_config, dict):
+                continue
+            for model_config in provider_config.get("models", {}).values():
+                if model_config.get("name") != model_name:
+                    continue
+                if not model_config.get("rpm") and not model_config.get("tpm"):
+                    return None
+                return ModelRateLimits(
+                    rpm=model_config.get("rpm"),
+                    tpm=model_config.get("tpm"),
+                    estimated_tokens_per_request=model_config.get("estimated_tokens_per_request"),
+                )
+        return None
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # RAG CONFIG
@@ -546,6 +586,27 @@ class ChunkingConfig:
     chunk_overlap: int = 300
 
 
+@dataclass
+class IngestConfig:
+    """Staged document ingest configuration."""
+    graph_concurrency: int = 4
+    graph_batch_size: int = 8
+    vector_batch_size: int = 64
+    delete_batch_size: int = 1000
+
+
+@dataclass
+class LocalIndexConfig:
+    """Local in-process ANN mirror of RAGChunk embeddings."""
+    enabled: bool = False
+    backend: str = "auto"  # auto | hnsw | numpy
+    snapshot_dir: str = "/tmp/sight_rag_local_index"
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 200
+    hnsw_ef_search: int = 64
+    build_page_size: int = 1000
+
+
 @dataclass
 class RetrievalConfig:
     """Retrieval configuration."""
@@ -556,11 +617,29 @@ class RetrievalConfig:
     rrf_k: int = 60
     mode: str = "vector"  # vector | hybrid | hybrid+rerank
 
+    # Fuzja list kandydatów (app/services/rag/search/fusion_algorithms.py)
+    fusion_method: str = "rrf"  # rrf | combsum
+    fusion_weights: dict[str, float] = field(default_factory=lambda: {"vector": 1.0, "keyword": 1.0})
+
     # Reranking
     use_reranking: bool = True
     rerank_candidates: int = 10
     rerank_threshold: int = 3
     reranker_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    reranker_backend: str = "cross_encoder"  # cross_encoder | onnx_int8
+    reranker_onnx_path: str = "models/reranker/ms-marco-MiniLM-L-6-v2-int8.onnx"
+
+    # Micro-batching rerankera (app/services/rag/search/rerank_batcher.py)
+    rerank_timeout: float = 15.0
+    rerank_max_batch_pairs: int = 64
+    rerank_batch_window_ms: float = 8.0
+    rerank_max_queue_pairs: int = 512
+    rerank_predict_batch_size: int = 32
+
+    # Timeouty współbieżnych etapów retrieval (sekundy)
+    vector_timeout: float = 10.0
+    keyword_timeout: float = 5.0
+    graph_timeout: float = 30.0
 
 
 @dataclass
@@ -603,9 +682,33 @@ class RagConfig:
             chunk_overlap=chunking.get("chunk_overlap", 300),
         )
 
+        # Ingest
+        ingest = config.get("ingest", {})
+        self.ingest = IngestConfig(
+            graph_concurrency=ingest.get("graph_concurrency", 4),
+            graph_batch_size=ingest.get("graph_batch_size", 8),
+            vector_batch_size=ingest.get("vector_batch_size", 64),
+            delete_batch_size=ingest.get("delete_batch_size", 1000),
+        )
+
+        # Local ANN index
+        local_index = config.get("local_index", {})
+        self.local_index = LocalIndexConfig(
+            enabled=local_index.get("enabled", False),
+            backend=local_index.get("backend", "auto"),
+            snapshot_dir=local_index.get("snapshot_dir", "/tmp/sight_rag_local_index"),
+            hnsw_m=local_index.get("hnsw_m", 16),
+            hnsw_ef_construction=local_index.get("hnsw_ef_construction", 200),
+            hnsw_ef_search=local_index.get("hnsw_ef_search", 64),
+            build_page_size=local_index.get("build_page_size", 1000),
+        )
+
         # Retrieval
         retrieval = config.get("retrieval", {})
         reranking = retrieval.get("reranking", {})
+        stage_timeouts = retrieval.get("stage_timeouts", {})
+        batching = reranking.get("batching", {})
+        fusion = retrieval.get("fusion", {})
 
         self.retrieval = RetrievalConfig(
             top_k=retrieval.get("top_k", 8),
@@ -614,10 +717,22 @@ class RagConfig:
             vector_weight=retrieval.get("vector_weight", 0.7),
             rrf_k=retrieval.get("rrf_k", 60),
             mode=retrieval.get("mode", "vector"),
+            fusion_method=fusion.get("method", "rrf"),
+            fusion_weights=fusion.get("weights", {"vector": 1.0, "keyword": 1.0}),
             use_reranking=reranking.get("enabled", True),
             rerank_candidates=reranking.get("candidates", 10),
             rerank_threshold=retrieval.get("rerank_threshold", 3),
             reranker_model=reranking.get("model", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+            reranker_backend=reranking.get("backend", "cross_encoder"),
+            reranker_onnx_path=reranking.get("onnx_model_path", "models/reranker/ms-marco-MiniLM-L-6-v2-int8.onnx"),
+            rerank_timeout=batching.get("timeout", 15.0),
+            rerank_max_batch_pairs=batching.get("max_batch_pairs", 64),
+            rerank_batch_window_ms=batching.get("window_ms", 8.0),
+            rerank_max_queue_pairs=batching.get("max_queue_pairs", 512),
+            rerank_predict_batch_size=batching.get("predict_batch_size", 32),
+            vector_timeout=stage_timeouts.get("vector", 10.0),
+            keyword_timeout=stage_timeouts.get("keyword", 5.0),
+            graph_timeout=stage_timeouts.get("graph", 30.0),
         )
 
     def _load_graph_transformer(self):
@@ -2,38 +2,210 @@
 """
 Neo4j Backup Script
 
-Tworzy backup grafu Neo4j do pliku .cypher (Cypher statements).
+Strumieniowy backup grafu Neo4j do skompresowanych shardów JSONL
+(+ równoległe odtworzenie) przy stałym zużyciu pamięci.
 
 Funkcjonalności:
-- Eksport wszystkich nodes i relationships do Cypher statements
-- Weryfikacja połączenia z Neo4j przed backup
-- Tworzenie timestamped backups w data/backups/
+- Eksport nodes i relationships strumieniem (driver pobiera wyniki stronami
+  po --page-size rekordów) do shardów ``nodes-00000.jsonl.gz`` /
+  ``relationships-00000.jsonl.gz`` po --shard-size rekordów
+- ``manifest.json`` z liczbami rekordów per shard (weryfikacja i restore)
+- Embeddingi pomijane po stronie serwera (chyba że --include-embeddings)
+- Weryfikacja połączenia z Neo4j i weryfikacja zapisanego backupu
+- --restore: równoległe odtworzenie shardów (--workers) paczkami UNWIND
 - --dry-run mode (sprawdza co zostanie zrobione bez tworzenia backup)
-- Weryfikacja że backup się powiódł
+
+Format rekordu:
+    nodes:         {"id": elementId, "labels": [...], "properties": {...}}
+    relationships: {"id": elementId, "type": "...", "start": elementId, "end": elementId, "properties": {...}}
 
 Uruchomienie:
-    python scripts/backup_neo4j.py                    # Normalny backup
-    python scripts/backup_neo4j.py --dry-run          # Podgląd bez tworzenia backup
-    python scripts/backup_neo4j.py --output custom.cypher  # Custom output path
+    python scripts/backup_neo4j.py                                   # Normalny backup
+    python scripts/backup_neo4j.py --dry-run                         # Podgląd bez tworzenia backup
+    python scripts/backup_neo4j.py --output data/backups/przed-migracja  # Custom katalog backupu
+    python scripts/backup_neo4j.py --restore data/backups/neo4j-backup-2025-01-01-12-00 --workers 8
 
 Wymaga:
-    - Uruchomiony Neo4j (docker-compose up neo4j)
+    - Uruchomiony Neo4j 5.x (docker-compose up neo4j)
     - Poprawne NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD w .env
 """
 
 import argparse
+import base64
+import gzip
+import json
 import sys
-from pathlib import Path
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List
 
 # Dodaj root directory do path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from neo4j import GraphDatabase
-from app.core.config import get_settings
+from neo4j.time import Date, DateTime, Time
+from config import app as app_config
+
+FORMAT_VERSION = 1
+NODES = "nodes"
+RELATIONSHIPS = "relationships"
+MANIFEST_FILE = "manifest.json"
+
+# Tymczasowa etykieta + indeks mapujące elementId z backupu na nowe węzły w trakcie restore
+RESTORE_LABEL = "__BackupRestore"
+RESTORE_ID_PROPERTY = "__backup_id"
+RESTORE_INDEX = "backup_restore_id"
+
+EXPORT_QUERIES = {
+    NODES: """
+        MATCH (n)
+        RETURN elementId(n) AS id, labels(n) AS labels, n {{.*{embedding}}} AS properties
+    """,
+    RELATIONSHIPS: """
+        MATCH (a)-[r]->(b)
+        RETURN elementId(r) AS id, type(r) AS type, elementId(a) AS start, elementId(b) AS end,
+               properties(r) AS properties
+    """,
+}
+
+
+def _quote(name: str) -> str:
+    """Escapuje nazwę etykiety / typu relacji do Cypher."""
+    return "`" + name.replace("`", "``") + "`"
+
+
+def encode_value(value: Any) -> Any:
+    """Wartość property → JSON (typy temporalne i bajty jako {"$type", "value"})."""
+    if isinstance(value, DateTime):
+        return {"$type": "datetime", "value": value.iso_format()}
+    if isinstance(value, Date):
+        return {"$type": "date", "value": value.iso_format()}
+    if isinstance(value, Time):
+        return {"$type": "time", "value": value.iso_format()}
+    if isinstance(value, (bytes, bytearray)):
+        return {"$type": "bytes", "value": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, list):
+        return [encode_value(item) for item in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    # Pozostałe typy (duration, point) - jako tekst
+    return str(value)
+
+
+def decode_value(value: Any) -> Any:
+    """Odwrotność ``encode_value``."""
+    if isinstance(value, dict) and "$type" in value:
+        kind, raw = value["$type"], value["value"]
+        if kind == "datetime":
+            return DateTime.from_iso_format(raw)
+        if kind == "date":
+            return Date.from_iso_format(raw)
+        if kind == "time":
+            return Time.from_iso_format(raw)
+        if kind == "bytes":
+            return base64.b64decode(raw)
+    if isinstance(value, list):
+        return [decode_value(item) for item in value]
+    return value
+
+
+def encode_properties(props: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: encode_value(value) for key, value in props.items() if value is not None}
+
+
+def decode_properties(props: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: decode_value(value) for key, value in props.items()}
+
+
+class ShardWriter:
+    """
+    Zapisuje rekordy do kolejnych shardów ``{prefix}-NNNNN.jsonl.gz``.
 
-settings = get_settings()
+    Attributes:
+        shards: Lista {"file", "records"} zamkniętych shardów
+    """
+
+    def __init__(self, directory: Path, prefix: str, shard_size: int):
+        self.directory = directory
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self.shards: List[Dict[str, Any]] = []
+        self._handle = None
+        self._count = 0
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self._handle is None:
+            name = f"{self.prefix}-{len(self.shards):05d}.jsonl.gz"
+            self._handle = gzip.open(self.directory / name, "wt", encoding="utf-8")
+            self.shards.append({"file": name, "records": 0})
+        self._handle.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._count += 1
+        if self._count >= self.shard_size:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self.shards[-1]["records"] = self._count
+        self._handle = None
+        self._count = 0
+
+    def close(self) -> List[Dict[str, Any]]:
+        self._rotate()
+        return self.shards
+
+    @property
+    def total(self) -> int:
+        return sum(shard["records"] for shard in self.shards) + self._count
+
+
+def iter_shard_batches(path: Path, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Czyta shard paczkami po ``batch_size`` rekordów (w pamięci tylko jedna paczka)."""
+    batch: List[Dict[str, Any]] = []
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def node_restore_query(labels: Iterable[str]) -> str:
+    """UNWIND tworzący węzły o danym zestawie etykiet (etykiet nie da się parametryzować)."""
+    label_part = "".join(":" + _quote(label) for label in [RESTORE_LABEL, *sorted(labels)])
+    return (
+        "UNWIND $rows AS row\n"
+        f"CREATE (n{label_part})\n"
+        f"SET n += row.properties, n.{RESTORE_ID_PROPERTY} = row.id"
+    )
+
+
+def relationship_restore_query(rel_type: str) -> str:
+    """UNWIND tworzący relacje jednego typu między odtworzonymi węzłami."""
+    label = _quote(RESTORE_LABEL)
+    return (
+        "UNWIND $rows AS row\n"
+        f"MATCH (a:{label} {{{RESTORE_ID_PROPERTY}: row.start}})\n"
+        f"MATCH (b:{label} {{{RESTORE_ID_PROPERTY}: row.end}})\n"
+        f"CREATE (a)-[r:{_quote(rel_type)}]->(b)\n"
+        "SET r += row.properties"
+    )
+
+
+RESTORE_CLEANUP_QUERY = f"""
+MATCH (n:{_quote(RESTORE_LABEL)})
+CALL {{
+  WITH n
+  REMOVE n:{_quote(RESTORE_LABEL)}
+  REMOVE n.{RESTORE_ID_PROPERTY}
+}} IN TRANSACTIONS OF $batch_size ROWS
+"""
 
 
 class Neo4jBackup:
@@ -45,9 +217,9 @@ class Neo4jBackup:
         backup_dir: Ścieżka do katalogu z backupami
     """
 
-    def __init__(self):
+    def __init__(self, driver=None):
         """Inicjalizuje backup manager i tworzy katalog backups."""
-        self.driver = None
+        self.driver = driver
         self.backup_dir = Path("data/backups")
         self.backup_dir.mkdir(parents=True, exist_ok=True)
 
@@ -58,12 +230,12 @@ class Neo4jBackup:
         Returns:
             True jeśli połączenie udane, False w przeciwnym razie
         """
-        print(f"🔌 Łączę się z Neo4j: {settings.NEO4J_URI}")
+        print(f"🔌 Łączę się z Neo4j: {app_config.neo4j.uri}")
 
         try:
             self.driver = GraphDatabase.driver(
-                settings.NEO4J_URI,
-                auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD)
+                app_config.neo4j.uri,
+                auth=(app_config.neo4j.user, app_config.neo4j.password)
             )
 
             # Weryfikuj połączenie
@@ -109,175 +281,178 @@ class Neo4jBackup:
                 'rel_types': rel_types
             }
 
-    def export_to_cypher(self) -> List[str]:
-        """
-        Eksportuje cały graf do Cypher statements.
-
-        Returns:
-            Lista stringów z Cypher statements (CREATE statements)
+    def export(
+        self,
+        output_dir: Path,
+        page_size: int = 5000,
+        shard_size: int = 100_000,
+        include_embeddings: bool = False,
+    ) -> Dict[str, Any]:
         """
-        statements = []
-
-        with self.driver.session() as session:
-            # 1. Export nodes
-            # Pobierz wszystkie labels
-            result = session.run("CALL db.labels()")
-            labels = [record['label'] for record in result]
-
-            print(f"📦 Eksportuję nodes dla {len(labels)} labels...")
-
-            for label in labels:
-                # Pobierz nodes dla tego label
-                result = session.run(f"MATCH (n:{label}) RETURN n")
-
-                for record in result:
-                    node = record['n']
-                    node_id = node.id
-                    node_labels = ':'.join(node.labels)
-
-                    # Serialize properties
-                    props = dict(node.items())
+        Eksportuje graf do shardów JSONL.gz i zapisuje manifest.
 
-                    # Utwórz CREATE statement
-                    # Format: CREATE (n:Label {prop1: value1, prop2: value2})
-                    props_str = self._serialize_properties(props)
-
-                    statement = f"CREATE (n{node_id}:{node_labels} {props_str});"
-                    statements.append(statement)
-
-            # 2. Export relationships
-            print(f"🔗 Eksportuję relationships...")
-
-            result = session.run("MATCH (a)-[r]->(b) RETURN a, r, b")
-
-            for record in result:
-                source = record['a']
-                rel = record['r']
-                target = record['b']
-
-                source_id = source.id
-                target_id = target.id
-                rel_type = rel.type
-
-                # Serialize relationship properties
-                rel_props = dict(rel.items())
-                rel_props_str = self._serialize_properties(rel_props)
-
-                if rel_props_str != "{}":
-                    statement = f"MATCH (a), (b) WHERE id(a)={source_id} AND id(b)={target_id} CREATE (a)-[r:{rel_type} {rel_props_str}]->(b);"
-                else:
-                    statement = f"MATCH (a), (b) WHERE id(a)={source_id} AND id(b)={target_id} CREATE (a)-[r:{rel_type}]->(b);"
-
-                statements.append(statement)
-
-        return statements
-
-    def _serialize_properties(self, props: Dict[str, Any]) -> str:
-        """
-        Serializes properties do formatu Cypher.
+        Wyniki pobierane są strumieniem - driver trzyma w pamięci najwyżej
+        ``page_size`` rekordów (fetch_size), a shardy zapisywane są na bieżąco.
 
         Args:
-            props: Dict z properties node/relationship
+            output_dir: Katalog backupu (tworzony)
+            page_size: Ile rekordów driver pobiera z serwera na raz
+            shard_size: Ile rekordów w jednym shardzie
+            include_embeddings: Czy zapisywać property ``embedding``
 
         Returns:
-            String w formacie {prop1: value1, prop2: value2}
+            Manifest backupu
         """
-        if not props:
-            return "{}"
-
-        # Filter out embedding vectors (zbyt duże dla text backup)
-        filtered_props = {k: v for k, v in props.items() if k != 'embedding'}
-
-        if not filtered_props:
-            return "{}"
-
-        # Serialize każdą property
-        prop_strs = []
-        for key, value in filtered_props.items():
-            # Escape strings
-            if isinstance(value, str):
-                # Escape single quotes i backslashes
-                escaped = value.replace("\\", "\\\\").replace("'", "\\'")
-                prop_strs.append(f"{key}: '{escaped}'")
-            elif isinstance(value, bool):
-                prop_strs.append(f"{key}: {str(value).lower()}")
-            elif isinstance(value, (int, float)):
-                prop_strs.append(f"{key}: {value}")
-            elif value is None:
-                prop_strs.append(f"{key}: null")
-            elif isinstance(value, list):
-                # Serialize lists
-                list_str = str(value).replace("'", '"')
-                prop_strs.append(f"{key}: {list_str}")
-            else:
-                # Default: convert to string
-                escaped = str(value).replace("\\", "\\\\").replace("'", "\\'")
-                prop_strs.append(f"{key}: '{escaped}'")
-
-        return "{" + ", ".join(prop_strs) + "}"
-
-    def save_backup(self, statements: List[str], output_path: Path) -> bool:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        queries = {
+            NODES: EXPORT_QUERIES[NODES].format(embedding="" if include_embeddings else ", embedding: null"),
+            RELATIONSHIPS: EXPORT_QUERIES[RELATIONSHIPS],
+        }
+        manifest: Dict[str, Any] = {
+            "format_version": FORMAT_VERSION,
+            "created": datetime.now().isoformat(),
+            "source": app_config.neo4j.uri,
+            "include_embeddings": include_embeddings,
+        }
+
+        for kind in (NODES, RELATIONSHIPS):
+            print(f"📦 Eksportuję {kind}...")
+            writer = ShardWriter(output_dir, kind, shard_size)
+            try:
+                with self.driver.session(fetch_size=page_size) as session:
+                    for record in session.run(queries[kind]):
+                        writer.write(self._export_record(kind, record))
+                        if writer.total % page_size == 0:
+                            print(f"   {writer.total} {kind}...")
+            finally:
+                shards = writer.close()
+            manifest[kind] = {"records": sum(shard["records"] for shard in shards), "shards": shards}
+            print(f"   ✅ {manifest[kind]['records']} {kind} w {len(shards)} shardach")
+
+        with open(output_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return manifest
+
+    @staticmethod
+    def _export_record(kind: str, record: Any) -> Dict[str, Any]:
+        if kind == NODES:
+            return {
+                "id": record["id"],
+                "labels": list(record["labels"]),
+                "properties": encode_properties(dict(record["properties"])),
+            }
+        return {
+            "id": record["id"],
+            "type": record["type"],
+            "start": record["start"],
+            "end": record["end"],
+            "properties": encode_properties(dict(record["properties"])),
+        }
+
+    def verify_backup(self, backup_path: Path, manifest: Dict[str, Any]) -> bool:
         """
-        Zapisuje backup do pliku.
+        Weryfikuje że backup się powiódł (liczba rekordów w shardach vs manifest).
 
         Args:
-            statements: Lista Cypher statements
-            output_path: Ścieżka do pliku output
+            backup_path: Katalog backupu
+            manifest: Manifest zwrócony przez ``export``
 
         Returns:
-            True jeśli backup zapisany pomyślnie
+            True jeśli weryfikacja pomyślna
         """
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                # Header
-                f.write("// Neo4j Backup\n")
-                f.write(f"// Created: {datetime.now().isoformat()}\n")
-                f.write(f"// Source: {settings.NEO4J_URI}\n")
-                f.write("//\n")
-                f.write("// UWAGA: Ten backup NIE zawiera embedding vectors (zbyt duże)\n")
-                f.write("// Aby przywrócić embeddings, należy ponownie uruchomić RAG ingest\n")
-                f.write("//\n\n")
-
-                # Statements
-                for statement in statements:
-                    f.write(statement + "\n")
-
-            print(f"✅ Backup zapisany do: {output_path}")
-            print(f"   Rozmiar: {output_path.stat().st_size / 1024:.2f} KB")
-            return True
+            ok = True
+            for kind in (NODES, RELATIONSHIPS):
+                for shard in manifest[kind]["shards"]:
+                    with gzip.open(backup_path / shard["file"], "rt", encoding="utf-8") as handle:
+                        count = sum(1 for line in handle if line.strip())
+                    if count != shard["records"]:
+                        print(f"⚠️  Ostrzeżenie: {shard['file']} ma {count} rekordów, oczekiwano {shard['records']}")
+                        ok = False
+            if ok:
+                print(
+                    f"✅ Weryfikacja pomyślna: {manifest[NODES]['records']} nodes, "
+                    f"{manifest[RELATIONSHIPS]['records']} relationships"
+                )
+            return ok
 
         except Exception as e:
-            print(f"❌ BŁĄD podczas zapisywania backup: {e}")
+            print(f"❌ BŁĄD podczas weryfikacji backup: {e}")
             return False
 
-    def verify_backup(self, backup_path: Path, expected_count: int) -> bool:
+    def restore(self, backup_path: Path, workers: int = 4, batch_size: int = 1000) -> Dict[str, int]:
         """
-        Weryfikuje że backup się powiódł.
+        Odtwarza backup: najpierw wszystkie shardy nodes, potem relationships.
 
-        Args:
-            backup_path: Ścieżka do backup file
-            expected_count: Oczekiwana liczba statements
+        Shardy przetwarzane równolegle (``workers`` wątków, osobna sesja per
+        shard), każdy paczkami po ``batch_size`` rekordów w osobnej transakcji.
+        Węzły dostają tymczasową etykietę z ``elementId`` z backupu (indeksowaną),
+        po której łączone są relacje; na końcu etykieta jest zdejmowana paczkami.
 
         Returns:
-            True jeśli weryfikacja pomyślna
+            Liczba odtworzonych nodes i relationships
         """
-        try:
-            with open(backup_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+        with open(backup_path / MANIFEST_FILE, encoding="utf-8") as f:
+            manifest = json.load(f)
 
-            # Count non-comment lines
-            statement_count = sum(1 for line in lines if line.strip() and not line.strip().startswith('//'))
+        with self.driver.session() as session:
+            session.run(
+                f"CREATE INDEX {RESTORE_INDEX} IF NOT EXISTS "
+                f"FOR (n:{_quote(RESTORE_LABEL)}) ON (n.{RESTORE_ID_PROPERTY})"
+            ).consume()
+            session.run("CALL db.awaitIndexes()").consume()
+
+        restored = {}
+        for kind, restore_shard in ((NODES, self._restore_node_batch), (RELATIONSHIPS, self._restore_relationship_batch)):
+            shards = [backup_path / shard["file"] for shard in manifest[kind]["shards"]]
+            print(f"📥 Odtwarzam {kind}: {len(shards)} shardów, {workers} workerów...")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                counts = list(executor.map(lambda path: self._restore_shard(path, batch_size, restore_shard), shards))
+            restored[kind] = sum(counts)
+            print(f"   ✅ {restored[kind]} / {manifest[kind]['records']} {kind}")
 
-            if statement_count == expected_count:
-                print(f"✅ Weryfikacja pomyślna: {statement_count} statements")
-                return True
-            else:
-                print(f"⚠️  Ostrzeżenie: Zapisano {statement_count} statements, oczekiwano {expected_count}")
-                return False
+        with self.driver.session() as session:
+            session.run(RESTORE_CLEANUP_QUERY, batch_size=batch_size).consume()
+            session.run(f"DROP INDEX {RESTORE_INDEX} IF EXISTS").consume()
+        return restored
+
+    def _restore_shard(
+        self,
+        path: Path,
+        batch_size: int,
+        restore_batch: Callable[[Any, List[Dict[str, Any]]], int],
+    ) -> int:
+        count = 0
+        with self.driver.session() as session:
+            for batch in iter_shard_batches(path, batch_size):
+                count += restore_batch(session, batch)
+        print(f"   {path.name}: {count}")
+        return count
+
+    @staticmethod
+    def _write_grouped(session: Any, groups: Dict[Any, List[Dict[str, Any]]], build_query: Callable[[Any], str]) -> int:
+        count = 0
+        for key, rows in groups.items():
+            query = build_query(key)
+            session.execute_write(lambda tx, q=query, r=rows: tx.run(q, rows=r).consume())
+            count += len(rows)
+        return count
+
+    def _restore_node_batch(self, session: Any, batch: List[Dict[str, Any]]) -> int:
+        groups: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+        for record in batch:
+            groups[tuple(sorted(record["labels"]))].append(
+                {"id": record["id"], "properties": decode_properties(record["properties"])}
+            )
+        return self._write_grouped(session, groups, node_restore_query)
 
-        except Exception as e:
-            print(f"❌ BŁĄD podczas weryfikacji backup: {e}")
-            return False
+    def _restore_relationship_batch(self, session: Any, batch: List[Dict[str, Any]]) -> int:
+        groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for record in batch:
+            groups[record["type"]].append(
+                {"start": record["start"], "end": record["end"], "properties": decode_properties(record["properties"])}
+            )
+        return self._write_grouped(session, groups, relationship_restore_query)
 
     def close(self):
         """Zamyka połączenie z Neo4j."""
@@ -285,26 +460,82 @@ class Neo4jBackup:
             self.driver.close()
 
 
+def _print_stats(stats: Dict[str, Any]) -> None:
+    print("-" * 80)
+    print("DATABASE STATS")
+    print("-" * 80)
+    print(f"Nodes: {stats['node_count']}")
+    print(f"Relationships: {stats['rel_count']}")
+    print(f"Labels ({len(stats['labels'])}): {', '.join(stats['labels'])}")
+    print(f"Relationship Types ({len(stats['rel_types'])}): {', '.join(stats['rel_types'])}")
+    print()
+
+
+def run_restore(backup: Neo4jBackup, backup_path: Path, args: argparse.Namespace) -> None:
+    """Restore workflow (--restore)."""
+    if not (backup_path / MANIFEST_FILE).exists():
+        print(f"❌ BŁĄD: Brak {MANIFEST_FILE} w {backup_path}")
+        sys.exit(1)
+
+    stats = backup.get_database_stats()
+    _print_stats(stats)
+    if stats['node_count'] and not args.force:
+        print("❌ Baza nie jest pusta - restore dopisałby duplikaty. Użyj --force, aby kontynuować.")
+        sys.exit(1)
+
+    if args.dry_run:
+        with open(backup_path / MANIFEST_FILE, encoding="utf-8") as f:
+            manifest = json.load(f)
+        print("✅ Restore NIE został wykonany (--dry-run mode)")
+        print(f"  - {manifest[NODES]['records']} nodes w {len(manifest[NODES]['shards'])} shardach")
+        print(f"  - {manifest[RELATIONSHIPS]['records']} relationships w {len(manifest[RELATIONSHIPS]['shards'])} shardach")
+        sys.exit(0)
+
+    restored = backup.restore(backup_path, workers=args.workers, batch_size=args.batch_size)
+
+    print()
+    print("=" * 80)
+    print("✅ RESTORE COMPLETED")
+    print("=" * 80)
+    print(f"Nodes: {restored[NODES]}, Relationships: {restored[RELATIONSHIPS]}")
+    print()
+    print("Następne kroki:")
+    print("  1. Utwórz indeksy: python scripts/init_neo4j_indexes.py")
+    print("  2. Jeśli backup był bez embeddingów, ponownie zaindeksuj dokumenty: POST /api/v1/rag/documents/upload")
+    print()
+
+
 def main():
     """Main backup workflow."""
     parser = argparse.ArgumentParser(
-        description="Backup Neo4j graph do Cypher statements"
+        description="Strumieniowy backup / restore grafu Neo4j (shardy JSONL.gz)"
     )
     parser.add_argument(
         '--dry-run',
         action='store_true',
-        help='Tylko sprawdź co zostanie zrobione bez tworzenia backup'
+        help='Tylko sprawdź co zostanie zrobione bez tworzenia backup / restore'
     )
     parser.add_argument(
         '--output',
         type=str,
-        help='Custom output path (default: data/backups/neo4j-backup-TIMESTAMP.cypher)'
+        help='Katalog backupu (default: data/backups/neo4j-backup-TIMESTAMP/)'
+    )
+    parser.add_argument('--restore', type=str, metavar='BACKUP_DIR', help='Odtwórz backup z katalogu')
+    parser.add_argument('--force', action='store_true', help='Restore do niepustej bazy')
+    parser.add_argument('--page-size', type=int, default=5000, help='Rekordów pobieranych z serwera na raz (default: 5000)')
+    parser.add_argument('--shard-size', type=int, default=100_000, help='Rekordów w jednym shardzie (default: 100000)')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rekordów w jednej transakcji restore (default: 1000)')
+    parser.add_argument('--workers', type=int, default=4, help='Równoległe shardy przy restore (default: 4)')
+    parser.add_argument(
+        '--include-embeddings',
+        action='store_true',
+        help='Zapisz także property embedding (duże shardy, restore bez ponownego ingestu)'
     )
 
     args = parser.parse_args()
 
     print("=" * 80)
-    print("NEO4J BACKUP")
+    print("NEO4J RESTORE" if args.restore else "NEO4J BACKUP")
     print("=" * 80)
     print()
 
@@ -316,23 +547,24 @@ def main():
         sys.exit(1)
 
     try:
-        # Get database stats
-        print("-" * 80)
-        print("DATABASE STATS")
-        print("-" * 80)
+        if args.restore:
+            run_restore(backup, Path(args.restore), args)
+            return
 
         stats = backup.get_database_stats()
-
-        print(f"Nodes: {stats['node_count']}")
-        print(f"Relationships: {stats['rel_count']}")
-        print(f"Labels ({len(stats['labels'])}): {', '.join(stats['labels'])}")
-        print(f"Relationship Types ({len(stats['rel_types'])}): {', '.join(stats['rel_types'])}")
-        print()
+        _print_stats(stats)
 
         if stats['node_count'] == 0:
             print("⚠️  UWAGA: Baza danych jest pusta - backup nie zawiera danych")
             print()
 
+        # Determine output path
+        if args.output:
+            output_path = Path(args.output)
+        else:
+            timestamp = datetime.now().strftime("%Y-%m-%d-%H-%M")
+            output_path = backup.backup_dir / f"neo4j-backup-{timestamp}"
+
         # Dry-run mode
         if args.dry_run:
             print("-" * 80)
@@ -342,18 +574,11 @@ def main():
             print("✅ Backup NIE został utworzony (--dry-run mode)")
             print()
             print(f"W normalnym trybie zostałby utworzony backup zawierający:")
-            print(f"  - {stats['node_count']} nodes")
-            print(f"  - {stats['rel_count']} relationships")
-            print(f"  - Razem: ~{stats['node_count'] + stats['rel_count']} Cypher statements")
+            print(f"  - {stats['node_count']} nodes (~{-(-stats['node_count'] // args.shard_size)} shardów)")
+            print(f"  - {stats['rel_count']} relationships (~{-(-stats['rel_count'] // args.shard_size)} shardów)")
+            print(f"  - Embeddings: {'tak' if args.include_embeddings else 'nie'}")
             print()
-
-            if args.output:
-                print(f"Output path: {args.output}")
-            else:
-                timestamp = datetime.now().strftime("%Y-%m-%d-%H-%M")
-                default_path = backup.backup_dir / f"neo4j-backup-{timestamp}.cypher"
-                print(f"Output path: {default_path}")
-
+            print(f"Output path: {output_path}")
             print()
             print("Aby utworzyć backup, uruchom bez --dry-run:")
             print(f"  python scripts/backup_neo4j.py")
@@ -363,31 +588,16 @@ def main():
 
         # Normal backup mode
         print("-" * 80)
-        print("EXPORTING TO CYPHER")
-        print("-" * 80)
-        print()
-
-        statements = backup.export_to_cypher()
-
-        print()
-        print(f"✅ Wyeksportowano {len(statements)} Cypher statements")
-        print()
-
-        # Determine output path
-        if args.output:
-            output_path = Path(args.output)
-        else:
-            timestamp = datetime.now().strftime("%Y-%m-%d-%H-%M")
-            output_path = backup.backup_dir / f"neo4j-backup-{timestamp}.cypher"
-
-        # Save backup
-        print("-" * 80)
-        print("SAVING BACKUP")
+        print("EXPORTING TO JSONL SHARDS")
         print("-" * 80)
         print()
 
-        if not backup.save_backup(statements, output_path):
-            sys.exit(1)
+        manifest = backup.export(
+            output_path,
+            page_size=args.page_size,
+            shard_size=args.shard_size,
+            include_embeddings=args.include_embeddings,
+        )
 
         # Verify backup
         print()
@@ -396,7 +606,7 @@ def main():
         print("-" * 80)
         print()
 
-        if not backup.verify_backup(output_path, len(statements)):
+        if not backup.verify_backup(output_path, manifest):
             sys.exit(1)
 
         # Summary
@@ -411,8 +621,10 @@ def main():
         print(f"  1. Zatrzymaj aplikację: docker-compose down")
         print(f"  2. Usuń Neo4j volume: docker volume rm sight_neo4j_data")
         print(f"  3. Uruchom Neo4j: docker-compose up -d neo4j")
-        print(f"  4. Załaduj backup: cypher-shell < {output_path}")
-        print(f"  5. Ponownie utwórz embeddings: POST /api/v1/rag/documents/upload")
+        print(f"  4. Załaduj backup: python scripts/backup_neo4j.py --restore {output_path}")
+        print(f"  5. Utwórz indeksy: python scripts/init_neo4j_indexes.py")
+        if not args.include_embeddings:
+            print(f"  6. Ponownie utwórz embeddings: POST /api/v1/rag/documents/upload")
         print()
 
     except Exception as e:
@@ -0,0 +1,671 @@
+#!/usr/bin/env python3
+"""
+Benchmark jakości i latencji retrievalu RAG (vector, keyword, fusion, rerank, graph)
+
+Uruchamia etapy hybrid search na nagranym korpusie testowym z etykietami
+trafności (tests/fixtures/rag_benchmark/) i raportuje:
+- recall@k i MRR per etap (vector, keyword, fusion, rerank) oraz recall węzłów grafu
+- latencję p50/p95 per etap
+- raport JSON o stabilnej strukturze (posortowane klucze, zaokrąglone wartości),
+  który CI może porównać między commitami (``--compare``)
+
+Backendy:
+- ``memory`` (domyślny, bez usług zewnętrznych, deterministyczny): embeddingi
+  feature hashing terminów (``extract_search_terms``) w ``LocalVectorIndex``
+  (NumPy), BM25 w procesie zamiast fulltext indexu Neo4j, graf w pamięci
+  emulujący fulltext ``graph_terms_*`` (te same limity i kolejność co Cypher
+  w ``GraphTraversal``). Fuzja (``fuse``), reranking
+  (``rerank_with_cross_encoder``) i zapytanie grafu (``GraphTraversal``) to kod
+  produkcyjny.
+- ``neo4j``: lokalny Neo4j + model embeddingów z konfiguracji; ``--seed`` wgrywa
+  korpus (chunki + węzły grafu) przed pomiarem.
+
+Reranker: ``overlap`` (leksykalny, deterministyczny - domyślny dla CI) albo
+``cross_encoder`` / ``onnx_int8`` (model z config/rag/retrieval.yaml).
+
+Uruchomienie:
+    python scripts/benchmark_rag.py --output benchmark.json
+    python scripts/benchmark_rag.py --output current.json --compare baseline.json
+    python scripts/benchmark_rag.py --backend neo4j --seed --reranker cross_encoder
+
+Kod wyjścia 1 przy ``--compare``, gdy metryka jakości spadła (albo latencja p95
+wzrosła ponad ``--max-latency-increase``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterator
+
+import numpy as np
+
+# Dodaj root directory do path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+from langchain_text_splitters import RecursiveCharacterTextSplitter  # noqa: E402
+
+from app.services.rag.clients.local_index import BACKEND_NUMPY, LocalVectorIndex  # noqa: E402
+from app.services.rag.graph.term_index import (  # noqa: E402
+    TERM_INDEXED_LABELS,
+    annotate_node_properties,
+    extract_search_terms,
+    term_index_name,
+)
+from app.services.rag.graph.traversal import GraphTraversal  # noqa: E402
+from app.services.rag.search.fusion_algorithms import FUSION_METHODS, RankedList, fuse  # noqa: E402
+from app.services.rag.search.reranker import LazyReranker, rerank_with_cross_encoder  # noqa: E402
+from config import features, rag  # noqa: E402
+
+SCHEMA_VERSION = 1
+FIXTURES_DIR = Path(__file__).parent.parent / "tests" / "fixtures" / "rag_benchmark"
+STAGES = ("vector", "keyword", "fusion", "rerank", "graph")
+RANKING_STAGES = ("vector", "keyword", "fusion", "rerank")
+RECALL_AT = (1, 3, 5)
+HASHING_DIMENSIONS = 512
+
+# Limity i kolejność per etykieta jak w Cypher ``GraphTraversal._query_graph_context``
+_CONFIDENCE_RANK = {"wysoka": 0, "srednia": 1}
+_GRAPH_LABEL_LIMITS = {"Wskaznik": 3, "Obserwacja": 3, "Trend": 2, "Demografia": 2}
+_GRAPH_LABEL_FIELDS = {
+    "Wskaznik": ("streszczenie", "kluczowe_fakty", "skala", "pewnosc", "okres_czasu"),
+    "Obserwacja": ("streszczenie", "kluczowe_fakty", "pewnosc", "okres_czasu"),
+    "Trend": ("streszczenie", "kluczowe_fakty", "okres_czasu"),
+    "Demografia": ("streszczenie", "kluczowe_fakty", "pewnosc"),
+}
+
+
+@dataclass
+class BenchmarkConfig:
+    """Parametry przebiegu (domyślnie z config/rag/retrieval.yaml)."""
+
+    backend: str = "memory"
+    chunk_size: int = rag.chunking.chunk_size
+    chunk_overlap: int = rag.chunking.chunk_overlap
+    rrf_k: int = rag.retrieval.rrf_k
+    fusion_method: str = rag.retrieval.fusion_method
+    candidates_k: int = rag.retrieval.rerank_candidates
+    top_k: int = rag.retrieval.top_k
+    reranker: str = "overlap"
+    repeats: int = 3
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# KORPUS
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+def load_fixtures(fixtures_dir: Path = FIXTURES_DIR) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """Wczytaj korpus (dokumenty + węzły grafu) i zapytania z etykietami trafności."""
+    corpus = json.loads((fixtures_dir / "corpus.json").read_text(encoding="utf-8"))
+    queries = json.loads((fixtures_dir / "queries.json").read_text(encoding="utf-8"))["queries"]
+    return corpus, queries
+
+
+def chunk_corpus(documents: list[dict[str, Any]], chunk_size: int, chunk_overlap: int) -> list[Document]:
+    """Podziel dokumenty na chunki tak jak ``RAGDocumentService`` przy ingestcie."""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", ". ", " ", ""],
+        length_function=len,
+    )
+    chunks: list[Document] = []
+    for document in documents:
+        for chunk_index, text in enumerate(splitter.split_text(document["text"])):
+            chunks.append(
+                Document(
+                    page_content=text,
+                    metadata={
+                        "doc_id": document["doc_id"],
+                        "title": document["title"],
+                        "chunk_index": chunk_index,
+                    },
+                )
+            )
+    return chunks
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# STAND-INY W PAMIĘCI
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministyczne embeddingi: feature hashing terminów (bez modelu i sieci)."""
+
+    def __init__(self, dimensions: int = HASHING_DIMENSIONS) -> None:
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> list[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for term in extract_search_terms(text):
+            digest = hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = float(np.linalg.norm(vector))
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+class BM25Index:
+    """BM25 po terminach ``extract_search_terms`` - stand-in fulltext indexu chunków."""
+
+    def __init__(self, chunks: list[Document], k1: float = 1.2, b: float = 0.75) -> None:
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self._terms = [extract_search_terms(chunk.page_content) for chunk in chunks]
+        self._avg_length = sum(len(terms) for terms in self._terms) / max(len(chunks), 1)
+        document_frequency: dict[str, int] = {}
+        for terms in self._terms:
+            for term in set(terms):
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+        total = len(chunks)
+        self._idf = {
+            term: math.log(1 + (total - freq + 0.5) / (freq + 0.5)) for term, freq in document_frequency.items()
+        }
+
+    def search(self, query: str, k: int) -> list[tuple[Document, float]]:
+        query_terms = [term for term in extract_search_terms(query) if term in self._idf]
+        scored = []
+        for position, terms in enumerate(self._terms):
+            length_norm = self.k1 * (1 - self.b + self.b * len(terms) / self._avg_length)
+            score = 0.0
+            for term in query_terms:
+                frequency = terms.count(term)
+                if frequency:
+                    score += self._idf[term] * frequency * (self.k1 + 1) / (frequency + length_norm)
+            if score > 0:
+                scored.append((score, position))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(self.chunks[position], score) for score, position in scored[:k]]
+
+
+class LexicalOverlapReranker:
+    """Deterministyczny "cross-encoder": udział terminów zapytania obecnych w fragmencie."""
+
+    def predict(self, pairs: list[tuple[str, str]], **kwargs: Any) -> list[float]:
+        scores = []
+        for query, passage in pairs:
+            query_terms = set(extract_search_terms(query))
+            passage_terms = set(extract_search_terms(passage))
+            scores.append(len(query_terms & passage_terms) / len(query_terms) if query_terms else 0.0)
+        return scores
+
+
+class InMemoryGraphStore:
+    """Graph store w pamięci dla ``GraphTraversal``.
+
+    Emuluje zapytanie graph context: prefiksy z ``$lucene_query`` dopasowywane do
+    ``search_terms`` węzłów (jak fulltext ``graph_terms_*``), limity i kolejność
+    per etykieta jak w Cypher. Pozostałe zapytania (tworzenie indeksów,
+    uzupełnianie terminów) zwracają pustą listę.
+    """
+
+    def __init__(self, graph_nodes: list[dict[str, Any]]) -> None:
+        self.nodes: dict[str, list[dict[str, Any]]] = {label: [] for label in TERM_INDEXED_LABELS}
+        for node in graph_nodes:
+            properties = {key: value for key, value in node.items() if key != "type"}
+            annotate_node_properties(properties)
+            self.nodes[node["type"]].append(properties)
+
+    def query(self, query: str, params: dict[str, Any] | None = None) -> list[dict[str, Any]]:
+        if "graph_context" not in query or not params or "lucene_query" not in params:
+            return []
+        prefixes = [
+            term.rstrip("*").replace("\\", "") for term in params["lucene_query"].split(" OR ") if term
+        ]
+        graph_context: list[dict[str, Any]] = []
+        for label in TERM_INDEXED_LABELS:
+            if term_index_name(label) not in query:
+                continue
+            matches = [
+                node for node in self.nodes[label]
+                if any(term.startswith(prefix) for term in node["search_terms"] for prefix in prefixes)
+            ]
+            matches.sort(key=lambda node: self._order_key(label, node))
+            for node in matches[:_GRAPH_LABEL_LIMITS[label]]:
+                entry = {"type": label, **{field: node.get(field) for field in _GRAPH_LABEL_FIELDS[label]}}
+                if "pewnosc" in entry:
+                    entry["pewnosc"] = entry["pewnosc"] or "nieznana"
+                graph_context.append(entry)
+        return [{"graph_context": graph_context}]
+
+    @staticmethod
+    def _order_key(label: str, node: dict[str, Any]) -> tuple[int, int]:
+        confidence = _CONFIDENCE_RANK.get(node.get("pewnosc"), 2)
+        facts_size = -len(node.get("kluczowe_fakty") or "")
+        if label == "Trend":
+            return (0, facts_size)
+        if label == "Demografia":
+            return (confidence, 0)
+        return (confidence, facts_size)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BACKENDY
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+SearchFunc = Callable[[str, int], Awaitable[list[tuple[Document, float]]]]
+
+
+@dataclass
+class BenchmarkBackend:
+    """Źródła etapów retrievalu dla jednego przebiegu benchmarku."""
+
+    name: str
+    vector_search: SearchFunc
+    keyword_search: SearchFunc
+    graph_store: Any
+    chunk_count: int
+
+
+def build_memory_backend(corpus: dict[str, Any], config: BenchmarkConfig) -> BenchmarkBackend:
+    """Backend w procesie: LocalVectorIndex (NumPy) + BM25 + graf w pamięci."""
+    chunks = chunk_corpus(corpus["documents"], config.chunk_size, config.chunk_overlap)
+    embeddings = HashingEmbeddings()
+    vectors = embeddings.embed_documents([chunk.page_content for chunk in chunks])
+    records = [
+        {"id": f"{chunk.metadata['doc_id']}:{chunk.metadata['chunk_index']}", "text": chunk.page_content,
+         "embedding": vector, "metadata": chunk.metadata}
+        for chunk, vector in zip(chunks, vectors)
+    ]
+    vector_index = LocalVectorIndex.from_records(0, records, BACKEND_NUMPY)
+    keyword_index = BM25Index(chunks)
+
+    async def vector_search(query: str, k: int) -> list[tuple[Document, float]]:
+        return vector_index.search(await embeddings.aembed_query(query), k)
+
+    async def keyword_search(query: str, k: int) -> list[tuple[Document, float]]:
+        return keyword_index.search(query, k)
+
+    return BenchmarkBackend(
+        name="memory",
+        vector_search=vector_search,
+        keyword_search=keyword_search,
+        graph_store=InMemoryGraphStore(corpus["graph_nodes"]),
+        chunk_count=len(chunks),
+    )
+
+
+async def build_neo4j_backend(corpus: dict[str, Any], config: BenchmarkConfig, seed: bool) -> BenchmarkBackend:
+    """Backend na lokalnym Neo4j (vector index, fulltext chunków, graf wiedzy)."""
+    import logging
+
+    from app.services.rag.clients import get_graph_store, get_vector_store, vector_search_with_score
+    from app.services.rag.search.keyword_search import ensure_fulltext_index, keyword_search
+    from app.services.rag.search.lucene_utils import sanitize_lucene_query
+
+    logger = logging.getLogger("benchmark_rag")
+    vector_store = get_vector_store(logger)
+    graph_store = get_graph_store(logger)
+    if vector_store is None or graph_store is None:
+        raise RuntimeError("Neo4j niedostępny - sprawdź NEO4J_URI / NEO4J_USER / NEO4J_PASSWORD")
+
+    chunks = chunk_corpus(corpus["documents"], config.chunk_size, config.chunk_overlap)
+    if seed:
+        print(f"Wgrywanie korpusu: {len(chunks)} chunków, {len(corpus['graph_nodes'])} węzłów grafu...")
+        await vector_store.aadd_documents(chunks)
+        for node in corpus["graph_nodes"]:
+            properties = {key: value for key, value in node.items() if key != "type"}
+            annotate_node_properties(properties)
+            await asyncio.to_thread(
+                graph_store.query,
+                f"MERGE (n:{node['type']} {{streszczenie: $props.streszczenie}}) SET n += $props, n.benchmark = true",
+                params={"props": properties},
+            )
+    await ensure_fulltext_index(vector_store)
+
+    async def vector_search(query: str, k: int) -> list[tuple[Document, float]]:
+        return await vector_search_with_score(vector_store, query, k)
+
+    async def neo4j_keyword_search(query: str, k: int) -> list[tuple[Document, float]]:
+        return await keyword_search(query, k, vector_store, sanitize_lucene_query)
+
+    return BenchmarkBackend(
+        name="neo4j",
+        vector_search=vector_search,
+        keyword_search=neo4j_keyword_search,
+        graph_store=graph_store,
+        chunk_count=len(chunks),
+    )
+
+
+def build_reranker(name: str) -> Any:
+    """Reranker benchmarku: ``overlap`` albo model z konfiguracji (ładowany synchronicznie)."""
+    if name == "overlap":
+        return LexicalOverlapReranker()
+    reranker = LazyReranker(name)
+    if not reranker.wait_until_loaded():
+        raise RuntimeError(f"Nie udało się załadować rerankera {name}")
+    return reranker
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# METRYKI
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+def matches_label(doc: Document, label: dict[str, str]) -> bool:
+    """Chunk spełnia etykietę: ten sam dokument i zawiera oznaczony fragment (niezależne od chunkingu)."""
+    return doc.metadata.get("title") == label["title"] and label["contains"] in doc.page_content
+
+
+def first_relevant_rank(docs: list[Document], labels: list[dict[str, str]]) -> int | None:
+    """Pozycja (od 1) pierwszego trafnego chunku albo None."""
+    for rank, doc in enumerate(docs, start=1):
+        if any(matches_label(doc, label) for label in labels):
+            return rank
+    return None
+
+
+def recall_at(docs: list[Document], labels: list[dict[str, str]], k: int) -> float:
+    """Udział etykiet spełnionych przez top-k chunków."""
+    if not labels:
+        return 0.0
+    top = docs[:k]
+    return sum(any(matches_label(doc, label) for doc in top) for label in labels) / len(labels)
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Percentyl metodą nearest-rank (stabilny dla małych prób)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def recall_cutoffs(top_k: int) -> tuple[int, ...]:
+    return tuple(sorted({*RECALL_AT, top_k}))
+
+
+@contextmanager
+def _uncached_retrieval() -> Iterator[None]:
+    """Wyłącz cache RAG (i Redis lock single-flight) - mierzymy etapy, nie trafienia w cache."""
+    saved = (features.rag_cache.enabled, features.rag_cache.single_flight_lock_seconds)
+    features.rag_cache.enabled = False
+    features.rag_cache.single_flight_lock_seconds = 0
+    try:
+        yield
+    finally:
+        features.rag_cache.enabled, features.rag_cache.single_flight_lock_seconds = saved
+
+
+async def _timed(latencies: list[float], coroutine: Awaitable[Any]) -> Any:
+    start = time.perf_counter()
+    result = await coroutine
+    latencies.append((time.perf_counter() - start) * 1000)
+    return result
+
+
+async def _run_query(
+    query: dict[str, Any],
+    backend: BenchmarkBackend,
+    traversal: GraphTraversal,
+    reranker: Any,
+    config: BenchmarkConfig,
+    latencies: dict[str, list[float]],
+) -> dict[str, list[Any]]:
+    text = query["query"]
+    vector = await _timed(latencies["vector"], backend.vector_search(text, config.candidates_k))
+    keyword = await _timed(latencies["keyword"], backend.keyword_search(text, config.candidates_k))
+
+    start = time.perf_counter()
+    weights = rag.retrieval.fusion_weights
+    fused = fuse(
+        [RankedList("vector", vector, weights.get("vector", 1.0)),
+         RankedList("keyword", keyword, weights.get("keyword", 1.0))],
+        method=config.fusion_method,
+        k=config.rrf_k,
+        limit=max(config.candidates_k, config.top_k),
+    )
+    latencies["fusion"].append((time.perf_counter() - start) * 1000)
+
+    reranked = await _timed(
+        latencies["rerank"],
+        rerank_with_cross_encoder(text, fused[: config.candidates_k], reranker, top_k=config.top_k),
+    )
+
+    graph_nodes: list[dict[str, Any]] = []
+    profile = query.get("profile")
+    if profile:
+        graph_nodes = await _timed(
+            latencies["graph"],
+            traversal.get_demographic_graph_context(
+                profile["age_group"], profile["location"], profile["education"], profile["gender"]
+            ),
+        )
+
+    return {
+        "vector": [doc for doc, _ in vector],
+        "keyword": [doc for doc, _ in keyword],
+        "fusion": [doc for doc, _ in fused],
+        "rerank": [doc for doc, _ in reranked],
+        "graph": graph_nodes,
+    }
+
+
+async def run_benchmark(
+    backend: BenchmarkBackend,
+    corpus: dict[str, Any],
+    queries: list[dict[str, Any]],
+    config: BenchmarkConfig,
+    reranker: Any | None = None,
+) -> dict[str, Any]:
+    """Wykonaj wszystkie zapytania ``config.repeats`` razy i zbuduj raport.
+
+    Jakość liczona z pierwszego powtórzenia (etapy są deterministyczne),
+    latencja ze wszystkich powtórzeń.
+    """
+    reranker = reranker or build_reranker(config.reranker)
+    traversal = GraphTraversal(backend.graph_store)
+    latencies: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    results: dict[str, dict[str, list[Any]]] = {}
+
+    with _uncached_retrieval():
+        for repeat in range(max(1, config.repeats)):
+            for query in queries:
+                outcome = await _run_query(query, backend, traversal, reranker, config, latencies)
+                if repeat == 0:
+                    results[query["id"]] = outcome
+
+    return build_report(backend, corpus, queries, config, results, latencies)
+
+
+def build_report(
+    backend: BenchmarkBackend,
+    corpus: dict[str, Any],
+    queries: list[dict[str, Any]],
+    config: BenchmarkConfig,
+    results: dict[str, dict[str, list[Any]]],
+    latencies: dict[str, list[float]],
+) -> dict[str, Any]:
+    """Raport JSON: jakość per etap, latencja p50/p95, rangi per zapytanie."""
+    cutoffs = recall_cutoffs(config.top_k)
+    quality: dict[str, dict[str, float]] = {}
+    per_query: dict[str, dict[str, Any]] = {}
+
+    for stage in RANKING_STAGES:
+        recalls = {k: [] for k in cutoffs}
+        reciprocal_ranks = []
+        for query in queries:
+            docs = results[query["id"]][stage]
+            labels = query["relevant_chunks"]
+            rank = first_relevant_rank(docs, labels)
+            reciprocal_ranks.append(1 / rank if rank else 0.0)
+            for k in cutoffs:
+                recalls[k].append(recall_at(docs, labels, k))
+            per_query.setdefault(query["id"], {})[f"{stage}_rank"] = rank
+        quality[stage] = {f"recall@{k}": _mean(values) for k, values in recalls.items()}
+        quality[stage]["mrr"] = _mean(reciprocal_ranks)
+
+    graph_recalls, graph_precisions = [], []
+    for query in queries:
+        expected = set(query.get("relevant_nodes") or ())
+        if not query.get("profile") or not expected:
+            continue
+        retrieved = {node.get("streszczenie") for node in results[query["id"]]["graph"]}
+        hits = len(expected & retrieved)
+        graph_recalls.append(hits / len(expected))
+        graph_precisions.append(hits / len(retrieved) if retrieved else 0.0)
+        per_query[query["id"]]["graph_hits"] = hits
+    quality["graph"] = {"recall": _mean(graph_recalls), "precision": _mean(graph_precisions)}
+
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "backend": backend.name,
+        "config": asdict(config),
+        "corpus": {
+            "documents": len(corpus["documents"]),
+            "chunks": backend.chunk_count,
+            "graph_nodes": len(corpus["graph_nodes"]),
+            "queries": len(queries),
+            "graph_queries": len(graph_recalls),
+        },
+        "quality": quality,
+        "latency_ms": {
+            stage: {
+                "p50": round(percentile(values, 50), 3),
+                "p95": round(percentile(values, 95), 3),
+                "samples": len(values),
+            }
+            for stage, values in latencies.items()
+        },
+        "queries": per_query,
+    }
+
+
+def _mean(values: list[float]) -> float:
+    return round(sum(values) / len(values), 4) if values else 0.0
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PORÓWNANIE Z BASELINE (CI)
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+def compare_reports(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    max_quality_drop: float = 0.0,
+    max_latency_increase: float | None = None,
+) -> list[str]:
+    """Lista regresji względem baseline (pusta = OK).
+
+    Args:
+        current: Raport bieżącego przebiegu
+        baseline: Raport z poprzedniego commitu
+        max_quality_drop: Dopuszczalny spadek metryki jakości (wartość bezwzględna)
+        max_latency_increase: Dopuszczalny względny wzrost p95 (0.5 = +50%);
+            None = latencja tylko raportowana (różne maszyny CI)
+    """
+    regressions = []
+    for stage, metrics in baseline.get("quality", {}).items():
+        for metric, previous in metrics.items():
+            value = current.get("quality", {}).get(stage, {}).get(metric)
+            if value is None:
+                regressions.append(f"quality.{stage}.{metric}: brak w bieżącym raporcie")
+            elif value < previous - max_quality_drop - 1e-9:
+                regressions.append(f"quality.{stage}.{metric}: {previous} -> {value}")
+
+    if max_latency_increase is not None:
+        for stage, stats in baseline.get("latency_ms", {}).items():
+            previous = stats.get("p95", 0.0)
+            value = current.get("latency_ms", {}).get(stage, {}).get("p95")
+            if previous and value is not None and value > previous * (1 + max_latency_increase):
+                regressions.append(f"latency_ms.{stage}.p95: {previous} -> {value}")
+    return regressions
+
+
+def format_summary(report: dict[str, Any]) -> str:
+    """Tabela podsumowania na stdout."""
+    lines = [f"Backend: {report['backend']}  |  {report['corpus']}"]
+    for stage in RANKING_STAGES:
+        metrics = "  ".join(f"{name}={value:.3f}" for name, value in report["quality"][stage].items())
+        lines.append(f"{stage:>8}: {metrics}")
+    lines.append(f"{'graph':>8}: " + "  ".join(
+        f"{name}={value:.3f}" for name, value in report["quality"]["graph"].items()
+    ))
+    lines.append("Latencja [ms]:")
+    for stage, stats in report["latency_ms"].items():
+        lines.append(f"{stage:>8}: p50={stats['p50']:.2f}  p95={stats['p95']:.2f}  (n={stats['samples']})")
+    return "\n".join(lines)
+
+
+def write_report(report: dict[str, Any], output: Path) -> None:
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+async def _main(args: argparse.Namespace) -> int:
+    config = BenchmarkConfig(
+        backend=args.backend,
+        rrf_k=args.rrf_k,
+        fusion_method=args.fusion,
+        candidates_k=args.candidates_k,
+        top_k=args.top_k,
+        reranker=args.reranker,
+        repeats=args.repeats,
+    )
+    corpus, queries = load_fixtures(args.fixtures)
+    if config.backend == "neo4j":
+        backend = await build_neo4j_backend(corpus, config, seed=args.seed)
+    else:
+        backend = build_memory_backend(corpus, config)
+
+    report = await run_benchmark(backend, corpus, queries, config)
+    print(format_summary(report))
+    if args.output:
+        write_report(report, args.output)
+        print(f"Raport zapisany: {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare_reports(report, baseline, args.max_quality_drop, args.max_latency_increase)
+        for regression in regressions:
+            print(f"REGRESJA {regression}")
+        if regressions:
+            return 1
+        print(f"Brak regresji względem {args.compare}")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark jakości i latencji retrievalu RAG")
+    parser.add_argument("--backend", choices=("memory", "neo4j"), default="memory")
+    parser.add_argument("--seed", action="store_true", help="Wgraj korpus do Neo4j przed pomiarem (backend neo4j)")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR)
+    parser.add_argument("--output", type=Path, help="Ścieżka raportu JSON")
+    parser.add_argument("--compare", type=Path, help="Raport baseline do porównania (regresja = exit 1)")
+    parser.add_argument("--max-quality-drop", type=float, default=0.0)
+    parser.add_argument("--max-latency-increase", type=float, default=None,
+                        help="Dopuszczalny względny wzrost p95 (np. 0.5); domyślnie tylko raport")
+    parser.add_argument("--reranker", choices=("overlap", "cross_encoder", "onnx_int8"), default="overlap")
+    parser.add_argument("--rrf-k", type=int, default=rag.retrieval.rrf_k)
+    parser.add_argument("--fusion", choices=FUSION_METHODS, default=rag.retrieval.fusion_method)
+    parser.add_argument("--candidates-k", type=int, default=rag.retrieval.rerank_candidates)
+    parser.add_argument("--top-k", type=int, default=rag.retrieval.top_k)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_main(args)))
+
+
+if __name__ == "__main__":
+    main()
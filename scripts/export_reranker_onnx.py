@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Eksport cross-encoder rerankera do ONNX + dynamiczna kwantyzacja int8
+
+Tworzy plik używany przez backend ``onnx_int8`` (config/rag/retrieval.yaml →
+``reranking.onnx_model_path``):
+1. Eksport modelu HuggingFace (``reranking.model``) do ONNX (fp32)
+2. Dynamiczna kwantyzacja wag do int8 (onnxruntime.quantization)
+
+Uruchomienie:
+    python scripts/export_reranker_onnx.py
+    python scripts/export_reranker_onnx.py --output models/reranker/custom-int8.onnx
+
+Wymaga:
+    - pip install -e ".[reranker-onnx]" (onnx, onnxruntime, transformers)
+    - torch (instalowany z sentence-transformers)
+
+Porównanie z modelem PyTorch: python tests/manual/test_reranker_backends.py
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+# Dodaj root directory do path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import rag  # noqa: E402
+
+OPSET_VERSION = 17
+
+
+def export_reranker(model_name: str, output_path: Path) -> None:
+    """Wyeksportuj model do ONNX i zapisz wersję skwantyzowaną int8."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    print(f"Ładowanie modelu {model_name}...")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["zapytanie"], ["przykładowy fragment dokumentu"], return_tensors="pt")
+    input_names = list(sample.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fp32_path = Path(tmp_dir) / "reranker-fp32.onnx"
+        print("Eksport do ONNX (fp32)...")
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                str(fp32_path),
+                input_names=input_names,
+                output_names=["logits"],
+                dynamic_axes=dynamic_axes,
+                opset_version=OPSET_VERSION,
+            )
+
+        print("Kwantyzacja int8 (dynamic)...")
+        quantize_dynamic(str(fp32_path), str(output_path), weight_type=QuantType.QInt8)
+        fp32_size = fp32_path.stat().st_size
+
+    int8_size = output_path.stat().st_size
+    print(f"✅ Zapisano {output_path} ({int8_size / 1e6:.1f} MB, fp32: {fp32_size / 1e6:.1f} MB)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Eksport rerankera do ONNX int8")
+    parser.add_argument("--model", default=rag.retrieval.reranker_model, help="Model HuggingFace")
+    parser.add_argument("--output", default=rag.retrieval.reranker_onnx_path, help="Ścieżka pliku .onnx")
+    args = parser.parse_args()
+
+    try:
+        export_reranker(args.model, Path(args.output))
+    except ImportError as exc:
+        print(f"❌ Brak zależności: {exc}. Zainstaluj: pip install -e \".[reranker-onnx]\"")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 from types import SimpleNamespace
 from typing import Any
@@ -12,6 +13,90 @@ import pytest_asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 
+INGEST_MODULE = "app.services.rag.documents.document_service"
+
+
+class FakeGraphTransformer:
+    """LLMGraphTransformer without the LLM: one graph document per chunk.
+
+    Records processed chunk indices and texts, fails chosen chunk indices
+    and measures the peak number of concurrent calls.
+    """
+
+    def __init__(self, fail_indices=()):
+        self.fail_indices = set(fail_indices)
+        self.active = 0
+        self.max_active = 0
+        self.processed: list[int] = []
+        self.processed_texts: list[str] = []
+
+    async def aprocess_response(self, chunk):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        index = chunk.metadata["chunk_index"]
+        if index in self.fail_indices:
+            raise RuntimeError("LLM zwrócił niepoprawny JSON")
+        self.processed.append(index)
+        self.processed_texts.append(chunk.page_content)
+        return MagicMock(source=chunk)
+
+
+@pytest.fixture
+def ingest_pages() -> list[str]:
+    """Pages of the ingested PDF; override in a test module to change the document."""
+    return [f"Strona {page}. " + "Dane GUS o zatrudnieniu. " * 3 for page in range(6)]
+
+
+@pytest.fixture
+def ingest_document_file(tmp_path):
+    path = tmp_path / "raport.pdf"
+    path.write_bytes(b"%PDF-1.4")
+    return str(path)
+
+
+@pytest.fixture
+def ingest_service():
+    """RAGDocumentService with fake stores and a FakeGraphTransformer (``service.transformer``)."""
+    from app.services.rag.documents import RAGDocumentService
+
+    service = RAGDocumentService.__new__(RAGDocumentService)
+    service.llm = MagicMock()
+    service.vector_store = MagicMock()
+    service.vector_store.embedding.aembed_documents = AsyncMock(
+        side_effect=lambda texts: [[0.1, 0.2] for _ in texts]
+    )
+    service.graph_store = MagicMock()
+    service.transformer = FakeGraphTransformer()
+    service._build_graph_transformer = MagicMock(return_value=service.transformer)
+    return service
+
+
+@pytest.fixture
+def ingest_pipeline(ingest_pages):
+    """Patch loading and side effects of ``ingest_document``: one page = one chunk."""
+    from langchain_core.documents import Document
+
+    from config import rag
+
+    class PagesLoader:
+        def __init__(self, path):
+            self.path = path
+
+        def lazy_load(self):
+            for number, text in enumerate(ingest_pages):
+                yield Document(page_content=text, metadata={"page": number})
+
+    with patch.object(rag.chunking, "chunk_size", 1000), \
+            patch.object(rag.chunking, "chunk_overlap", 0), \
+            patch(f"{INGEST_MODULE}.PyPDFLoader", PagesLoader), \
+            patch(f"{INGEST_MODULE}.bump_index_version", AsyncMock()), \
+            patch(f"{INGEST_MODULE}.schedule_graph_term_indexes"), \
+            patch("app.services.rag.graph.GraphRAGService.enrich_graph_nodes", side_effect=lambda docs, **kwargs: docs):
+        yield
+
+
 @pytest.fixture
 def mock_neo4j_driver():
     """Return an AsyncMock that mirrors the AsyncDriver contract."""
@@ -0,0 +1,194 @@
+"""
+Benchmark backendów rerankera (cross_encoder vs onnx_int8)
+==========================================================
+
+Porównuje na stałym zestawie fixture (zapytania demograficzne + kandydaci):
+- Czas ładowania modelu i warm-up
+- Latencję predict per zapytanie (p50 / p95)
+- Zgodność rankingu z obecnym modelem PyTorch (Kendall tau, top-1, overlap top-3)
+
+Użycie:
+    python tests/manual/test_reranker_backends.py
+
+Wymaga:
+    - sentence-transformers (backend cross_encoder - punkt odniesienia)
+    - pip install -e ".[reranker-onnx]" + python scripts/export_reranker_onnx.py
+"""
+
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import pytest
+
+from app.services.rag.search.reranker import (
+    BACKEND_CROSS_ENCODER,
+    BACKEND_ONNX_INT8,
+    LazyReranker,
+)
+
+pytestmark = pytest.mark.manual
+
+LOAD_TIMEOUT_SECONDS = 300
+REPEATS = 5
+
+# Minimalna akceptowalna zgodność int8 z modelem PyTorch
+MIN_KENDALL_TAU = 0.8
+MIN_TOP3_OVERLAP = 0.8
+
+
+@dataclass
+class RerankFixture:
+    """Zapytanie z kandydatami do rerankingu"""
+    query: str
+    passages: List[str]
+
+
+FIXTURES = [
+    RerankFixture(
+        query="młode kobiety z wyższym wykształceniem w Warszawie",
+        passages=[
+            "Wskaźnik zatrudnienia kobiet w wieku 25-34 lat z wyższym wykształceniem w Warszawie wynosi 86%.",
+            "Seniorzy na obszarach wiejskich najczęściej korzystają z telewizji jako źródła informacji.",
+            "Mediana wynagrodzeń w województwie mazowieckim jest najwyższa w kraju.",
+            "Absolwentki uczelni w dużych miastach częściej wybierają pracę w sektorze usług.",
+            "Produkcja rolna w Polsce wzrosła w 2023 roku o 3%.",
+            "Młodzi mieszkańcy stolicy deklarują wysokie zainteresowanie pracą hybrydową.",
+        ],
+    ),
+    RerankFixture(
+        query="seniorzy w małych miastach i ich dochody",
+        passages=[
+            "Przeciętna emerytura w miastach poniżej 20 tys. mieszkańców jest niższa od średniej krajowej.",
+            "Osoby 65+ w małych miejscowościach częściej mieszkają w domach jednorodzinnych.",
+            "Studenci w Krakowie wydają średnio 40% budżetu na wynajem mieszkania.",
+            "Aktywność zawodowa osób po 60. roku życia rośnie od 2015 roku.",
+            "Ceny energii elektrycznej wzrosły w 2022 roku.",
+        ],
+    ),
+    RerankFixture(
+        query="absolwenci szukający pierwszej pracy",
+        passages=[
+            "Bezrobocie wśród osób do 25. roku życia spadło do 10% w 2023 roku.",
+            "Pracodawcy oczekują od absolwentów doświadczenia zdobytego na stażach.",
+            "Średni wiek matki przy pierwszym porodzie wynosi 28 lat.",
+            "Młodzi absolwenci najczęściej szukają pracy przez portale internetowe.",
+            "Liczba gospodarstw rolnych zmniejsza się od dekady.",
+            "Umowy cywilnoprawne dominują w pierwszej pracy absolwentów.",
+        ],
+    ),
+    RerankFixture(
+        query="wykształcenie średnie a aktywność zawodowa mężczyzn",
+        passages=[
+            "Mężczyźni z wykształceniem zasadniczym zawodowym najczęściej pracują w przemyśle.",
+            "Wskaźnik zatrudnienia mężczyzn z wykształceniem średnim wynosi 78%.",
+            "Kobiety częściej niż mężczyźni kończą studia wyższe.",
+            "Popularność transportu publicznego rośnie w dużych miastach.",
+            "Technikum daje absolwentom kwalifikacje zawodowe cenione przez pracodawców.",
+        ],
+    ),
+]
+
+
+def _ranking(scores: List[float]) -> List[int]:
+    return sorted(range(len(scores)), key=lambda index: scores[index], reverse=True)
+
+
+def kendall_tau(reference: List[float], candidate: List[float]) -> float:
+    """Kendall tau-a między dwiema listami scores (zgodność kolejności par)."""
+    concordant = discordant = 0
+    for i in range(len(reference)):
+        for j in range(i + 1, len(reference)):
+            sign = (reference[i] - reference[j]) * (candidate[i] - candidate[j])
+            if sign > 0:
+                concordant += 1
+            elif sign < 0:
+                discordant += 1
+    pairs = len(reference) * (len(reference) - 1) / 2
+    return (concordant - discordant) / pairs if pairs else 1.0
+
+
+def benchmark_backend(backend: str) -> Dict[str, Any]:
+    """Załaduj backend, zmierz latencję i zwróć scores per fixture."""
+    reranker = LazyReranker(backend)
+    load_start = time.perf_counter()
+    if not reranker.wait_until_loaded(timeout=LOAD_TIMEOUT_SECONDS):
+        return {"backend": backend, "available": False}
+    load_seconds = time.perf_counter() - load_start
+
+    latencies_ms: List[float] = []
+    scores: List[List[float]] = []
+    for fixture in FIXTURES:
+        pairs = [(fixture.query, passage) for passage in fixture.passages]
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            result = reranker.predict(pairs, batch_size=32, show_progress_bar=False)
+            latencies_ms.append((time.perf_counter() - start) * 1000)
+        scores.append([float(score) for score in result])
+
+    latencies_ms.sort()
+    return {
+        "backend": backend,
+        "available": True,
+        "load_seconds": load_seconds,
+        "p50_ms": statistics.median(latencies_ms),
+        "p95_ms": latencies_ms[int(0.95 * (len(latencies_ms) - 1))],
+        "scores": scores,
+    }
+
+
+def compare_rankings(reference: Dict[str, Any], candidate: Dict[str, Any]) -> Dict[str, float]:
+    """Zgodność rankingu kandydata z modelem referencyjnym."""
+    taus, top1, top3 = [], [], []
+    for ref_scores, cand_scores in zip(reference["scores"], candidate["scores"]):
+        ref_rank, cand_rank = _ranking(ref_scores), _ranking(cand_scores)
+        taus.append(kendall_tau(ref_scores, cand_scores))
+        top1.append(1.0 if ref_rank[0] == cand_rank[0] else 0.0)
+        top3.append(len(set(ref_rank[:3]) & set(cand_rank[:3])) / 3)
+    return {
+        "kendall_tau": statistics.mean(taus),
+        "top1_agreement": statistics.mean(top1),
+        "top3_overlap": statistics.mean(top3),
+    }
+
+
+def test_onnx_int8_matches_cross_encoder_ranking():
+    reference = benchmark_backend(BACKEND_CROSS_ENCODER)
+    candidate = benchmark_backend(BACKEND_ONNX_INT8)
+    if not (reference["available"] and candidate["available"]):
+        pytest.skip("Backend rerankera niedostępny (brak zależności lub pliku .onnx)")
+
+    agreement = compare_rankings(reference, candidate)
+
+    assert agreement["kendall_tau"] >= MIN_KENDALL_TAU
+    assert agreement["top3_overlap"] >= MIN_TOP3_OVERLAP
+
+
+def run_benchmark() -> None:
+    print("=" * 80)
+    print("🏁 RERANKER BACKENDS BENCHMARK")
+    print("=" * 80)
+
+    results = {backend: benchmark_backend(backend) for backend in (BACKEND_CROSS_ENCODER, BACKEND_ONNX_INT8)}
+
+    for backend, result in results.items():
+        if not result["available"]:
+            print(f"\n⚠️  {backend}: niedostępny (brak zależności lub pliku modelu)")
+            continue
+        print(f"\n📊 {backend}:")
+        print(f"  Load + warm-up: {result['load_seconds']:.2f}s")
+        print(f"  Predict p50: {result['p50_ms']:.1f}ms | p95: {result['p95_ms']:.1f}ms")
+
+    reference, candidate = results[BACKEND_CROSS_ENCODER], results[BACKEND_ONNX_INT8]
+    if reference["available"] and candidate["available"]:
+        agreement = compare_rankings(reference, candidate)
+        print("\n🔍 Zgodność rankingu onnx_int8 vs cross_encoder:")
+        print(f"  Kendall tau: {agreement['kendall_tau']:.3f} (min {MIN_KENDALL_TAU})")
+        print(f"  Top-1 agreement: {agreement['top1_agreement']:.0%}")
+        print(f"  Top-3 overlap: {agreement['top3_overlap']:.0%} (min {MIN_TOP3_OVERLAP:.0%})")
+        print(f"  Speedup p50: {reference['p50_ms'] / candidate['p50_ms']:.2f}x")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -9,6 +9,10 @@ Te testy weryfikują czy system spełnia wymagania wydajnościowe:
 
 UWAGA: Te testy wymagają prawdziwego Gemini API i mogą być kosztowne
 (wiele wywołań API). Oznaczone jako @pytest.mark.slow.
+
+Bez API: ``SIMULATED_LLM=true`` przełącza build_chat_model / get_embeddings na
+symulowany provider (app/services/shared/simulated_llm.py) - latencja i błędy
+wg ``features.simulated_llm``, mierzymy narzut pipeline'u, nie samego modelu.
 """
 
 import pytest
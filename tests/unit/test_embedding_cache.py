@@ -0,0 +1,108 @@
+"""
+Testy jednostkowe dla cache embeddingów (CachedEmbeddings)
+
+Zakres testów:
+- Klucz cache: model + hash znormalizowanego tekstu
+- Packed float32 round-trip
+- aembed_query: LRU → Redis → API, zapis do Redis przy miss
+- aembed_documents: do API trafiają tylko brakujące teksty
+- Statystyki hit rate / bytes saved
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.shared import embedding_cache
+from app.services.shared.embedding_cache import (
+    CachedEmbeddings,
+    embedding_cache_key,
+    pack_vector,
+    unpack_vector,
+)
+
+MODULE = "app.services.shared.embedding_cache"
+
+
+@pytest.fixture
+def inner():
+    model = MagicMock()
+    model.aembed_query = AsyncMock(return_value=[0.5, -0.25, 1.0])
+    model.aembed_documents = AsyncMock(side_effect=lambda texts: [[float(len(text)), 0.0] for text in texts])
+    model.embed_query = MagicMock(return_value=[0.5, -0.25, 1.0])
+    return model
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats():
+    with patch.object(embedding_cache, "embedding_cache_stats", embedding_cache.EmbeddingCacheStats()):
+        yield
+
+
+def test_cache_key_normalizes_whitespace_and_includes_model():
+    assert embedding_cache_key("m1", "  Młoda   kobieta\nWarszawa ") == embedding_cache_key("m1", "Młoda kobieta Warszawa")
+    assert embedding_cache_key("m1", "tekst") != embedding_cache_key("m2", "tekst")
+
+
+def test_pack_vector_round_trip_uses_four_bytes_per_dimension():
+    payload = pack_vector([0.5, -0.25, 1.0])
+
+    assert len(payload) == 12
+    assert unpack_vector(payload) == [0.5, -0.25, 1.0]
+
+
+@pytest.mark.asyncio
+async def test_aembed_query_hits_lru_after_first_call(inner):
+    cached = CachedEmbeddings(inner, "test-model")
+
+    with patch(f"{MODULE}.redis_mget_bytes", AsyncMock(return_value=[None])), \
+            patch(f"{MODULE}.redis_mset_bytes", AsyncMock(return_value=True)) as mset:
+        first = await cached.aembed_query("zapytanie")
+        second = await cached.aembed_query("zapytanie")
+
+    assert first == second == [0.5, -0.25, 1.0]
+    inner.aembed_query.assert_awaited_once()
+    mset.assert_awaited_once()
+    stats = embedding_cache.embedding_cache_stats.snapshot()
+    assert stats["lru_hits"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["bytes_saved"] == 12
+
+
+@pytest.mark.asyncio
+async def test_aembed_query_uses_redis_before_api(inner):
+    cached = CachedEmbeddings(inner, "test-model")
+    remote = pack_vector([1.0, 2.0])
+
+    with patch(f"{MODULE}.redis_mget_bytes", AsyncMock(return_value=[remote])):
+        vector = await cached.aembed_query("zapytanie")
+
+    assert vector == [1.0, 2.0]
+    inner.aembed_query.assert_not_awaited()
+    assert embedding_cache.embedding_cache_stats.redis_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_aembed_documents_embeds_only_missing_texts(inner):
+    cached = CachedEmbeddings(inner, "test-model")
+    key_b = embedding_cache_key("test-model", "bb")
+
+    async def mget(keys):
+        return [pack_vector([9.0, 9.0]) if key == key_b else None for key in keys]
+
+    with patch(f"{MODULE}.redis_mget_bytes", AsyncMock(side_effect=mget)), \
+            patch(f"{MODULE}.redis_mset_bytes", AsyncMock(return_value=True)) as mset:
+        vectors = await cached.aembed_documents(["a", "bb", "cccc"])
+
+    assert vectors == [[1.0, 0.0], [9.0, 9.0], [4.0, 0.0]]
+    inner.aembed_documents.assert_awaited_once_with(["a", "cccc"])
+    assert len(mset.await_args.args[0]) == 2
+
+
+def test_sync_embed_query_uses_lru_only(inner):
+    cached = CachedEmbeddings(inner, "test-model")
+
+    cached.embed_query("zapytanie")
+    cached.embed_query("zapytanie")
+
+    inner.embed_query.assert_called_once()
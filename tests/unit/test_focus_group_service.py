@@ -36,6 +36,7 @@ class DummyPersona:
         self.income_bracket = "50k-70k"
         self.occupation = "Software Engineer"
         self.background_story = "A tech enthusiast who loves innovation."
+        self.background_summary = None
         self.values = ["Innovation", "Quality"]
         self.interests = []  # Dodane dla zgodności z kodem produkcyjnym
         self.openness = 0.8
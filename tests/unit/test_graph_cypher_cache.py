@@ -0,0 +1,169 @@
+"""
+Testy jednostkowe dla cache Graph RAG (pytanie → Cypher, wynik → odpowiedź)
+
+Zakres testów:
+- Normalizacja pytania, walidacja read-only Cypher, klucze bez wersji indeksu
+- Powtórzone (niemal identyczne) pytanie omija generację Cypher i odpowiedź LLM
+- Negatywny cache Cypher zakończonego błędem; błędy połączenia nie są cache'owane
+- Zmiana wyniku zapytania (hash) wymusza nową odpowiedź
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from neo4j.exceptions import ServiceUnavailable
+
+from app.schemas.rag import GraphRAGQuery
+from app.services.rag.graph import cypher_cache
+from app.services.rag.graph.cypher_cache import is_read_only_cypher, normalize_question
+from app.services.rag.graph.insights_extractor import answer_question
+from config import features
+
+CACHE_MODULE = "app.services.rag.caching.tiered_cache"
+CYPHER = "MATCH (w:Wskaznik) RETURN w.streszczenie AS streszczenie LIMIT 5"
+
+
+@pytest.fixture(autouse=True)
+def redis_store():
+    """Słownik udający Redis; czyste LRU cache Graph RAG w każdym teście."""
+    store: dict[str, bytes] = {}
+
+    async def mget(keys):
+        return [store.get(key) for key in keys]
+
+    async def mset(values, ttl_seconds=None):
+        store.update(values)
+        return True
+
+    caches = (cypher_cache.graph_cypher_cache, cypher_cache.graph_cypher_failure_cache, cypher_cache.graph_answer_cache)
+    for cache in caches:
+        cache.clear_local()
+    with patch.object(features.rag_cache, "enabled", True), \
+            patch(f"{CACHE_MODULE}.redis_mget_bytes", AsyncMock(side_effect=mget)), \
+            patch(f"{CACHE_MODULE}.redis_mset_bytes", AsyncMock(side_effect=mset)), \
+            patch(f"{CACHE_MODULE}.get_index_version", AsyncMock(return_value=1)):
+        yield store
+
+
+def _graph_store(rows=None, error=None):
+    store = MagicMock()
+    store.get_schema = "Node properties: Wskaznik {streszczenie: STRING}"
+    store.query = MagicMock(return_value=rows if rows is not None else [{"streszczenie": "Zatrudnienie 86%"}])
+    if error is not None:
+        store.query.side_effect = error
+    return store
+
+
+def _llm(answer="Odpowiedź"):
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock(return_value=MagicMock(content=answer))
+    return llm
+
+
+async def _ask(question, llm, graph_store, generate):
+    return await answer_question(llm, graph_store, MagicMock(), question, generate)
+
+
+def test_normalization_and_read_only_validation():
+    assert normalize_question("  Ile KOBIET 25-34 pracuje?! ") == normalize_question("ile kobiet 25-34 pracuje")
+    assert is_read_only_cypher(CYPHER)
+    assert not is_read_only_cypher("MATCH (n) DETACH DELETE n")
+    assert not is_read_only_cypher("MERGE (n:Wskaznik {streszczenie: 'x'}) RETURN n")
+
+
+@pytest.mark.parametrize(
+    "cypher",
+    [
+        "MATCH (n:Produkt) WHERE n.name = 'Set Top Box' RETURN n",
+        "MATCH (w:Wskaznik) WHERE toLower(w.streszczenie) CONTAINS 'create' RETURN w",
+        'MATCH (t:Trend) WHERE t.opis = "Merge firm \\" delete" RETURN t',
+        "MATCH (n:`Remove Me`) RETURN n.set AS set_value, n.created",
+        "MATCH (n) // SET n.x = 1\nRETURN n",
+    ],
+)
+def test_write_keywords_in_literals_and_identifiers_are_read_only(cypher):
+    assert is_read_only_cypher(cypher)
+
+
+@pytest.mark.parametrize(
+    "cypher",
+    [
+        "MATCH (n:Produkt {name: 'Set Top Box'}) SET n.cena = 1",
+        "MATCH (n) WHERE n.name = 'x' DETACH DELETE n",
+        "MATCH (n:`Trend`) CREATE (m:Trend) RETURN m",
+        "MATCH (n) WHERE n.name = 'niedomknięty DELETE n",
+    ],
+)
+def test_write_clauses_outside_literals_are_rejected(cypher):
+    assert not is_read_only_cypher(cypher)
+
+
+@pytest.mark.asyncio
+async def test_graph_rag_keys_survive_index_version_bump():
+    with patch(f"{CACHE_MODULE}.get_index_version", AsyncMock(return_value=7)):
+        assert await cypher_cache.graph_cypher_cache.full_key("abc") == "rag:graph_cypher:abc"
+
+
+@pytest.mark.asyncio
+async def test_repeated_question_skips_both_llm_hops():
+    llm, graph_store = _llm(), _graph_store()
+    generate = MagicMock(return_value=GraphRAGQuery(cypher_query=CYPHER, entities=[]))
+
+    first = await _ask("Ile kobiet 25-34 pracuje?", llm, graph_store, generate)
+    second = await _ask("ile kobiet 25-34 pracuje", llm, graph_store, generate)
+
+    assert first == second and second["answer"] == "Odpowiedź"
+    generate.assert_called_once()
+    llm.ainvoke.assert_awaited_once()
+    assert graph_store.query.call_count == 2  # Cypher z cache wykonywany na świeżym grafie
+
+
+@pytest.mark.asyncio
+async def test_changed_query_result_regenerates_answer():
+    llm, graph_store = _llm(), _graph_store()
+    generate = MagicMock(return_value=GraphRAGQuery(cypher_query=CYPHER, entities=[]))
+
+    await _ask("Ile kobiet pracuje?", llm, graph_store, generate)
+    graph_store.query.return_value = [{"streszczenie": "Zatrudnienie 88%"}]
+    await _ask("Ile kobiet pracuje?", llm, graph_store, generate)
+
+    generate.assert_called_once()
+    assert llm.ainvoke.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_cypher_is_negatively_cached():
+    llm = _llm()
+    graph_store = _graph_store(error=ValueError("Generated Cypher Statement is not valid"))
+    generate = MagicMock(return_value=GraphRAGQuery(cypher_query="MATCH (n RETURN n", entities=[]))
+
+    first = await _ask("Zepsute pytanie", llm, graph_store, generate)
+    second = await _ask("Zepsute pytanie", llm, graph_store, generate)
+
+    assert first["graph_context"] == second["graph_context"] == []
+    generate.assert_called_once()
+    graph_store.query.assert_called_once()
+    llm.ainvoke.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_write_cypher_is_rejected_without_execution():
+    graph_store = _graph_store()
+    generate = MagicMock(return_value=GraphRAGQuery(cypher_query="MATCH (n) DETACH DELETE n", entities=[]))
+
+    result = await _ask("Usuń wszystko", _llm(), graph_store, generate)
+
+    assert result["graph_context"] == []
+    graph_store.query.assert_not_called()
+    assert await cypher_cache.get_cached_cypher("Usuń wszystko", cypher_cache.graph_schema_version(graph_store.get_schema))
+
+
+@pytest.mark.asyncio
+async def test_connection_error_is_not_cached():
+    graph_store = _graph_store(error=ServiceUnavailable("neo4j down"))
+    generate = MagicMock(return_value=GraphRAGQuery(cypher_query=CYPHER, entities=[]))
+
+    await _ask("Ile kobiet pracuje?", _llm(), graph_store, generate)
+    await _ask("Ile kobiet pracuje?", _llm(), graph_store, generate)
+
+    assert generate.call_count == 2
@@ -0,0 +1,118 @@
+"""
+Testy jednostkowe dla skompilowanego indeksu słów kluczowych węzłów grafu
+
+Zakres testów:
+- Automat Aho-Corasick znajduje nakładające się słowa kluczowe w jednym przejściu
+- Parytet z dawnym skanem ``keyword in chunk_text`` (doc_id, próg 2 słów)
+- Cache indeksu per wynik graph context (klucz z wersją indeksu)
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.documents import Document
+
+from app.services.rag.graph import node_index
+from app.services.rag.graph.node_index import GraphNodeIndex, KeywordAutomaton, get_graph_node_index
+from app.services.rag.graph.traversal import get_profile_node_index
+from app.services.rag.search.graph_enrichment import find_related_graph_nodes
+from config import features
+
+GRAPH_NODES = [
+    {"type": "Wskaznik", "streszczenie": "Zatrudnienie młodych dorosłych rośnie", "doc_id": "doc-a"},
+    {"type": "Obserwacja", "summary": "Mieszkańcy Warszawy częściej pracują zdalnie", "key_facts": "praca zdalna"},
+    {"type": "Trend", "streszczenie": "Spadek dzietności", "kluczowe_fakty": "dzietność kobiet maleje"},
+    {"type": "Demografia", "streszczenie": "", "kluczowe_fakty": None, "doc_id": "doc-b"},
+]
+
+CHUNKS = [
+    Document(page_content="Zatrudnienie młodych w Warszawie rośnie szybko.", metadata={"doc_id": "doc-x"}),
+    Document(page_content="Mieszkańcy stolicy pracują zdalnie trzy dni w tygodniu.", metadata={"doc_id": "doc-b"}),
+    Document(page_content="Współczynnik dzietności spadł; dzietność kobiet maleje.", metadata={}),
+    Document(page_content="Zatrudnienie", metadata={"doc_id": "doc-a"}),
+]
+
+
+def legacy_related_nodes(chunk_doc, graph_nodes):
+    """Dawna implementacja - węzeł × słowo kluczowe × podciąg tekstu chunku."""
+    related = []
+    chunk_text = chunk_doc.page_content.lower()
+    for node in graph_nodes:
+        if chunk_doc.metadata.get("doc_id", "") == node.get("doc_id", "") and node.get("doc_id"):
+            related.append(node)
+            continue
+        summary = (node.get("streszczenie") or node.get("summary", "") or "").lower()
+        key_facts = (node.get("kluczowe_fakty") or node.get("key_facts", "") or "").lower()
+        keywords = {w for w in summary.split() + key_facts.split() if len(w) > 5}
+        if sum(1 for keyword in keywords if keyword in chunk_text) >= 2:
+            related.append(node)
+    return related
+
+
+@pytest.fixture(autouse=True)
+def clear_node_index_cache():
+    node_index._node_index_cache.clear()
+    yield
+    node_index._node_index_cache.clear()
+
+
+def test_automaton_finds_overlapping_keywords():
+    automaton = KeywordAutomaton(["zatrudnienie", "trudnie", "nienie", "praca"])
+
+    found = {automaton.keywords[i] for i in automaton.find("bezrobocie i zatrudnienie")}
+
+    assert found == {"zatrudnienie", "trudnie", "nienie"}
+    assert automaton.find("") == set()
+
+
+@pytest.mark.parametrize("chunk", CHUNKS, ids=lambda chunk: chunk.page_content[:20])
+def test_related_nodes_match_legacy_scan(chunk):
+    index = GraphNodeIndex(GRAPH_NODES)
+
+    assert index.related_nodes(chunk) == legacy_related_nodes(chunk, GRAPH_NODES)
+    assert find_related_graph_nodes(chunk, GRAPH_NODES, node_index=index) == legacy_related_nodes(
+        chunk, GRAPH_NODES
+    )
+
+
+def test_related_nodes_by_doc_id_and_keywords():
+    index = GraphNodeIndex(GRAPH_NODES)
+
+    related = index.related_nodes(CHUNKS[1])
+
+    # doc-b (Demografia) po doc_id + Obserwacja po słowach "mieszkańcy", "pracują", "zdalnie"
+    assert [node["type"] for node in related] == ["Obserwacja", "Demografia"]
+
+
+def test_node_index_cached_per_graph_context_key():
+    first = get_graph_node_index("rag:graph_context:v3:25-34:any:warszawa:any", GRAPH_NODES)
+    again = get_graph_node_index("rag:graph_context:v3:25-34:any:warszawa:any", GRAPH_NODES)
+    other_version = get_graph_node_index("rag:graph_context:v4:25-34:any:warszawa:any", GRAPH_NODES)
+    changed = get_graph_node_index("rag:graph_context:v3:25-34:any:warszawa:any", GRAPH_NODES[:2])
+
+    assert again is first
+    assert other_version is not first
+    assert changed is not first and len(changed) == 2
+    assert get_graph_node_index(None, GRAPH_NODES) is not get_graph_node_index(None, GRAPH_NODES)
+
+
+@pytest.mark.asyncio
+async def test_profile_node_index_uses_graph_context_key():
+    with patch.object(features.rag_cache, "enabled", True), patch(
+        "app.services.rag.graph.traversal.graph_context_cache.full_key",
+        AsyncMock(side_effect=lambda key: f"rag:graph_context:v7:{key}"),
+    ):
+        first = await get_profile_node_index(GRAPH_NODES, "25-34", "Warszawa", "Wyższe", "kobieta")
+        second = await get_profile_node_index(GRAPH_NODES, "25-34", "Warszawa", "Wyższe", "kobieta")
+
+    assert second is first
+    assert "rag:graph_context:v7:25-34:wyższe:warszawa:kobieta" in node_index._node_index_cache
+
+
+@pytest.mark.asyncio
+async def test_profile_node_index_skips_cache_when_disabled():
+    with patch.object(features.rag_cache, "enabled", False):
+        index = await get_profile_node_index(GRAPH_NODES, "25-34", "Warszawa", "Wyższe", "kobieta")
+
+    assert len(index) == len(GRAPH_NODES)
+    assert not node_index._node_index_cache
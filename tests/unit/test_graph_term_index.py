@@ -0,0 +1,176 @@
+"""
+Testy jednostkowe dla indeksowanego dopasowania terminów w traversal grafu
+
+Zakres testów:
+- Normalizacja tokenów (lowercase, pseudo-lematyzacja, przedziały wiekowe)
+- Zapytanie Lucene z prefiksami i escapingiem znaków specjalnych
+- Terminy zapisywane na węzłach przy ingestcie (enrich_graph_nodes)
+- Recall parity z dawnym CONTAINS na fixture grafie
+- Traversal przekazuje zapytanie Lucene do Cypher z fulltext indexami
+- Przed gotowością indexów: fallback na CONTAINS, przygotowanie indexów w tle
+- ensure_graph_term_indexes: raz na proces pod lockiem, db.awaitIndexes przed flagą
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_community.graphs.graph_document import GraphDocument, Node
+from langchain_core.documents import Document
+
+from app.services.rag.graph.insights_extractor import enrich_graph_nodes
+from app.services.rag.graph import term_index
+from app.services.rag.graph.term_index import (
+    build_lucene_query,
+    ensure_graph_term_indexes,
+    extract_search_terms,
+    term_indexes_ready,
+)
+from app.services.rag.graph.traversal import GraphTraversal
+
+FIXTURE_GRAPH = [
+    ("Wskaznik", "Wskaźnik zatrudnienia kobiet 25-34 z wyższym wykształceniem", "81% w Warszawie"),
+    ("Wskaznik", "Zatrudnienie osób z wykształceniem średnim", "Mężczyźni 35-44: 78%"),
+    ("Obserwacja", "Kobiety w wieku 25-34 częściej pracują hybrydowo", "Warszawa, Kraków"),
+    ("Obserwacja", "Seniorzy na wsi korzystają z telewizji", "65+ lat, obszary wiejskie"),
+    ("Trend", "Rosnąca liczba osób z wyższym wykształceniem", "2015-2023"),
+    ("Trend", "Spadek bezrobocia wśród absolwentów", "wyższe, średnie"),
+    ("Demografia", "Ludność Warszawy według wieku", "Kobieta: 53% mieszkańców"),
+    ("Demografia", "Struktura wykształcenia mieszkańców wsi", "podstawowe 22%"),
+]
+
+TRAVERSAL_MODULE = "app.services.rag.graph.traversal"
+
+PROFILES = [
+    ["25-34", "warszawa", "kobieta", "wyższe"],
+    ["35-44", "kraków", "mężczyzna", "średnie"],
+    ["65+", "wieś", "kobieta", "podstawowe"],
+    ["18-24", "gdańsk", "mężczyzna", "podstawowe", "średnie", "wyższe"],
+]
+
+
+@pytest.fixture(autouse=True)
+def reset_index_state():
+    with patch.object(term_index, "_indexes_ready", False), \
+            patch.object(term_index, "_indexes_lock", asyncio.Lock()), \
+            patch.object(term_index, "_background_task", None):
+        yield
+
+
+def _contains_match(terms, streszczenie, fakty):
+    """Dawna semantyka: toLower(prop) CONTAINS toLower(term)."""
+    return any(term.lower() in streszczenie.lower() or term.lower() in fakty.lower() for term in terms)
+
+
+def _fulltext_match(terms, streszczenie, fakty):
+    """Semantyka indeksu: prefiksowe zapytanie Lucene po tokenach search_text."""
+    node_tokens = extract_search_terms(streszczenie, fakty)
+    query_terms = extract_search_terms(*terms)
+    return any(token.startswith(term) for term in query_terms for token in node_tokens)
+
+
+def test_extract_search_terms_keeps_ranges_and_stems():
+    terms = extract_search_terms("Kobiety 25-34 z wyższymi dochodami")
+
+    assert "25-34" in terms
+    assert "wyższymi" in terms and "wyższ" in terms
+    assert "z" not in terms
+
+
+def test_lucene_query_escapes_special_characters():
+    query = build_lucene_query(["25-34", "Warszawa"])
+
+    assert query == "25\\-34* OR warszawa*"
+
+
+def test_enrich_graph_nodes_stores_search_terms_for_indexed_labels():
+    indicator = Node(id="zatrudnienie", type="Wskaznik", properties={"streszczenie": "Zatrudnienie kobiet w Warszawie"})
+    location = Node(id="warszawa", type="Lokalizacja", properties={})
+    graph_doc = GraphDocument(nodes=[indicator, location], relationships=[], source=Document(page_content="x"))
+
+    enrich_graph_nodes([graph_doc], doc_id="doc-1", metadata={})
+
+    assert "warszawie" in indicator.properties["search_terms"]
+    assert indicator.properties["search_text"] == " ".join(indicator.properties["search_terms"])
+    assert "search_text" not in location.properties
+
+
+@pytest.mark.parametrize("profile", PROFILES)
+def test_fulltext_matching_has_recall_parity_with_contains(profile):
+    for label, streszczenie, fakty in FIXTURE_GRAPH:
+        if _contains_match(profile, streszczenie, fakty):
+            assert _fulltext_match(profile, streszczenie, fakty), (label, streszczenie)
+
+
+@pytest.mark.asyncio
+async def test_traversal_queries_fulltext_indexes_with_lucene_terms():
+    graph_store = MagicMock()
+    graph_store.query.return_value = [{"graph_context": [{"type": "Wskaznik", "streszczenie": "81%"}]}]
+    traversal = GraphTraversal(graph_store)
+
+    with patch.object(traversal, "_set_cache", AsyncMock()), \
+            patch.object(term_index, "_indexes_ready", True), \
+            patch(f"{TRAVERSAL_MODULE}.schedule_graph_term_indexes") as schedule:
+        result = await traversal._query_graph_context("key", "25-34", "Warszawa", "Wyższe (Magister)", "kobieta")
+
+    schedule.assert_not_called()
+    cypher, = graph_store.query.call_args.args
+    assert "toLower(" not in cypher
+    assert "db.index.fulltext.queryNodes('graph_terms_wskaznik'" in cypher
+    assert graph_store.query.call_args.kwargs["params"] == {"lucene_query": "25\\-34* OR warszawa* OR kobieta* OR wyższe*"}
+    assert result == [{"type": "Wskaznik", "streszczenie": "81%"}]
+
+
+@pytest.mark.asyncio
+async def test_traversal_falls_back_to_contains_until_indexes_are_ready():
+    graph_store = MagicMock()
+    graph_store.query.return_value = [{"graph_context": [{"type": "Trend", "streszczenie": "Wzrost"}]}]
+    traversal = GraphTraversal(graph_store)
+
+    with patch.object(traversal, "_set_cache", AsyncMock()), \
+            patch(f"{TRAVERSAL_MODULE}.schedule_graph_term_indexes") as schedule:
+        result = await traversal._query_graph_context("key", "25-34", "Warszawa", "", "kobieta")
+
+    schedule.assert_called_once_with(graph_store)
+    cypher, = graph_store.query.call_args.args
+    assert "db.index.fulltext" not in cypher
+    for label in term_index.TERM_INDEXED_LABELS:
+        assert f":{label})" in cypher
+    assert "toLower(coalesce(ind.kluczowe_fakty, '')) CONTAINS toLower(term)" in cypher
+    assert graph_store.query.call_args.kwargs["params"] == {"search_terms": ["25-34", "warszawa", "kobieta"]}
+    assert result == [{"type": "Trend", "streszczenie": "Wzrost"}]
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_runs_once_and_awaits_population_before_ready():
+    calls: list[str] = []
+
+    def query(cypher, params=None):
+        calls.append(cypher)
+        assert not term_indexes_ready()
+        return []
+
+    graph_store = MagicMock()
+    graph_store.query = MagicMock(side_effect=query)
+
+    results = await asyncio.gather(*(ensure_graph_term_indexes(graph_store) for _ in range(3)))
+
+    assert results == [True] * 3 and term_indexes_ready()
+    assert sum("CREATE FULLTEXT INDEX" in cypher for cypher in calls) == len(term_index.TERM_INDEXED_LABELS)
+    assert calls[-1] == "CALL db.awaitIndexes($timeout)"
+    assert sum("db.awaitIndexes" in cypher for cypher in calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_index_population_leaves_fallback_and_is_retried_in_background():
+    graph_store = MagicMock()
+    graph_store.query = MagicMock(side_effect=RuntimeError("Neo4j niedostępny"))
+
+    assert await term_index.schedule_graph_term_indexes(graph_store) is False
+    assert not term_indexes_ready()
+
+    graph_store.query = MagicMock(return_value=[])
+    task = term_index.schedule_graph_term_indexes(graph_store)
+    assert task is term_index.schedule_graph_term_indexes(graph_store)
+    assert await task is True
+    assert term_index.schedule_graph_term_indexes(graph_store) is None
@@ -0,0 +1,189 @@
+"""
+Testy jednostkowe dla trybu batch dużych zadań generacji (app/services/shared/llm_batch.py)
+
+Zakres testów:
+- Zbieranie współbieżnych wywołań w jeden plik requestów, polling, rozesłanie wyników
+- Persony: structured output i repair call przez te same ścieżki walidacji (drugi plik)
+- Ankiety: odpowiedzi z batch dopasowane do opcji jak w trybie online
+- Błąd pojedynczego requestu, sync invoke → TypeError, provider local (stand-in), progi włączenia trybu
+"""
+
+import asyncio
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.prompts import ChatPromptTemplate
+
+from app.schemas.persona import PersonaProfileOutput
+from app.services.personas import PersonaGeneratorLangChain
+from app.services.shared import llm_batch
+from app.services.shared.clients import with_schema_output
+from app.services.shared.llm_batch import (
+    STATUS_RUNNING,
+    STATUS_SUCCEEDED,
+    BatchChatModel,
+    BatchCollector,
+    BatchRequestError,
+    BatchResult,
+    LocalBatchProvider,
+    read_requests,
+    read_results,
+    use_batch_mode,
+    write_jsonl,
+)
+from app.services.surveys import SurveyResponseGenerator
+from config import features
+
+USAGE = {"input_tokens": 50, "output_tokens": 10, "total_tokens": 60}
+
+
+def _persona_payload(index: int, **overrides):
+    payload = {
+        "full_name": f"Anna Kowalska {index}",
+        "persona_title": "Księgowa",
+        "headline": "Księgowa (34) z Poznania szukająca stabilności",
+        "background_story": "Anna od dziesięciu lat pracuje w biurze rachunkowym w Poznaniu. " * 3,
+        "values": ["Rodzina", "Stabilność", "Uczciwość"],
+        "interests": ["Bieganie", "Książki", "Gotowanie"],
+    }
+    payload.update(overrides)
+    return payload
+
+
+class FakeBatchProvider:
+    """Provider odpowiadający z pliku requestów wg funkcji ``answer``."""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.jobs: dict[str, list] = {}
+        self.polls = 0
+
+    async def submit(self, requests_path: Path) -> str:
+        job_id = f"fake-{len(self.jobs)}"
+        self.jobs[job_id] = read_requests(requests_path)
+        self._dir = requests_path.parent
+        return job_id
+
+    async def status(self, job_id: str) -> str:
+        self.polls += 1
+        return STATUS_RUNNING if self.polls % 2 else STATUS_SUCCEEDED
+
+    async def results(self, job_id: str) -> Path:
+        path = self._dir / f"{job_id}.results.jsonl"
+        write_jsonl(path, [self.answer(request) for request in self.jobs[job_id]])
+        return path
+
+
+@pytest.fixture(autouse=True)
+def fast_batch_config():
+    with patch.object(features.llm_batch, "collect_window_seconds", 0.01), \
+            patch.object(features.llm_batch, "poll_interval_seconds", 0.0):
+        yield
+
+
+def _batch_model(provider, tmp_path, job_name="job"):
+    collector = BatchCollector(provider, job_name=job_name, work_dir=tmp_path)
+    return BatchChatModel(collector=collector, params={"model": "gemini-2.5-flash", "temperature": 0.9})
+
+
+def _persona_generator(llm):
+    generator = PersonaGeneratorLangChain.__new__(PersonaGeneratorLangChain)
+    generator.llm = llm
+    generator.persona_prompt = ChatPromptTemplate.from_messages([("system", "system"), ("user", "{prompt}")])
+    generator.structured_llm = with_schema_output(llm, PersonaProfileOutput, include_raw=True)
+    return generator
+
+
+@pytest.mark.asyncio
+async def test_persona_requests_share_one_file_and_repair_goes_to_next(tmp_path):
+    def answer(request):
+        prompt = request.messages[-1]["data"]["content"]
+        properties = set(request.response_schema["properties"])
+        if properties == {"full_name"}:  # repair call
+            payload = {"full_name": "Jan Nowak"}
+        else:
+            index = int(prompt.split()[-1])
+            payload = _persona_payload(index, full_name="N/A" if index == 0 else f"Anna Kowalska {index}")
+        return BatchResult(custom_id=request.custom_id, content=json.dumps(payload), usage=USAGE)
+
+    provider = FakeBatchProvider(answer)
+    generator = _persona_generator(_batch_model(provider, tmp_path, "personas-p1"))
+
+    personas = await asyncio.gather(*(generator._invoke_persona_llm(f"Persona {i}") for i in range(3)))
+
+    assert [len(requests) for requests in provider.jobs.values()] == [3, 1]
+    assert personas[0]["full_name"] == "Jan Nowak"
+    assert personas[2]["full_name"] == "Anna Kowalska 2"
+    assert sorted(path.name for path in tmp_path.glob("personas-p1/*.requests.jsonl")) == [
+        "personas-p1-0001.requests.jsonl",
+        "personas-p1-0002.requests.jsonl",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_result_carries_usage_and_failed_request_raises(tmp_path):
+    def answer(request):
+        if request.messages[-1]["data"]["content"] == "zły":
+            return BatchResult(custom_id=request.custom_id, error="INVALID_ARGUMENT")
+        return BatchResult(custom_id=request.custom_id, content="Tak", usage=USAGE)
+
+    model = _batch_model(FakeBatchProvider(answer), tmp_path)
+
+    ok, failed = await asyncio.gather(model.ainvoke("dobry"), model.ainvoke("zły"), return_exceptions=True)
+
+    assert ok.content == "Tak" and ok.usage_metadata["total_tokens"] == 60
+    assert isinstance(failed, BatchRequestError)
+    with pytest.raises(TypeError, match="only async"):
+        await asyncio.to_thread(model.invoke, "sync")
+
+
+@pytest.mark.asyncio
+async def test_survey_answers_are_matched_like_online_mode(tmp_path):
+    def answer(request):
+        content = "4" if "Ocena?" in request.messages[-1]["data"]["content"] else "Raczej tak"
+        return BatchResult(custom_id=request.custom_id, content=content, usage=USAGE)
+
+    provider = FakeBatchProvider(answer)
+    service = SurveyResponseGenerator(llm=_batch_model(provider, tmp_path))
+
+    answers = await asyncio.gather(
+        service._answer_single_choice("Persona", "Czy kupisz?", "", ["Raczej tak", "Nie"]),
+        service._answer_rating_scale("Persona", "Ocena?", "", 1, 5),
+    )
+
+    assert answers == ["Raczej tak", 4]
+    assert len(provider.jobs) == 1
+
+
+@pytest.mark.asyncio
+async def test_local_provider_executes_request_file(tmp_path):
+    class FakeChatModel(BaseChatModel):
+        @property
+        def _llm_type(self) -> str:
+            return "fake"
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            message = AIMessage(content=f"echo: {messages[-1].content}", usage_metadata=USAGE)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+    provider = LocalBatchProvider(concurrency=2)
+    with patch.object(llm_batch, "build_chat_model", return_value=FakeChatModel()) as build:
+        model = _batch_model(provider, tmp_path)
+        response = await model.ainvoke("Pytanie")
+
+    assert response.content == "echo: Pytanie"
+    build.assert_called_once_with(model="gemini-2.5-flash", temperature=0.9, request_priority="batch")
+    results = read_results(next(tmp_path.glob("job/*.results.jsonl")))
+    assert results[0].usage == USAGE
+
+
+def test_batch_mode_thresholds():
+    with patch.object(features.llm_batch, "enabled", True):
+        assert use_batch_mode(500, features.llm_batch.persona_min_count)
+        assert not use_batch_mode(499, features.llm_batch.persona_min_count)
+    assert not use_batch_mode(10_000, features.llm_batch.persona_min_count)
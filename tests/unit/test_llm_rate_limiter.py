@@ -0,0 +1,197 @@
+"""
+Testy jednostkowe dla globalnego limitera RPM/TPM (app/services/shared/rate_limiter.py)
+
+Zakres testów:
+- Limity per model z models.yaml, wpięcie w build_chat_model (priorytet call site)
+- Czekanie wg podpowiedzi skryptu Lua, rezerwa pojemności dla batch
+- Interaktywne wywołania przed batch w procesie
+- Korekta TPM o faktyczne usage po odpowiedzi; trafienie cache nie zużywa limitu
+- Fail-open przy niedostępnym Redis
+- Ścieżka sync (invoke w wątku) czeka na ten sam kubełek przez sync klienta Redis
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.services.shared import rate_limiter
+from app.services.shared.clients import build_chat_model
+from app.services.shared.llm_cache import LLMResponseCache, SQLiteResponseBackend
+from app.services.shared.rate_limiter import (
+    ACQUIRE_SCRIPT,
+    RECONCILE_SCRIPT,
+    RedisTokenBucketLimiter,
+    RequestPriority,
+    get_rate_limiter,
+)
+from config import features
+
+
+class UsageChatModel(BaseChatModel):
+    """Model z usage_metadata (128 tokenów) bez wywołań sieciowych."""
+
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "usage-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        message = AIMessage(
+            content="Odpowiedź",
+            usage_metadata={"input_tokens": 100, "output_tokens": 28, "total_tokens": 128},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+@pytest.fixture(autouse=True)
+def reset_limiter_state():
+    rate_limiter._limiters.clear()
+    RedisTokenBucketLimiter._waiting.clear()
+    RedisTokenBucketLimiter._redis_down_until = 0.0
+    with patch.object(features.llm_rate_limit, "min_poll_ms", 5):
+        yield
+    rate_limiter._limiters.clear()
+    RedisTokenBucketLimiter._redis_down_until = 0.0
+
+
+def _fake_eval(results):
+    """redis_eval zwracający kolejne wartości i zapisujący wywołania."""
+    calls: list[tuple[str, list, list]] = []
+    iterator = iter(results)
+
+    async def fake(script, keys, args):
+        calls.append((script, keys, args))
+        return next(iterator) if script == ACQUIRE_SCRIPT else 1
+
+    return calls, fake
+
+
+def test_limits_from_models_yaml_and_build_chat_model(monkeypatch):
+    flash = get_rate_limiter("gemini-2.5-flash", "interactive")
+    assert (flash.rpm, flash.tpm, flash.reserve) == (1000, 1_000_000, 0.0)
+    assert get_rate_limiter("gemini-2.5-flash", "interactive") is flash
+    assert get_rate_limiter("gemini-2.5-pro").estimated_tokens == 6000
+    assert get_rate_limiter("gemini-2.5-pro").reserve == features.llm_rate_limit.batch_reserve_fraction
+    assert get_rate_limiter("models/gemini-embedding-001") is None
+    with patch.object(features.llm_rate_limit, "enabled", False):
+        assert get_rate_limiter("gemini-2.5-flash") is None
+
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    llm = build_chat_model(model="gemini-2.5-flash", request_priority="interactive")
+    assert llm.rate_limiter is flash
+    assert flash.reconciler in llm.callbacks
+
+
+@pytest.mark.asyncio
+async def test_acquire_sleeps_for_hint_and_sends_reserve():
+    calls, fake = _fake_eval([20, 0])
+    limiter = RedisTokenBucketLimiter("gemini-2.5-flash", 1000, 1_000_000, estimated_tokens=500)
+
+    with patch.object(rate_limiter, "redis_eval", fake):
+        assert await limiter.aacquire() is True
+
+    assert len(calls) == 2
+    script, keys, args = calls[0]
+    assert keys == ["llm_rl:gemini-2.5-flash"]
+    assert args == [1000, 1_000_000, 500, features.llm_rate_limit.batch_reserve_fraction]
+
+
+@pytest.mark.asyncio
+async def test_interactive_waiters_go_ahead_of_batch():
+    bucket = {"available": 0}
+    order: list[str] = []
+
+    async def fake(script, keys, args):
+        if bucket["available"] > 0:
+            bucket["available"] -= 1
+            return 0
+        return 10
+
+    batch = RedisTokenBucketLimiter("m", 10, None, priority=RequestPriority.BATCH)
+    interactive = RedisTokenBucketLimiter("m", 10, None, priority=RequestPriority.INTERACTIVE)
+
+    async def call(limiter, name):
+        await limiter.aacquire()
+        order.append(name)
+
+    with patch.object(rate_limiter, "redis_eval", fake):
+        batch_task = asyncio.create_task(call(batch, "batch"))
+        await asyncio.sleep(0.02)
+        interactive_task = asyncio.create_task(call(interactive, "interactive"))
+        await asyncio.sleep(0.02)
+        bucket["available"] = 1
+        await interactive_task
+        bucket["available"] = 1
+        await batch_task
+
+    assert order == ["interactive", "batch"]
+
+
+@pytest.mark.asyncio
+async def test_model_call_reconciles_tokens_and_cache_hits_are_free():
+    calls, fake = _fake_eval([0, 0])
+    limiter = RedisTokenBucketLimiter("gemini-2.5-flash", 1000, 1_000_000, estimated_tokens=2000)
+    model = UsageChatModel(
+        rate_limiter=limiter,
+        callbacks=[limiter.reconciler],
+        cache=LLMResponseCache(SQLiteResponseBackend(":memory:"), ttl_seconds=60),
+    )
+
+    with patch.object(rate_limiter, "redis_eval", fake):
+        await model.ainvoke("Pytanie")
+        await model.ainvoke("Pytanie")  # trafienie cache - bez limitu i korekty
+
+    assert model.calls == 1
+    assert [script for script, _, _ in calls] == [ACQUIRE_SCRIPT, RECONCILE_SCRIPT]
+    assert calls[1][2] == [128 - 2000, 1_000_000]
+
+
+@pytest.mark.asyncio
+async def test_redis_unavailable_fails_open_with_backoff():
+    eval_mock = AsyncMock(return_value=None)
+    limiter = RedisTokenBucketLimiter("gemini-2.5-flash", 1000, 1_000_000)
+
+    with patch.object(rate_limiter, "redis_eval", eval_mock):
+        assert await limiter.aacquire() is True
+        assert await limiter.aacquire() is True
+
+    eval_mock.assert_awaited_once()
+
+
+def test_sync_path_waits_on_same_bucket():
+    results = iter([20, 0])
+    calls: list[tuple[str, list, list]] = []
+
+    def fake_sync(script, keys, args):
+        calls.append((script, keys, args))
+        return next(results)
+
+    limiter = RedisTokenBucketLimiter("gemini-2.5-flash", 1000, 1_000_000, estimated_tokens=500)
+    model = UsageChatModel(rate_limiter=limiter, callbacks=[limiter.reconciler])
+
+    with patch.object(rate_limiter, "redis_eval_sync", fake_sync), \
+            patch.object(rate_limiter, "redis_eval", AsyncMock()) as eval_mock:
+        assert model.invoke("Pytanie").content == "Odpowiedź"
+
+    assert [script for script, _, _ in calls] == [ACQUIRE_SCRIPT, ACQUIRE_SCRIPT]
+    assert calls[0][1:] == (["llm_rl:gemini-2.5-flash"], [1000, 1_000_000, 500, limiter.reserve])
+    eval_mock.assert_not_called()
+
+
+def test_sync_path_fails_open_and_honours_non_blocking():
+    limiter = RedisTokenBucketLimiter("gemini-2.5-flash", 1000, 1_000_000)
+
+    with patch.object(rate_limiter, "redis_eval_sync", return_value=50):
+        assert limiter.acquire(blocking=False) is False
+    with patch.object(rate_limiter, "redis_eval_sync", return_value=None) as eval_sync:
+        assert limiter.acquire() is True
+        assert limiter.acquire() is True
+
+    eval_sync.assert_called_once()
+    assert RedisTokenBucketLimiter._waiting[(limiter.model, limiter.priority)] == 0
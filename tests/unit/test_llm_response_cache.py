@@ -0,0 +1,149 @@
+"""
+Testy jednostkowe dla cache odpowiedzi chat modeli (app/services/shared/llm_cache.py)
+
+Zakres testów:
+- Powtórzony prompt obsłużony z cache (SQLite), zmiana parametrów modelu = miss
+- Trafienie ma zerowe usage_metadata i jest logowane jako wywołanie bez tokenów
+- Polityka: call site (response_cache) + próg temperatury, wpięcie w build_chat_model
+- Backend Redis przez binarną pulę
+"""
+
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.services.dashboard.usage import UsageLogContext, log_usage_from_metadata
+from app.services.shared import llm_cache
+from app.services.shared.clients import build_chat_model
+from app.services.shared.llm_cache import (
+    LLMResponseCache,
+    RedisResponseBackend,
+    SQLiteResponseBackend,
+    resolve_response_cache,
+)
+from config import features
+
+
+class CountingChatModel(BaseChatModel):
+    """Model zwracający stałą odpowiedź i liczący wywołania API."""
+
+    temperature: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "counting-fake"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"temperature": self.temperature}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        message = AIMessage(
+            content=f"Młodzi Prekariusze #{self.calls}",
+            usage_metadata={"input_tokens": 120, "output_tokens": 8, "total_tokens": 128},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+@pytest.fixture
+def sqlite_cache():
+    return LLMResponseCache(SQLiteResponseBackend(":memory:"), ttl_seconds=3600)
+
+
+@pytest.mark.asyncio
+async def test_repeated_prompt_is_served_from_cache_with_zero_usage(sqlite_cache):
+    model = CountingChatModel(cache=sqlite_cache)
+
+    first = await model.ainvoke("Nazwij segment: 18-24, niskie dochody")
+    second = await model.ainvoke("Nazwij segment: 18-24, niskie dochody")
+
+    assert model.calls == 1
+    assert second.content == first.content
+    assert first.usage_metadata["total_tokens"] == 128
+    assert second.usage_metadata["total_tokens"] == 0
+    assert second.response_metadata["cache_hit"] is True
+
+
+@pytest.mark.asyncio
+async def test_different_params_or_messages_miss(sqlite_cache):
+    cold = CountingChatModel(cache=sqlite_cache)
+    hot = CountingChatModel(cache=sqlite_cache, temperature=0.7)
+
+    await cold.ainvoke("Nazwij segment A")
+    await hot.ainvoke("Nazwij segment A")
+    await cold.ainvoke("Nazwij segment B")
+
+    assert cold.calls == 2 and hot.calls == 1
+
+
+def test_sync_path_uses_sqlite_backend(sqlite_cache):
+    model = CountingChatModel(cache=sqlite_cache)
+    model.invoke("Nazwij segment")
+    assert model.invoke("Nazwij segment").response_metadata["cache_hit"] is True
+    assert model.calls == 1
+
+
+def test_policy_call_site_and_temperature(monkeypatch):
+    monkeypatch.setattr(llm_cache, "_response_cache", None)
+    with patch.object(features.llm_cache, "backend", "sqlite"), \
+            patch.object(features.llm_cache, "sqlite_path", ":memory:"), \
+            patch.object(features.llm_cache, "max_temperature", 0.2):
+        assert resolve_response_cache(None, 0.1) is not None
+        assert resolve_response_cache(None, 0.7) is None
+        assert resolve_response_cache(True, 0.7) is not None
+        assert resolve_response_cache(False, 0.0) is None
+        with patch.object(features.llm_cache, "enabled", False):
+            assert resolve_response_cache(True, 0.0) is None
+
+        monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+        assert isinstance(build_chat_model(temperature=0.0).cache, LLMResponseCache)
+        assert build_chat_model(temperature=0.9).cache is None
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_is_logged_as_zero_token_call():
+    service = MagicMock()
+    service.track_token_usage = AsyncMock()
+    session = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    context = UsageLogContext(user_id="user-1", operation_type="segment_naming", model_name="gemini-2.5-flash")
+    usage = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0, "cache_hit": True}
+
+    module = "app.services.dashboard.usage.usage_logging"
+    with patch(f"{module}.AsyncSessionLocal", return_value=session), \
+            patch(f"{module}.UsageTrackingService", return_value=service):
+        await log_usage_from_metadata(context, usage)
+        await log_usage_from_metadata(context, {"input_tokens": 0, "output_tokens": 0})
+
+    service.track_token_usage.assert_awaited_once()
+    kwargs = service.track_token_usage.await_args.kwargs
+    assert (kwargs["input_tokens"], kwargs["output_tokens"]) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_roundtrip():
+    store: dict[str, bytes] = {}
+
+    async def mget(keys):
+        return [store.get(key) for key in keys]
+
+    async def mset(values, ttl_seconds=None):
+        store.update(values)
+        return True
+
+    with patch.object(llm_cache, "redis_mget_bytes", AsyncMock(side_effect=mget)), \
+            patch.object(llm_cache, "redis_mset_bytes", AsyncMock(side_effect=mset)):
+        model = CountingChatModel(cache=LLMResponseCache(RedisResponseBackend(), ttl_seconds=60))
+        await model.ainvoke("Nazwij segment")
+        second = await model.ainvoke("Nazwij segment")
+
+    assert model.calls == 1
+    assert second.usage_metadata["cache_hit"] is True
+    assert all(key.startswith("llm:") for key in store)
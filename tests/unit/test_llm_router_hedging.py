@@ -0,0 +1,162 @@
+"""
+Testy jednostkowe dla statystyk latencji i hedged requests w LLMRouter
+
+Zakres testów:
+- Rolling p50/p95 i error rate per provider
+- Callback modeli routera: latencja udanych wywołań, błędy, pomijanie anulowanych
+- Hedge po p95 primary: wygrywa pierwsza odpowiedź, przegrany anulowany
+- Budżet hedgy i brak hedge bez wystarczających statystyk
+- Degradacja providera przy wysokim error rate, wpięcie w get_chat_model
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.services.shared.llm_router import (
+    HedgedChatModel,
+    LLMProvider,
+    LLMRouter,
+    ProviderLatencyStats,
+    TaskComplexity,
+)
+from config import features
+
+
+class SlowChatModel(BaseChatModel):
+    """Model odpowiadający po ``delay`` sekundach; zapamiętuje anulowanie."""
+
+    name_tag: str
+    delay: float = 0.0
+    fail: bool = False
+    cancelled: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.name_tag))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.fail:
+            raise RuntimeError(f"{self.name_tag} failed")
+        return self._generate(messages)
+
+
+@pytest.fixture
+def router():
+    with patch.object(features.llm_router, "min_samples", 5), \
+            patch.object(features.llm_router, "min_hedge_delay_seconds", 0.0), \
+            patch.object(features.llm_router, "hedge_budget_fraction", 1.0):
+        yield LLMRouter()
+
+
+def _warm_up(router: LLMRouter, provider: LLMProvider, latency: float, count: int = 5) -> None:
+    for _ in range(count):
+        router.record_call(provider, latency)
+
+
+def _hedged(router: LLMRouter, primary: SlowChatModel, hedge: SlowChatModel) -> HedgedChatModel:
+    return HedgedChatModel(primary=primary, hedge=hedge, primary_provider=LLMProvider.GEMINI, router=router)
+
+
+def test_latency_stats_percentiles_and_error_rate():
+    stats = ProviderLatencyStats(window=4)
+    for latency in (0.5, 0.1, 0.2, 0.4, 0.3):
+        stats.record(latency)
+    stats.record(None, error=True)
+
+    assert list(stats.latencies) == [0.1, 0.2, 0.4, 0.3]
+    assert stats.p50 == 0.2 and stats.p95 == 0.4
+    assert stats.error_rate == 0.25
+    assert stats.snapshot()["samples"] == 4
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_loser_cancelled(router):
+    _warm_up(router, LLMProvider.GEMINI, 0.01)
+    primary = SlowChatModel(name_tag="primary", delay=5.0)
+    hedge = SlowChatModel(name_tag="hedge", delay=0.0)
+
+    response = await _hedged(router, primary, hedge).ainvoke("Pytanie")
+    await asyncio.sleep(0)
+
+    assert response.content == "hedge"
+    assert primary.cancelled
+    assert router.get_latency_summary()["hedging"] == {"calls": 1, "hedged": 1, "budget_fraction": 1.0}
+
+
+@pytest.mark.asyncio
+async def test_failed_hedge_falls_back_to_primary(router):
+    _warm_up(router, LLMProvider.GEMINI, 0.01)
+    primary = SlowChatModel(name_tag="primary", delay=0.1)
+    hedge = SlowChatModel(name_tag="hedge", fail=True)
+
+    response = await _hedged(router, primary, hedge).ainvoke("Pytanie")
+
+    assert response.content == "primary"
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_without_stats_or_budget(router):
+    primary = SlowChatModel(name_tag="primary", delay=0.05)
+    hedge = SlowChatModel(name_tag="hedge")
+    model = _hedged(router, primary, hedge)
+
+    assert router.hedge_delay(LLMProvider.GEMINI) is None
+    assert (await model.ainvoke("Pytanie")).content == "primary"
+
+    _warm_up(router, LLMProvider.GEMINI, 0.01)
+    with patch.object(features.llm_router, "hedge_budget_fraction", 0.0):
+        assert (await model.ainvoke("Pytanie")).content == "primary"
+    assert router.get_latency_summary()["hedging"]["hedged"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stats_callback_records_latency_and_errors(router):
+    callback = router._stats_callback(LLMProvider.OPENAI)
+    ok = SlowChatModel(name_tag="ok", delay=0.01, callbacks=[callback])
+    broken = SlowChatModel(name_tag="broken", fail=True, callbacks=[callback])
+
+    await ok.ainvoke("Pytanie")
+    with pytest.raises(RuntimeError):
+        await broken.ainvoke("Pytanie")
+
+    stats = router.latency_stats[LLMProvider.OPENAI]
+    assert stats.samples == 2 and stats.error_rate == 0.5
+    assert stats.p50 >= 0.01
+
+
+def test_high_error_rate_degrades_provider(router, monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    assert router.is_provider_available(LLMProvider.GEMINI)
+
+    for _ in range(5):
+        router.record_call(LLMProvider.GEMINI, None, error=True)
+
+    assert not router.is_provider_available(LLMProvider.GEMINI)
+    assert router.get_latency_summary()["gemini"]["degraded"] is True
+
+
+def test_get_chat_model_with_hedge(router, monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+
+    model = router.get_chat_model(task_complexity=TaskComplexity.SIMPLE, hedge=True)
+
+    assert isinstance(model, HedgedChatModel)
+    assert model.primary.model.endswith("gemini-2.5-flash")
+    assert model.hedge.model.endswith("gemini-2.5-flash")  # jedyny provider - duplikat requestu
+    assert router._stats_callback(LLMProvider.GEMINI) in model.primary.callbacks
+    assert not isinstance(router.get_chat_model(task_complexity=TaskComplexity.SIMPLE), HedgedChatModel)
@@ -0,0 +1,109 @@
+"""
+Testy jednostkowe dla strumieniowego backupu Neo4j (scripts/backup_neo4j.py)
+
+Zakres testów:
+- Kodowanie property (typy temporalne, bajty) tam i z powrotem przez JSON
+- Rotacja shardów JSONL.gz i odczyt paczkami
+- Eksport strumieniem (fetch_size) + manifest + weryfikacja
+- Restore: paczki UNWIND grupowane po etykietach / typie relacji, sprzątanie w IN TRANSACTIONS
+"""
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from neo4j.time import Date, DateTime
+
+from scripts.backup_neo4j import (
+    MANIFEST_FILE,
+    NODES,
+    RELATIONSHIPS,
+    RESTORE_CLEANUP_QUERY,
+    Neo4jBackup,
+    ShardWriter,
+    decode_properties,
+    encode_properties,
+    iter_shard_batches,
+)
+
+NODE_ROWS = [
+    {"id": f"4:n:{i}", "labels": ["Wskaznik"] if i % 2 else ["Document", "RAGChunk"], "properties": {"streszczenie": f"węzeł {i}"}}
+    for i in range(5)
+]
+REL_ROWS = [
+    {"id": "5:r:0", "type": "MENTIONS", "start": "4:n:0", "end": "4:n:1", "properties": {}},
+    {"id": "5:r:1", "type": "DOTYCZY", "start": "4:n:1", "end": "4:n:3", "properties": {"pewnosc": "wysoka"}},
+]
+
+
+@pytest.fixture
+def backup(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return Neo4jBackup(driver=MagicMock())
+
+
+def test_properties_roundtrip_through_json():
+    props = {
+        "created": DateTime(2024, 5, 1, 10, 0, 0),
+        "day": Date(2024, 5, 1),
+        "raw": b"\x00\x01",
+        "doc_ids": ["a", "b"],
+        "pewnosc": 0.9,
+        "empty": None,
+    }
+
+    encoded = json.loads(json.dumps(encode_properties(props)))
+
+    assert "empty" not in encoded
+    assert decode_properties(encoded) == {k: v for k, v in props.items() if v is not None}
+
+
+def test_shard_writer_rotates_and_reads_back_in_batches(tmp_path):
+    writer = ShardWriter(tmp_path, NODES, shard_size=2)
+    for row in NODE_ROWS:
+        writer.write(row)
+    shards = writer.close()
+
+    assert [shard["records"] for shard in shards] == [2, 2, 1]
+    assert [shard["file"] for shard in shards][0] == "nodes-00000.jsonl.gz"
+    batches = list(iter_shard_batches(tmp_path / shards[0]["file"], batch_size=1))
+    assert batches == [[NODE_ROWS[0]], [NODE_ROWS[1]]]
+
+
+def test_export_streams_records_into_shards_and_manifest(backup, tmp_path):
+    session = MagicMock()
+    session.run.side_effect = [iter(NODE_ROWS), iter(REL_ROWS)]
+    backup.driver.session.return_value.__enter__.return_value = session
+
+    manifest = backup.export(tmp_path / "bk", page_size=100, shard_size=2)
+
+    backup.driver.session.assert_called_with(fetch_size=100)
+    assert "embedding: null" in session.run.call_args_list[0].args[0]
+    assert manifest[NODES]["records"] == 5 and len(manifest[NODES]["shards"]) == 3
+    assert manifest[RELATIONSHIPS]["records"] == 2
+    assert json.loads((tmp_path / "bk" / MANIFEST_FILE).read_text())[NODES] == manifest[NODES]
+    assert backup.verify_backup(tmp_path / "bk", manifest)
+
+
+def test_restore_groups_batches_by_labels_and_type(backup, tmp_path):
+    export_session = MagicMock()
+    export_session.run.side_effect = [iter(NODE_ROWS), iter(REL_ROWS)]
+    backup.driver.session.return_value.__enter__.return_value = export_session
+    backup.export(tmp_path / "bk", shard_size=3)
+
+    written = []
+    tx = MagicMock()
+    tx.run.side_effect = lambda query, rows: written.append((query, rows)) or MagicMock()
+    session = MagicMock()
+    session.execute_write.side_effect = lambda work: work(tx)
+    backup.driver.session.return_value.__enter__.return_value = session
+
+    restored = backup.restore(tmp_path / "bk", workers=2, batch_size=10)
+
+    assert restored == {NODES: 5, RELATIONSHIPS: 2}
+    node_writes = [(query, rows) for query, rows in written if "CREATE (n" in query]
+    assert sum(len(rows) for _, rows in node_writes) == 5
+    assert any(":`Document`:`RAGChunk`" in query for query, _ in node_writes)
+    assert any("[r:`DOTYCZY`]" in query for query, _ in written)
+    session.run.assert_any_call(RESTORE_CLEANUP_QUERY, batch_size=10)
+    assert "IN TRANSACTIONS OF $batch_size ROWS" in RESTORE_CLEANUP_QUERY
@@ -0,0 +1,114 @@
+"""
+Testy jednostkowe dla bulk eksportu/importu person (Parquet, Arrow IPC, CSV)
+
+Zakres testów:
+- Schemat Arrow zgodny z kolumnami modelu Persona
+- Round-trip: PersonaBatchEncoder → iter_import_batches → build_copy_record
+- Odrzucanie wierszy bez wymaganych pól, nowe UUID przy imporcie
+"""
+
+import io
+from datetime import datetime, timezone
+from uuid import UUID, uuid4
+
+import pytest
+
+from app.services.export.persona_bulk import (
+    PERSONA_EXPORT_COLUMNS,
+    PYARROW_AVAILABLE,
+    PersonaBatchEncoder,
+    build_arrow_schema,
+    build_copy_record,
+    copy_columns,
+    iter_import_batches,
+    row_to_export_dict,
+)
+
+requires_pyarrow = pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow not installed")
+
+
+def _persona_row(**overrides):
+    row = {name: None for name in PERSONA_EXPORT_COLUMNS}
+    row.update({
+        "id": uuid4(),
+        "age": 34,
+        "gender": "Kobieta",
+        "location": "Poznań",
+        "full_name": "Anna Kowalska",
+        "openness": 0.7,
+        "values": ["Rodzina", "Stabilność"],
+        "interests": ["Bieganie"],
+        "rag_context_used": True,
+        "rag_citations": [{"source": "GUS", "score": 0.9}],
+        "is_active": True,
+        "created_at": datetime(2025, 1, 1, tzinfo=timezone.utc),
+        "updated_at": datetime(2025, 1, 2, tzinfo=timezone.utc),
+    })
+    row.update(overrides)
+    return row
+
+
+def _encode(fmt, rows):
+    encoder = PersonaBatchEncoder(fmt)
+    data = encoder.encode([row_to_export_dict(row) for row in rows]) + encoder.finish()
+    return data, encoder
+
+
+def test_export_columns_exclude_environment_specific_fields():
+    assert "project_id" not in PERSONA_EXPORT_COLUMNS
+    assert "deleted_at" not in PERSONA_EXPORT_COLUMNS
+    assert copy_columns()[0] == "project_id"
+
+
+@requires_pyarrow
+def test_arrow_schema_maps_column_types():
+    import pyarrow as pa
+
+    schema = build_arrow_schema()
+
+    assert schema.field("age").type == pa.int32()
+    assert schema.field("openness").type == pa.float64()
+    assert schema.field("values").type == pa.list_(pa.string())
+    assert schema.field("rag_citations").type == pa.string()
+
+
+@pytest.mark.parametrize("fmt", [
+    pytest.param("parquet", marks=requires_pyarrow),
+    pytest.param("arrow", marks=requires_pyarrow),
+    "csv",
+])
+def test_round_trip_preserves_values(fmt):
+    project_id = uuid4()
+    original = _persona_row()
+    data, encoder = _encode(fmt, [original, _persona_row(full_name="Jan Nowak")])
+
+    batches = list(iter_import_batches(io.BytesIO(data), fmt, batch_size=1))
+    now = datetime.now(timezone.utc)
+    records = [
+        build_copy_record(raw, project_id, preserve_ids=True, now=now)
+        for batch in batches for raw in batch
+    ]
+
+    assert encoder.rows_written == 2
+    assert len(batches) == 2
+    restored = dict(zip(copy_columns(), records[0]))
+    assert restored["project_id"] == project_id
+    assert restored["id"] == original["id"]
+    assert restored["age"] == 34
+    assert restored["values"] == ["Rodzina", "Stabilność"]
+    assert restored["rag_context_used"] is True
+    assert restored["rag_citations"] == '[{"source": "GUS", "score": 0.9}]'
+    assert restored["created_at"] == original["created_at"]
+
+
+def test_import_assigns_new_ids_and_rejects_incomplete_rows():
+    data, _ = _encode("csv", [_persona_row(), _persona_row(gender=None)])
+    now = datetime.now(timezone.utc)
+
+    rows = next(iter_import_batches(io.BytesIO(data), "csv"))
+    records = [build_copy_record(raw, uuid4(), preserve_ids=False, now=now) for raw in rows]
+
+    assert records[1] is None
+    new_id = dict(zip(copy_columns(), records[0]))["id"]
+    assert isinstance(new_id, UUID)
+    assert str(new_id) != rows[0]["id"]
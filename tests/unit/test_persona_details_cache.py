@@ -0,0 +1,125 @@
+"""
+Testy jednostkowe dla cache Detail View persony (PersonaDetailsService)
+
+Zakres testów:
+- Recompute zapisuje wpis, który kolejny odczyt serwuje jako świeży (bez ponownego liczenia)
+- Persist wygenerowanych needs_and_pains zachowuje updated_at (wpis nie staje się stale)
+- Edycja persony (nowe updated_at) od razu omija poprzedni wpis
+- Zewnętrzna zmiana pola (persist_persona_field) nadal unieważnia cache
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.models import Persona
+from app.services.personas.details import details_crud
+from app.services.personas.details.persona_details_service import PersonaDetailsService
+
+SERVICE_MODULE = "app.services.personas.details.persona_details_service"
+CACHE_MODULE = "app.services.personas.details.details_cache"
+
+NEEDS = {"jobs_to_be_done": [{"job_statement": "Szybko zrobić zakupy"}], "pain_points": []}
+
+
+@pytest.fixture
+def redis_store():
+    """Redis w pamięci dla wersjonowanych kluczy details_cache."""
+    store: dict = {}
+
+    async def set_json(key, value, ttl_seconds=None):
+        store[key] = value
+        return True
+
+    with patch(f"{CACHE_MODULE}.redis_get_json", AsyncMock(side_effect=store.get)), \
+            patch(f"{CACHE_MODULE}.redis_set_json", AsyncMock(side_effect=set_json)):
+        yield store
+
+
+@pytest.fixture
+def persona():
+    return Persona(
+        id=uuid.uuid4(),
+        project_id=uuid.uuid4(),
+        full_name="Anna Kowalska",
+        age=31,
+        gender="kobieta",
+        location="Warszawa",
+        needs_and_pains=None,
+        rag_context_used=False,
+        created_at=datetime.now(timezone.utc),
+        updated_at=datetime.now(timezone.utc),
+        is_active=True,
+    )
+
+
+@pytest.fixture
+def details_service(persona):
+    """Serwis z zamockowanym fetchem persony, enrichmentem i sesją persystencji."""
+    persist_session = MagicMock(commit=AsyncMock())
+    persist_session.execute = AsyncMock(return_value=MagicMock(scalars=lambda: MagicMock(first=lambda: persona)))
+    session_factory = MagicMock()
+    session_factory.return_value.__aenter__ = AsyncMock(return_value=persist_session)
+    session_factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    fetch_needs = AsyncMock(return_value=NEEDS)
+
+    with patch.object(PersonaDetailsService, "_fetch_persona", AsyncMock(return_value=persona)), \
+            patch(f"{SERVICE_MODULE}.fetch_needs_and_pains", fetch_needs), \
+            patch(f"{SERVICE_MODULE}.fetch_audit_log", AsyncMock(return_value=[])), \
+            patch(f"{SERVICE_MODULE}.fetch_segment_brief", AsyncMock(return_value=None)), \
+            patch(f"{SERVICE_MODULE}.log_view_event", AsyncMock()), \
+            patch.object(details_crud, "AsyncSessionLocal", session_factory), \
+            patch.object(details_crud, "flag_modified") as flag_modified, \
+            patch("app.core.single_flight.redis_acquire_lock", AsyncMock(return_value="token")), \
+            patch("app.core.single_flight.redis_release_lock", AsyncMock()):
+        yield PersonaDetailsService(MagicMock()), fetch_needs, persist_session, flag_modified
+
+
+async def _drain_background_tasks():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_second_read_after_recompute_is_served_fresh(details_service, persona, redis_store):
+    service, fetch_needs, persist_session, flag_modified = details_service
+    user_id = uuid.uuid4()
+
+    first = await service.get_persona_details(persona.id, user_id)
+    await _drain_background_tasks()
+    second = await service.get_persona_details(persona.id, user_id)
+
+    assert fetch_needs.await_count == 1
+    persist_session.commit.assert_awaited_once()
+    assert persona.needs_and_pains == NEEDS
+    flag_modified.assert_called_once_with(persona, "updated_at")
+    assert first.needs_and_pains == second.needs_and_pains
+    assert second.needs_and_pains.jobs_to_be_done[0].job_statement == "Szybko zrobić zakupy"
+
+
+@pytest.mark.asyncio
+async def test_persona_edit_misses_previous_entry(details_service, persona, redis_store):
+    service, fetch_needs, _, _ = details_service
+    user_id = uuid.uuid4()
+
+    await service.get_persona_details(persona.id, user_id)
+    await _drain_background_tasks()
+    persona.updated_at += timedelta(seconds=1)
+    await service.get_persona_details(persona.id, user_id)
+
+    assert fetch_needs.await_count == 2
+    assert len([key for key in redis_store if key.startswith(f"persona_details:{persona.id}:v")]) == 2
+
+
+@pytest.mark.asyncio
+async def test_external_field_update_still_invalidates_cache(details_service, persona):
+    _, _, persist_session, flag_modified = details_service
+
+    await details_crud.persist_persona_field(persona.id, "needs_and_pains", NEEDS)
+
+    persist_session.commit.assert_awaited_once()
+    flag_modified.assert_not_called()
+    assert persona.needs_and_pains == NEEDS
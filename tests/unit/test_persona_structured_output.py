@@ -0,0 +1,157 @@
+"""
+Testy jednostkowe dla structured output w generatorze person
+
+Zakres testów:
+- Walidacja PersonaProfileOutput (placeholdery, puste listy)
+- Odzyskiwanie payloadu z surowej odpowiedzi (tool call / JSON content)
+- Repair call tylko dla niepoprawnych pól (bez regeneracji całej persony)
+- Prompt naprawczy: schema, wartości i błędy pól + krótki kontekst, bez pierwotnego promptu
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+from app.schemas.persona import PersonaProfileOutput
+from app.services.personas import PersonaGeneratorLangChain
+from app.services.personas.generation.structured_output import (
+    build_repair_model,
+    build_repair_prompt,
+    extract_raw_payload,
+    find_invalid_fields,
+    structured_output_stats,
+)
+
+
+def _valid_payload(**overrides):
+    payload = {
+        "full_name": "Anna Kowalska",
+        "persona_title": "Księgowa",
+        "headline": "Księgowa (34) z Poznania szukająca stabilności",
+        "background_story": "Anna od dziesięciu lat pracuje w biurze rachunkowym w Poznaniu. " * 3,
+        "values": ["Rodzina", "Stabilność", "Uczciwość"],
+        "interests": ["Bieganie", "Książki", "Gotowanie"],
+    }
+    payload.update(overrides)
+    return payload
+
+
+@pytest.fixture
+def generator():
+    """Generator bez inicjalizacji LLM (pattern __new__ jak w test_persona_generator.py)."""
+    gen = PersonaGeneratorLangChain.__new__(PersonaGeneratorLangChain)
+    gen.llm = MagicMock()
+    gen.persona_prompt = ChatPromptTemplate.from_messages([("system", "system"), ("user", "{prompt}")])
+    gen.structured_llm = MagicMock()
+    return gen
+
+
+class TestValidation:
+    """Testy walidacji payloadu względem PersonaProfileOutput."""
+
+    def test_valid_payload_has_no_invalid_fields(self):
+        assert find_invalid_fields(_valid_payload()) == {}
+
+    def test_placeholders_and_short_lists_are_invalid(self):
+        payload = _valid_payload(full_name="N/A", values=["N/A", "", "Rodzina"])
+
+        invalid = find_invalid_fields(payload)
+
+        assert set(invalid) == {"full_name", "values"}
+
+    def test_missing_fields_are_reported(self):
+        payload = _valid_payload()
+        del payload["headline"]
+
+        assert set(find_invalid_fields(payload)) == {"headline"}
+
+    def test_repair_model_contains_only_requested_fields(self):
+        model = build_repair_model(["headline", "values"])
+
+        assert set(model.model_fields) == {"headline", "values"}
+
+
+class TestRepairPrompt:
+    """Testy promptu naprawczego."""
+
+    def test_contains_only_failed_field_schema_values_and_short_context(self):
+        payload = _valid_payload(headline="N/A")
+        invalid = find_invalid_fields(payload)
+
+        prompt = build_repair_prompt(payload, invalid, {"age": 34, "location": "Poznań", "gender": None})
+
+        assert '"headline": {' in prompt and '"minLength": 10' in prompt
+        assert "otrzymano: N/A" in prompt and invalid["headline"] in prompt
+        assert '"age": 34' in prompt and '"location": "Poznań"' in prompt and "gender" not in prompt
+        assert '"full_name": "Anna Kowalska"' in prompt
+        assert "biurze rachunkowym" not in prompt and "Bieganie" not in prompt
+        assert '"background_story": {' not in prompt
+
+
+class TestExtractRawPayload:
+    """Testy odzyskiwania payloadu z surowej odpowiedzi."""
+
+    def test_reads_tool_call_args(self):
+        raw = AIMessage(content="", tool_calls=[{"name": "PersonaProfileOutput", "args": {"full_name": "Jan"}, "id": "1"}])
+
+        assert extract_raw_payload(raw) == {"full_name": "Jan"}
+
+    def test_reads_json_content(self):
+        raw = AIMessage(content='{"full_name": "Jan"}')
+
+        assert extract_raw_payload(raw) == {"full_name": "Jan"}
+
+    def test_returns_empty_dict_for_garbage(self):
+        assert extract_raw_payload(AIMessage(content="to nie jest JSON")) == {}
+
+
+class TestInvokePersonaLLM:
+    """Testy wywołania LLM w trybie structured output."""
+
+    @pytest.mark.asyncio
+    async def test_parsed_output_is_returned_without_repair(self, generator):
+        generator.structured_llm.ainvoke = AsyncMock(return_value={
+            "raw": AIMessage(content=""),
+            "parsed": PersonaProfileOutput(**_valid_payload()),
+            "parsing_error": None,
+        })
+
+        with patch(
+            "app.services.personas.generation.persona_generator_langchain.with_schema_output"
+        ) as mock_bind:
+            result = await generator._invoke_persona_llm("prompt")
+
+        assert result["full_name"] == "Anna Kowalska"
+        mock_bind.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_only_invalid_fields_are_repaired(self, generator):
+        broken = _valid_payload(headline="N/A")
+        generator.structured_llm.ainvoke = AsyncMock(return_value={
+            "raw": AIMessage(content=PersonaProfileOutput.model_construct(**broken).model_dump_json()),
+            "parsed": None,
+            "parsing_error": ValueError("headline"),
+        })
+        repair_model = build_repair_model(["headline"])
+        repair_llm = MagicMock()
+        repair_llm.ainvoke = AsyncMock(return_value={
+            "raw": AIMessage(content=""),
+            "parsed": repair_model(headline="Księgowa (34) planująca własne biuro rachunkowe"),
+            "parsing_error": None,
+        })
+        repaired_before = structured_output_stats.repaired
+
+        with patch(
+            "app.services.personas.generation.persona_generator_langchain.with_schema_output",
+            return_value=repair_llm,
+        ) as mock_bind:
+            result = await generator._invoke_persona_llm("PIERWOTNY PROMPT", persona_context={"age": 34})
+
+        repair_prompt = repair_llm.ainvoke.call_args.args[0]
+        assert "PIERWOTNY PROMPT" not in repair_prompt and '"age": 34' in repair_prompt
+        assert result["headline"] == "Księgowa (34) planująca własne biuro rachunkowe"
+        assert result["full_name"] == "Anna Kowalska"
+        assert set(mock_bind.call_args.args[1].model_fields) == {"headline"}
+        assert structured_output_stats.repaired == repaired_before + 1
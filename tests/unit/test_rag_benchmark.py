@@ -0,0 +1,104 @@
+"""
+Testy jednostkowe dla benchmarku retrievalu RAG (scripts/benchmark_rag.py)
+
+Zakres testów:
+- Etykiety trafności niezależne od chunkingu, recall@k, percentyle
+- Graf w pamięci: limity i kolejność per etykieta jak w Cypher GraphTraversal
+- Pełny przebieg backendu ``memory`` na korpusie z tests/fixtures/rag_benchmark
+- Porównanie raportów z baseline (regresja jakości / latencji)
+"""
+
+import json
+
+import pytest
+from langchain_core.documents import Document
+
+from app.services.rag.graph.term_index import build_lucene_query
+from scripts.benchmark_rag import (
+    STAGES,
+    BenchmarkConfig,
+    InMemoryGraphStore,
+    build_memory_backend,
+    compare_reports,
+    load_fixtures,
+    percentile,
+    recall_at,
+    run_benchmark,
+    write_report,
+)
+
+
+def test_recall_uses_title_and_fragment_labels():
+    labels = [{"title": "A", "contains": "kobiet"}, {"title": "B", "contains": "seniorów"}]
+    docs = [
+        Document(page_content="zatrudnienie kobiet", metadata={"title": "B"}),
+        Document(page_content="zatrudnienie kobiet", metadata={"title": "A"}),
+        Document(page_content="dochody seniorów", metadata={"title": "B"}),
+    ]
+
+    assert recall_at(docs, labels, 1) == 0.0
+    assert recall_at(docs, labels, 2) == 0.5
+    assert recall_at(docs, labels, 3) == 1.0
+    assert percentile([5.0, 1.0, 3.0, 2.0, 4.0], 50) == 3.0
+    assert percentile([float(value) for value in range(1, 21)], 95) == 19.0
+
+
+def test_in_memory_graph_applies_label_limits_and_confidence_order():
+    nodes = [
+        {"type": "Wskaznik", "streszczenie": f"Zatrudnienie 25-34, wariant {i}", "kluczowe_fakty": "x" * i,
+         "pewnosc": "wysoka" if i == 1 else "srednia"}
+        for i in range(1, 6)
+    ] + [{"type": "Trend", "streszczenie": "Emerytury na wsi", "kluczowe_fakty": "KRUS"}]
+    store = InMemoryGraphStore(nodes)
+
+    result = store.query(
+        "CALL db.index.fulltext.queryNodes('graph_terms_wskaznik', $lucene_query) ... "
+        "CALL db.index.fulltext.queryNodes('graph_terms_trend', $lucene_query) ... AS graph_context",
+        params={"lucene_query": build_lucene_query(["Warszawa", "25-34"])},
+    )
+    context = result[0]["graph_context"]
+
+    assert [node["streszczenie"] for node in context] == [
+        "Zatrudnienie 25-34, wariant 1", "Zatrudnienie 25-34, wariant 5", "Zatrudnienie 25-34, wariant 4",
+    ]
+    assert store.query("CREATE FULLTEXT INDEX graph_terms_trend IF NOT EXISTS ...") == []
+
+
+@pytest.mark.asyncio
+async def test_memory_benchmark_reports_quality_and_latency(tmp_path):
+    corpus, queries = load_fixtures()
+    config = BenchmarkConfig(repeats=2)
+
+    report = await run_benchmark(build_memory_backend(corpus, config), corpus, queries, config)
+
+    assert report["corpus"]["queries"] == len(queries)
+    assert set(report["latency_ms"]) == set(STAGES)
+    assert report["latency_ms"]["vector"]["samples"] == 2 * len(queries)
+    for stage in ("vector", "keyword", "fusion", "rerank"):
+        metrics = report["quality"][stage]
+        assert set(metrics) == {"recall@1", "recall@3", "recall@5", f"recall@{config.top_k}", "mrr"}
+        assert 0.0 < metrics["mrr"] <= 1.0
+        assert metrics["recall@1"] <= metrics["recall@5"] <= metrics[f"recall@{config.top_k}"]
+    assert report["quality"]["fusion"][f"recall@{config.top_k}"] >= 0.9
+    assert report["quality"]["graph"]["recall"] > 0.5
+
+    output = tmp_path / "benchmark.json"
+    write_report(report, output)
+    assert json.loads(output.read_text(encoding="utf-8")) == report
+
+
+def test_compare_reports_flags_quality_drop_and_optional_latency_budget():
+    baseline = {
+        "quality": {"rerank": {"mrr": 0.8, "recall@5": 0.9}},
+        "latency_ms": {"rerank": {"p95": 10.0}},
+    }
+    current = {
+        "quality": {"rerank": {"mrr": 0.75, "recall@5": 0.9}},
+        "latency_ms": {"rerank": {"p95": 20.0}},
+    }
+
+    assert compare_reports(current, baseline) == ["quality.rerank.mrr: 0.8 -> 0.75"]
+    assert compare_reports(current, baseline, max_quality_drop=0.1) == []
+    assert compare_reports(current, baseline, max_quality_drop=0.1, max_latency_increase=0.5) == [
+        "latency_ms.rerank.p95: 10.0 -> 20.0"
+    ]
@@ -0,0 +1,141 @@
+"""
+Testy jednostkowe dla rozgrzewania cache kontekstów demograficznych RAG
+
+Zakres testów:
+- Wybór najczęstszych komórek (iloczyn wag z config/demographics)
+- Budżet współbieżności, statusy komórek (cached/warmed/partial/failed) i pokrycie
+- Aktualność raportu (zmiana wersji indeksu, wiek raportu)
+- Jednorazowy przebieg po ingeście przez APScheduler
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core import scheduler as scheduler_module
+from app.tasks import rag_cache_warming
+from app.tasks.rag_cache_warming import (
+    get_warming_report,
+    run_rag_cache_warming_job,
+    top_demographic_cells,
+)
+from config import features
+
+MODULE = "app.tasks.rag_cache_warming"
+
+DEMOGRAPHICS = SimpleNamespace(
+    common=SimpleNamespace(age_groups={"25-34": 0.6, "65+": 0.4}, genders={"female": 0.5, "male": 0.5}),
+    poland=SimpleNamespace(
+        education_levels={"Wyższe magisterskie": 0.7, "Podstawowe": 0.3},
+        locations={"Warszawa": 0.8, "Kraków": 0.2},
+    ),
+)
+
+
+class FakeRAG:
+    """Udaje PolishSocietyRAG - mierzy współbieżność, pamięta rozgrzane komórki."""
+
+    def __init__(self, cached=(), partial=(), failing=()):
+        self.cache = set(cached)
+        self.partial = set(partial)
+        self.failing = set(failing)
+        self.active = 0
+        self.max_active = 0
+
+    async def is_demographic_insights_cached(self, age_group, education, location, gender):
+        return (age_group, education, location, gender) in self.cache
+
+    async def get_demographic_insights(self, age_group, education, location, gender):
+        key = (age_group, education, location, gender)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if key in self.failing:
+            raise RuntimeError("neo4j down")
+        if key not in self.partial:
+            self.cache.add(key)
+        return {"context": "...", "num_results": 3}
+
+
+@pytest.fixture(autouse=True)
+def warming_settings():
+    with patch.object(features.rag_cache_warming, "enabled", True), \
+            patch.object(features.rag_cache_warming, "max_combinations", 4), \
+            patch.object(features.rag_cache_warming, "concurrency", 2), \
+            patch(f"{MODULE}.demographics", DEMOGRAPHICS), \
+            patch(f"{MODULE}.get_index_version", AsyncMock(return_value=3)):
+        yield
+
+
+def test_top_cells_ranked_by_population_weight():
+    cells = top_demographic_cells(3, DEMOGRAPHICS)
+
+    assert [(cell.age_group, cell.education, cell.location) for cell in cells] == [
+        ("25-34", "Wyższe magisterskie", "Warszawa"),
+        ("25-34", "Wyższe magisterskie", "Warszawa"),
+        ("65+", "Wyższe magisterskie", "Warszawa"),
+    ]
+    assert [cell.gender for cell in cells[:2]] == ["female", "male"]
+    assert cells[0].weight == pytest.approx(0.6 * 0.7 * 0.8 * 0.5)
+
+
+@pytest.mark.asyncio
+async def test_job_respects_concurrency_and_reports_coverage():
+    cells = top_demographic_cells(4, DEMOGRAPHICS)
+    keys = [(cell.age_group, cell.education, cell.location, cell.gender) for cell in cells]
+    rag_service = FakeRAG(cached=[keys[0]], partial=[keys[2]], failing=[keys[3]])
+
+    with patch(f"{MODULE}.redis_set_json", AsyncMock()) as save:
+        report = await run_rag_cache_warming_job("ingest", rag_service=rag_service)
+
+    assert rag_service.max_active <= 2
+    assert [cell["status"] for cell in report["cells"]] == ["cached", "warmed", "partial", "failed"]
+    assert report["status_counts"] == {"cached": 1, "warmed": 1, "partial": 1, "failed": 1}
+    assert report["coverage"] == 0.5
+    assert report["population_coverage"] == pytest.approx(2 * 0.6 * 0.7 * 0.8 * 0.5, abs=1e-4)
+    assert report["index_version"] == 3 and report["trigger"] == "ingest"
+    save.assert_awaited_once_with(rag_cache_warming.WARMING_REPORT_KEY, report)
+
+
+@pytest.mark.asyncio
+async def test_job_skips_when_previous_run_in_progress():
+    async with rag_cache_warming._warming_lock:
+        assert await run_rag_cache_warming_job("nightly", rag_service=FakeRAG()) is None
+
+
+@pytest.mark.asyncio
+async def test_report_stale_after_index_version_change_or_age():
+    finished = datetime.now(timezone.utc) - timedelta(hours=2)
+    stored = {"index_version": 3, "finished_at": finished.isoformat(), "cells": []}
+
+    with patch(f"{MODULE}.redis_get_json", AsyncMock(return_value=stored)):
+        fresh = await get_warming_report()
+        with patch(f"{MODULE}.get_index_version", AsyncMock(return_value=4)):
+            bumped = await get_warming_report()
+        with patch.object(features.rag_cache_warming, "stale_after_hours", 1):
+            old = await get_warming_report()
+
+    assert fresh["stale"] is False and fresh["age_hours"] == pytest.approx(2, abs=0.01)
+    assert bumped["stale_reason"] == "index_version_changed"
+    assert old["stale_reason"] == "age"
+
+
+def test_schedule_after_ingest_collapses_into_one_delayed_job():
+    fake_scheduler = MagicMock()
+
+    with patch.object(scheduler_module, "_scheduler", None):
+        assert scheduler_module.schedule_rag_cache_warming("ingest") is False
+
+    with patch.object(scheduler_module, "_scheduler", fake_scheduler), \
+            patch.object(features.rag_cache_warming, "ingest_delay_seconds", 60):
+        assert scheduler_module.schedule_rag_cache_warming("ingest") is True
+
+    kwargs = fake_scheduler.add_job.call_args.kwargs
+    assert kwargs["trigger"] == "date"
+    assert kwargs["id"] == "rag_cache_warming_after_ingest"
+    assert kwargs["replace_existing"] is True
+    assert kwargs["run_date"] > datetime.now(timezone.utc) + timedelta(seconds=50)
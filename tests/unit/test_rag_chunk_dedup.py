@@ -0,0 +1,127 @@
+"""
+Testy jednostkowe dla deduplikacji chunków RAG po hashu treści
+
+Zakres testów:
+- Hash odporny na różnice w białych znakach / formie Unicode
+- Re-ingest: chunki obecne w indeksie są tylko linkowane (bez LLM i embeddingów)
+- Powtórzenia w obrębie dokumentu embedowane raz
+- Usuwanie dokumentu: współdzielone węzły tracą doc_id, kasowane są tylko osierocone
+- Przepięty węzeł dostaje metadane nowego właściciela
+- Węzły dokumentu wyszukiwane po indeksowanych etykietach, nie skanem grafu
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.rag.documents import chunk_dedup
+from app.services.rag.documents.chunk_dedup import (
+    DEDUP_INDEX_QUERIES,
+    DELETE_DOCUMENT_REF_QUERY,
+    DELETE_EXCLUSIVE_NODES_QUERY,
+    LINK_CHUNKS_QUERY,
+    RELEASE_SHARED_NODES_QUERY,
+    chunk_content_hash,
+    owner_metadata,
+    release_document_nodes,
+)
+from tests.fixtures.rag import INGEST_MODULE
+
+BOILERPLATE = "Źródło: GUS, Badanie Aktywności Ekonomicznej Ludności."
+PAGES = [BOILERPLATE, "Zatrudnienie kobiet 25-34 wzrosło do 81%.", BOILERPLATE, "Bezrobocie spadło do 2,9%."]
+
+pytestmark = pytest.mark.usefixtures("ingest_pipeline")
+
+
+@pytest.fixture
+def ingest_pages():
+    """Dokument ze stopką powtarzaną na co drugiej stronie."""
+    return PAGES
+
+
+def test_content_hash_ignores_whitespace_and_unicode_form():
+    assert chunk_content_hash("Łódź  ma\n 670 tys.  mieszkańców ") == chunk_content_hash("Łódź ma 670 tys. mieszkańców")
+    assert chunk_content_hash("ﬁrma") == chunk_content_hash("firma")
+    assert chunk_content_hash("80%") != chunk_content_hash("81%")
+
+
+@pytest.mark.asyncio
+async def test_reingest_links_existing_chunks_without_llm_or_embeddings(ingest_service, ingest_document_file):
+    existing = {chunk_content_hash(BOILERPLATE), chunk_content_hash(PAGES[1])}
+    link = MagicMock(return_value=1)
+
+    with patch(f"{INGEST_MODULE}.find_existing_chunks", side_effect=lambda driver, ids: existing & set(ids)), \
+            patch(f"{INGEST_MODULE}.link_chunks_to_document", link):
+        result = await ingest_service.ingest_document(ingest_document_file, {"doc_id": "doc-v2"})
+
+    assert result["status"] == "ready"
+    assert result["reused_chunks"] == 3
+    assert ingest_service.transformer.processed_texts == [PAGES[3]]
+    ingest_service.vector_store.embedding.aembed_documents.assert_awaited_once_with([PAGES[3]])
+    linked = [set(call.args[1]) for call in link.call_args_list]
+    assert linked == [existing, {chunk_content_hash(PAGES[3])}]
+    assert all(call.args[2] == "doc-v2" for call in link.call_args_list)
+
+
+@pytest.mark.asyncio
+async def test_duplicates_within_document_are_embedded_once(ingest_service, ingest_document_file):
+    with patch(f"{INGEST_MODULE}.find_existing_chunks", return_value=set()), \
+            patch(f"{INGEST_MODULE}.link_chunks_to_document", return_value=0):
+        result = await ingest_service.ingest_document(ingest_document_file, {"doc_id": "doc-1"})
+
+    assert result["num_chunks"] == 4
+    assert ingest_service.transformer.processed_texts.count(BOILERPLATE) == 1
+    texts, _, metadatas, ids = ingest_service.vector_store.add_embeddings.call_args.args
+    assert texts.count(BOILERPLATE) == 1
+    assert ids == [metadata["content_hash"] for metadata in metadatas]
+
+
+def test_release_document_nodes_unlinks_shared_before_deleting_orphans(monkeypatch):
+    monkeypatch.setattr(chunk_dedup, "_indexes_ready", False)
+    session = MagicMock()
+    session.run.return_value.single.side_effect = [{"kept": 2}, {"deleted": 5}]
+    driver = MagicMock()
+    driver.session.return_value.__enter__.return_value = session
+
+    owners = {"doc-2": owner_metadata("Raport GUS 2024", None, "gus-2024.pdf")}
+
+    result = release_document_nodes(driver, "doc-1", batch_size=250, owners=owners)
+
+    assert result == {"kept": 2, "deleted": 5}
+    queries = [call.args[0] for call in session.run.call_args_list]
+    assert queries == [
+        *DEDUP_INDEX_QUERIES,
+        RELEASE_SHARED_NODES_QUERY,
+        DELETE_EXCLUSIVE_NODES_QUERY,
+        DELETE_DOCUMENT_REF_QUERY,
+    ]
+    # CALL { ... } IN TRANSACTIONS wymaga transakcji niejawnej - nie execute_write
+    session.execute_write.assert_not_called()
+    assert all(
+        "IN TRANSACTIONS OF $batch_size ROWS" in query
+        for query in (RELEASE_SHARED_NODES_QUERY, DELETE_EXCLUSIVE_NODES_QUERY)
+    )
+    release_call, delete_call, ref_call = session.run.call_args_list[len(DEDUP_INDEX_QUERIES):]
+    assert release_call.kwargs == {"doc_id": "doc-1", "batch_size": 250, "owners": owners}
+    assert delete_call.kwargs == {"doc_id": "doc-1", "batch_size": 250}
+    assert ref_call.kwargs == {"doc_id": "doc-1"}
+
+
+def test_document_nodes_are_matched_by_indexed_labels():
+    for query in (RELEASE_SHARED_NODES_QUERY, DELETE_EXCLUSIVE_NODES_QUERY):
+        assert "MATCH (n)" not in query
+        assert "(:RAGDocumentRef {id: $doc_id})<-[:IN_DOCUMENT]-(c:RAGChunk)" in query
+        assert "MATCH (c:RAGChunk {doc_id: $doc_id})" in query
+        assert "(d)-[:MENTIONS]->(e)" in query
+    assert "MERGE (c)-[:IN_DOCUMENT]->(ref)" in LINK_CHUNKS_QUERY
+    assert any("FOR (n:RAGChunk) ON (n.doc_id)" in query for query in DEDUP_INDEX_QUERIES)
+
+
+def test_owner_metadata_matches_ingested_properties():
+    metadata = owner_metadata("Raport GUS 2024", None, "gus-2024.pdf")
+
+    assert metadata["chunk"] == {"title": "Raport GUS 2024", "country": "Poland", "source_file": "gus-2024.pdf"}
+    assert metadata["entity"] == {"document_title": "Raport GUS 2024", "document_country": "Poland"}
+    # Pozycja chunku należała do usuwanego dokumentu - przepięty węzeł jej nie zachowuje
+    assert "n.chunk_index = CASE WHEN reassigned THEN null" in RELEASE_SHARED_NODES_QUERY
+    assert "$owners[remaining[0]]" in RELEASE_SHARED_NODES_QUERY
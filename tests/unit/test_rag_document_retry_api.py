@@ -0,0 +1,81 @@
+"""
+Testy jednostkowe dla endpointu ponowienia ingestu (POST /rag/documents/{id}/retry)
+
+Zakres testów:
+- Dokument partial (część chunków bez grafu) i failed → 202, ingest w tle od checkpointu
+- Dokument ready → 409 (nie ma czego ponawiać)
+"""
+
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import rag
+from app.api.dependencies import get_current_user, get_db
+from app.models.rag_document import RAGDocument
+from config import app as app_config
+
+
+def _document(status: str) -> RAGDocument:
+    return RAGDocument(
+        id=uuid.uuid4(),
+        title="Raport GUS",
+        filename="raport.pdf",
+        file_path="/tmp/raport.pdf",
+        file_type="pdf",
+        country="Poland",
+        num_chunks=6,
+        status=status,
+        error_message="Nie udało się wygenerować grafu wiedzy dla 1 fragmentów",
+        ingest_stage="done",
+        created_at=datetime.now(timezone.utc),
+        is_active=True,
+    )
+
+
+@pytest.fixture
+def retry_client():
+    """TestClient z samym routerem RAG, sesją DB zwracającą jeden dokument i zalogowanym użytkownikiem."""
+    app = FastAPI()
+    app.state.limiter = rag.limiter
+    app.include_router(rag.router, prefix=app_config.api_prefix)
+    session = MagicMock(commit=AsyncMock(), refresh=AsyncMock())
+
+    async def override_get_db():
+        yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: MagicMock(id=uuid.uuid4())
+    with patch("app.api.rag._process_document_background", AsyncMock()) as process:
+        yield TestClient(app, raise_server_exceptions=False), session, process
+
+
+@pytest.mark.parametrize("status", ["partial", "failed"])
+def test_retry_accepts_partial_and_failed_documents(retry_client, status):
+    client, session, process = retry_client
+    document = _document(status)
+    session.get = AsyncMock(return_value=document)
+
+    response = client.post(f"{app_config.api_prefix}/rag/documents/{document.id}/retry")
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "processing"
+    assert document.error_message is None
+    process.assert_awaited_once()
+    assert process.await_args.args[:2] == (document.id, document.file_path)
+
+
+def test_retry_rejects_ready_document(retry_client):
+    client, session, process = retry_client
+    document = _document("ready")
+    session.get = AsyncMock(return_value=document)
+
+    response = client.post(f"{app_config.api_prefix}/rag/documents/{document.id}/retry")
+
+    assert response.status_code == 409
+    assert document.status == "ready"
+    process.assert_not_awaited()
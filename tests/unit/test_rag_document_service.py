@@ -190,7 +190,8 @@ class TestDeleteDocument:
         mock_db.commit.assert_called_once()
 
         # Verify Neo4j cleanup
-        service._delete_chunks_from_neo4j.assert_called_once_with(str(doc_id))
+        service._delete_chunks_from_neo4j.assert_called_once()
+        assert service._delete_chunks_from_neo4j.call_args.args[0] == str(doc_id)
 
     async def test_delete_document_not_found(self, rag_document_service_with_mocks):
         """Test: delete_document raise ValueError gdy dokument nie istnieje"""
@@ -0,0 +1,103 @@
+"""
+Testy jednostkowe dla fuzji rankingów hybrid search (fusion_algorithms.py)
+
+Zakres testów:
+- Stabilne ID chunku (content_hash; doc_id + chunk_index lub skrót treści jako fallback)
+- RRF dla N list z wagami, CombSUM z normalizacją min-max
+- Ograniczenie wyniku (limit) zgodne z pełnym sortowaniem, remisy wg kolejności list
+- rrf_fusion (dwie listy) jako wrapper
+"""
+
+import pytest
+from langchain_core.documents import Document
+
+from app.services.rag.search.fusion_algorithms import (
+    FUSION_COMBSUM,
+    RankedList,
+    chunk_id,
+    fuse,
+    rrf_fusion,
+)
+
+
+def _doc(doc_id, index, text=None):
+    return Document(page_content=text or f"{doc_id}-{index}", metadata={"doc_id": doc_id, "chunk_index": index})
+
+
+def test_chunk_id_prefers_metadata_and_falls_back_to_content_digest():
+    assert chunk_id(_doc("d1", 0, "treść A")) == chunk_id(_doc("d1", 0, "inna treść")) == "d1:0"
+    assert chunk_id(_doc("d1", 0)) != chunk_id(_doc("d1", 1))
+    anonymous = Document(page_content="bez metadanych")
+    assert chunk_id(anonymous) == chunk_id(Document(page_content="bez metadanych"))
+    assert chunk_id(anonymous).startswith("h:")
+
+
+def test_chunk_id_uses_content_hash_of_shared_chunks():
+    # Współdzielony chunk po usunięciu dokumentu A ma doc_id B i chunk_index z A -
+    # ten sam doc_id:chunk_index co własny chunk B, ale inna treść
+    shared = Document(page_content="wspólny", metadata={"doc_id": "B", "chunk_index": 3, "content_hash": "h1"})
+    own = Document(page_content="własny", metadata={"doc_id": "B", "chunk_index": 3, "content_hash": "h2"})
+
+    assert chunk_id(shared) == "c:h1"
+    fused = fuse([RankedList("vector", [(shared, 0.9)]), RankedList("keyword", [(own, 2.0)])])
+
+    assert [doc.page_content for doc, _ in fused] == ["wspólny", "własny"]
+
+
+def test_weighted_rrf_over_three_retrievers():
+    a, b, c = _doc("d", 0), _doc("d", 1), _doc("d", 2)
+    fused = fuse(
+        [
+            RankedList("vector", [(a, 0.9), (b, 0.8)]),
+            RankedList("keyword", [(b, 3.0), (c, 1.0)]),
+            RankedList("graph", [c], weight=2.0),
+        ],
+        k=60,
+    )
+
+    scores = {doc.metadata["chunk_index"]: score for doc, score in fused}
+    assert [doc.metadata["chunk_index"] for doc, _ in fused] == [2, 1, 0]
+    assert scores[2] == pytest.approx(1 / 62 + 2 / 61)
+    assert scores[1] == pytest.approx(1 / 62 + 1 / 61)
+
+
+def test_combsum_normalizes_scores_per_list():
+    a, b, c = _doc("d", 0), _doc("d", 1), _doc("d", 2)
+    fused = fuse(
+        [
+            RankedList("vector", [(a, 0.95), (b, 0.90), (c, 0.50)]),
+            RankedList("keyword", [(c, 12.0), (b, 11.0)], weight=0.5),
+        ],
+        method=FUSION_COMBSUM,
+    )
+
+    scores = {doc.metadata["chunk_index"]: score for doc, score in fused}
+    assert scores[0] == pytest.approx(1.0)
+    assert scores[1] == pytest.approx(0.40 / 0.45)
+    assert scores[2] == pytest.approx(0.5)
+
+
+def test_limit_matches_full_sort_and_ties_keep_list_order():
+    vector = [(_doc("v", i), 1.0) for i in range(50)]
+    keyword = [(_doc("k", i), 1.0) for i in range(50)]
+    lists = [RankedList("vector", vector), RankedList("keyword", keyword)]
+
+    full = fuse(lists)
+    top = fuse(lists, limit=5)
+
+    assert [chunk_id(doc) for doc, _ in top] == [chunk_id(doc) for doc, _ in full[:5]]
+    assert [chunk_id(doc) for doc, _ in top[:2]] == ["v:0", "k:0"]
+    with pytest.raises(ValueError):
+        fuse(lists, method="borda")
+
+
+def test_rrf_fusion_wrapper_merges_same_chunk_by_id():
+    first = _doc("d1", 3, "Zatrudnienie kobiet")
+    same_chunk = _doc("d1", 3, "Zatrudnienie kobiet ")  # np. inna normalizacja białych znaków w Neo4j
+
+    fused = rrf_fusion([(first, 0.9)], [same_chunk], k=60)
+
+    assert len(fused) == 1
+    assert fused[0][0] is first
+    assert fused[0][1] == pytest.approx(2 / 61)
+    assert rrf_fusion([], [], k=60) == []
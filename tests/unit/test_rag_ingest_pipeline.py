@@ -0,0 +1,125 @@
+"""
+Testy jednostkowe dla etapowego, wznawialnego ingestu dokumentów RAG
+
+Zakres testów:
+- Load strona po stronie → split → graph (ograniczona współbieżność) → vector w batchach
+- Checkpoint per chunk po każdym batchu, wznowienie pomija zapisane chunki
+- Błąd LLM dla chunku → graph_failed, dokument trafia do indeksu wektorowego ze statusem
+  partial; ponowienie uzupełnia graf tylko dla tych chunków
+- Błąd zapisu wektorów → status failed z zachowanym postępem etapu graph
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.rag.documents import IngestCheckpoint
+from config import rag
+from tests.fixtures.rag import INGEST_MODULE, FakeGraphTransformer
+
+
+@pytest.fixture(autouse=True)
+def pipeline_settings(ingest_pipeline):
+    """Jedna strona = jeden chunk, małe batche żeby sprawdzić granulację."""
+    with patch.object(rag.ingest, "graph_concurrency", 2), \
+            patch.object(rag.ingest, "graph_batch_size", 2), \
+            patch.object(rag.ingest, "vector_batch_size", 4), \
+            patch(f"{INGEST_MODULE}.find_existing_chunks", return_value=set()), \
+            patch(f"{INGEST_MODULE}.link_chunks_to_document", return_value=0):
+        yield
+
+
+def _recording_saver():
+    saved: list[dict] = []
+
+    async def save(checkpoint):
+        saved.append(checkpoint.to_dict())
+
+    return saved, save
+
+
+@pytest.mark.asyncio
+async def test_staged_ingest_batches_graph_and_vector_writes(ingest_service, ingest_document_file):
+    transformer = ingest_service.transformer
+    saved, save = _recording_saver()
+
+    result = await ingest_service.ingest_document(
+        ingest_document_file, {"doc_id": "doc-1", "title": "GUS"}, save_checkpoint=save
+    )
+
+    assert result == {"num_chunks": 6, "status": "ready", "stage": "done", "reused_chunks": 0}
+    assert transformer.max_active == 2
+    assert [len(call.args[0]) for call in ingest_service.graph_store.add_graph_documents.call_args_list] == [2, 2, 2]
+    assert [len(call.args[0]) for call in ingest_service.vector_store.add_embeddings.call_args_list] == [4, 2]
+    assert saved[-1]["graph_done"] == saved[-1]["vector_done"] == list(range(6))
+    # Checkpoint zapisywany po każdym batchu (load + 3× graph + 2× vector + done)
+    assert len(saved) == 7
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_chunks_from_checkpoint(ingest_service, ingest_document_file, ingest_pages):
+    transformer = ingest_service.transformer
+    checkpoint = IngestCheckpoint.from_dict(
+        {
+            "chunk_size": 1000,
+            "chunk_overlap": 0,
+            "stage": "vector",
+            "total_chunks": 6,
+            "graph_done": [0, 1, 2, 3, 4, 5],
+            "vector_done": [0, 1, 2, 3],
+        },
+        chunk_size=1000,
+        chunk_overlap=0,
+    )
+
+    result = await ingest_service.ingest_document(ingest_document_file, {"doc_id": "doc-1"}, checkpoint=checkpoint)
+
+    assert result["status"] == "ready"
+    assert transformer.processed == []
+    texts = ingest_service.vector_store.add_embeddings.call_args.args[0]
+    assert texts == [page.strip() for page in ingest_pages[4:]]
+
+
+@pytest.mark.asyncio
+async def test_failed_chunk_graph_is_recorded_and_vectors_still_written(ingest_service, ingest_document_file):
+    ingest_service._build_graph_transformer = MagicMock(return_value=FakeGraphTransformer(fail_indices={3}))
+    checkpoint = IngestCheckpoint(chunk_size=1000, chunk_overlap=0)
+
+    result = await ingest_service.ingest_document(ingest_document_file, {"doc_id": "doc-1"}, checkpoint=checkpoint)
+
+    assert result["status"] == "partial"
+    assert result["graph_failed_chunks"] == 1
+    assert checkpoint.graph_failed == {3}
+    assert checkpoint.graph_done == {0, 1, 2, 4, 5}
+    assert checkpoint.vector_done == set(range(6))
+
+    retry_transformer = FakeGraphTransformer()
+    ingest_service._build_graph_transformer = MagicMock(return_value=retry_transformer)
+    retried = await ingest_service.ingest_document(ingest_document_file, {"doc_id": "doc-1"}, checkpoint=checkpoint)
+
+    assert retried["status"] == "ready" and "error" not in retried
+    assert retry_transformer.processed == [3]
+    assert checkpoint.graph_failed == set()
+
+
+@pytest.mark.asyncio
+async def test_vector_failure_keeps_graph_progress(ingest_service, ingest_document_file):
+    ingest_service.vector_store.add_embeddings.side_effect = [["ids"], ConnectionError("Neo4j niedostępny")]
+    checkpoint = IngestCheckpoint(chunk_size=1000, chunk_overlap=0)
+
+    result = await ingest_service.ingest_document(ingest_document_file, {"doc_id": "doc-1"}, checkpoint=checkpoint)
+
+    assert result["status"] == "failed"
+    assert result["stage"] == "vector"
+    assert checkpoint.graph_done == set(range(6))
+    assert checkpoint.vector_done == {0, 1, 2, 3}
+
+
+def test_checkpoint_resets_when_splitter_changes():
+    stored = IngestCheckpoint(chunk_size=1000, chunk_overlap=300, total_chunks=4, vector_done={0, 1}).to_dict()
+
+    same = IngestCheckpoint.from_dict(stored, chunk_size=1000, chunk_overlap=300)
+    changed = IngestCheckpoint.from_dict(stored, chunk_size=800, chunk_overlap=300)
+
+    assert same.vector_done == {0, 1}
+    assert changed.vector_done == set() and changed.total_chunks == 0
@@ -0,0 +1,141 @@
+"""
+Testy jednostkowe dla lokalnego lustra indeksu wektorowego RAG
+
+Zakres testów:
+- NumPy brute-force: ranking i score jak cosine w Neo4j ((1 + cos) / 2)
+- Snapshot per wersja indeksu RAG: zapis atomowy, odczyt wektorów przez mmap
+- LocalIndexManager: fallback do Neo4j do czasu budowy, przebudowa po bumpie wersji
+- vector_search_with_score: lokalny indeks gdy gotowy, Neo4j gdy nie
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.services.rag.clients import local_index
+from app.services.rag.clients.local_index import (
+    BACKEND_NUMPY,
+    LocalIndexManager,
+    LocalVectorIndex,
+    fetch_chunk_records,
+)
+from app.services.rag.clients.rag_clients import vector_search_with_score
+from config import rag
+
+MODULE = "app.services.rag.clients.local_index"
+
+RECORDS = [
+    {"id": "a", "text": "Zatrudnienie kobiet", "embedding": [1.0, 0.0, 0.0], "metadata": {"doc_id": "d1", "title": None}},
+    {"id": "b", "text": "Dochody seniorów", "embedding": [0.0, 2.0, 0.0], "metadata": {"doc_id": "d1"}},
+    {"id": "c", "text": "Praca zdalna", "embedding": [0.6, 0.8, 0.0], "metadata": {"doc_id": "d2"}},
+    {"id": "d", "text": "Dzietność", "embedding": [0.0, 0.0, 3.0], "metadata": {"doc_id": "d2"}},
+]
+
+
+def _vector_store(records=RECORDS, page_size=2):
+    """Mock Neo4jVector - ``query`` zwraca strony rekordów po ``id`` (keyset)."""
+    store = MagicMock()
+    store.node_label = "RAGChunk"
+    store.text_node_property = "text"
+    store.embedding_node_property = "embedding"
+
+    def query(cypher, params):
+        remaining = [record for record in records if record["id"] > params["after"]]
+        return remaining[: params["limit"]]
+
+    store.query = MagicMock(side_effect=query)
+    store.embedding.aembed_query = AsyncMock(return_value=[0.9, 0.1, 0.0])
+    store.similarity_search_with_score_by_vector = MagicMock(return_value=[("neo4j", 0.5)])
+    return store
+
+
+@pytest.fixture(autouse=True)
+def local_index_settings(tmp_path):
+    with patch.object(rag.local_index, "enabled", True), \
+            patch.object(rag.local_index, "backend", BACKEND_NUMPY), \
+            patch.object(rag.local_index, "snapshot_dir", str(tmp_path)), \
+            patch.object(rag.local_index, "build_page_size", 2), \
+            patch.object(local_index, "_manager", None):
+        yield
+
+
+def test_brute_force_search_ranks_by_cosine():
+    index = LocalVectorIndex.from_records(1, RECORDS, BACKEND_NUMPY)
+
+    results = index.search([1.0, 1.0, 0.0], k=3)
+
+    assert [doc.page_content for doc, _ in results] == ["Praca zdalna", "Zatrudnienie kobiet", "Dochody seniorów"]
+    cosine = (0.6 + 0.8) / np.sqrt(2)
+    assert results[0][1] == pytest.approx((1 + cosine) / 2)
+    assert results[0][0].metadata == {"doc_id": "d2"}
+    assert results[1][0].metadata == {"doc_id": "d1"}  # wartości None pominięte jak w Neo4jVector
+
+
+def test_snapshot_roundtrip_uses_mmap(tmp_path):
+    index = LocalVectorIndex.from_records(3, RECORDS, BACKEND_NUMPY)
+    index.save(tmp_path / "v3")
+
+    loaded = LocalVectorIndex.load(tmp_path / "v3", BACKEND_NUMPY)
+
+    assert isinstance(loaded.vectors, np.memmap)
+    assert loaded.version == 3
+    assert [(doc.page_content, score) for doc, score in loaded.search([0.0, 0.0, 1.0], k=2)] == [
+        (doc.page_content, score) for doc, score in index.search([0.0, 0.0, 1.0], k=2)
+    ]
+    assert not list(tmp_path.glob("*.tmp-*"))
+
+
+def test_fetch_chunk_records_pages_by_id():
+    store = _vector_store()
+
+    records = fetch_chunk_records(store, page_size=3)
+
+    assert [record["id"] for record in records] == ["a", "b", "c", "d"]
+    assert [call.kwargs["params"]["after"] for call in store.query.call_args_list] == ["", "c", "d"]
+
+
+@pytest.mark.asyncio
+async def test_manager_falls_back_until_built_and_rebuilds_on_new_version(tmp_path):
+    manager = LocalIndexManager(tmp_path, BACKEND_NUMPY)
+    store = _vector_store()
+
+    with patch(f"{MODULE}.get_index_version", AsyncMock(return_value=5)) as version:
+        assert await manager.get(store) is None
+        await manager._refresh_task
+        ready = await manager.get(store)
+        assert ready is not None and ready.version == 5 and len(ready) == 4
+
+        version.return_value = 6
+        assert await manager.get(store) is None
+        await manager._refresh_task
+        assert (await manager.get(store)).version == 6
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["v6"]
+
+
+@pytest.mark.asyncio
+async def test_manager_loads_existing_snapshot_without_neo4j(tmp_path):
+    LocalVectorIndex.from_records(7, RECORDS, BACKEND_NUMPY).save(tmp_path / "v7")
+    store = _vector_store()
+
+    with patch(f"{MODULE}.get_index_version", AsyncMock(return_value=7)):
+        index = await LocalIndexManager(tmp_path, BACKEND_NUMPY).refresh(7, store)
+
+    assert len(index) == 4
+    store.query.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_vector_search_uses_local_index_when_ready():
+    store = _vector_store()
+    index = LocalVectorIndex.from_records(1, RECORDS, BACKEND_NUMPY)
+
+    with patch("app.services.rag.clients.rag_clients.get_local_index", AsyncMock(return_value=index)):
+        results = await vector_search_with_score(store, "praca kobiet", k=2)
+
+    assert [doc.page_content for doc, _ in results] == ["Zatrudnienie kobiet", "Praca zdalna"]
+    store.similarity_search_with_score_by_vector.assert_not_called()
+
+    with patch("app.services.rag.clients.rag_clients.get_local_index", AsyncMock(return_value=None)):
+        assert await vector_search_with_score(store, "praca kobiet", k=2) == [("neo4j", 0.5)]
@@ -0,0 +1,175 @@
+"""
+Testy jednostkowe dla współbieżnych etapów retrieval w PolishSocietyRAG
+
+Zakres testów:
+- Vector i keyword search działają współbieżnie (latencja = max, nie suma)
+- Timeout etapu → wynik częściowy z pozostałych etapów, bez zapisu do cache
+- Reranking pominięty (model się ładuje) → ranking RRF bez zapisu do cache
+- get_demographic_insights: Graph RAG równolegle z wyszukiwaniem chunków
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.documents import Document
+
+from app.services.rag.search.hybrid_search_service import PolishSocietyRAG, rag
+from app.services.rag.search.reranker import LazyReranker
+from app.services.rag.search.retrieval_stages import StageTimings, run_stage
+from config import features
+
+MODULE = "app.services.rag.search.hybrid_search_service"
+
+
+def _doc(text):
+    return Document(page_content=text, metadata={"title": "GUS"})
+
+
+def _slow(result, delay):
+    async def _call(*args, **kwargs):
+        await asyncio.sleep(delay)
+        return result
+    return _call
+
+
+@pytest.fixture
+def rag_service():
+    """PolishSocietyRAG bez połączeń (vector store i graph service jako mocki)."""
+    service = PolishSocietyRAG.__new__(PolishSocietyRAG)
+    service.vector_store = MagicMock()
+    service.reranker = None
+    service._fulltext_index_initialized = True
+    service._graph_rag_service = MagicMock()
+    return service
+
+
+@pytest.fixture(autouse=True)
+def retrieval_settings():
+    with patch.object(features.rag_cache, "enabled", False), \
+            patch.object(features.rag_cache, "single_flight_lock_seconds", 0), \
+            patch.object(rag.retrieval, "use_hybrid_search", True), \
+            patch.object(rag.retrieval, "use_reranking", False), \
+            patch.object(rag.retrieval, "vector_timeout", 1.0), \
+            patch.object(rag.retrieval, "keyword_timeout", 1.0), \
+            patch.object(rag.retrieval, "graph_timeout", 1.0):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_run_stage_returns_fallback_on_timeout():
+    timings = StageTimings()
+
+    result = await run_stage("graph", asyncio.sleep(1, result=["late"]), timeout=0.01, fallback=[], timings=timings)
+
+    assert result == []
+    assert timings.statuses == {"graph": "timeout"}
+    assert timings.degraded
+
+
+@pytest.mark.asyncio
+async def test_vector_and_keyword_run_concurrently(rag_service):
+    with patch(f"{MODULE}.vector_search_with_score", _slow([(_doc("wektor"), 0.9)], 0.2)), \
+            patch(f"{MODULE}.keyword_search", _slow([(_doc("keyword"), 3.0)], 0.2)), \
+            patch(f"{MODULE}.get_hybrid_cache", AsyncMock(return_value=None)), \
+            patch(f"{MODULE}.set_hybrid_cache", AsyncMock()) as set_cache:
+        start = time.perf_counter()
+        documents = await rag_service.hybrid_search("zapytanie", top_k=2)
+        elapsed = time.perf_counter() - start
+
+    assert {doc.page_content for doc in documents} == {"wektor", "keyword"}
+    assert elapsed < 0.35
+    set_cache.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_partial_results_when_vector_times_out(rag_service):
+    with patch.object(rag.retrieval, "vector_timeout", 0.05), \
+            patch(f"{MODULE}.vector_search_with_score", _slow([(_doc("wektor"), 0.9)], 1.0)), \
+            patch(f"{MODULE}.keyword_search", AsyncMock(return_value=[(_doc("keyword"), 3.0)])), \
+            patch(f"{MODULE}.get_hybrid_cache", AsyncMock(return_value=None)), \
+            patch(f"{MODULE}.set_hybrid_cache", AsyncMock()) as set_cache:
+        documents = await rag_service.hybrid_search("zapytanie", top_k=2)
+
+    assert [doc.page_content for doc in documents] == ["keyword"]
+    set_cache.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_results_without_reranking_are_not_cached_while_model_loads(rag_service):
+    release = threading.Event()
+    rag_service.reranker = LazyReranker("cross_encoder", loader=lambda backend: release.wait(5))
+    insights_cache = MagicMock(get=AsyncMock(return_value=None), set=AsyncMock())
+
+    try:
+        with patch.object(rag.retrieval, "use_reranking", True), \
+                patch(f"{MODULE}.vector_search_with_score", AsyncMock(return_value=[(_doc("wektor"), 0.9)])), \
+                patch(f"{MODULE}.keyword_search", AsyncMock(return_value=[])), \
+                patch(f"{MODULE}.get_hybrid_cache", AsyncMock(return_value=None)), \
+                patch(f"{MODULE}.set_hybrid_cache", AsyncMock()) as set_cache, \
+                patch(f"{MODULE}.demographic_insights_cache", insights_cache):
+            rag_service._graph_rag_service.get_demographic_graph_context = AsyncMock(return_value=[])
+            documents = await rag_service.hybrid_search("zapytanie", top_k=2)
+            insights = await rag_service.get_demographic_insights("25-34", "wyższe", "Warszawa", "kobieta")
+    finally:
+        release.set()
+
+    assert [doc.page_content for doc in documents] == ["wektor"]
+    assert insights["search_type"] == "hybrid"
+    set_cache.assert_not_awaited()
+    insights_cache.set.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_fused_ranking_is_cached_when_reranker_failed_to_load(rag_service):
+    rag_service.reranker = LazyReranker("onnx_int8", loader=MagicMock(side_effect=FileNotFoundError("brak .onnx")))
+    assert not rag_service.reranker.wait_until_loaded(timeout=5)
+    insights_cache = MagicMock(get=AsyncMock(return_value=None), set=AsyncMock())
+
+    with patch.object(rag.retrieval, "use_reranking", True), \
+            patch(f"{MODULE}.vector_search_with_score", AsyncMock(return_value=[(_doc("wektor"), 0.9)])), \
+            patch(f"{MODULE}.keyword_search", AsyncMock(return_value=[])), \
+            patch(f"{MODULE}.get_hybrid_cache", AsyncMock(return_value=None)), \
+            patch(f"{MODULE}.set_hybrid_cache", AsyncMock()) as set_cache, \
+            patch(f"{MODULE}.demographic_insights_cache", insights_cache):
+        rag_service._graph_rag_service.get_demographic_graph_context = AsyncMock(return_value=[])
+        documents = await rag_service.hybrid_search("zapytanie", top_k=2)
+        insights = await rag_service.get_demographic_insights("25-34", "wyższe", "Warszawa", "kobieta")
+
+    assert [doc.page_content for doc in documents] == ["wektor"]
+    assert insights["search_type"] == "hybrid"
+    set_cache.assert_awaited_once()
+    insights_cache.set.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_demographic_insights_runs_graph_concurrently(rag_service):
+    rag_service._graph_rag_service.get_demographic_graph_context = _slow(
+        [{"type": "Wskaznik", "streszczenie": "Zatrudnienie 78.4%", "skala": "78.4%"}], 0.2
+    )
+
+    with patch(f"{MODULE}.vector_search_with_score", _slow([(_doc("Młodzi w Warszawie"), 0.9)], 0.2)), \
+            patch(f"{MODULE}.keyword_search", AsyncMock(return_value=[])):
+        start = time.perf_counter()
+        result = await rag_service.get_demographic_insights("25-34", "wyższe", "Warszawa", "kobieta")
+        elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.35
+    assert result["search_type"] == "hybrid+graph"
+    assert result["graph_nodes_count"] == 1
+    assert "Młodzi w Warszawie" in result["context"]
+
+
+@pytest.mark.asyncio
+async def test_demographic_insights_survives_graph_failure(rag_service):
+    rag_service._graph_rag_service.get_demographic_graph_context = AsyncMock(side_effect=RuntimeError("neo4j down"))
+
+    with patch(f"{MODULE}.vector_search_with_score", AsyncMock(return_value=[(_doc("Seniorzy"), 0.8)])), \
+            patch(f"{MODULE}.keyword_search", AsyncMock(return_value=[])):
+        result = await rag_service.get_demographic_insights("65+", "podstawowe", "wieś", "mężczyzna")
+
+    assert result["search_type"] == "hybrid"
+    assert result["graph_nodes"] == []
+    assert "Seniorzy" in result["context"]
@@ -0,0 +1,131 @@
+"""
+Testy jednostkowe dla single-flight (request coalescing) w RAG
+
+Zakres testów:
+- hybrid_search: współbieżne identyczne zapytania → jedno wyszukiwanie w Neo4j
+- GraphTraversal: współbieżne zapytania o profil → jedno zapytanie Cypher
+- get_demographic_insights: coalescing + wynik zapisany w cache
+- Lock trzymany przez inną instancję → follower czeka na wpis w cache
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.documents import Document
+
+from app.services.rag.graph.traversal import GraphTraversal
+from app.services.rag.search.hybrid_search_service import PolishSocietyRAG, rag
+from config import features
+
+MODULE = "app.services.rag.search.hybrid_search_service"
+GRAPH_MODULE = "app.services.rag.graph.traversal"
+
+GRAPH_CONTEXT = [{"type": "Wskaznik", "streszczenie": "Zatrudnienie 78.4%", "skala": "78.4%"}]
+
+
+def _doc(text):
+    return Document(page_content=text, metadata={"title": "GUS"})
+
+
+def _slow(result, delay, calls):
+    async def _call(*args, **kwargs):
+        calls.append(args)
+        await asyncio.sleep(delay)
+        return result
+    return _call
+
+
+@pytest.fixture
+def rag_service():
+    service = PolishSocietyRAG.__new__(PolishSocietyRAG)
+    service.vector_store = MagicMock()
+    service.reranker = None
+    service._fulltext_index_initialized = True
+    service._graph_rag_service = MagicMock()
+    return service
+
+
+@pytest.fixture(autouse=True)
+def settings():
+    """Coalescing tylko w procesie (bez Redis lock), stałe ustawienia retrieval."""
+    with patch.object(features.rag_cache, "single_flight_lock_seconds", 0), \
+            patch.object(rag.retrieval, "use_hybrid_search", True), \
+            patch.object(rag.retrieval, "use_reranking", False):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_concurrent_hybrid_searches_share_one_retrieval(rag_service):
+    vector_calls: list = []
+
+    with patch(f"{MODULE}.vector_search_with_score", _slow([(_doc("Młodzi"), 0.9)], 0.05, vector_calls)), \
+            patch(f"{MODULE}.keyword_search", AsyncMock(return_value=[])), \
+            patch(f"{MODULE}.get_hybrid_cache", AsyncMock(return_value=None)), \
+            patch(f"{MODULE}.set_hybrid_cache", AsyncMock()) as set_cache:
+        results = await asyncio.gather(*(rag_service.hybrid_search("młodzi w Warszawie", top_k=3) for _ in range(10)))
+
+    assert len(vector_calls) == 1
+    assert all([doc.page_content for doc in result] == ["Młodzi"] for result in results)
+    set_cache.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_graph_context_requests_run_one_cypher_query():
+    def slow_query(*args, **kwargs):
+        time.sleep(0.05)  # graph_store.query działa w wątku (asyncio.to_thread)
+        return [{"graph_context": GRAPH_CONTEXT}]
+
+    graph_store = MagicMock()
+    graph_store.query = MagicMock(side_effect=slow_query)
+    traversal = GraphTraversal(graph_store)
+
+    with patch.object(traversal, "_get_from_cache", AsyncMock(return_value=None)), \
+            patch.object(traversal, "_set_cache", AsyncMock()) as set_cache, \
+            patch(f"{GRAPH_MODULE}.schedule_graph_term_indexes"):
+        results = await asyncio.gather(
+            *(traversal.get_demographic_graph_context("25-34", "Warszawa", "wyższe", "kobieta") for _ in range(5))
+        )
+
+    assert graph_store.query.call_count == 1
+    assert results == [GRAPH_CONTEXT] * 5
+    set_cache.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_demographic_insights_are_coalesced_and_cached(rag_service):
+    vector_calls: list = []
+    rag_service._graph_rag_service.get_demographic_graph_context = AsyncMock(return_value=GRAPH_CONTEXT)
+
+    with patch(f"{MODULE}.vector_search_with_score", _slow([(_doc("Młodzi w Warszawie"), 0.9)], 0.05, vector_calls)), \
+            patch(f"{MODULE}.keyword_search", AsyncMock(return_value=[])), \
+            patch(f"{MODULE}.demographic_insights_cache") as cache:
+        cache.get = AsyncMock(return_value=None)
+        cache.set = AsyncMock()
+        results = await asyncio.gather(
+            *(rag_service.get_demographic_insights("25-34", "wyższe", "Warszawa", "kobieta") for _ in range(8))
+        )
+
+    assert len(vector_calls) == 1
+    assert rag_service._graph_rag_service.get_demographic_graph_context.await_count == 1
+    assert {result["search_type"] for result in results} == {"hybrid+graph"}
+    cache.set.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_waits_for_leader_on_other_instance():
+    graph_store = MagicMock()
+    traversal = GraphTraversal(graph_store)
+    # Pierwszy odczyt (przed single-flight) - miss; potem leader z innej instancji zapisał wynik
+    reads = AsyncMock(side_effect=[None, None, GRAPH_CONTEXT])
+
+    with patch.object(features.rag_cache, "single_flight_lock_seconds", 5), \
+            patch("app.core.single_flight.redis_acquire_lock", AsyncMock(return_value=None)), \
+            patch("app.core.single_flight.redis_lock_held", AsyncMock(return_value=True)), \
+            patch(f"{GRAPH_MODULE}._graph_context_flight.poll_interval", 0.01), \
+            patch.object(traversal, "_get_from_cache", reads):
+        result = await traversal.get_demographic_graph_context("25-34", "Warszawa", "wyższe", "kobieta")
+
+    assert result == GRAPH_CONTEXT
+    graph_store.query.assert_not_called()
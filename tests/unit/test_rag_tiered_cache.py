@@ -0,0 +1,124 @@
+"""
+Testy jednostkowe dla dwupoziomowego cache RAG (TieredCache)
+
+Zakres testów:
+- Codec: round-trip i odczyt wpisów w formacie fallback (JSON + zlib)
+- Trafienie w LRU bez round-tripu do Redis, TTL wpisu w LRU
+- Trafienie w Redis zasila LRU
+- Klucze z wersją indeksu; bump wersji unieważnia cache
+- Hybrid search cache: Document round-trip
+"""
+
+import json
+import zlib
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.documents import Document
+
+from app.services.rag.caching import tiered_cache
+from app.services.rag.caching.tiered_cache import TieredCache, decode_value, encode_value
+from app.services.rag.search import cache as search_cache
+
+MODULE = "app.services.rag.caching.tiered_cache"
+
+GRAPH_CONTEXT = [
+    {"type": "Wskaznik", "streszczenie": "Zatrudnienie kobiet 25-34", "skala": "78.4%", "pewnosc": "wysoka"},
+    {"type": "Trend", "streszczenie": "Wzrost pracy zdalnej", "okres_czasu": "2020-2024"},
+]
+
+
+@pytest.fixture(autouse=True)
+def index_version():
+    """Stała wersja indeksu bez odczytu z Redis."""
+    with patch.object(tiered_cache, "_index_version", 3), \
+            patch.object(tiered_cache, "_index_version_checked_at", float("inf")), \
+            patch.object(tiered_cache, "tiered_cache_metrics", tiered_cache.TieredCacheMetrics()):
+        yield
+
+
+@pytest.fixture
+def redis_store():
+    """Słownik udający Redis dla redis_mget_bytes / redis_mset_bytes."""
+    store: dict[str, bytes] = {}
+
+    async def mget(keys):
+        return [store.get(key) for key in keys]
+
+    async def mset(values, ttl_seconds=None):
+        store.update(values)
+        return True
+
+    with patch(f"{MODULE}.redis_mget_bytes", AsyncMock(side_effect=mget)) as mget_mock, \
+            patch(f"{MODULE}.redis_mset_bytes", AsyncMock(side_effect=mset)):
+        yield store, mget_mock
+
+
+def test_codec_round_trip_and_json_zlib_fallback():
+    assert decode_value(encode_value(GRAPH_CONTEXT)) == GRAPH_CONTEXT
+
+    legacy = b"jl" + zlib.compress(json.dumps(GRAPH_CONTEXT).encode("utf-8"))
+    assert decode_value(legacy) == GRAPH_CONTEXT
+
+
+@pytest.mark.asyncio
+async def test_memory_hit_skips_redis(redis_store):
+    store, mget = redis_store
+    cache = TieredCache("graph_context_test", lru_max_entries=8, lru_ttl_seconds=60, redis_ttl_seconds=60)
+
+    await cache.set("25-34:wyższe:warszawa:kobieta", GRAPH_CONTEXT)
+    result = await cache.get("25-34:wyższe:warszawa:kobieta")
+
+    assert result == GRAPH_CONTEXT
+    assert list(store) == ["rag:graph_context_test:v3:25-34:wyższe:warszawa:kobieta"]
+    mget.assert_not_awaited()
+    assert tiered_cache.tiered_cache_metrics.snapshot()["graph_context_test"]["memory_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_hit_populates_lru(redis_store):
+    store, mget = redis_store
+    cache = TieredCache("graph_context_test", lru_max_entries=8, lru_ttl_seconds=60, redis_ttl_seconds=60)
+    store["rag:graph_context_test:v3:key"] = encode_value(GRAPH_CONTEXT)
+
+    assert await cache.get("key") == GRAPH_CONTEXT
+    assert await cache.get("key") == GRAPH_CONTEXT
+
+    assert mget.await_count == 1
+    stats = tiered_cache.tiered_cache_metrics.snapshot()["graph_context_test"]
+    assert (stats["redis_hits"], stats["memory_hits"]) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_expired_lru_entry_falls_back_to_redis(redis_store):
+    store, mget = redis_store
+    cache = TieredCache("graph_context_test", lru_max_entries=8, lru_ttl_seconds=0, redis_ttl_seconds=60)
+
+    await cache.set("key", GRAPH_CONTEXT)
+    assert await cache.get("key") == GRAPH_CONTEXT
+
+    mget.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_bump_index_version_invalidates_entries(redis_store):
+    cache = TieredCache("graph_context_test", lru_max_entries=8, lru_ttl_seconds=60, redis_ttl_seconds=60)
+    await cache.set("key", GRAPH_CONTEXT)
+
+    with patch(f"{MODULE}.redis_incr", AsyncMock(return_value=4)):
+        assert await tiered_cache.bump_index_version() == 4
+
+    assert len(cache) == 0
+    assert await cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_cache_round_trips_documents(redis_store):
+    documents = [Document(page_content="Młodzi w Warszawie", metadata={"doc_id": "d1", "chunk_index": 2})]
+    key = search_cache.get_hybrid_search_cache_key("  Młodzi Warszawa ", 5)
+
+    await search_cache.set_hybrid_cache(key, documents)
+    cached = await search_cache.get_hybrid_cache(key)
+
+    assert cached == documents
+    assert key == search_cache.get_hybrid_search_cache_key("młodzi warszawa", 5)
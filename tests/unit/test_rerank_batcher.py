@@ -0,0 +1,116 @@
+"""
+Testy jednostkowe dla micro-batching rerankera (RerankBatcher)
+
+Zakres testów:
+- Pary z współbieżnych requestów trafiają do jednego predict, scores wracają do callerów
+- Timeout requestu → rerank_with_cross_encoder wraca do rankingu RRF
+- Backpressure: pełna kolejka blokuje callera do deadline'u
+- Błąd modelu propaguje się do wszystkich requestów z batcha
+"""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.documents import Document
+
+from app.services.rag.search.rerank_batcher import RerankBatcher, RerankUnavailable
+from app.services.rag.search.reranker import rerank_with_cross_encoder
+from app.services.rag.search.retrieval_stages import StageTimings
+
+
+class FakeCrossEncoder:
+    """Score = długość passage; opcjonalne opóźnienie predict."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls: list[int] = []
+
+    def predict(self, pairs, **kwargs):
+        self.calls.append(len(pairs))
+        time.sleep(self.delay)
+        return [float(len(passage)) for _, passage in pairs]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_predict():
+    model = FakeCrossEncoder()
+    batcher = RerankBatcher(model, batch_window_ms=20, max_batch_pairs=64)
+
+    results = await asyncio.gather(
+        batcher.score([("q1", "a"), ("q1", "bbb")], timeout=1.0),
+        batcher.score([("q2", "cc")], timeout=1.0),
+        batcher.score([("q3", "dddd"), ("q3", "e")], timeout=1.0),
+    )
+
+    assert results == [[1.0, 3.0], [2.0], [4.0, 1.0]]
+    assert model.calls == [5]
+    assert batcher.snapshot()["avg_batch_pairs"] == 5.0
+
+
+@pytest.mark.asyncio
+async def test_batches_split_at_max_batch_pairs():
+    model = FakeCrossEncoder()
+    batcher = RerankBatcher(model, batch_window_ms=20, max_batch_pairs=3)
+
+    await asyncio.gather(
+        batcher.score([("q", "a"), ("q", "b")], timeout=1.0),
+        batcher.score([("q", "c"), ("q", "d")], timeout=1.0),
+    )
+
+    assert model.calls == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_backpressure_times_out_when_queue_stays_full():
+    model = FakeCrossEncoder(delay=0.2)
+    batcher = RerankBatcher(model, batch_window_ms=50, max_queue_pairs=2)
+
+    first = asyncio.create_task(batcher.score([("q", "a"), ("q", "b")], timeout=1.0))
+    await asyncio.sleep(0)
+
+    with pytest.raises(RerankUnavailable):
+        await batcher.score([("q", "c")], timeout=0.01)
+
+    assert await first == [1.0, 1.0]
+    assert batcher.stats["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_model_error_reaches_every_caller():
+    model = MagicMock()
+    model.predict.side_effect = RuntimeError("onnx session closed")
+    batcher = RerankBatcher(model, batch_window_ms=10)
+
+    results = await asyncio.gather(
+        batcher.score([("q", "a")], timeout=1.0),
+        batcher.score([("q", "b")], timeout=1.0),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert model.predict.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_rerank_falls_back_to_rrf_order_on_timeout():
+    model = FakeCrossEncoder(delay=0.3)
+    candidates = [(Document(page_content="krótki"), 0.9), (Document(page_content="znacznie dłuższy fragment"), 0.5)]
+
+    timings = StageTimings()
+
+    with patch("app.services.rag.search.reranker.rag.retrieval.rerank_timeout", 0.05):
+        results = await rerank_with_cross_encoder("zapytanie", candidates, model, top_k=2, timings=timings)
+
+    assert results == candidates
+    assert timings.statuses["rerank"] == "timeout" and timings.degraded
+
+
+@pytest.mark.asyncio
+async def test_rerank_orders_by_cross_encoder_score():
+    candidates = [(Document(page_content="krótki"), 0.9), (Document(page_content="znacznie dłuższy fragment"), 0.5)]
+
+    results = await rerank_with_cross_encoder("zapytanie", candidates, FakeCrossEncoder(), top_k=1)
+
+    assert [doc.page_content for doc, _ in results] == ["znacznie dłuższy fragment"]
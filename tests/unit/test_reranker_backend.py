@@ -0,0 +1,103 @@
+"""
+Testy jednostkowe dla leniwego backendu rerankera (LazyReranker)
+
+Zakres testów:
+- init_reranker nie ładuje modelu (cold start bez PyTorch/ONNX)
+- Ładowanie w tle z warm-up batchem
+- Do czasu gotowości modelu reranking jest pomijany (ranking RRF, etap ``rerank`` = skipped)
+- Nieudane ładowanie wyłącza reranking (ranking RRF bez statusu zdegradowanego)
+"""
+
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.documents import Document
+
+from app.services.rag.search.reranker import (
+    STATE_FAILED,
+    WARMUP_PAIRS,
+    LazyReranker,
+    init_reranker,
+    load_reranker_backend,
+    rerank_with_cross_encoder,
+    reranker_disabled,
+    reranker_ready,
+)
+from app.services.rag.search.retrieval_stages import StageTimings
+
+CANDIDATES = [(Document(page_content="krótki"), 0.9), (Document(page_content="znacznie dłuższy fragment"), 0.5)]
+
+
+class LengthModel:
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, pairs, **kwargs):
+        self.calls.append(list(pairs))
+        return [float(len(passage)) for _, passage in pairs]
+
+
+def test_init_reranker_does_not_load_model():
+    loader = MagicMock()
+
+    with patch("app.services.rag.search.reranker.rag.retrieval.use_reranking", True), \
+            patch("app.services.rag.search.reranker.load_reranker_backend", loader):
+        reranker = init_reranker()
+
+    assert isinstance(reranker, LazyReranker)
+    assert not reranker.ready
+    loader.assert_not_called()
+
+
+def test_background_load_runs_warmup_batch():
+    model = LengthModel()
+    reranker = LazyReranker("onnx_int8", loader=lambda backend: model)
+
+    assert reranker.wait_until_loaded(timeout=5)
+    assert model.calls == [WARMUP_PAIRS]
+
+
+@pytest.mark.asyncio
+async def test_rerank_skipped_until_model_ready():
+    release = threading.Event()
+    model = LengthModel()
+
+    def slow_loader(backend):
+        release.wait(5)
+        return model
+
+    reranker = LazyReranker("cross_encoder", loader=slow_loader)
+
+    loading_timings = StageTimings()
+    while_loading = await rerank_with_cross_encoder("zapytanie", CANDIDATES, reranker, top_k=2, timings=loading_timings)
+    assert while_loading == CANDIDATES
+    assert reranker.state == "loading"
+    assert loading_timings.statuses == {"rerank": "skipped"} and loading_timings.degraded
+
+    release.set()
+    assert reranker.wait_until_loaded(timeout=5)
+    ready_timings = StageTimings()
+    after_load = await rerank_with_cross_encoder("zapytanie", CANDIDATES, reranker, top_k=1, timings=ready_timings)
+    assert [doc.page_content for doc, _ in after_load] == ["znacznie dłuższy fragment"]
+    assert ready_timings.statuses == {"rerank": "ok"} and not ready_timings.degraded
+
+
+@pytest.mark.asyncio
+async def test_failed_load_disables_reranking():
+    reranker = LazyReranker("onnx_int8", loader=MagicMock(side_effect=FileNotFoundError("brak pliku .onnx")))
+
+    assert not reranker.wait_until_loaded(timeout=5)
+    assert reranker.state == STATE_FAILED
+    assert not reranker_ready(reranker) and reranker_disabled(reranker)
+
+    timings = StageTimings()
+    results = await rerank_with_cross_encoder("zapytanie", CANDIDATES, reranker, top_k=1, timings=timings)
+
+    assert results == CANDIDATES[:1]
+    assert "rerank" not in timings.statuses and not timings.degraded
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        load_reranker_backend("tensorrt")
@@ -0,0 +1,148 @@
+"""
+Testy jednostkowe dla symulowanego providera LLM (app/services/shared/simulated_llm.py)
+
+Zakres testów:
+- build_chat_model / get_embeddings z provider="simulated" bez API key, flaga SIMULATED_LLM
+- Structured output zgodny ze schematami (persona, Graph RAG), deterministyczny per prompt
+- Odpowiedzi ankiet (opcje, skala), plan orkiestracji, sekcje podsumowania dyskusji
+- usage_metadata, latencja log-normalna, wstrzykiwane błędy 429 / 503
+- Embeddingi: deterministyczne, znormalizowane, zadany wymiar
+"""
+
+import math
+import time
+from unittest.mock import patch
+
+import pytest
+from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable
+
+from app.schemas.persona import PersonaProfileOutput
+from app.schemas.rag import GraphRAGQuery
+from app.services.focus_groups.summaries.discussion_summarizer import DiscussionSummarizerService
+from app.services.personas.orchestration.json_parser import extract_json_from_response
+from app.services.personas.orchestration.models import PersonaAllocationPlan
+from app.services.personas.orchestration.prompt_builder import build_orchestration_prompt
+from app.services.shared.clients import build_chat_model, get_embeddings, with_schema_output
+from app.services.shared.simulated_llm import SimulatedChatModel, SimulatedEmbeddings
+from app.services.surveys import SurveyResponseGenerator
+from config import features
+from config.features_loader import FeaturesConfig
+
+
+@pytest.fixture(autouse=True)
+def offline_simulation(monkeypatch):
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    with patch.object(features.simulated_llm, "latency_median_ms", 0.0), \
+            patch.object(features.simulated_llm, "embedding_latency_median_ms", 0.0), \
+            patch.object(features.llm_rate_limit, "enabled", False), \
+            patch.object(features.embedding_cache, "enabled", False):
+        get_embeddings.cache_clear()
+        yield
+    get_embeddings.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_structured_output_is_schema_valid_and_deterministic():
+    llm = build_chat_model(provider="simulated", model="gemini-2.5-flash", temperature=0.9)
+    chain = with_schema_output(llm, PersonaProfileOutput, include_raw=True)
+
+    first = await chain.ainvoke("Persona 1")
+    again = await chain.ainvoke("Persona 1")
+    other = await chain.ainvoke("Persona 2")
+
+    assert isinstance(llm, SimulatedChatModel)
+    assert first["parsing_error"] is None and isinstance(first["parsed"], PersonaProfileOutput)
+    assert first["raw"].content == again["raw"].content
+    assert first["raw"].content != other["raw"].content
+    query = await with_schema_output(llm, GraphRAGQuery).ainvoke("Jakie trendy?")
+    assert query.cypher_query.startswith("MATCH")
+
+
+@pytest.mark.asyncio
+async def test_survey_answers_match_options_and_scale():
+    service = SurveyResponseGenerator(llm=SimulatedChatModel())
+    options = ["Codziennie", "Raz w tygodniu", "Rzadziej", "Nigdy"]
+
+    single = await service._answer_single_choice("Persona", "Jak często?", "", options)
+    multiple = await service._answer_multiple_choice("Persona", "Gdzie kupujesz?", "", options)
+    rating = await service._answer_rating_scale("Persona", "Ocena?", "", 1, 7)
+
+    assert single in options
+    assert multiple and set(multiple) <= set(options)
+    assert 1 <= rating <= 7
+
+
+@pytest.mark.asyncio
+async def test_orchestration_plan_and_discussion_summary():
+    llm = SimulatedChatModel()
+    prompt = build_orchestration_prompt(
+        num_personas=7,
+        target_demographics={},
+        graph_context="",
+        project_description="Badanie",
+        additional_context=None,
+    )
+
+    plan = PersonaAllocationPlan(**extract_json_from_response((await llm.ainvoke(prompt)).content))
+    summary = (await llm.ainvoke("Please provide ... ## 1. EXECUTIVE SUMMARY (90-120 words)")).content
+    sections = DiscussionSummarizerService.__new__(DiscussionSummarizerService)._parse_ai_response(summary)
+
+    assert plan.total_personas == 7 and sum(group.count for group in plan.groups) == 7
+    assert sections["executive_summary"] and sections["sentiment_narrative"]
+    assert len(sections["key_insights"]) >= 3 and sections["recommendations"]
+    assert len(sections["segment_analysis"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_usage_metadata_and_latency():
+    llm = SimulatedChatModel(model="gemini-2.5-pro")
+
+    with patch.object(features.simulated_llm, "latency_median_ms", 30.0), \
+            patch.object(features.simulated_llm, "latency_p95_ms", 30.0):
+        started = time.monotonic()
+        response = await llm.ainvoke("Opowiedz o sobie")
+        elapsed = time.monotonic() - started
+
+    usage = response.usage_metadata
+    assert elapsed >= 0.03
+    assert usage["input_tokens"] == 4 and usage["output_tokens"] == math.ceil(len(response.content) / 4)
+    assert usage["total_tokens"] == usage["input_tokens"] + usage["output_tokens"]
+    assert response.response_metadata["model_name"] == "gemini-2.5-pro"
+
+
+@pytest.mark.asyncio
+async def test_injected_rate_limit_and_server_errors():
+    llm = SimulatedChatModel()
+
+    with patch.object(features.simulated_llm, "rate_limit_rate", 1.0):
+        with pytest.raises(ResourceExhausted):
+            await llm.ainvoke("Pytanie")
+    with patch.object(features.simulated_llm, "error_rate", 1.0):
+        with pytest.raises(ServiceUnavailable):
+            llm.invoke("Pytanie")
+        with pytest.raises(ServiceUnavailable):
+            await SimulatedEmbeddings("models/gemini-embedding-001").aembed_query("tekst")
+
+
+@pytest.mark.asyncio
+async def test_embeddings_are_deterministic_and_normalized():
+    embeddings = get_embeddings(provider="simulated")
+
+    first, second = await embeddings.aembed_documents(["kawa", "herbata"])
+    again = embeddings.embed_query("kawa")
+
+    assert isinstance(embeddings, SimulatedEmbeddings)
+    assert len(first) == features.simulated_llm.embedding_dimensions
+    assert first == again and first != second
+    assert math.isclose(sum(value * value for value in first), 1.0)
+
+
+def test_env_flag_switches_default_provider(monkeypatch):
+    monkeypatch.setenv("SIMULATED_LLM", "true")
+    assert FeaturesConfig().simulated_llm.enabled is True
+
+    with patch.object(features.simulated_llm, "enabled", True):
+        assert isinstance(build_chat_model(), SimulatedChatModel)
+        assert isinstance(get_embeddings(), SimulatedEmbeddings)
+    with pytest.raises(ValueError, match="GOOGLE_API_KEY"):
+        build_chat_model()
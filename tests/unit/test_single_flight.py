@@ -0,0 +1,119 @@
+"""
+Testy jednostkowe dla SingleFlight (request coalescing).
+
+Zakres testów:
+- Współbieżni callerzy z tym samym kluczem współdzielą jedno obliczenie
+- Wyjątek leadera propaguje się do followerów
+- Cross-instance: brak Redis lock → czekanie na wynik innej instancji
+- Cross-instance: lock zwolniony bez wyniku w cache → obliczenie lokalne bez czekania do timeout
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.core.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_single_computation():
+    """Test: 10 współbieżnych wywołań → factory wykonana raz."""
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def factory():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"value": 42}
+
+    results = await asyncio.gather(*(flight.run("key", factory) for _ in range(10)))
+
+    assert calls == 1
+    assert all(result == {"value": 42} for result in results)
+    assert flight.stats["leaders"] == 1
+    assert flight.stats["coalesced"] == 9
+    assert not flight.inflight("key")
+
+
+@pytest.mark.asyncio
+async def test_different_keys_are_not_coalesced():
+    """Test: różne klucze liczą się niezależnie."""
+    flight = SingleFlight("test")
+    factory = AsyncMock(return_value="ok")
+
+    await asyncio.gather(flight.run("a", factory), flight.run("b", factory))
+
+    assert factory.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_leader_exception_propagates_to_followers():
+    """Test: błąd leadera trafia do wszystkich czekających, kolejne wywołanie liczy od nowa."""
+    flight = SingleFlight("test")
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        flight.run("key", failing),
+        flight.run("key", failing),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert await flight.run("key", AsyncMock(return_value="recovered")) == "recovered"
+
+
+@pytest.mark.asyncio
+async def test_waits_for_remote_leader_when_lock_is_held():
+    """Test: lock trzymany przez inną instancję → wynik z wait_for, bez lokalnego obliczenia."""
+    flight = SingleFlight("test", poll_interval=0.01)
+    factory = AsyncMock(return_value="local")
+    wait_for = AsyncMock(side_effect=[None, "remote"])
+
+    with patch("app.core.single_flight.redis_acquire_lock", AsyncMock(return_value=None)), \
+            patch("app.core.single_flight.redis_lock_held", AsyncMock(return_value=True)):
+        result = await flight.run("key", factory, lock_ttl_seconds=1, wait_for=wait_for)
+
+    assert result == "remote"
+    factory.assert_not_awaited()
+    assert flight.stats["remote_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_releases_lock_after_computation():
+    """Test: leader zwalnia Redis lock po obliczeniu."""
+    flight = SingleFlight("test")
+    release = AsyncMock(return_value=True)
+
+    with patch("app.core.single_flight.redis_acquire_lock", AsyncMock(return_value="token")), \
+            patch("app.core.single_flight.redis_release_lock", release):
+        result = await flight.run("key", AsyncMock(return_value="value"), lock_ttl_seconds=5)
+
+    assert result == "value"
+    release.assert_awaited_once_with("test:lock:key", "token")
+
+
+@pytest.mark.asyncio
+async def test_released_lock_without_cached_result_computes_locally():
+    """Test: leader z innej instancji zwolnił lock bez zapisu (pusty wynik) → liczymy od razu."""
+    flight = SingleFlight("test", poll_interval=0.01)
+    factory = AsyncMock(return_value="local")
+    wait_for = AsyncMock(return_value=None)
+    lock_held = AsyncMock(side_effect=[True, False])
+
+    with patch("app.core.single_flight.redis_acquire_lock", AsyncMock(side_effect=[None, "token"])), \
+            patch("app.core.single_flight.redis_lock_held", lock_held), \
+            patch("app.core.single_flight.redis_release_lock", AsyncMock(return_value=True)):
+        started = asyncio.get_running_loop().time()
+        result = await flight.run("key", factory, lock_ttl_seconds=30, wait_for=wait_for)
+        elapsed = asyncio.get_running_loop().time() - started
+
+    assert result == "local"
+    assert elapsed < 1
+    lock_held.assert_awaited_with("test:lock:key")
+    assert wait_for.await_count == 3  # 2 polle + odczyt po zwolnieniu locka
+    assert flight.stats["remote_released"] == 1
@@ -21,6 +21,7 @@ class DummyPersona:
         self.income_bracket = "50k-70k"
         self.occupation = "Designer"
         self.background_story = "Creative professional who values quality design."
+        self.background_summary = None
         self.values = ["Creativity", "Innovation"]
         self.interests = ["Design", "Art"]
 
@@ -0,0 +1,98 @@
+"""
+Testy jednostkowe dla token budget managera
+
+Zakres testów:
+- Przycinanie tekstu do budżetu na granicy zdań
+- Ekstraktywne streszczenie background_story (zdania otwierające akapity)
+- PromptBudget - budżety per zadanie z konfiguracji i raport zaoszczędzonych tokenów
+"""
+
+from unittest.mock import patch
+
+from config import PromptBudgetFeatures
+from app.services.shared.token_budget import (
+    PromptBudget,
+    count_tokens,
+    summarize_background,
+    truncate_to_tokens,
+)
+
+STORY = (
+    "Anna dorastała w małym mieście pod Poznaniem. Jej rodzice prowadzili piekarnię. "
+    "Wcześnie nauczyła się odpowiedzialności.\n\n"
+    "Dziś pracuje jako księgowa w dużej firmie. Lubi porządek i przewidywalność. "
+    "Po pracy biega nad Wartą.\n\n"
+    "Martwi się rosnącymi kosztami życia. Oszczędza na mieszkanie dla córki."
+)
+
+
+def _budget_config(**tasks):
+    return PromptBudgetFeatures(enabled=True, summary_max_tokens=30, tasks=tasks)
+
+
+def test_truncate_keeps_whole_sentences_within_budget():
+    text = "Pierwsze zdanie jest krótkie. Drugie zdanie też. " * 20
+
+    result = truncate_to_tokens(text, 30)
+
+    assert count_tokens(result) <= 30
+    assert result.endswith("[...]")
+    assert result.startswith("Pierwsze zdanie jest krótkie.")
+
+
+def test_truncate_returns_text_unchanged_when_within_budget():
+    assert truncate_to_tokens("Krótki tekst.", 100) == "Krótki tekst."
+
+
+def test_summary_prefers_paragraph_lead_sentences():
+    summary = summarize_background(STORY, max_tokens=40)
+
+    assert count_tokens(summary) <= 40
+    assert "Anna dorastała w małym mieście pod Poznaniem." in summary
+    assert "Dziś pracuje jako księgowa w dużej firmie." in summary
+    assert "Martwi się rosnącymi kosztami życia." in summary
+    # Kolejność zdań jak w oryginale
+    assert summary.index("Anna") < summary.index("Dziś") < summary.index("Martwi")
+
+
+def test_summary_of_empty_story_is_none():
+    assert summarize_background("   ") is None
+
+
+def test_prompt_budget_trims_sections_and_reports_savings():
+    config = _budget_config(focus_group_response={"background": 20})
+
+    with patch("app.services.shared.token_budget.features") as mock_features:
+        mock_features.prompt_budget = config
+        budget = PromptBudget("focus_group_response")
+        background = budget.fit("background", STORY)
+        question = budget.fit("question", "Co sądzisz o cenach?")
+
+    report = budget.report()
+    assert count_tokens(background) <= 20
+    assert question == "Co sądzisz o cenach?"
+    assert report["tokens_saved"] == count_tokens(STORY) - count_tokens(background)
+    assert report["sections"]["background"]["budget"] == 20
+
+
+def test_prompt_budget_counts_savings_against_original_story():
+    summary = summarize_background(STORY, max_tokens=30)
+
+    with patch("app.services.shared.token_budget.features") as mock_features:
+        mock_features.prompt_budget = _budget_config()
+        budget = PromptBudget("survey_response")
+        budget.fit("background", summary, original=STORY)
+
+    assert budget.tokens_saved == count_tokens(STORY) - count_tokens(summary)
+
+
+def test_disabled_budget_passes_sections_through():
+    config = PromptBudgetFeatures(enabled=False, tasks={"survey_response": {"background": 5}})
+
+    with patch("app.services.shared.token_budget.features") as mock_features:
+        mock_features.prompt_budget = config
+        budget = PromptBudget("survey_response")
+        result = budget.fit("background", STORY)
+
+    assert result == STORY
+    assert budget.tokens_saved == 0